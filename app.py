@@ -1,64 +1,178 @@
+import atexit
+import queue
+import random
 import time
 import os
 from typing import Tuple
 import logging
-from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 from flask import Flask, jsonify, Response, request
-from flasgger import Swagger
+from blueprints.metrics import metrics_bp
 from blueprints.tasks import task_bp
+from models.tasks import Task
+from storage.compact import CompactBackend
+from storage.shared import SharedMemoryBackend
+from storage.sqlite import SQLiteBackend
+from storage.write_behind import WriteBehindBackend
+from utils.admission import AdmissionController
+from utils.compression import DEFAULT_LEVEL, DEFAULT_MIN_SIZE
+from utils.idempotency import IdempotencyCache
+from utils.lazy_mount import LazyMount
+from utils.request_logging import (
+    BatchingFileHandler,
+    BatchingLogListener,
+    DroppingQueueHandler,
+    JSONLinesFormatter,
+    redact_headers,
+)
 
 load_dotenv()
 
 app = Flask(__name__)
 
-swagger = Swagger(app, template_file="docs/swagger.yml")
+# The paths served by flasgger: the docs page, the spec, its assets and the OAuth2 redirect page
+DOCS_PATHS = (
+    "/apidocs",
+    "/apispec_1.json",
+    "/flasgger_static",
+    "/oauth2-redirect.html",
+)
+
+
+def create_docs_app() -> Flask:
+    """
+    Builds the app serving the Swagger docs on its own, so that flasgger and its dependencies are
+    only imported once the docs are requested.
+
+    Returns:
+        - The Flask app serving `DOCS_PATHS`.
+    """
+    from flasgger import Swagger
+
+    docs_app = Flask(__name__)
+    Swagger(docs_app, template_file="docs/swagger.yml")
+
+    return docs_app
+
+
+# Load the API docs on the first request for them instead of at startup
+if os.environ.get("SWAGGER_LAZY", "False").lower() == "true":
+    app.wsgi_app = LazyMount(app.wsgi_app, DOCS_PATHS, create_docs_app)
+else:
+    from flasgger import Swagger
+
+    swagger = Swagger(app, template_file="docs/swagger.yml")
+
+# Configure logging: requests only enqueue records, a background thread writes them as JSON lines
+file_handler = BatchingFileHandler(
+    os.environ.get("LOG_PATH") or "./logs/app.log",
+    maxBytes=10 * 1024 * 1024,
+    backupCount=3,
+    encoding="utf-8",
+)
+file_handler.setFormatter(JSONLinesFormatter())
+log_queue: queue.Queue = queue.Queue(maxsize=10_000)
+log_listener = BatchingLogListener(log_queue, file_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
 
-# Configure logging
-handler = RotatingFileHandler("./logs/app.log", maxBytes=10000, backupCount=3)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-logger.addHandler(handler)
+logger.addHandler(DroppingQueueHandler(log_queue))
+
+# Fraction of successful requests logged, error responses are always logged
+log_sample_rate = float(os.environ.get("LOG_SAMPLE_RATE", "1"))
+log_headers = os.environ.get("LOG_HEADERS", "True").lower() == "true"
+
+# Keep tasks in SQLite when a database path is configured
+sqlite_path = os.environ.get("TASK_SQLITE_PATH")
+if sqlite_path:
+    sqlite_backend = SQLiteBackend(sqlite_path)
+    # Answer from memory and write the changes to SQLite in the background
+    if os.environ.get("TASK_WRITE_BEHIND", "False").lower() == "true":
+        sqlite_backend = WriteBehindBackend(
+            sqlite_backend,
+            max_dirty=int(os.environ.get("TASK_WRITE_BEHIND_MAX_DIRTY") or 100_000),
+            flush_interval=int(os.environ.get("TASK_WRITE_BEHIND_INTERVAL_MS") or 50)
+            / 1000,
+        )
+    Task.use_backend(sqlite_backend)
+    atexit.register(Task.backend.close)
+
+# Share one task store between worker processes when a shared file is configured
+shared_path = os.environ.get("TASK_SHARED_PATH")
+if shared_path and not sqlite_path:
+    Task.use_backend(
+        SharedMemoryBackend(
+            shared_path,
+            capacity=int(os.environ.get("TASK_SHARED_CAPACITY") or 1_000_000),
+        )
+    )
+    atexit.register(Task.backend.close)
+
+# Restore tasks from disk and log every mutation when a data directory is configured
+data_dir = os.environ.get("TASK_DATA_DIR")
+if data_dir and not sqlite_path and not shared_path:
+    Task.enable_persistence(data_dir)
+    atexit.register(Task.disable_persistence)
+
+# Seconds deleted tasks are remembered for clients fetching the changes since a version
+tombstone_retention = os.environ.get("TASK_TOMBSTONE_RETENTION")
+if tombstone_retention:
+    Task.change_index.tombstone_retention = float(tombstone_retention)
+
+# Keep tasks in flat arrays when the store is expected to hold millions of them
+compact_store = os.environ.get("TASK_COMPACT_STORE", "False").lower() == "true"
+if compact_store and not sqlite_path and not shared_path and not data_dir:
+    Task.use_backend(CompactBackend())
 
 
 @app.before_request
 def before_request() -> None:
     """
-    Log request details before processing it.
+    Record the time the request started at.
     """
-    request.start_time = time.time()
-    logger.info(
-        "Request: %s %s, Headers: %s, Query Params: %s",
-        request.method,
-        request.path,
-        dict(request.headers),
-        request.args,
-    )
+    request.start_time = time.perf_counter()
 
 
 @app.after_request
 def after_request(response: Response) -> Response:
     """
-    Log response details after processing the request.
+    Log request and response details in a single structured record, for a sample of the
+    successful requests and for every error response.
     """
-    response_time_str = "Unknown"
+    if response.status_code < 400 and random.random() >= log_sample_rate:
+        return response
+
+    duration_ms = None
     if hasattr(request, "start_time"):
-        response_time = (time.time() - request.start_time) * 1000
-        response_time_str = f"{response_time:.2f} ms"
+        duration_ms = round((time.perf_counter() - request.start_time) * 1000, 3)
+
+    fields = {
+        "method": request.method,
+        "path": request.path,
+        "query": request.query_string.decode("latin-1"),
+        "status": response.status_code,
+        "duration_ms": duration_ms,
+        "user_agent": request.headers.get("User-Agent"),
+        "ip": request.remote_addr,
+    }
+    if log_headers:
+        fields["headers"] = redact_headers(request.headers.items())
 
     logger.info(
-        "Response: %s, Route: %s, Response Time: %s, User-Agent: %s, IP: %s",
-        response.status_code,
+        "%s %s %s",
+        request.method,
         request.path,
-        response_time_str,
-        request.headers.get("User-Agent"),
-        request.remote_addr,
+        response.status_code,
+        extra={"fields": fields},
     )
 
     return response
 
 
 app.register_blueprint(task_bp, url_prefix="/api")
+app.register_blueprint(metrics_bp)
 
 
 # page not found
@@ -101,6 +215,31 @@ def handle_exception(error) -> Tuple[Response, int]:
 
 app.config["DEBUG"] = os.environ.get("DEBUG", "False").lower() == "true"
 
+# Admission control of the task API: per-client rate limits, off unless a rate is given, and
+# a cap on the requests in flight, shedding those that wait for a slot longer than the target
+app.extensions["admission"] = AdmissionController(
+    rate=float(os.environ.get("ADMISSION_RATE") or 0),
+    burst=float(os.environ.get("ADMISSION_BURST") or 0),
+    max_in_flight=int(os.environ.get("ADMISSION_MAX_IN_FLIGHT") or 128),
+    write_reserve=int(os.environ.get("ADMISSION_WRITE_RESERVE") or 16),
+    read_target=float(os.environ.get("ADMISSION_READ_TARGET_MS") or 50) / 1000,
+    write_target=float(os.environ.get("ADMISSION_WRITE_TARGET_MS") or 200) / 1000,
+)
+
+# Responses to task creations sent with an Idempotency-Key header, replayed to their retries
+app.extensions["idempotency"] = IdempotencyCache(
+    capacity=int(os.environ.get("IDEMPOTENCY_CAPACITY") or 10_000),
+    ttl=float(os.environ.get("IDEMPOTENCY_TTL") or 86_400),
+)
+
+# Compression of list responses for clients accepting gzip or deflate
+app.config["COMPRESSION_LEVEL"] = int(
+    os.environ.get("COMPRESSION_LEVEL") or DEFAULT_LEVEL
+)
+app.config["COMPRESSION_MIN_SIZE"] = int(
+    os.environ.get("COMPRESSION_MIN_SIZE") or DEFAULT_MIN_SIZE
+)
+
 # Run the Flask application
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,747 @@
+"""
+ASGI entry point of the API, for serving it from an event loop:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The task routes are answered by coroutines mirroring the views of `task_bp`, reading and writing
+the tasks through `AsyncTask`, so that a slow storage never stalls the loop. Every other request,
+e.g. /apidocs, /metrics, an unknown URL or a method the route does not allow, is handed to
+the Flask app in an executor, so both entry points answer alike.
+
+Requests are logged and counted exactly like in the Flask app, through the same queue handler:
+logging a request only enqueues a record and never waits for the file.
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import parse_qsl
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_etags, parse_options_header, quote_etag
+from app import app, log_headers, log_sample_rate, logger
+from blueprints.metrics import count_admission, metrics, observe_request
+from blueprints.tasks import apply_operations, import_batch, iter_page
+from exceptions.ChangesExpiredException import ChangesExpiredException
+from exceptions.IdempotencyKeyException import IdempotencyKeyException
+from exceptions.InvalidFilterException import InvalidFilterException
+from exceptions.InvalidInputException import InvalidInputException
+from exceptions.InvalidPaginationException import InvalidPaginationException
+from exceptions.StorageFullException import StorageFullException
+from exceptions.TaskNotFoundException import TaskNotFoundException
+from exceptions.VersionConflictException import VersionConflictException
+from models.async_tasks import AsyncTask
+from models.tasks import Task, TaskInResponse
+from schemas.task_schema import (
+    CreateTask,
+    ImportTask,
+    UpdateTask,
+    PatchTask,
+    TaskOperation,
+)
+from utils.admission import READ, SAFE_METHODS, WRITE
+from utils.compression import compress_body, negotiate_encoding
+from utils.conditional import make_etag, make_task_etag, parse_if_match
+from utils.filters import parse_filter_args, parse_since_arg
+from utils.idempotency import parse_idempotency_key
+from utils.ndjson import NDJSON_MEDIA_TYPE, NDJSONReader, check_ndjson_media_type
+from utils.pagination import encode_cursor, parse_pagination_args
+from utils.request_logging import redact_headers
+from utils.serialization import dumps, encode_field, encode_list
+from utils.streaming import stream_json_list, stream_ndjson
+from utils.validation import validate_batch_body, validate_body
+from utils.wsgi_bridge import build_environ, call_wsgi
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class Request:
+    """
+    The parts of an HTTP request read by the handlers.
+    """
+
+    __slots__ = (
+        "method",
+        "path",
+        "query_string",
+        "args",
+        "headers",
+        "body",
+        "chunks",
+        "ip",
+    )
+
+    def __init__(
+        self,
+        scope: Scope,
+        body: bytes,
+        chunks: Optional[AsyncIterator[bytes]] = None,
+    ):
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.query_string: str = scope.get("query_string", b"").decode("latin-1")
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        self.headers = Headers(
+            [
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in scope.get("headers", ())
+            ]
+        )
+        self.body = body
+        # The body as it is received, for the handlers in `STREAMED_BODY_HANDLERS`
+        self.chunks = chunks
+        client = scope.get("client")
+        self.ip: Optional[str] = client[0] if client else None
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised while a streamed request body is received, if the client disconnects before sending
+    all of it.
+    """
+
+
+class Reply(NamedTuple):
+    """
+    A response produced by a handler, with either a complete or a streamed body.
+    """
+
+    status: int
+    body: Union[bytes, AsyncIterator[bytes]]
+    etag: Optional[str] = None
+    content_type: Optional[str] = "application/json"
+    content_encoding: Optional[str] = None
+    vary: Optional[str] = None
+    cache_control: Optional[str] = None
+    retry_after: Optional[int] = None
+    replayed: bool = False
+
+
+def _json(status: int, value: Any) -> Reply:
+    return Reply(status, dumps(value))
+
+
+def _is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    return etag is not None and parse_etags(
+        request.headers.get("If-None-Match")
+    ).contains_weak(etag)
+
+
+def _not_modified(etag: str) -> Reply:
+    return Reply(304, b"", etag, None)
+
+
+def _task_reply(task: TaskInResponse) -> Reply:
+    """
+    Mirrors `task_response` of `task_bp`.
+    """
+    body = encode_field("result", Task.json_cache.encode(task))
+
+    return Reply(200, body, make_task_etag(Task.get_epoch(), task["version"]))
+
+
+def _conflict_reply(e: VersionConflictException) -> Reply:
+    """
+    Mirrors `conflict_response` of `task_bp`.
+    """
+    etag = (
+        None
+        if e.current_version is None
+        else make_task_etag(Task.get_epoch(), e.current_version)
+    )
+
+    return Reply(e.error_code, dumps({"errors": e.message}), etag)
+
+
+def _list_reply(
+    body: Union[bytes, Iterator[bytes]], encoding: Optional[str], etag: Optional[str]
+) -> Reply:
+    """
+    Mirrors `list_response` of `task_bp`, streamed bodies being compressed in the executor.
+    """
+    body, content_encoding = compress_body(
+        body,
+        encoding,
+        app.config["COMPRESSION_LEVEL"],
+        app.config["COMPRESSION_MIN_SIZE"],
+    )
+    if not isinstance(body, bytes):
+        body = AsyncTask.iterate(body)
+
+    return Reply(
+        200, body, etag, content_encoding=content_encoding, vary="Accept-Encoding"
+    )
+
+
+async def get_tasks(request: Request) -> Reply:
+    """
+    Mirrors `GET /api/v1/tasks`.
+    """
+    try:
+        limit, after_id = parse_pagination_args(request.args)
+        status, query = parse_filter_args(request.args)
+        since = parse_since_arg(request.args)
+
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        etag = make_etag(Task.get_version(), encoding)
+        if _is_not_modified(request, etag):
+            return _not_modified(etag)._replace(vary="Accept-Encoding")
+
+        if since is not None:
+            tasks_list, deleted, version, has_more = await AsyncTask.get_changes(
+                since, limit
+            )
+            body = encode_list(
+                "result",
+                Task.json_cache.encode_items(tasks_list),
+                {"deleted": deleted, "version": version, "has_more": has_more},
+            )
+            return _list_reply(body, encoding, etag)
+
+        if request.args.get("stream", "false").lower() == "true":
+            trailer: Dict[str, Any] = {}
+            chunks = stream_json_list(
+                "result",
+                iter_page(limit, after_id, status, query, trailer),
+                trailer,
+                encode=Task.json_cache.encode_items,
+            )
+            return _list_reply(chunks, encoding, etag)
+
+        if limit is None:
+            tasks_list = await AsyncTask.get_all(status, query)
+            body = encode_list("result", Task.json_cache.encode_items(tasks_list))
+
+            return _list_reply(body, encoding, etag)
+
+        tasks_list, next_id = await AsyncTask.get_page(limit, after_id, status, query)
+        next_cursor = encode_cursor(next_id) if next_id is not None else None
+        body = encode_list(
+            "result",
+            Task.json_cache.encode_items(tasks_list),
+            {"next_cursor": next_cursor},
+        )
+
+        return _list_reply(body, encoding, etag)
+    except (
+        InvalidPaginationException,
+        InvalidFilterException,
+        ChangesExpiredException,
+    ) as e:
+        return _json(e.error_code, {"errors": e.message})
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def get_task_stats(request: Request) -> Reply:
+    """
+    Mirrors `GET /api/v1/tasks/stats`.
+    """
+    try:
+        counts = await AsyncTask.count_by_status()
+
+        return _json(
+            200,
+            {
+                "result": {
+                    "total": counts[False] + counts[True],
+                    "status": {"false": counts[False], "true": counts[True]},
+                }
+            },
+        )
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def get_task_events(request: Request) -> Reply:
+    """
+    Mirrors `GET /api/v1/tasks/events`. A subscriber waits on the loop rather than in a
+    thread, so idle subscribers only cost a coroutine each.
+    """
+    events = Task.events.subscribe_async(request.headers.get("Last-Event-ID"))
+
+    return Reply(
+        200, events, content_type="text/event-stream", cache_control="no-cache"
+    )
+
+
+async def get_task(request: Request, id: int) -> Reply:
+    """
+    Mirrors `GET /api/v1/task/<id>`.
+    """
+    try:
+        epoch = Task.get_epoch()
+        task = await AsyncTask.get(id)
+        etag = make_task_etag(epoch, task["version"])
+        if _is_not_modified(request, etag):
+            return _not_modified(etag)
+
+        return _task_reply(task)
+    except TaskNotFoundException as e:
+        return _json(e.error_code, {"errors": e.message})
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def create_task(request: Request) -> Reply:
+    """
+    Mirrors `POST /api/v1/task`.
+    """
+    try:
+        validated_data = validate_body(
+            CreateTask, request.headers.get("Content-Type"), request.body
+        )
+
+        async def create() -> Tuple[int, bytes]:
+            new_task = await AsyncTask.create(validated_data.name)
+            return 201, encode_field("result", Task.json_cache.encode(new_task))
+
+        key = parse_idempotency_key(request.headers.get("Idempotency-Key"))
+        idempotency = app.extensions.get("idempotency")
+        if key is None or idempotency is None:
+            return Reply(*await create())
+
+        stored, replayed = await idempotency.execute_async(
+            key, validated_data.model_dump_json(), create, scope=Task.get_epoch()
+        )
+        return Reply(stored.status, stored.body, replayed=replayed)
+    except (
+        InvalidInputException,
+        IdempotencyKeyException,
+        StorageFullException,
+    ) as e:
+        return _json(e.error_code, {"errors": e.message})
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def update_task(request: Request, id: int) -> Reply:
+    """
+    Mirrors `PUT /api/v1/task/<id>`.
+    """
+    try:
+        validated_data = validate_body(
+            UpdateTask, request.headers.get("Content-Type"), request.body
+        )
+        if id != validated_data.id:
+            return _json(
+                400, {"errors": "ID in URL does not match ID in request body."}
+            )
+
+        updated_task = await AsyncTask.update(
+            id,
+            validated_data.name,
+            validated_data.status,
+            parse_if_match(request.headers.get("If-Match"), Task.get_epoch()),
+        )
+
+        return _task_reply(updated_task)
+    except (
+        InvalidInputException,
+        TaskNotFoundException,
+        StorageFullException,
+    ) as e:
+        return _json(e.error_code, {"errors": e.message})
+    except VersionConflictException as e:
+        return _conflict_reply(e)
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def patch_task(request: Request, id: int) -> Reply:
+    """
+    Mirrors `PATCH /api/v1/task/<id>`.
+    """
+    try:
+        validated_data = validate_body(
+            PatchTask, request.headers.get("Content-Type"), request.body
+        )
+        updated_task = await AsyncTask.patch(
+            id,
+            validated_data.name,
+            validated_data.status,
+            parse_if_match(request.headers.get("If-Match"), Task.get_epoch()),
+        )
+
+        return _task_reply(updated_task)
+    except (
+        InvalidInputException,
+        TaskNotFoundException,
+        StorageFullException,
+    ) as e:
+        return _json(e.error_code, {"errors": e.message})
+    except VersionConflictException as e:
+        return _conflict_reply(e)
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def delete_task(request: Request, id: int) -> Reply:
+    """
+    Mirrors `DELETE /api/v1/task/<id>`.
+    """
+    try:
+        await AsyncTask.delete(id)
+
+        return _json(200, {"message": f"Task #{id} has been deleted"})
+    except TaskNotFoundException as e:
+        return _json(e.error_code, {"errors": e.message})
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def batch_tasks(request: Request) -> Reply:
+    """
+    Mirrors `POST /api/v1/tasks:batch`.
+    """
+    try:
+        validated_data = validate_batch_body(
+            TaskOperation, request.headers.get("Content-Type"), request.body
+        )
+    except InvalidInputException as e:
+        return _json(e.error_code, {"errors": e.message})
+
+    try:
+        results = await AsyncTask.run(apply_operations, validated_data)
+
+        return _json(200, {"result": results})
+    except StorageFullException as e:
+        return _json(e.error_code, {"errors": e.message})
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def import_tasks(request: Request) -> Reply:
+    """
+    Mirrors `POST /api/v1/tasks/import`, validating the body while it is received.
+    """
+    try:
+        mimetype, _ = parse_options_header(request.headers.get("Content-Type"))
+        check_ndjson_media_type(mimetype)
+        reader = NDJSONReader(ImportTask)
+        async for chunk in request.chunks:
+            for batch in reader.feed(chunk):
+                await AsyncTask.run(import_batch, batch)
+        await AsyncTask.run(import_batch, reader.close())
+
+        return _json(200, {"result": reader.report()})
+    except (InvalidInputException, StorageFullException) as e:
+        return _json(e.error_code, {"errors": e.message})
+    except ClientDisconnected:
+        raise
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+async def export_tasks(request: Request) -> Reply:
+    """
+    Mirrors `GET /api/v1/tasks/export`, streamed bodies being compressed in the executor.
+    """
+    try:
+        status, query = parse_filter_args(request.args)
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        body, content_encoding = compress_body(
+            stream_ndjson(
+                Task.iter_tasks(0, status, query), encode=Task.json_cache.encode
+            ),
+            encoding,
+            app.config["COMPRESSION_LEVEL"],
+        )
+
+        return Reply(
+            200,
+            AsyncTask.iterate(body),
+            content_type=NDJSON_MEDIA_TYPE,
+            content_encoding=content_encoding,
+            vary="Accept-Encoding",
+        )
+    except InvalidFilterException as e:
+        return _json(e.error_code, {"errors": e.message})
+    except Exception as e:
+        return _json(500, {"errors": str(e)})
+
+
+# (path pattern, method, URL rule of the matching Flask view, handler)
+ROUTES: List[Tuple[re.Pattern, str, str, Callable[..., Awaitable[Reply]]]] = [
+    (re.compile(r"/api/v1/tasks"), "GET", "/api/v1/tasks", get_tasks),
+    (re.compile(r"/api/v1/tasks/stats"), "GET", "/api/v1/tasks/stats", get_task_stats),
+    (
+        re.compile(r"/api/v1/tasks/events"),
+        "GET",
+        "/api/v1/tasks/events",
+        get_task_events,
+    ),
+    (re.compile(r"/api/v1/task/([0-9]+)"), "GET", "/api/v1/task/<int:id>", get_task),
+    (re.compile(r"/api/v1/task"), "POST", "/api/v1/task", create_task),
+    (re.compile(r"/api/v1/task/([0-9]+)"), "PUT", "/api/v1/task/<int:id>", update_task),
+    (
+        re.compile(r"/api/v1/task/([0-9]+)"),
+        "PATCH",
+        "/api/v1/task/<int:id>",
+        patch_task,
+    ),
+    (
+        re.compile(r"/api/v1/task/([0-9]+)"),
+        "DELETE",
+        "/api/v1/task/<int:id>",
+        delete_task,
+    ),
+    (re.compile(r"/api/v1/tasks:batch"), "POST", "/api/v1/tasks:batch", batch_tasks),
+    (
+        re.compile(r"/api/v1/tasks/import"),
+        "POST",
+        "/api/v1/tasks/import",
+        import_tasks,
+    ),
+    (
+        re.compile(r"/api/v1/tasks/export"),
+        "GET",
+        "/api/v1/tasks/export",
+        export_tasks,
+    ),
+]
+
+
+# Mirrors `UNCAPPED_ENDPOINTS` of `task_bp`
+UNCAPPED_HANDLERS = frozenset((get_task_events,))
+
+# Handlers reading the request body from `Request.chunks` as it is received
+STREAMED_BODY_HANDLERS = frozenset((import_tasks,))
+
+
+async def _admit(
+    request: Request, handler: Callable[..., Awaitable[Reply]]
+) -> Optional[Reply]:
+    """
+    Mirrors `admit_request` of `task_bp`, waiting for a slot on the loop.
+
+    Returns:
+        The rejection to send, or None if the request is admitted. An admitted request holds a
+        concurrency slot unless its handler is uncapped.
+    """
+    admission = app.extensions["admission"]
+    priority = READ if request.method in SAFE_METHODS else WRITE
+    hold_slot = handler not in UNCAPPED_HANDLERS
+    rejection = await admission.admit_async(request.ip, priority, hold_slot)
+    if rejection is not None:
+        count_admission(priority, rejection.reason)
+        return Reply(
+            rejection.status,
+            dumps({"errors": rejection.message}),
+            retry_after=rejection.retry_after,
+        )
+
+    count_admission(priority, "admitted")
+    return None
+
+
+def _match(
+    method: str, path: str
+) -> Optional[Tuple[str, Callable[..., Awaitable[Reply]], List[int]]]:
+    for pattern, route_method, rule, handler in ROUTES:
+        if route_method != method:
+            continue
+        match = pattern.fullmatch(path)
+        if match is not None:
+            return rule, handler, [int(group) for group in match.groups()]
+
+    return None
+
+
+async def _read_body(receive: Receive) -> Optional[bytes]:
+    """
+    Receives the whole request body, or returns None if the client disconnected first.
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _iter_body(receive: Receive) -> AsyncIterator[bytes]:
+    """
+    Yields the chunks of the request body as they are received.
+
+    Raises:
+        ClientDisconnected: If the client disconnects before the end of the body.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnected()
+        chunk = message.get("body", b"")
+        if chunk:
+            yield chunk
+        if not message.get("more_body", False):
+            return
+
+
+async def _send_reply(send: Send, receive: Receive, reply: Reply) -> None:
+    headers = []
+    if reply.content_type is not None:
+        headers.append((b"content-type", reply.content_type.encode("latin-1")))
+    if reply.etag is not None:
+        headers.append((b"etag", quote_etag(reply.etag).encode("latin-1")))
+    if reply.content_encoding is not None:
+        headers.append((b"content-encoding", reply.content_encoding.encode("latin-1")))
+    if reply.vary is not None:
+        headers.append((b"vary", reply.vary.encode("latin-1")))
+    if reply.cache_control is not None:
+        headers.append((b"cache-control", reply.cache_control.encode("latin-1")))
+    if reply.retry_after is not None:
+        headers.append((b"retry-after", str(reply.retry_after).encode()))
+    if reply.replayed:
+        headers.append((b"idempotent-replayed", b"true"))
+
+    if isinstance(reply.body, bytes):
+        if reply.status != 304:
+            headers.append((b"content-length", str(len(reply.body)).encode()))
+        await send(
+            {"type": "http.response.start", "status": reply.status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": reply.body})
+        return
+
+    await send(
+        {"type": "http.response.start", "status": reply.status, "headers": headers}
+    )
+    await _send_stream(send, receive, reply.body)
+
+
+async def _send_stream(
+    send: Send, receive: Receive, body: AsyncIterator[bytes]
+) -> None:
+    """
+    Sends a streamed body, and stops producing it as soon as the client disconnects, which
+    an endless stream waiting for its next chunk would otherwise only notice once it has one.
+    """
+
+    async def send_chunks() -> None:
+        async for chunk in body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def wait_disconnect() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    sending = asyncio.ensure_future(send_chunks())
+    disconnect = asyncio.ensure_future(wait_disconnect())
+    try:
+        await asyncio.wait({sending, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        if not sending.done():
+            sending.cancel()
+            await asyncio.wait({sending})
+    if not sending.cancelled():
+        sending.result()
+
+
+async def _call_flask(scope: Scope, body: bytes, send: Send) -> None:
+    status, headers, content = await asyncio.to_thread(
+        call_wsgi, app, build_environ(scope, body)
+    )
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": content})
+
+
+def _log_request(request: Request, status: int, start_time: float) -> None:
+    """
+    Logs the request like the `after_request` hook of the Flask app.
+    """
+    if status < 400 and random.random() >= log_sample_rate:
+        return
+
+    fields = {
+        "method": request.method,
+        "path": request.path,
+        "query": request.query_string,
+        "status": status,
+        "duration_ms": round((time.perf_counter() - start_time) * 1000, 3),
+        "user_agent": request.headers.get("User-Agent"),
+        "ip": request.ip,
+    }
+    if log_headers:
+        fields["headers"] = redact_headers(request.headers.items())
+
+    logger.info(
+        "%s %s %s", request.method, request.path, status, extra={"fields": fields}
+    )
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope: Scope, receive: Receive, send: Send) -> None:
+    """
+    The ASGI application.
+    """
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    route = _match(scope["method"], scope["path"])
+    chunks = None
+    if route is not None and route[1] in STREAMED_BODY_HANDLERS:
+        body = b""
+        chunks = _iter_body(receive)
+    else:
+        body = await _read_body(receive)
+        if body is None:
+            return
+
+    if route is None:
+        await _call_flask(scope, body, send)
+        return
+
+    rule, handler, params = route
+    start_time = time.perf_counter()
+    request = Request(scope, body, chunks)
+    metrics.increment("http_requests_started_total")
+    try:
+        reply = await _admit(request, handler)
+        if reply is None:
+            try:
+                reply = await handler(request, *params)
+            except ClientDisconnected:
+                return
+            finally:
+                if handler not in UNCAPPED_HANDLERS:
+                    app.extensions["admission"].release()
+        await _send_reply(send, receive, reply)
+    finally:
+        metrics.increment("http_requests_finished_total")
+
+    observe_request(
+        rule, request.method, reply.status, time.perf_counter() - start_time
+    )
+    _log_request(request, reply.status, start_time)
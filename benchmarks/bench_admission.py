@@ -0,0 +1,145 @@
+"""
+Overloads the server with `--clients` concurrent clients, first without admission control and
+then with `--max-in-flight` slots, and reports the latency of the requests handled, per
+priority, along with the share of requests shed with 503. The server runs in its own process,
+configured through the ADMISSION_* environment variables, on a SQLite store so that handlers
+wait on storage and pile up when the server falls behind.
+
+On the threaded Werkzeug server, every request opens a connection, and the requests mostly
+queue to be accepted, before admission control sees them; the ASGI server is used by default.
+
+Usage:
+    python -m benchmarks.bench_admission [--clients 128] [--duration 5] [--tasks 1000]
+        [--max-in-flight 8] [--server asgi]
+"""
+
+import argparse
+import http.client
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+from utils.admission import READ, WRITE
+from benchmarks.bench_asgi import _free_port, _wait_until_listening
+from benchmarks.bench_load import _request, percentile
+
+
+def run(
+    port: int, clients: int, duration: float, max_id: int
+) -> Dict[str, List[float]]:
+    """
+    Sends nine reads for every write from `clients` threads for `duration` seconds.
+
+    Returns:
+        The latencies in seconds of the handled reads and writes, and of the shed requests.
+    """
+    latencies: Dict[str, List[float]] = {READ: [], WRITE: [], "shed": []}
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+    deadline = [0.0]
+
+    def client(index: int) -> None:
+        rng = random.Random(index)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local: Dict[str, List[float]] = {key: [] for key in latencies}
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            write = rng.random() < 0.1
+            start = time.perf_counter()
+            try:
+                if write:
+                    task_id = rng.randint(1, max_id)
+                    status = _request(
+                        connection,
+                        "PUT",
+                        f"/api/v1/task/{task_id}",
+                        {"id": task_id, "name": f"Load {index}", "status": True},
+                    )
+                else:
+                    status = _request(connection, "GET", "/api/v1/tasks?limit=1000")
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                continue
+            key = "shed" if status == 503 else WRITE if write else READ
+            local[key].append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            for key, values in local.items():
+                latencies[key].extend(values)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    return latencies
+
+
+def _report(label: str, latencies: Dict[str, List[float]], duration: float) -> None:
+    total = sum(len(values) for values in latencies.values())
+    shed = len(latencies["shed"]) / max(total, 1)
+    print(f"{label}: {total / duration:,.0f} req/s, {shed:.1%} shed")
+    for key in (READ, WRITE):
+        values = sorted(latencies[key])
+        print(
+            f"    {key:>5}: p50 {percentile(values, 0.5) * 1000:8.2f} ms,"
+            f" p99 {percentile(values, 0.99) * 1000:8.2f} ms"
+        )
+
+
+def bench(
+    server: str, max_in_flight: int, clients: int, duration: float, tasks: int
+) -> Dict[str, List[float]]:
+    """
+    Starts `server` in a child process with `max_in_flight` slots, 0 for none, and runs the
+    load against it.
+    """
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            TASK_SQLITE_PATH=os.path.join(directory, "tasks.db"),
+            ADMISSION_MAX_IN_FLIGHT=str(max_in_flight),
+            ADMISSION_WRITE_RESERVE=str(max(1, max_in_flight // 8)),
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_asgi", "--serve", server]
+            + ["--port", str(port), "--tasks", str(tasks)],
+            env=env,
+        )
+        try:
+            _wait_until_listening(port, process, timeout=30)
+            return run(port, clients, duration, tasks)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="asgi")
+    args = parser.parse_args()
+
+    for label, max_in_flight in (
+        ("no admission control", 0),
+        (f"{args.max_in_flight} in flight", args.max_in_flight),
+    ):
+        latencies = bench(
+            args.server, max_in_flight, args.clients, args.duration, args.tasks
+        )
+        _report(label, latencies, args.duration)
+
+
+if __name__ == "__main__":
+    main()
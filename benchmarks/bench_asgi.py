@@ -0,0 +1,139 @@
+"""
+Compares the synchronous and the asynchronous entry points under the same load: the Flask app
+on the threaded Werkzeug server, then `asgi:application` on uvicorn. Each server runs in its
+own process, seeded with the same tasks, so the load generator does not compete with it for
+the interpreter lock. Many concurrent clients are used, which is where the event loop should
+differ from one thread per connection.
+
+Usage:
+    python -m benchmarks.bench_asgi [--clients 64] [--duration 10] [--tasks 1000]
+        [--servers wsgi,asgi] [--output asgi.json]
+        [--baseline benchmarks/baselines/asgi.json] [--threshold 0.2]
+"""
+
+import argparse
+import logging
+import socket
+import subprocess
+import sys
+import time
+from benchmarks.bench_load import run_load, summarize
+from benchmarks.results import Metrics, load_results, metric, report, save_results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_listening(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"The server did not listen on port {port} in {timeout}s")
+
+
+def serve(server: str, port: int, tasks: int) -> None:
+    """
+    Seeds the store and serves the app until killed. Runs in the child process.
+    """
+    from models.tasks import Task
+    from storage.wal import OP_CREATE
+
+    Task.apply_batch([(OP_CREATE, 0, f"Task {i}", False) for i in range(tasks)])
+    if server == "wsgi":
+        from werkzeug.serving import make_server
+        from app import app
+
+        # The per-request access log of the development server would dominate the timings
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+
+        uvicorn.run(
+            "asgi:application",
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+            access_log=False,
+        )
+
+
+def bench_server(server: str, clients: int, duration: float, tasks: int) -> Metrics:
+    """
+    Starts `server` in a child process and runs the load of `bench_load` against it.
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_asgi",
+            "--serve",
+            server,
+            "--port",
+            str(port),
+            "--tasks",
+            str(tasks),
+        ]
+    )
+    try:
+        _wait_until_listening(port, process, timeout=30)
+        latencies, failures, elapsed = run_load(
+            "127.0.0.1", port, clients, duration, tasks
+        )
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        f"{server}.{name[len('load.'):]}": entry
+        for name, entry in summarize(latencies, failures, elapsed).items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--servers", default="wsgi,asgi")
+    parser.add_argument("--output", help="Path the results are saved to as JSON")
+    parser.add_argument("--baseline", help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--serve", choices=["wsgi", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.tasks)
+        return
+
+    metrics: Metrics = {}
+    servers = args.servers.split(",")
+    for server in servers:
+        metrics.update(bench_server(server, args.clients, args.duration, args.tasks))
+    if "wsgi.all.rps" in metrics and "asgi.all.rps" in metrics:
+        metrics["asgi_vs_wsgi.rps_ratio"] = metric(
+            metrics["asgi.all.rps"]["value"] / metrics["wsgi.all.rps"]["value"],
+            "x",
+            higher_is_better=True,
+        )
+
+    if args.output:
+        save_results(args.output, "asgi", metrics)
+    baseline = load_results(args.baseline)["metrics"] if args.baseline else {}
+    if not report(metrics, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares per-operation latency of the storage backends.
+
+Usage:
+    python -m benchmarks.bench_backends [--records 100000]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict
+from storage.compact import CompactBackend
+from storage.memory import InMemoryBackend
+from storage.sqlite import SQLiteBackend
+from storage.wal import OP_CREATE
+from storage.write_behind import WriteBehindBackend
+
+
+def _per_op_us(operation: Callable[[int], object], count: int) -> float:
+    start = time.perf_counter()
+    for i in range(1, count + 1):
+        operation(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bench_backend(backend, records: int) -> Dict[str, float]:
+    """
+    Measures the average latency of each operation in microseconds, plus batched insert
+    throughput in records per second.
+    """
+    results = {}
+    start = time.perf_counter()
+    backend.apply_batch(
+        (OP_CREATE, i, f"Task number {i}", False) for i in range(1, records + 1)
+    )
+    results["batch_insert_per_s"] = records / (time.perf_counter() - start)
+
+    sample = min(records, 10_000)
+    results["create_us"] = _per_op_us(
+        lambda i: backend.create(records + i, "New task", False), sample
+    )
+    results["get_us"] = _per_op_us(backend.get, sample)
+    results["update_us"] = _per_op_us(
+        lambda i: backend.update(i, "Updated task", True), sample
+    )
+    results["page_of_100_us"] = _per_op_us(
+        lambda i: [task for _, task in zip(range(100), backend.iter_tasks(i * 7))],
+        1_000,
+    )
+    results["delete_us"] = _per_op_us(backend.delete, sample)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-backends-")
+    try:
+        backends = {
+            "memory": InMemoryBackend(),
+            "compact": CompactBackend(),
+            "sqlite": SQLiteBackend(os.path.join(root, "tasks.db")),
+            "write-behind": WriteBehindBackend(
+                SQLiteBackend(os.path.join(root, "write-behind.db"))
+            ),
+        }
+        for name, backend in backends.items():
+            results = bench_backend(backend, args.records)
+            backend.close()
+            print(
+                f"{name:>12}: "
+                + ", ".join(f"{key}={value:,.1f}" for key, value in results.items())
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares bulk ingestion through single-task requests and through the batch endpoint.
+
+Usage:
+    python -m benchmarks.bench_batch [--tasks 5000] [--batch-size 1000]
+"""
+
+import argparse
+import time
+from app import app
+from models.tasks import Task
+
+
+def bench_single(client, tasks: int) -> float:
+    """
+    Creates `tasks` tasks with one `POST /api/v1/task` each and returns tasks per second.
+    """
+    Task.reset()
+    start = time.perf_counter()
+    for i in range(tasks):
+        client.post("/api/v1/task", json={"name": f"Task {i}"})
+    return tasks / (time.perf_counter() - start)
+
+
+def bench_batch(client, tasks: int, batch_size: int) -> float:
+    """
+    Creates `tasks` tasks through `POST /api/v1/tasks:batch` and returns tasks per second.
+    """
+    Task.reset()
+    start = time.perf_counter()
+    for offset in range(0, tasks, batch_size):
+        operations = [
+            {"op": "create", "name": f"Task {i}"}
+            for i in range(offset, min(offset + batch_size, tasks))
+        ]
+        client.post("/api/v1/tasks:batch", json=operations)
+    return tasks / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with app.test_client() as client:
+        single = bench_single(client, args.tasks)
+        batch = bench_batch(client, args.tasks, args.batch_size)
+    Task.reset()
+
+    print(f"single requests: {single:,.0f} tasks/s")
+    print(f"batch requests:  {batch:,.0f} tasks/s ({batch / single:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
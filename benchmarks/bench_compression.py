@@ -0,0 +1,85 @@
+"""
+Measures the CPU time compression costs against the bytes it saves, for task list responses of
+a few sizes, with gzip and deflate at several levels. For each, the compressed size, the time
+to compress the body whole and streamed in chunks as `stream_json_list` yields them, and the
+time to send the body over a link of the given bandwidth, compression included, are reported.
+
+Usage:
+    python -m benchmarks.bench_compression [--sizes 10,100,1000,10000] [--levels 1,6,9]
+        [--bandwidth 50]
+"""
+
+import argparse
+import time
+from typing import Callable, List
+from utils.compression import ENCODINGS, compress_chunks
+from utils.serialization import encode_items
+from utils.streaming import stream_json_list
+
+
+def _per_call_ms(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - start) / repeat * 1000)
+    return best
+
+
+def _tasks(count: int) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"Buy groceries for week {i}",
+            "status": i % 3 == 0,
+            "version": 1,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--levels", default="1,6,9")
+    parser.add_argument(
+        "--bandwidth", type=float, default=50, help="Link bandwidth in Mbit/s"
+    )
+    args = parser.parse_args()
+    bytes_per_ms = args.bandwidth * 1e6 / 8 / 1000
+
+    print(
+        f"{'tasks':>6} {'coding':>8} {'level':>5} {'bytes':>10} {'ratio':>6}"
+        f" {'whole ms':>9} {'stream ms':>9} {'send ms':>9}"
+    )
+    for count in (int(size) for size in args.sizes.split(",")):
+        tasks = _tasks(count)
+        chunks = list(stream_json_list("result", tasks, encode=encode_items))
+        body = b"".join(chunks)
+        repeat = max(1, 20_000 // count)
+        print(
+            f"{count:>6} {'identity':>8} {'-':>5} {len(body):>10,} {1:>6.2f}"
+            f" {0:>9.3f} {0:>9.3f} {len(body) / bytes_per_ms:>9.3f}"
+        )
+        for encoding in ENCODINGS:
+            for level in (int(level) for level in args.levels.split(",")):
+                compressed = b"".join(compress_chunks((body,), encoding, level))
+                whole_ms = _per_call_ms(
+                    lambda: b"".join(compress_chunks((body,), encoding, level)),
+                    repeat,
+                )
+                stream_ms = _per_call_ms(
+                    lambda: b"".join(compress_chunks(iter(chunks), encoding, level)),
+                    repeat,
+                )
+                send_ms = stream_ms + len(compressed) / bytes_per_ms
+                print(
+                    f"{count:>6} {encoding:>8} {level:>5} {len(compressed):>10,}"
+                    f" {len(body) / len(compressed):>6.2f} {whole_ms:>9.3f}"
+                    f" {stream_ms:>9.3f} {send_ms:>9.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
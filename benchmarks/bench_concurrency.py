@@ -0,0 +1,60 @@
+"""
+Measures Task throughput as writer threads are added.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--ops 20000] [--threads 1,2,4,8,16]
+"""
+
+import argparse
+import threading
+import time
+from typing import List
+from models.tasks import Task
+
+
+def run_mixed_workload(threads: int, ops_per_thread: int) -> float:
+    """
+    Runs create/update/delete cycles from `threads` threads and returns operations per second.
+    """
+    Task.reset()
+    barrier = threading.Barrier(threads + 1)
+    errors: List[BaseException] = []
+
+    def worker() -> None:
+        barrier.wait()
+        try:
+            for _ in range(ops_per_thread // 3):
+                task_id = Task.create(name="Task")["id"]
+                Task.update(task_id, "Updated Task", True)
+                Task.delete(task_id)
+        except BaseException as e:  # surfaced after the run
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    return threads * (ops_per_thread // 3) * 3 / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per thread")
+    parser.add_argument("--threads", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    for threads in map(int, args.threads.split(",")):
+        rate = run_mixed_workload(threads, args.ops)
+        print(f"{threads:>3} threads: {rate:,.0f} ops/s")
+    Task.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures the cost of the task change feed: the memory held per idle subscriber waiting on an
+event loop, the time to deliver one event to all of them, and the time `publish` adds to every
+mutation.
+
+Usage:
+    python -m benchmarks.bench_events [--subscribers 10000] [--events 100]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+import tracemalloc
+from models.events import TaskEventLog
+
+
+async def _subscriber(events: TaskEventLog, ready: asyncio.Semaphore, received: list):
+    stream = events.subscribe_async()
+    await stream.__anext__()
+    ready.release()
+    async for _ in stream:
+        received[0] += 1
+
+
+async def _fan_out(subscribers: int, rounds: int) -> None:
+    events = TaskEventLog()
+    received = [0]
+    ready = asyncio.Semaphore(0)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.ensure_future(_subscriber(events, ready, received))
+        for _ in range(subscribers)
+    ]
+    for _ in tasks:
+        await ready.acquire()
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+    print(f"memory per idle subscriber: {per_subscriber:,.0f} B")
+
+    latencies = []
+    for i in range(rounds):
+        expected = received[0] + subscribers
+        start = time.perf_counter()
+        # Published from another thread, like a request handled by the WSGI server
+        publisher = threading.Thread(target=events.publish, args=("created", {"id": i}))
+        publisher.start()
+        while received[0] < expected:
+            await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - start)
+        publisher.join()
+
+    latencies.sort()
+    print(
+        f"delivery to {subscribers:,} subscribers: median"
+        f" {latencies[len(latencies) // 2] * 1000:.2f} ms,"
+        f" max {latencies[-1] * 1000:.2f} ms"
+    )
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=100)
+    args = parser.parse_args()
+
+    events = TaskEventLog()
+    count = 200_000
+    start = time.perf_counter()
+    for i in range(count):
+        events.publish("updated", {"id": i, "name": "Buy breakfast", "status": True})
+    print(f"publish: {(time.perf_counter() - start) / count * 1e6:.2f} us")
+
+    asyncio.run(_fan_out(args.subscribers, args.events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures seeding `--tasks` tasks through `POST /api/v1/tasks/import` and reading them back
+through `GET /api/v1/tasks/export`, against creating `--single` tasks one request at a time
+through `POST /api/v1/task`. Requests go through the test client, on the in-memory store or,
+with `--sqlite`, on a SQLite store in a temporary directory.
+
+Usage:
+    python -m benchmarks.bench_import [--tasks 1000000] [--single 10000] [--sqlite]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from typing import Iterator
+from app import app
+from models.tasks import Task
+from storage.sqlite import SQLiteBackend
+
+
+def _lines(count: int) -> Iterator[bytes]:
+    for i in range(count):
+        yield b'{"name": "Imported task %d", "status": %s}\n' % (
+            i,
+            b"true" if i % 2 else b"false",
+        )
+
+
+def _report(label: str, count: int, seconds: float) -> None:
+    print(
+        f"{label}: {count / seconds:>12,.0f} rows/s, {count / seconds * 60:>14,.0f} rows/min"
+        f" ({count:,} rows in {seconds:.2f} s)"
+    )
+
+
+def run(tasks: int, single: int) -> None:
+    client = app.test_client()
+
+    Task.reset()
+    start = time.perf_counter()
+    for i in range(single):
+        client.post("/api/v1/task", json={"name": f"Single task {i}"})
+    _report("single POST", single, time.perf_counter() - start)
+
+    Task.reset()
+    body = b"".join(_lines(tasks))
+    start = time.perf_counter()
+    response = client.post(
+        "/api/v1/tasks/import",
+        input_stream=io.BytesIO(body),
+        content_length=len(body),
+        content_type="application/x-ndjson",
+    )
+    _report("     import", tasks, time.perf_counter() - start)
+    assert response.get_json()["result"]["imported"] == tasks
+    del body
+
+    start = time.perf_counter()
+    response = client.get("/api/v1/tasks/export", buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    _report("     export", tasks, time.perf_counter() - start)
+    print(f"export size: {size:,} B")
+    Task.reset()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--single", type=int, default=10_000)
+    parser.add_argument("--sqlite", action="store_true")
+    args = parser.parse_args()
+
+    if not args.sqlite:
+        run(args.tasks, args.single)
+        return
+
+    default_backend = Task.backend
+    with tempfile.TemporaryDirectory() as directory:
+        Task.use_backend(SQLiteBackend(os.path.join(directory, "tasks.db")))
+        try:
+            run(args.tasks, args.single)
+        finally:
+            Task.backend.close()
+            Task.use_backend(default_backend)
+
+
+if __name__ == "__main__":
+    main()
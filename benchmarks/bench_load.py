@@ -0,0 +1,197 @@
+"""
+End-to-end load generator for the task API. Concurrent clients send a mix of list, read,
+create and update requests for a fixed duration, then the latency percentiles and the
+throughput are reported.
+
+By default the app is served in-process by the threaded Werkzeug server; pass --url to load
+a server started separately, e.g. under gunicorn.
+
+Usage:
+    python -m benchmarks.bench_load [--clients 8] [--duration 10] [--tasks 1000]
+        [--url http://localhost:5000] [--output load.json]
+        [--baseline benchmarks/baselines/load.json] [--threshold 0.2]
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from werkzeug.serving import make_server
+from app import app
+from models.tasks import Task
+from storage.wal import OP_CREATE
+from benchmarks.results import Metrics, load_results, metric, report, save_results
+
+# (name, weight) of each kind of request in the workload
+WORKLOAD = [("list", 2), ("get", 5), ("create", 2), ("update", 1)]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0, min(len(sorted_values) - 1, int(fraction * len(sorted_values) + 0.5) - 1)
+    )
+    return sorted_values[index]
+
+
+def _request(
+    connection: http.client.HTTPConnection,
+    method: str,
+    path: str,
+    body: Optional[Dict] = None,
+) -> int:
+    headers = {}
+    payload = None
+    if body is not None:
+        payload = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    connection.request(method, path, payload, headers)
+    response = connection.getresponse()
+    response.read()
+    if response.getheader("Connection", "").lower() == "close" or response.will_close:
+        connection.close()
+    return response.status
+
+
+def run_load(
+    host: str, port: int, clients: int, duration: float, max_id: int
+) -> Tuple[Dict[str, List[float]], int, float]:
+    """
+    Runs the workload from `clients` threads for `duration` seconds.
+
+    Returns:
+        The latencies in seconds per kind of request, the number of failed requests and
+        the elapsed time.
+    """
+    names = [name for name, _ in WORKLOAD]
+    weights = [weight for _, weight in WORKLOAD]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    failures = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+    deadline = [0.0]
+
+    def client(index: int) -> None:
+        rng = random.Random(index)
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        local: Dict[str, List[float]] = {name: [] for name in names}
+        local_failures = 0
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            name = rng.choices(names, weights)[0]
+            task_id = rng.randint(1, max_id)
+            start = time.perf_counter()
+            try:
+                if name == "list":
+                    status = _request(connection, "GET", "/api/v1/tasks?limit=100")
+                elif name == "get":
+                    status = _request(connection, "GET", f"/api/v1/task/{task_id}")
+                elif name == "create":
+                    status = _request(
+                        connection, "POST", "/api/v1/task", {"name": f"Load {index}"}
+                    )
+                else:
+                    status = _request(
+                        connection,
+                        "PUT",
+                        f"/api/v1/task/{task_id}",
+                        {"id": task_id, "name": f"Load {index}", "status": True},
+                    )
+                ok = status < 500
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                ok = False
+            local[name].append(time.perf_counter() - start)
+            if not ok:
+                local_failures += 1
+        connection.close()
+        with lock:
+            for key, values in local.items():
+                latencies[key].extend(values)
+            failures[0] += local_failures
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    start = time.perf_counter()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    return latencies, failures[0], time.perf_counter() - start
+
+
+def summarize(
+    latencies: Dict[str, List[float]], failures: int, elapsed: float
+) -> Metrics:
+    metrics: Metrics = {}
+    all_latencies = sorted(value for values in latencies.values() for value in values)
+    groups = {"all": all_latencies}
+    groups.update({name: sorted(values) for name, values in latencies.items()})
+    for name, values in groups.items():
+        for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            metrics[f"load.{name}.{label}_ms"] = metric(
+                percentile(values, fraction) * 1000, "ms"
+            )
+    metrics["load.all.rps"] = metric(len(all_latencies) / elapsed, "req/s", True)
+    metrics["load.all.errors"] = metric(failures, "requests")
+
+    return metrics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--url", help="Load this server instead of an in-process one")
+    parser.add_argument("--output", help="Path the results are saved to as JSON")
+    parser.add_argument("--baseline", help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        Task.reset()
+        Task.apply_batch(
+            [(OP_CREATE, 0, f"Task {i}", False) for i in range(args.tasks)]
+        )
+        # The per-request access log of the development server would dominate the timings
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        host, port = "127.0.0.1", server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        latencies, failures, elapsed = run_load(
+            host, port, args.clients, args.duration, args.tasks
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+            Task.reset()
+
+    metrics = summarize(latencies, failures, elapsed)
+    if args.output:
+        save_results(args.output, "load", metrics)
+    baseline = load_results(args.baseline)["metrics"] if args.baseline else {}
+    if not report(metrics, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures the time a request thread spends logging one record, with a synchronous rotating
+file handler and with the background queue listener.
+
+Usage:
+    python -m benchmarks.bench_logging [--records 100000]
+"""
+
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from utils.request_logging import (
+    BatchingFileHandler,
+    BatchingLogListener,
+    DroppingQueueHandler,
+    JSONLinesFormatter,
+)
+
+FIELDS = {
+    "method": "GET",
+    "path": "/api/v1/tasks",
+    "query": "limit=100",
+    "status": 200,
+    "duration_ms": 0.42,
+    "user_agent": "bench",
+    "ip": "127.0.0.1",
+    "headers": {"Host": "localhost", "User-Agent": "bench", "Accept": "*/*"},
+}
+
+
+def _per_record_us(logger: logging.Logger, records: int) -> float:
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.info("GET /api/v1/tasks 200", extra={"fields": FIELDS})
+    return (time.perf_counter() - start) / records * 1e6
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"bench_logging.{name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sync_handler = RotatingFileHandler(
+            f"{directory}/sync.log", maxBytes=10000, backupCount=3
+        )
+        sync_handler.setFormatter(JSONLinesFormatter())
+        sync_us = _per_record_us(_logger("sync", sync_handler), args.records)
+        sync_handler.close()
+
+        file_handler = BatchingFileHandler(
+            f"{directory}/queued.log", maxBytes=10 * 1024 * 1024, backupCount=3
+        )
+        file_handler.setFormatter(JSONLinesFormatter())
+        log_queue: queue.Queue = queue.Queue(maxsize=args.records)
+        listener = BatchingLogListener(log_queue, file_handler)
+        listener.start()
+        queue_handler = DroppingQueueHandler(log_queue)
+        queued_us = _per_record_us(_logger("queued", queue_handler), args.records)
+        start = time.perf_counter()
+        listener.stop()
+        drain_s = time.perf_counter() - start
+
+    print(f"synchronous, 10 kB rotation: {sync_us:6.2f} us per record")
+    print(
+        f"queued, batched writes:      {queued_us:6.2f} us per record "
+        f"({queue_handler.dropped:,} dropped, {drain_s:.2f} s to drain at shutdown)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compares the memory taken by a task in the dictionary of `InMemoryBackend` and in the flat
+arrays of `CompactBackend`, at a few store sizes. Each store is filled through `Task` in a new
+process, and the growth of its resident memory is divided by the number of tasks, so the status,
+name and change indexes `Task` keeps on top of an in-memory store are measured too.
+
+Usage:
+    python -m benchmarks.bench_memory [--sizes 100000,1000000] [--output memory.json]
+        [--baseline benchmarks/baselines/memory.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict
+from benchmarks.results import Metrics, load_results, metric, report, save_results
+
+BACKENDS = ("memory", "compact")
+
+
+def _rss_bytes() -> int:
+    """
+    Returns the resident memory of this process, or its peak where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def fill(backend_name: str, size: int) -> Dict[str, float]:
+    """
+    Fills a store with `size` tasks and measures it. Runs in the child process.
+    """
+    from models.tasks import Task
+    from storage.compact import CompactBackend
+    from storage.memory import InMemoryBackend
+    from storage.wal import OP_CREATE
+
+    backend = CompactBackend() if backend_name == "compact" else InMemoryBackend({})
+    Task.use_backend(backend)
+    before = _rss_bytes()
+    start = time.perf_counter()
+    batch = 10_000
+    for first in range(1, size + 1, batch):
+        Task.apply_batch(
+            [
+                (OP_CREATE, 0, f"Task number {i}", i % 2 == 0)
+                for i in range(first, min(first + batch, size + 1))
+            ]
+        )
+    elapsed = time.perf_counter() - start
+    results = {
+        "bytes_per_task": (_rss_bytes() - before) / size,
+        "fill_s": elapsed,
+    }
+    if backend_name == "compact":
+        results["allocated_bytes_per_task"] = backend.memory_usage() / size
+    return results
+
+
+def measure(backend_name: str, size: int) -> Dict[str, float]:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_memory",
+            "--fill",
+            backend_name,
+            "--sizes",
+            str(size),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--output", help="Path the results are saved to as JSON")
+    parser.add_argument("--baseline", help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--fill", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    if args.fill:
+        print(json.dumps(fill(args.fill, sizes[0])))
+        return
+
+    metrics: Metrics = {}
+    for size in sizes:
+        for backend_name in BACKENDS:
+            results = measure(backend_name, size)
+            prefix = f"memory.{backend_name}.{size}"
+            metrics[f"{prefix}.bytes_per_task"] = metric(results["bytes_per_task"], "B")
+            metrics[f"{prefix}.fill_s"] = metric(results["fill_s"], "s")
+            if "allocated_bytes_per_task" in results:
+                metrics[f"{prefix}.allocated_bytes_per_task"] = metric(
+                    results["allocated_bytes_per_task"], "B"
+                )
+
+    if args.output:
+        save_results(args.output, "memory", metrics)
+    baseline = load_results(args.baseline)["metrics"] if args.baseline else {}
+    if not report(metrics, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
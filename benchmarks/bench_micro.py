@@ -0,0 +1,133 @@
+"""
+Microbenchmarks of the Task operations at several store sizes and of request validation.
+
+Usage:
+    python -m benchmarks.bench_micro [--sizes 1000,10000,100000] [--ops 5000]
+        [--output micro.json] [--baseline benchmarks/baselines/micro.json] [--threshold 0.2]
+"""
+
+import argparse
+import io
+import random
+import sys
+import time
+from typing import Callable, Dict
+from werkzeug.test import EnvironBuilder
+from app import app
+from models.tasks import Task
+from schemas.task_schema import UpdateTask
+from storage.wal import OP_CREATE
+from utils.validation import validate_input
+from benchmarks.results import Metrics, load_results, metric, report, save_results
+
+
+def _fill(size: int) -> None:
+    Task.reset()
+    for offset in range(0, size, 10_000):
+        Task.apply_batch(
+            [
+                (OP_CREATE, 0, f"Task {i}", False)
+                for i in range(offset, min(offset + 10_000, size))
+            ]
+        )
+
+
+def _per_op_us(function: Callable[[int], object], ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        function(i)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench_task_operations(size: int, ops: int) -> Metrics:
+    """
+    Times create, update, delete and get_all with `size` tasks already stored.
+    """
+    _fill(size)
+    rng = random.Random(size)
+    existing = [rng.randint(1, size) for _ in range(ops)]
+
+    results = {}
+    created = []
+    results["create_us"] = _per_op_us(
+        lambda i: created.append(Task.create(name=f"New task {i}")["id"]), ops
+    )
+    results["update_us"] = _per_op_us(
+        lambda i: Task.update(existing[i], f"Updated {i}", True), ops
+    )
+    results["delete_us"] = _per_op_us(lambda i: Task.delete(created[i]), ops)
+
+    repeat = max(1, min(100, 1_000_000 // max(size, 1)))
+    results["get_all_ms"] = _per_op_us(lambda _: Task.get_all(), repeat) / 1000
+
+    return {
+        f"task.{name}[{size}]": metric(value, name.rsplit("_", 1)[1])
+        for name, value in results.items()
+    }
+
+
+def bench_validation(ops: int) -> Metrics:
+    """
+    Times `validate_input` on a valid and an invalid body. The cost of setting up the request
+    context, measured on an undecorated view, is subtracted. Both are the best of several
+    interleaved rounds, so that the difference is not dominated by noise.
+    """
+
+    def view(id: int, validated_data: UpdateTask = None):
+        return validated_data
+
+    validated_view = validate_input(UpdateTask)(view)
+    bodies = {
+        "valid": {"id": 1, "name": "Task", "status": True},
+        "invalid": {"id": 1, "name": "", "status": "maybe"},
+    }
+
+    def per_call_us(function: Callable, environ: Dict, data: bytes) -> float:
+        calls = max(ops // rounds, 1)
+        start = time.perf_counter()
+        for _ in range(calls):
+            environ["wsgi.input"] = io.BytesIO(data)
+            with app.request_context(environ):
+                function(id=1)
+        return (time.perf_counter() - start) / calls * 1e6
+
+    rounds = 10
+    results = {}
+    for name, body in bodies.items():
+        environ = EnvironBuilder(method="PUT", json=body).get_environ()
+        data = environ["wsgi.input"].read()
+        overhead = validated = float("inf")
+        for _ in range(rounds):
+            overhead = min(overhead, per_call_us(view, environ, data))
+            validated = min(validated, per_call_us(validated_view, environ, data))
+        results[f"validate_input.{name}_us"] = metric(
+            max(validated - overhead, 0.0), "us"
+        )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--output", help="Path the results are saved to as JSON")
+    parser.add_argument("--baseline", help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    metrics: Metrics = {}
+    for size in map(int, args.sizes.split(",")):
+        metrics.update(bench_task_operations(size, args.ops))
+    metrics.update(bench_validation(args.ops))
+    Task.reset()
+
+    if args.output:
+        save_results(args.output, "micro", metrics)
+    baseline = load_results(args.baseline)["metrics"] if args.baseline else {}
+    if not report(metrics, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares name search through the index with a linear scan of the tasks.
+
+Usage:
+    python -m benchmarks.bench_search [--tasks 1000000]
+"""
+
+import argparse
+import random
+import time
+from models.indexes import NameIndex
+from models.tasks import Task
+from storage.wal import OP_CREATE
+
+WORDS = [
+    "buy", "write", "review", "call", "plan", "fix", "clean", "send", "book", "pay",
+    "groceries", "report", "budget", "dentist", "trip", "invoice", "garden", "car",
+    "meeting", "birthday", "present", "email", "taxes", "kitchen", "laundry", "flight",
+]  # fmt: skip
+
+QUERIES = ["dentist", "gro", "buy groceries", "invoice 4242", "flight 99999"]
+
+
+def _per_query_ms(search, query: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search(query)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    Task.reset()
+    start = time.perf_counter()
+    for offset in range(0, args.tasks, 10_000):
+        Task.apply_batch(
+            [
+                (OP_CREATE, 0, f"{' '.join(rng.sample(WORDS, 3))} {i}", False)
+                for i in range(offset, min(offset + 10_000, args.tasks))
+            ]
+        )
+    print(f"indexed {args.tasks:,} tasks in {time.perf_counter() - start:.1f} s")
+
+    def scan(query: str) -> list:
+        return [
+            task_id
+            for task_id, task in Task.tasks_dict.items()
+            if NameIndex.matches(task["name"], query)
+        ]
+
+    def indexed(query: str) -> list:
+        return list(Task.name_index.search(query))
+
+    for query in QUERIES:
+        matches = len(indexed(query))
+        index_ms = _per_query_ms(indexed, query, 20)
+        scan_ms = _per_query_ms(scan, query, 1)
+        print(
+            f"{query!r:>16}: {matches:>8,} matches, index {index_ms:8.3f} ms, "
+            f"scan {scan_ms:9.1f} ms ({scan_ms / index_ms:,.0f}x)"
+        )
+    Task.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares encoding the task list with `jsonify` against joining cached JSON fragments with
+the standard library encoder, and against encoding it in one call with orjson when it is
+installed. The time spent reading the tasks with `get_all` is reported separately.
+
+Usage:
+    python -m benchmarks.bench_serialization [--tasks 100000] [--repeat 20]
+"""
+
+import argparse
+import time
+from flask import jsonify
+from app import app
+from models.json_cache import TaskJSONCache
+from models.tasks import Task
+from storage.wal import OP_CREATE
+from utils.serialization import FAST_ENCODER, encode_list
+
+
+def _per_call_ms(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Task.reset()
+    for offset in range(0, args.tasks, 10_000):
+        Task.apply_batch(
+            [
+                (OP_CREATE, 0, f"Task {i} 買早餐", False)
+                for i in range(offset, min(offset + 10_000, args.tasks))
+            ]
+        )
+    tasks_list = Task.get_all()
+    print(f"{args.tasks:,} tasks")
+
+    def assemble(cache: TaskJSONCache) -> bytes:
+        return encode_list("result", cache.encode_items(tasks_list))
+
+    stdlib_cache = TaskJSONCache(fast_encoder=False)
+    with app.app_context():
+        results = {
+            "jsonify": _per_call_ms(
+                lambda: jsonify({"result": tasks_list}).get_data(), args.repeat
+            ),
+            "stdlib, cold cache": _per_call_ms(
+                lambda: (stdlib_cache.clear(), assemble(stdlib_cache)), args.repeat
+            ),
+            "stdlib, warm cache": _per_call_ms(
+                lambda: assemble(stdlib_cache), args.repeat
+            ),
+        }
+        if FAST_ENCODER:
+            results["orjson"] = _per_call_ms(
+                lambda: assemble(TaskJSONCache(fast_encoder=True)), args.repeat
+            )
+
+    baseline = results["jsonify"]
+    for name, elapsed_ms in results.items():
+        print(f"{name:>20}: {elapsed_ms:8.2f} ms ({baseline / elapsed_ms:5.1f}x)")
+    print(f"{'get_all':>20}: {_per_call_ms(Task.get_all, args.repeat):8.2f} ms")
+    Task.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measures how read throughput of the shared-memory store scales with worker processes.
+
+Usage:
+    python -m benchmarks.bench_shared [--records 100000] [--processes 1,2,4,8] [--seconds 2]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from storage.shared import SharedMemoryBackend
+from storage.wal import OP_CREATE
+
+
+def _reader(path: str, records: int, seconds: float, queue) -> None:
+    backend = SharedMemoryBackend(path)
+    ids = [random.randint(1, records) for _ in range(10_000)]
+    reads = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for task_id in ids:
+            backend.get(task_id)
+        reads += len(ids)
+    backend.close()
+    queue.put(reads)
+
+
+def bench_reads(path: str, records: int, processes: int, seconds: float) -> float:
+    """
+    Runs `processes` readers against the same file and returns total reads per second.
+    """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [
+        context.Process(target=_reader, args=(path, records, seconds, queue))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    total = sum(queue.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    return total / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--processes", default="1,2,4,8")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-shared-")
+    try:
+        path = os.path.join(root, "tasks.shm")
+        backend = SharedMemoryBackend(path, capacity=args.records)
+        backend.apply_batch(
+            (OP_CREATE, i, f"Task number {i}", False)
+            for i in range(1, args.records + 1)
+        )
+        backend.close()
+
+        print(f"cores available: {os.cpu_count()}")
+        baseline = None
+        for processes in map(int, args.processes.split(",")):
+            rate = bench_reads(path, args.records, processes, args.seconds)
+            baseline = baseline or rate / processes
+            print(
+                f"{processes:>3} processes: {rate:,.0f} reads/s "
+                f"({rate / baseline / processes:.0%} of linear)"
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Measures the cold start of the API: the time from launching a fresh interpreter until the
+first request is answered, and until the first write is, with the Swagger docs built at import
+time and with them loaded lazily (SWAGGER_LAZY=true). Each start runs in a new process.
+
+With --profile, also prints the modules whose import takes longest, from `python -X importtime`.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--profile 25] [--output startup.json]
+        [--baseline benchmarks/baselines/startup.json] [--threshold 0.2]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+from benchmarks.results import Metrics, load_results, metric, report, save_results
+
+MODES = {"eager": "false", "lazy": "true"}
+
+
+def serve() -> None:
+    """
+    Serves the app on a free port, printed once listening. Runs in the child process.
+    """
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def _environ(lazy: str) -> Dict[str, str]:
+    environ = dict(os.environ, SWAGGER_LAZY=lazy)
+    # Start from an empty in-memory store whatever the local configuration
+    for name in ("TASK_SQLITE_PATH", "TASK_SHARED_PATH", "TASK_DATA_DIR"):
+        environ[name] = ""
+    return environ
+
+
+def _request(port: int, method: str, path: str, body: bytes = None) -> int:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection.request(method, path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def measure_start(lazy: str) -> Tuple[float, float]:
+    """
+    Starts the app in a new process and times its first read and its first write.
+
+    Returns:
+        The seconds from launching the process until the first GET was answered, and until
+        the first POST that followed it was.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--serve"],
+        stdout=subprocess.PIPE,
+        env=_environ(lazy),
+    )
+    try:
+        port = int(process.stdout.readline())
+        status = _request(port, "GET", "/api/v1/tasks")
+        first_request = time.perf_counter() - start
+        body = json.dumps({"name": "First task"}).encode()
+        write_status = _request(port, "POST", "/api/v1/task", body)
+        first_write = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+    if status != 200 or write_status != 201:
+        raise RuntimeError(f"Unexpected statuses {status} and {write_status}")
+
+    return first_request, first_write
+
+
+def profile_imports(lazy: str) -> List[Tuple[str, int, int]]:
+    """
+    Imports the app in a new process with `-X importtime`.
+
+    Returns:
+        (module, self microseconds, cumulative microseconds) of every imported module, in
+        import order, the app itself being last.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True,
+        text=True,
+        env=_environ(lazy),
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def print_profile(modules: List[Tuple[str, int, int]], top: int) -> None:
+    print(f"{'self ms':>9} {'cumul. ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(
+        modules, key=lambda module: module[1], reverse=True
+    )[:top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profile", type=int, default=0, metavar="TOP")
+    parser.add_argument("--output", help="Path the results are saved to as JSON")
+    parser.add_argument("--baseline", help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        return
+
+    metrics: Metrics = {}
+    for mode, lazy in MODES.items():
+        starts = [measure_start(lazy) for _ in range(args.runs)]
+        metrics[f"startup.{mode}.first_request_ms"] = metric(
+            statistics.median(start[0] for start in starts) * 1000, "ms"
+        )
+        metrics[f"startup.{mode}.first_write_ms"] = metric(
+            statistics.median(start[1] for start in starts) * 1000, "ms"
+        )
+        modules = profile_imports(lazy)
+        metrics[f"startup.{mode}.import_app_ms"] = metric(modules[-1][2] / 1000, "ms")
+        if args.profile:
+            print(f"Slowest imports, {mode} docs:")
+            print_profile(modules, args.profile)
+            print()
+
+    if args.output:
+        save_results(args.output, "startup", metrics)
+    baseline = load_results(args.baseline)["metrics"] if args.baseline else {}
+    if not report(metrics, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares keeping a client in sync by fetching every task against fetching only the changes
+since its last version, for a store of `--tasks` tasks of which `--changes` were updated or
+deleted in between. The time per fetch, through the test client, and the response size are
+reported.
+
+Usage:
+    python -m benchmarks.bench_sync [--tasks 100000] [--changes 100]
+"""
+
+import argparse
+import time
+from typing import Callable
+from app import app
+from models.tasks import Task
+from storage.wal import OP_CREATE
+
+
+def _per_call_ms(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - start) / repeat * 1000)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+
+    Task.reset()
+    Task.apply_batch(
+        [(OP_CREATE, 0, f"Task number {i}", False) for i in range(args.tasks)]
+    )
+    client = app.test_client()
+    version = client.get("/api/v1/tasks?since=0").get_json()["version"]
+    for i in range(1, args.changes + 1):
+        if i % 4:
+            Task.update(i * 7, f"Updated task {i}", True)
+        else:
+            Task.delete(i * 7)
+
+    full = client.get("/api/v1/tasks")
+    delta = client.get(f"/api/v1/tasks?since={version}")
+    full_ms = _per_call_ms(lambda: client.get("/api/v1/tasks"), 5)
+    delta_ms = _per_call_ms(lambda: client.get(f"/api/v1/tasks?since={version}"), 100)
+    print(f"full list: {full_ms:9.3f} ms, {len(full.data):>12,} B")
+    print(f"    since: {delta_ms:9.3f} ms, {len(delta.data):>12,} B")
+    Task.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares validating request bodies the previous way, decoding the JSON into Python objects and
+passing them to the model, against validating the raw bytes with the compiled validators of
+`utils.validation`. For each body, the time per call and the peak memory allocated during a
+call, as seen by tracemalloc, are reported.
+
+Usage:
+    python -m benchmarks.bench_validation [--repeat 20000] [--batch 100]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, List
+from pydantic import TypeAdapter
+from schemas.task_schema import CreateTask, TaskOperation, UpdateTask
+from utils.validation import validate_batch_body, validate_body
+
+
+def _per_call_us(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat // 5):
+            function()
+        best = min(best, (time.perf_counter() - start) / (repeat // 5) * 1e6)
+    return best
+
+
+def _peak_bytes(function: Callable[[], object]) -> int:
+    function()
+    tracemalloc.start()
+    try:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        return tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    create_body = json.dumps({"name": "Buy breakfast"}).encode()
+    update_body = json.dumps(
+        {"id": 1, "name": "Buy breakfast", "status": True}
+    ).encode()
+    operations: List[dict] = [
+        {"op": "update", "id": i + 1, "name": f"Task {i}", "status": True}
+        for i in range(args.batch)
+    ]
+    batch_body = json.dumps(operations).encode()
+    operations_adapter = TypeAdapter(List[TaskOperation])
+
+    cases = {
+        "CreateTask": (
+            lambda: CreateTask(**json.loads(create_body)),
+            lambda: validate_body(CreateTask, "application/json", create_body),
+        ),
+        "UpdateTask": (
+            lambda: UpdateTask(**json.loads(update_body)),
+            lambda: validate_body(UpdateTask, "application/json", update_body),
+        ),
+        f"batch of {args.batch}": (
+            lambda: operations_adapter.validate_python(json.loads(batch_body)),
+            lambda: validate_batch_body(TaskOperation, "application/json", batch_body),
+        ),
+    }
+
+    for name, (previous, current) in cases.items():
+        repeat = args.repeat if not name.startswith("batch") else args.repeat // 20
+        previous_us = _per_call_us(previous, repeat)
+        current_us = _per_call_us(current, repeat)
+        previous_bytes = _peak_bytes(previous)
+        current_bytes = _peak_bytes(current)
+        print(
+            f"{name:>14}: {previous_us:9.2f} us -> {current_us:9.2f} us"
+            f" ({previous_us / current_us:4.1f}x),"
+            f" peak {previous_bytes:>8,} B -> {current_bytes:>8,} B"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmarks write throughput and recovery time of the task write-ahead log.
+
+Usage:
+    python -m benchmarks.bench_wal [--records 1000000] [--sync-records 20000] [--writers 16]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from storage.wal import OP_CREATE, OP_UPDATE, WriteAheadLog
+
+
+def bench_async_append(directory: str, records: int) -> float:
+    """
+    Appends `records` creates without waiting for each fsync and returns records per second.
+    """
+    wal = WriteAheadLog(directory, sync=False, snapshot_on_close=False)
+    wal.open()
+    start = time.perf_counter()
+    for task_id in range(1, records + 1):
+        wal.append(OP_CREATE, task_id, f"Task number {task_id}", version=1)
+    wal.wait_durable(records - 1)
+    elapsed = time.perf_counter() - start
+    wal.close()
+    return records / elapsed
+
+
+def bench_group_commit(directory: str, records: int, writers: int) -> float:
+    """
+    Commits `records` updates from `writers` threads, each waiting for durability,
+    and returns records per second.
+    """
+    wal = WriteAheadLog(directory, sync=True, snapshot_on_close=False)
+    wal.open()
+    per_writer = records // writers
+
+    def writer(offset: int) -> None:
+        for task_id in range(offset, offset + per_writer):
+            wal.commit(OP_UPDATE, task_id, f"Task number {task_id}", True, 2)
+
+    threads = [
+        threading.Thread(target=writer, args=(index * per_writer + 1,))
+        for index in range(writers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    wal.close()
+    return per_writer * writers / elapsed
+
+
+def bench_recovery(directory: str, records: int) -> dict:
+    """
+    Builds a log with a snapshot covering half of the records and a WAL tail holding the
+    other half, then measures recovery from the tail only and from snapshot plus tail.
+    """
+    tasks = {}
+    wal = WriteAheadLog(
+        directory,
+        snapshot_source=lambda: (tasks.copy(), len(tasks)),
+        sync=False,
+        snapshot_on_close=False,
+        snapshot_interval=records + 1,
+    )
+    wal.open()
+    for task_id in range(1, records + 1):
+        name = f"Task number {task_id}"
+        tasks[task_id] = {"name": name, "status": False, "version": 1}
+        wal.append(OP_CREATE, task_id, name, version=1)
+        if task_id == records // 2:
+            wal.snapshot()
+    wal.close()
+
+    start = time.perf_counter()
+    recovered, _ = WriteAheadLog(directory).open()
+    elapsed = time.perf_counter() - start
+    assert len(recovered) == records
+
+    return {
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--sync-records", type=int, default=20_000)
+    parser.add_argument("--writers", type=int, default=16)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-wal-")
+    try:
+        rate = bench_async_append(os.path.join(root, "async"), args.records)
+        print(f"async append:  {rate:,.0f} records/s ({args.records:,} records)")
+
+        rate = bench_group_commit(
+            os.path.join(root, "sync"), args.sync_records, args.writers
+        )
+        print(
+            f"group commit:  {rate:,.0f} records/s "
+            f"({args.sync_records:,} records, {args.writers} writers)"
+        )
+
+        result = bench_recovery(os.path.join(root, "recovery"), args.records)
+        print(
+            f"recovery:      {result['seconds']:.2f} s "
+            f"({result['records_per_second']:,.0f} records/s, {args.records:,} records)"
+        )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Saves benchmark results as JSON and compares them against a stored baseline.
+
+Usage:
+    python -m benchmarks.results current.json benchmarks/baselines/micro.json [--threshold 0.2]
+
+Exits with status 1 when a metric regressed by more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Metric name -> {"value": float, "unit": str, "higher_is_better": bool}
+Metrics = Dict[str, Dict]
+
+
+def metric(value: float, unit: str, higher_is_better: bool = False) -> Dict:
+    return {
+        "value": round(value, 4),
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+    }
+
+
+def save_results(path: str, suite: str, metrics: Metrics) -> None:
+    """
+    Writes the metrics of a run along with where and when it was measured.
+    """
+    results = {
+        "suite": suite,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": metrics,
+    }
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def load_results(path: str) -> Dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(
+    current: Metrics, baseline: Metrics, threshold: float = 0.2
+) -> List[Tuple[str, float, float, float]]:
+    """
+    Finds the metrics that got worse than the baseline by more than `threshold`, a fraction.
+    Metrics missing from either side are ignored.
+
+    Returns:
+        (name, baseline value, current value, relative change) for every regression, the
+        change being positive when the metric got worse.
+    """
+    regressions = []
+    for name, entry in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["value"], entry["value"]
+        change = after - before
+        if entry.get("higher_is_better"):
+            change = -change
+        if before != 0:
+            change /= abs(before)
+        elif change > 0:
+            # Any deterioration from zero, e.g. errors appearing, is a regression
+            change = float("inf")
+        if change > threshold:
+            regressions.append((name, before, after, change))
+
+    return regressions
+
+
+def report(current: Metrics, baseline: Metrics, threshold: float = 0.2) -> bool:
+    """
+    Prints every metric next to its baseline and returns whether none regressed.
+    """
+    regressed = {name for name, *_ in compare(current, baseline, threshold)}
+    for name, entry in current.items():
+        line = f"{name:>45}: {entry['value']:>12,.3f} {entry['unit']}"
+        if name in baseline:
+            line += f"  (baseline {baseline[name]['value']:,.3f})"
+        if name in regressed:
+            line += "  REGRESSION"
+        print(line)
+
+    return not regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("current")
+    parser.add_argument("baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    current = load_results(args.current)["metrics"]
+    baseline = load_results(args.baseline)["metrics"]
+    if not report(current, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
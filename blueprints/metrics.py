@@ -0,0 +1,186 @@
+import time
+from typing import Optional
+from flask import Blueprint, Response, request
+from models.tasks import Task
+from storage.write_behind import WriteBehindBackend
+from utils.metrics import MetricsRegistry
+
+# Create a Flask Blueprint
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+metrics = MetricsRegistry()
+metrics.describe(
+    "http_requests_total", "counter", "Requests handled, by route, method and status."
+)
+metrics.describe(
+    "http_request_duration_seconds",
+    "histogram",
+    "Time spent handling requests until the response is returned, by route and method.",
+)
+metrics.describe(
+    "http_request_errors_total",
+    "counter",
+    "Requests answered with a 5xx status, by route and method.",
+)
+metrics.describe(
+    "http_requests_started_total", "counter", "Requests whose handling has started."
+)
+metrics.describe(
+    "http_requests_finished_total", "counter", "Requests whose handling has finished."
+)
+metrics.describe(
+    "http_requests_in_flight", "gauge", "Requests currently being handled."
+)
+metrics.describe("tasks_stored", "gauge", "Number of tasks in the store.")
+metrics.describe(
+    "task_event_subscribers", "gauge", "Clients connected to the task change feed."
+)
+metrics.describe(
+    "admission_decisions_total",
+    "counter",
+    "Task API requests admitted, rate limited or shed, by priority.",
+)
+metrics.describe(
+    "write_behind_dirty_tasks",
+    "gauge",
+    "Tasks changed in memory and not yet written to the database.",
+)
+metrics.describe(
+    "write_behind_flush_lag_seconds",
+    "gauge",
+    "Age of the oldest change not yet written to the database.",
+)
+metrics.describe(
+    "write_behind_last_flush_seconds",
+    "gauge",
+    "Time the latest flush to the database took.",
+)
+metrics.describe(
+    "write_behind_flushed_tasks_total",
+    "counter",
+    "Task writes flushed to the database.",
+)
+metrics.describe(
+    "write_behind_flush_errors_total", "counter", "Flushes to the database that failed."
+)
+metrics.describe(
+    "write_behind_backpressure_waits_total",
+    "counter",
+    "Writes that waited for the flusher because too many tasks were dirty.",
+)
+
+
+def _route() -> str:
+    """
+    Returns the URL rule that matched the request, so that e.g. every task ID shares a label.
+    """
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<unmatched>"
+
+
+def observe_request(
+    route: str, method: str, status: int, duration: Optional[float]
+) -> None:
+    """
+    Counts a response and records the latency of its request, when known.
+
+    Parameters:
+        - route (str): The URL rule that matched the request.
+        - method (str): The HTTP method of the request.
+        - status (int): The status code of the response.
+        - duration (Optional[float]): The seconds spent handling the request.
+    """
+    metrics.increment(
+        "http_requests_total",
+        (("route", route), ("method", method), ("status", str(status))),
+    )
+    if status >= 500:
+        metrics.increment(
+            "http_request_errors_total", (("route", route), ("method", method))
+        )
+    if duration is not None:
+        metrics.observe(
+            "http_request_duration_seconds",
+            (("route", route), ("method", method)),
+            duration,
+        )
+
+
+def count_admission(priority: str, decision: str) -> None:
+    """
+    Counts an admission decision.
+
+    Parameters:
+        - priority (str): "read" or "write".
+        - decision (str): "admitted", or the reason of the rejection.
+    """
+    metrics.increment(
+        "admission_decisions_total", (("priority", priority), ("decision", decision))
+    )
+
+
+@metrics_bp.before_app_request
+def start_timer() -> None:
+    """
+    Records the monotonic time the request started at and counts it as in flight.
+    """
+    request.metrics_start_time = time.perf_counter()
+    request.metrics_in_flight = True
+    metrics.increment("http_requests_started_total")
+
+
+@metrics_bp.after_app_request
+def record_request(response: Response) -> Response:
+    """
+    Counts the response and records the request latency.
+    """
+    start_time: Optional[float] = getattr(request, "metrics_start_time", None)
+    duration = None if start_time is None else time.perf_counter() - start_time
+    observe_request(_route(), request.method, response.status_code, duration)
+
+    return response
+
+
+@metrics_bp.teardown_app_request
+def finish_request(error: Optional[BaseException]) -> None:
+    """
+    Counts the request as finished, whether or not it succeeded. Teardown may run more than
+    once for a request, e.g. when the test client preserves its context, so it is only
+    counted the first time.
+    """
+    if getattr(request, "metrics_in_flight", False):
+        request.metrics_in_flight = False
+        metrics.increment("http_requests_finished_total")
+
+
+@metrics_bp.route("/metrics")
+def get_metrics() -> Response:
+    """
+    Exposes the request and store metrics in the Prometheus text format.
+
+    Returns:
+        - The metrics with a 200 status code.
+    """
+    total = metrics.collect()
+    started = total.counters.get(("http_requests_started_total", ()), 0)
+    finished = total.counters.get(("http_requests_finished_total", ()), 0)
+    gauges = {
+        "http_requests_in_flight": started - finished,
+        "tasks_stored": Task.backend.count(),
+        "task_event_subscribers": Task.events.subscribers,
+    }
+    backend = Task.backend
+    if isinstance(backend, WriteBehindBackend):
+        gauges.update(
+            {
+                "write_behind_dirty_tasks": backend.dirty_count(),
+                "write_behind_flush_lag_seconds": backend.flush_lag(),
+                "write_behind_last_flush_seconds": backend.last_flush_duration,
+                "write_behind_flushed_tasks_total": backend.flushed_count,
+                "write_behind_flush_errors_total": backend.flush_errors,
+                "write_behind_backpressure_waits_total": backend.backpressure_waits,
+            }
+        )
+    body = metrics.render(gauges, total)
+
+    return Response(body, mimetype="text/plain; version=0.0.4")
@@ -1,28 +1,362 @@
-from typing import Tuple
-from flask import Blueprint, jsonify, Response
-from schemas.task_schema import CreateTask, UpdateTask
-from models.tasks import Task
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from flask import Blueprint, current_app, jsonify, request, Response
+from schemas.task_schema import (
+    CreateTask,
+    ImportTask,
+    UpdateTask,
+    PatchTask,
+    CreateTaskOperation,
+    UpdateTaskOperation,
+    TaskOperation,
+)
+from pydantic import BaseModel
+from blueprints.metrics import count_admission
+from models.tasks import Task, TaskInResponse
+from exceptions.ChangesExpiredException import ChangesExpiredException
+from exceptions.IdempotencyKeyException import IdempotencyKeyException
 from exceptions.TaskNotFoundException import TaskNotFoundException
-from utils.validation import validate_input
+from exceptions.VersionConflictException import VersionConflictException
+from exceptions.InvalidPaginationException import InvalidPaginationException
+from exceptions.InvalidFilterException import InvalidFilterException
+from exceptions.InvalidInputException import InvalidInputException
+from exceptions.StorageFullException import StorageFullException
+from storage.wal import OP_CREATE, OP_DELETE, OP_UPDATE
+from utils.admission import READ, SAFE_METHODS, WRITE
+from utils.compression import compress_body, negotiate_encoding
+from utils.conditional import (
+    is_not_modified,
+    make_etag,
+    make_task_etag,
+    not_modified_response,
+    parse_if_match,
+    with_etag,
+)
+from utils.idempotency import parse_idempotency_key
+from utils.serialization import encode_field, encode_list, json_response
+from utils.validation import validate_batch_input, validate_input
+from utils.filters import parse_filter_args, parse_since_arg
+from utils.pagination import encode_cursor, parse_pagination_args
+from utils.ndjson import (
+    NDJSON_MEDIA_TYPE,
+    READ_CHUNK_SIZE,
+    NDJSONReader,
+    check_ndjson_media_type,
+)
+from utils.streaming import stream_json_list, stream_ndjson
 
 
 # Create a Flask Blueprint
 task_bp = Blueprint("task_bp", __name__)
 
 
+# Long-lived streams, which are rate limited but do not take a concurrency slot
+UNCAPPED_ENDPOINTS = frozenset(("task_bp.get_task_events",))
+
+
+@task_bp.before_request
+def admit_request() -> Optional[Tuple[Response, int]]:
+    """
+    Refuses the request early when the `AdmissionController` of the app, if any, sheds it.
+
+    Returns:
+        - None to handle the request.
+        - If the client exceeded its rate limit, a JSON object with an error message, a `Retry-After` header and a
+            429 status code.
+        - If no concurrency slot was released in time, a JSON object with an error message, a `Retry-After`
+            header and a 503 status code.
+    """
+    admission = current_app.extensions.get("admission")
+    if admission is None:
+        return None
+
+    priority = READ if request.method in SAFE_METHODS else WRITE
+    hold_slot = request.endpoint not in UNCAPPED_ENDPOINTS
+    rejection = admission.admit(request.remote_addr, priority, hold_slot)
+    if rejection is not None:
+        count_admission(priority, rejection.reason)
+        response = jsonify({"errors": rejection.message})
+        response.headers["Retry-After"] = str(rejection.retry_after)
+        return response, rejection.status
+
+    count_admission(priority, "admitted")
+    request.admission_slot = hold_slot
+    return None
+
+
+@task_bp.teardown_request
+def release_request(error: Optional[BaseException]) -> None:
+    """
+    Releases the concurrency slot of the request, once. Teardown may run more than once for a
+    request, e.g. when the test client preserves its context.
+    """
+    if getattr(request, "admission_slot", False):
+        request.admission_slot = False
+        current_app.extensions["admission"].release()
+
+
+def list_response(body: Any, encoding: Optional[str], etag: Optional[str]) -> Response:
+    """
+    Builds a tagged task list response, compressed with the negotiated coding when the app's
+    `COMPRESSION_MIN_SIZE` and `COMPRESSION_LEVEL` settings call for it.
+
+    Parameters:
+        - body (Any): The encoded list, either bytes or an iterator of bytes to be streamed.
+        - encoding (Optional[str]): The value of `negotiate_encoding()` for the request.
+        - etag (Optional[str]): The tag of the response, built for `encoding`.
+
+    Returns:
+        - The response, whose status code is set by the caller.
+    """
+    body, content_encoding = compress_body(
+        body,
+        encoding,
+        current_app.config["COMPRESSION_LEVEL"],
+        current_app.config["COMPRESSION_MIN_SIZE"],
+    )
+    response = with_etag(json_response(body), etag)
+    if content_encoding is not None:
+        response.content_encoding = content_encoding
+    response.vary.add("Accept-Encoding")
+
+    return response
+
+
+def task_response(task: TaskInResponse) -> Response:
+    """
+    Builds the response holding a single task, tagged with its version.
+
+    Parameters:
+        - task (TaskInResponse): The task to return.
+
+    Returns:
+        - The response, whose status code is set by the caller.
+    """
+    body = encode_field("result", Task.json_cache.encode(task))
+
+    return with_etag(
+        json_response(body), make_task_etag(Task.get_epoch(), task["version"])
+    )
+
+
+def conflict_response(e: VersionConflictException) -> Response:
+    """
+    Builds the 412 response to a write whose `If-Match` version is no longer current, tagged
+    with the current version so that the client can tell what to fetch.
+
+    Parameters:
+        - e (VersionConflictException): The refused write.
+
+    Returns:
+        - The response, whose status code is set by the caller.
+    """
+    response = jsonify({"errors": e.message})
+    if e.current_version is not None:
+        response.set_etag(make_task_etag(Task.get_epoch(), e.current_version))
+
+    return response
+
+
+def iter_page(
+    limit: Optional[int],
+    after_id: int,
+    status: Optional[bool],
+    query: Optional[str],
+    trailer: Dict[str, Any],
+) -> Iterator[TaskInResponse]:
+    """
+    Yields up to `limit` tasks following `after_id` and records the next cursor in `trailer`.
+
+    Parameters:
+        - limit (Optional[int]): The maximum number of tasks to yield, or None for all of them.
+        - after_id (int): Only tasks with an ID strictly greater than this are yielded.
+        - status (Optional[bool]): When given, only tasks with this status are yielded.
+        - query (Optional[str]): When given, only tasks whose name matches it are yielded.
+        - trailer (Dict[str, Any]): Receives the `next_cursor` field once the page is exhausted.
+    """
+    count = 0
+    last_id = after_id
+    for task in Task.iter_tasks(after_id, status, query):
+        if count == limit:
+            trailer["next_cursor"] = encode_cursor(last_id)
+            return
+        yield task
+        count += 1
+        last_id = task["id"]
+
+    if limit is not None:
+        trailer["next_cursor"] = None
+
+
 @task_bp.route("/v1/tasks")
 def get_tasks() -> Tuple[Response, int]:
     """
-    Fetches and returns all tasks in JSON format.
+    Fetches and returns tasks in JSON format.
+
+    Query Parameters:
+        - limit (int, optional): The maximum number of tasks to return, between 1 and 1000.
+        - cursor (str, optional): The opaque `next_cursor` value of the previous page.
+        - stream (bool, optional): When "true", the response body is encoded incrementally.
+        - status (bool, optional): When "true" or "false", only tasks with this status are returned.
+        - q (str, optional): Only tasks whose name contains a word starting with each word of `q` are returned.
+        - since (str, optional): The `version` of a previous response, or "0" for every task. Only the tasks
+            created, updated or deleted after it are returned, at most `limit` of them.
+
+    Headers:
+        - If-None-Match (str, optional): The `ETag` of a previous response for the same URL.
+        - Accept-Encoding (str, optional): When it accepts gzip or deflate, large lists and streamed lists
+            are compressed with it.
+
+    Returns:
+        - On success, returns the tasks list with a 200 status code and an `ETag` header. When `limit` or `cursor`
+            is given, the response also contains `next_cursor`, which is null on the last page.
+        - With `since`, returns the created or updated tasks, the IDs of the deleted ones in `deleted`, the `version`
+            to pass as `since` next and whether more changes remain in `has_more`.
+        - If no task changed since the response tagged `If-None-Match`, returns an empty body with a 304 status code.
+        - If the changes since `since` are no longer known, returns a JSON object with an error message and a 410
+            status code: the client should fetch every task again.
+        - On invalid pagination or filter parameters, returns a JSON object with an error message and a 400 status code.
+        - On unexpected errors, returns a JSON object with an error message and a 500 status code.
+    """
+    try:
+        limit, after_id = parse_pagination_args(request.args)
+        status, query = parse_filter_args(request.args)
+        since = parse_since_arg(request.args)
+
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        etag = make_etag(Task.get_version(), encoding)
+        if is_not_modified(etag):
+            response = not_modified_response(etag)
+            response.vary.add("Accept-Encoding")
+            return response, 304
+
+        if since is not None:
+            tasks_list, deleted, version, has_more = Task.get_changes(since, limit)
+            body = encode_list(
+                "result",
+                Task.json_cache.encode_items(tasks_list),
+                {"deleted": deleted, "version": version, "has_more": has_more},
+            )
+            return list_response(body, encoding, etag), 200
+
+        if request.args.get("stream", "false").lower() == "true":
+            trailer: Dict[str, Any] = {}
+            body = stream_json_list(
+                "result",
+                iter_page(limit, after_id, status, query, trailer),
+                trailer,
+                encode=Task.json_cache.encode_items,
+            )
+            return list_response(body, encoding, etag), 200
+
+        if limit is None:
+            tasks_list = Task.get_all(status, query)
+            body = encode_list("result", Task.json_cache.encode_items(tasks_list))
+
+            return list_response(body, encoding, etag), 200
+
+        tasks_list, next_id = Task.get_page(limit, after_id, status, query)
+        next_cursor = encode_cursor(next_id) if next_id is not None else None
+        body = encode_list(
+            "result",
+            Task.json_cache.encode_items(tasks_list),
+            {"next_cursor": next_cursor},
+        )
+
+        return list_response(body, encoding, etag), 200
+    except (
+        InvalidPaginationException,
+        InvalidFilterException,
+        ChangesExpiredException,
+    ) as e:
+        return jsonify({"errors": e.message}), e.error_code
+    except Exception as e:
+        return jsonify({"errors": str(e)}), 500
+
+
+@task_bp.route("/v1/tasks/events")
+def get_task_events() -> Tuple[Response, int]:
+    """
+    Streams the creates, updates and deletes of tasks as Server-Sent Events, as they happen.
+
+    Each event has the type "created", "updated" or "deleted" and the task as its data, only its ID for a
+    deletion. A "reset" event means some events were missed, e.g. because the client fell too far behind, or
+    that the whole store changed: the client should fetch the task list again. Mutations made by other
+    processes sharing the storage are not included.
+
+    Headers:
+        - Last-Event-ID (str, optional): The ID of the last event received, sent by a reconnecting client
+            to receive the events that followed it.
+
+    Returns:
+        - An endless `text/event-stream` response with a 200 status code.
+    """
+    events = Task.events.subscribe(request.headers.get("Last-Event-ID"))
+    response = Response(events, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+
+    return response, 200
+
+
+@task_bp.route("/v1/tasks/stats")
+def get_task_stats() -> Tuple[Response, int]:
+    """
+    Returns the number of tasks, in total and per status.
+
+    Returns:
+        - On success, returns the counts with a 200 status code.
+        - On unexpected errors, returns a JSON object with an error message and a 500 status code.
+    """
+    try:
+        counts = Task.count_by_status()
+
+        return (
+            jsonify(
+                {
+                    "result": {
+                        "total": counts[False] + counts[True],
+                        "status": {"false": counts[False], "true": counts[True]},
+                    }
+                }
+            ),
+            200,
+        )
+    except Exception as e:
+        return jsonify({"errors": str(e)}), 500
+
+
+@task_bp.route("/v1/task/<int:id>")
+def get_task(id: int) -> Tuple[Response, int]:
+    """
+    Fetches a single task identified by its ID.
+
+    Parameters:
+        - id (int): The ID of the task to fetch.
+
+    Headers:
+        - If-None-Match (str, optional): The `ETag` of a previous response for the same task.
 
     Returns:
-        - On success, returns the tasks list with a 200 status code.
+        - On success, returns a JSON object containing the task with a 200 status code and an `ETag` header holding
+            its version.
+        - If the task did not change since the response tagged `If-None-Match`, returns an empty body with a 304
+            status code.
+        - If the task is not found, returns a JSON object with an error message and a 400 status code.
         - On unexpected errors, returns a JSON object with an error message and a 500 status code.
+
+    Raises:
+        - TaskNotFoundException: If no task with the specified ID exists.
     """
     try:
-        tasks_list = Task.get_all()
+        # Read before the task, so that a task is never tagged with a newer epoch than its own
+        epoch = Task.get_epoch()
+        task = Task.get(id)
+        etag = make_task_etag(epoch, task["version"])
+        if is_not_modified(etag):
+            return not_modified_response(etag), 304
 
-        return jsonify({"result": tasks_list}), 200
+        return task_response(task), 200
+    except TaskNotFoundException as e:
+        return jsonify({"errors": e.message}), e.error_code
     except Exception as e:
         return jsonify({"errors": str(e)}), 500
 
@@ -33,6 +367,10 @@ def create_task(validated_data: CreateTask) -> Tuple[Response, int]:
     """
     Creates a new task based on validated input data and returns it in JSON format.
 
+    With an `Idempotency-Key` header, the task is created only once per key: a retry, or a request sent while
+    the first one is being handled, is answered with the response to the first one and an `Idempotent-Replayed`
+    header.
+
     Parameters:
         - validated_data (CreateTask): The data validated by the `CreateTask` model. It is automatically
             injected by the `@validate_input(CreateTask)` decorator.
@@ -40,12 +378,35 @@ def create_task(validated_data: CreateTask) -> Tuple[Response, int]:
     Returns:
         - On successful creation, returns a JSON object containing the new task and a 201 status code.
         - On validation failure (handled by the decorator), returns a JSON object with error details and a 400 status code.
+        - If the `Idempotency-Key` header is malformed, returns a JSON object with an error message and a 400 status
+            code; if it was used for a different request, a 422 status code; if the first request with it is still
+            being handled, a 409 status code.
+        - If the storage has no room left for the task, returns a JSON object with an error message and a 507
+            status code.
         - On unexpected errors, returns a JSON object with an error message and a 500 status code.
     """
-    try:
+
+    def create() -> Tuple[int, bytes]:
         new_task = Task.create(name=validated_data.name)
+        return 201, encode_field("result", Task.json_cache.encode(new_task))
+
+    try:
+        key = parse_idempotency_key(request.headers.get("Idempotency-Key"))
+        idempotency = current_app.extensions.get("idempotency")
+        if key is None or idempotency is None:
+            status, body = create()
+            return json_response(body), status
 
-        return jsonify({"result": new_task}), 201
+        # Scoped by the store epoch, so that no task created before a reset is replayed
+        stored, replayed = idempotency.execute(
+            key, validated_data.model_dump_json(), create, scope=Task.get_epoch()
+        )
+        response = json_response(stored.body)
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return response, stored.status
+    except (IdempotencyKeyException, StorageFullException) as e:
+        return jsonify({"errors": e.message}), e.error_code
     except Exception as e:
         return jsonify({"errors": str(e)}), 500
 
@@ -60,14 +421,24 @@ def update_task(id: int, validated_data: UpdateTask) -> Tuple[Response, int]:
         - id (int): The ID of the task to be updated, obtained from the URL.
         - validated_data (UpdateTask): The data validated by the `UpdateTask` model, injected by the `@validate_input(UpdateTask)` decorator.
 
+    Headers:
+        - If-Match (str, optional): The `ETag` of the task as last read. The task is then only updated if no one
+            changed it since.
+
     Returns:
-        - On successful update, returns a JSON object containing the updated task and a 200 status code.
+        - On successful update, returns a JSON object containing the updated task and a 200 status code, with an
+            `ETag` header holding its new version.
         - If the ID in the URL does not match the ID in the request body, returns a 400 status code with an error message.
         - If the task to be updated is not found, returns a 400 status code with an error message.
+        - If the task no longer has the version in `If-Match`, returns a 412 status code with an error message and
+            an `ETag` header holding its current version.
+        - If the storage has no room left for the new name, returns a JSON object with an error message and a 507
+            status code.
         - On unexpected errors, returns a JSON object with an error message and a 500 status code.
 
     Raises:
         - TaskNotFoundException: If no task matches the provided ID.
+        - VersionConflictException: If the task does not have the version in `If-Match`.
     """
     try:
         # data validation
@@ -78,11 +449,65 @@ def update_task(id: int, validated_data: UpdateTask) -> Tuple[Response, int]:
             )
 
         # update task
-        updated_task = Task.update(id, validated_data.name, validated_data.status)
+        updated_task = Task.update(
+            id,
+            validated_data.name,
+            validated_data.status,
+            parse_if_match(request.headers.get("If-Match"), Task.get_epoch()),
+        )
 
-        return jsonify({"result": updated_task}), 200
-    except TaskNotFoundException as e:
+        return task_response(updated_task), 200
+    except (TaskNotFoundException, StorageFullException) as e:
         return jsonify({"errors": e.message}), e.error_code
+    except VersionConflictException as e:
+        return conflict_response(e), e.error_code
+    except Exception as e:
+        return jsonify({"errors": str(e)}), 500
+
+
+@task_bp.route("/v1/task/<int:id>", methods=["PATCH"])
+@validate_input(PatchTask)
+def patch_task(id: int, validated_data: PatchTask) -> Tuple[Response, int]:
+    """
+    Updates the name, the status or both of an existing task, keeping the other as it is, then returns the
+    updated task in JSON format.
+
+    Parameters:
+        - id (int): The ID of the task to be updated, obtained from the URL.
+        - validated_data (PatchTask): The data validated by the `PatchTask` model, injected by the `@validate_input(PatchTask)` decorator.
+
+    Headers:
+        - If-Match (str, optional): The `ETag` of the task as last read. The task is then only updated if no one
+            changed it since.
+
+    Returns:
+        - On successful update, returns a JSON object containing the updated task and a 200 status code, with an
+            `ETag` header holding its new version.
+        - If neither a name nor a status is given, returns a 400 status code with an error message.
+        - If the task to be updated is not found, returns a 400 status code with an error message.
+        - If the task no longer has the version in `If-Match`, returns a 412 status code with an error message and
+            an `ETag` header holding its current version.
+        - If the storage has no room left for the new name, returns a JSON object with an error message and a 507
+            status code.
+        - On unexpected errors, returns a JSON object with an error message and a 500 status code.
+
+    Raises:
+        - TaskNotFoundException: If no task matches the provided ID.
+        - VersionConflictException: If the task does not have the version in `If-Match`.
+    """
+    try:
+        updated_task = Task.patch(
+            id,
+            validated_data.name,
+            validated_data.status,
+            parse_if_match(request.headers.get("If-Match"), Task.get_epoch()),
+        )
+
+        return task_response(updated_task), 200
+    except (TaskNotFoundException, StorageFullException) as e:
+        return jsonify({"errors": e.message}), e.error_code
+    except VersionConflictException as e:
+        return conflict_response(e), e.error_code
     except Exception as e:
         return jsonify({"errors": str(e)}), 500
 
@@ -111,3 +536,165 @@ def delete_task(id: int) -> Tuple[Response, int]:
         return jsonify({"errors": e.message}), e.error_code
     except Exception as e:
         return jsonify({"errors": str(e)}), 500
+
+
+def apply_operations(
+    validated_data: List[Union[BaseModel, str]],
+) -> List[Dict[str, Any]]:
+    """
+    Applies the valid operations of a batch and describes the outcome of each one.
+
+    Parameters:
+        - validated_data (List[Union[BaseModel, str]]): The operations validated as `CreateTaskOperation`,
+            `UpdateTaskOperation` or `DeleteTaskOperation`, with invalid ones replaced by their error message.
+
+    Returns:
+        - One entry per operation, in order, with the status code and body the matching single-task
+            endpoint would have returned.
+    """
+    operations = []
+    for operation in validated_data:
+        if isinstance(operation, CreateTaskOperation):
+            operations.append((OP_CREATE, 0, operation.name, False))
+        elif isinstance(operation, UpdateTaskOperation):
+            operations.append(
+                (OP_UPDATE, operation.id, operation.name, operation.status)
+            )
+        elif isinstance(operation, BaseModel):
+            operations.append((OP_DELETE, operation.id, "", False))
+
+    outcomes = iter(Task.apply_batch(operations))
+    results = []
+    for operation in validated_data:
+        if not isinstance(operation, BaseModel):
+            results.append({"status": 400, "errors": operation})
+            continue
+
+        outcome = next(outcomes)
+        if isinstance(outcome, TaskNotFoundException):
+            results.append({"status": outcome.error_code, "errors": outcome.message})
+        elif outcome is True:
+            results.append(
+                {"status": 200, "message": f"Task #{operation.id} has been deleted"}
+            )
+        else:
+            status_code = 201 if operation.op == "create" else 200
+            results.append({"status": status_code, "result": outcome})
+
+    return results
+
+
+@task_bp.route("/v1/tasks:batch", methods=["POST"])
+@validate_batch_input(TaskOperation)
+def batch_tasks(validated_data: List[Union[BaseModel, str]]) -> Tuple[Response, int]:
+    """
+    Applies an array of create, update and delete operations in a single request.
+
+    Parameters:
+        - validated_data (List[Union[BaseModel, str]]): The operations validated as `CreateTaskOperation`,
+            `UpdateTaskOperation` or `DeleteTaskOperation`, with invalid ones replaced by their error message.
+            It is injected by the `@validate_batch_input` decorator.
+
+    Returns:
+        - A JSON object whose `result` holds one entry per operation, in order, each with the status code
+            and body the matching single-task endpoint would have returned, and a 200 status code.
+        - If the body is not a JSON array or holds more than 1000 operations, returns a 400 status code with an error message.
+        - If the storage has no room left for the batch, none of whose operations is then applied, returns a JSON object with an error message and a 507
+            status code.
+        - On unexpected errors, returns a JSON object with an error message and a 500 status code.
+    """
+    try:
+        results = apply_operations(validated_data)
+
+        return jsonify({"result": results}), 200
+    except StorageFullException as e:
+        return jsonify({"errors": e.message}), e.error_code
+    except Exception as e:
+        return jsonify({"errors": str(e)}), 500
+
+
+def import_batch(batch: List[ImportTask]) -> None:
+    """
+    Creates the tasks of an import batch in a single storage batch.
+
+    Parameters:
+        - batch (List[ImportTask]): The validated lines of the import.
+    """
+    if batch:
+        Task.apply_batch([(OP_CREATE, 0, task.name, task.status) for task in batch])
+
+
+@task_bp.route("/v1/tasks/import", methods=["POST"])
+def import_tasks() -> Tuple[Response, int]:
+    """
+    Creates tasks from a newline-delimited JSON body, one `{"name": ..., "status": ...}` object per line.
+
+    The body is read, validated and written while it is received, in batches of 1000 tasks, without being
+    buffered, so it may hold any number of tasks. The tasks are given new IDs: the `id` and `version` fields of
+    lines written by the export are ignored.
+
+    Returns:
+        - A JSON object whose `result` holds the number of tasks created in `imported`, the number of invalid
+            lines in `failed` and the first 100 of them, with their line number, in `errors`, and a 200 status code.
+        - If the body is not declared as NDJSON, returns a 400 status code with an error message.
+        - If the storage has no room left for a batch, returns a JSON object with an error message and a 507
+            status code.
+        - On unexpected errors, returns a JSON object with an error message and a 500 status code. The batches
+            written until then are kept.
+    """
+    try:
+        check_ndjson_media_type(request.mimetype)
+        reader = NDJSONReader(ImportTask)
+        while chunk := request.stream.read(READ_CHUNK_SIZE):
+            for batch in reader.feed(chunk):
+                import_batch(batch)
+        import_batch(reader.close())
+
+        return jsonify({"result": reader.report()}), 200
+    except (InvalidInputException, StorageFullException) as e:
+        return jsonify({"errors": e.message}), e.error_code
+    except Exception as e:
+        return jsonify({"errors": str(e)}), 500
+
+
+@task_bp.route("/v1/tasks/export")
+def export_tasks() -> Tuple[Response, int]:
+    """
+    Streams every task as newline-delimited JSON, one task per line in ascending ID order, in a format
+    `POST /v1/tasks/import` reads back.
+
+    The tasks are read and encoded while the response is sent, so the memory used does not depend on the
+    number of tasks.
+
+    Query Parameters:
+        - status (bool, optional): When "true" or "false", only tasks with this status are exported.
+        - q (str, optional): Only tasks whose name contains a word starting with each word of `q` are exported.
+
+    Headers:
+        - Accept-Encoding (str, optional): When it accepts gzip or deflate, the body is compressed with it.
+
+    Returns:
+        - On success, returns the tasks with a 200 status code.
+        - On invalid filter parameters, returns a JSON object with an error message and a 400 status code.
+        - On unexpected errors, returns a JSON object with an error message and a 500 status code.
+    """
+    try:
+        status, query = parse_filter_args(request.args)
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        body, content_encoding = compress_body(
+            stream_ndjson(
+                Task.iter_tasks(0, status, query), encode=Task.json_cache.encode
+            ),
+            encoding,
+            current_app.config["COMPRESSION_LEVEL"],
+        )
+        response = Response(body, mimetype=NDJSON_MEDIA_TYPE)
+        if content_encoding is not None:
+            response.content_encoding = content_encoding
+        response.vary.add("Accept-Encoding")
+
+        return response, 200
+    except InvalidFilterException as e:
+        return jsonify({"errors": e.message}), e.error_code
+    except Exception as e:
+        return jsonify({"errors": str(e)}), 500
@@ -0,0 +1,17 @@
+class ChangesExpiredException(Exception):
+    """
+    Exception raised when the changes since a version can no longer be listed, because the
+    tombstones they include were compacted or the version predates a restart or reset.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+    """
+
+    def __init__(
+        self,
+        message="Changes since this version are no longer available, fetch every task again.",
+        error_code=410,
+    ):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
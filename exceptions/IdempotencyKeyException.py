@@ -0,0 +1,14 @@
+class IdempotencyKeyException(Exception):
+    """
+    Exception raised when an `Idempotency-Key` header cannot be honoured: it is malformed, was
+    used for a different request, or its first request is still being processed.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+        - error_code (int): The HTTP status code to respond with.
+    """
+
+    def __init__(self, message="Invalid Idempotency-Key", error_code=422):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
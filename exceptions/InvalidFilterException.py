@@ -0,0 +1,12 @@
+class InvalidFilterException(Exception):
+    """
+    Exception raised when filter query parameters are malformed.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+    """
+
+    def __init__(self, message="Invalid filter parameters", error_code=400):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
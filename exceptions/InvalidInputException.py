@@ -0,0 +1,12 @@
+class InvalidInputException(Exception):
+    """
+    Exception raised when a request body is not valid input for the endpoint.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+    """
+
+    def __init__(self, message="Invalid input", error_code=400):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
@@ -0,0 +1,12 @@
+class InvalidPaginationException(Exception):
+    """
+    Exception raised when pagination query parameters are malformed.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+    """
+
+    def __init__(self, message="Invalid pagination parameters", error_code=400):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
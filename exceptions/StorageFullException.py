@@ -0,0 +1,12 @@
+class StorageFullException(Exception):
+    """
+    Exception raised when a fixed-size storage has no room left for a task.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+    """
+
+    def __init__(self, message="Storage is full", error_code=507):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
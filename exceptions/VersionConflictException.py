@@ -0,0 +1,20 @@
+class VersionConflictException(Exception):
+    """
+    Exception raised when a task is written with an expected version it no longer has, because
+    another writer changed it since it was read.
+
+    Attributes:
+        - message (str): The error message describing the exception.
+        - current_version (Optional[int]): The version the task has, when known.
+    """
+
+    def __init__(
+        self,
+        message="The task was changed since it was read.",
+        error_code=412,
+        current_version=None,
+    ):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
+        self.current_version = current_version
@@ -0,0 +1,157 @@
+import asyncio
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from models.tasks import Task, TaskInResponse
+from storage.memory import InMemoryBackend
+
+T = TypeVar("T")
+
+
+class AsyncTask:
+    """
+    An awaitable facade over `Task` for handlers running on an event loop.
+
+    Operations on the in-memory backend only touch dictionaries and briefly held locks, so they
+    run inline: handing them to a thread would cost more than the operation itself. Everything
+    that may wait, i.e. the SQLite and shared backends, the write-behind backend whose writes
+    wait for its flusher when too many tasks are dirty, waiting for the write-ahead log to be
+    fsynced, or scanning a large store, runs in the default executor so the loop keeps serving
+    other requests meanwhile.
+
+    Attributes:
+        inline_scan_limit (int): The largest store whose full listing is built on the loop.
+
+    Methods:
+        run: Calls a function inline or in the executor, depending on the current storage.
+        get_all: Retrieves all tasks, optionally filtered.
+        get: Retrieves a single task by its ID.
+        get_page: Retrieves a bounded page of tasks following a given ID.
+        get_changes: Retrieves the tasks created, updated or deleted after a version.
+        count_by_status: Counts the tasks per status.
+        create: Inserts a new task.
+        update: Updates an existing task.
+        patch: Updates the given details of an existing task.
+        delete: Removes a task.
+        iterate: Drains a blocking iterator without blocking the loop.
+    """
+
+    inline_scan_limit: int = 10_000
+
+    @classmethod
+    def _is_inline(cls) -> bool:
+        wal = Task.wal
+        return isinstance(Task.backend, InMemoryBackend) and (
+            wal is None or not wal.sync
+        )
+
+    @classmethod
+    async def run(cls, function: Callable[..., T], *args) -> T:
+        """
+        Calls `function` on the loop when the storage never blocks, in the executor otherwise.
+
+        Parameters:
+            function (Callable[..., T]): The function to call.
+            args: The positional arguments of the call.
+
+        Returns:
+            The value returned by `function`.
+        """
+        if cls._is_inline():
+            return function(*args)
+
+        return await asyncio.to_thread(function, *args)
+
+    @classmethod
+    async def get_all(
+        cls, status: Optional[bool] = None, query: Optional[str] = None
+    ) -> List[TaskInResponse]:
+        if cls._is_inline() and Task.backend.count() <= cls.inline_scan_limit:
+            return Task.get_all(status, query)
+
+        return await asyncio.to_thread(Task.get_all, status, query)
+
+    @classmethod
+    async def get(cls, task_id: int) -> TaskInResponse:
+        return await cls.run(Task.get, task_id)
+
+    @classmethod
+    async def get_page(
+        cls,
+        limit: int,
+        after_id: int = 0,
+        status: Optional[bool] = None,
+        query: Optional[str] = None,
+    ) -> Tuple[List[TaskInResponse], Optional[int]]:
+        return await cls.run(Task.get_page, limit, after_id, status, query)
+
+    @classmethod
+    async def get_changes(
+        cls, since: str, limit: Optional[int] = None
+    ) -> Tuple[List[TaskInResponse], List[int], str, bool]:
+        if cls._is_inline() and Task.backend.count() <= cls.inline_scan_limit:
+            return Task.get_changes(since, limit)
+
+        return await asyncio.to_thread(Task.get_changes, since, limit)
+
+    @classmethod
+    async def count_by_status(cls) -> Dict[bool, int]:
+        return await cls.run(Task.count_by_status)
+
+    @classmethod
+    async def create(cls, name: str) -> TaskInResponse:
+        return await cls.run(Task.create, name)
+
+    @classmethod
+    async def update(
+        cls,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> TaskInResponse:
+        return await cls.run(Task.update, task_id, name, status, expected_version)
+
+    @classmethod
+    async def patch(
+        cls,
+        task_id: int,
+        name: Optional[str] = None,
+        status: Optional[bool] = None,
+        expected_version: Optional[int] = None,
+    ) -> TaskInResponse:
+        return await cls.run(Task.patch, task_id, name, status, expected_version)
+
+    @classmethod
+    async def delete(cls, task_id: int) -> bool:
+        return await cls.run(Task.delete, task_id)
+
+    @classmethod
+    async def iterate(cls, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """
+        Yields the items of a blocking iterator, e.g. the chunks of a streamed response. Between
+        items, control returns to the loop so that a long stream does not starve other requests.
+
+        Parameters:
+            iterator (Iterator[T]): The iterator to drain.
+
+        Returns:
+            An asynchronous iterator of the same items.
+        """
+        done = object()
+        while True:
+            if cls._is_inline():
+                item = next(iterator, done)
+                await asyncio.sleep(0)
+            else:
+                item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
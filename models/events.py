@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import uuid
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from utils.serialization import dumps
+
+# Seconds between the comments sent to idle subscribers, so dead connections are noticed
+HEARTBEAT_INTERVAL = 15.0
+
+# Milliseconds clients are told to wait before reconnecting
+RETRY_MS = 3000
+
+# Frames sent to a subscriber in a single chunk at most, when it is catching up
+MAX_FRAMES_PER_CHUNK = 256
+
+_KEEP_ALIVE = b": keep-alive\n\n"
+
+
+class _LoopWaiters:
+    """
+    The subscribers waiting on one event loop: the event set by the next publication or
+    heartbeat, their number, and the timer of the next heartbeat.
+    """
+
+    __slots__ = ("published", "count", "heartbeat")
+
+    def __init__(self):
+        self.published = asyncio.Event()
+        self.count = 0
+        self.heartbeat: Optional[asyncio.TimerHandle] = None
+
+
+class TaskEventLog:
+    """
+    Keeps the latest task mutations as Server-Sent Events frames in a ring buffer, from which
+    every subscriber reads at its own pace.
+
+    Each event is encoded once, when published. A subscriber only holds the ID of the last
+    event it was sent, so an idle subscriber costs a cursor and a waiting thread or coroutine.
+    A subscriber that falls further behind than the buffer holds, e.g. because its connection
+    is slow, or that resumes from an event no longer buffered, is sent a `reset` event instead
+    of the events it missed, telling it to fetch the task list again. Memory use is therefore
+    bounded by the capacity, whatever the number and the speed of the subscribers.
+
+    Event IDs are prefixed with an identifier of this process, so an ID sent before a restart
+    is not mistaken for one of the new events.
+
+    Attributes:
+        capacity (int): The number of events buffered.
+        heartbeat (float): The seconds after which an idle subscriber is sent a comment, so that
+            dead connections are noticed.
+        last_id (int): The number of the latest event, 0 before the first one.
+        subscribers (int): The number of connected subscribers.
+    """
+
+    def __init__(self, capacity: int = 10_000, heartbeat: float = HEARTBEAT_INTERVAL):
+        self.capacity = capacity
+        self.heartbeat = heartbeat
+        self.last_id = 0
+        self.subscribers = 0
+        self._frames: List[bytes] = [b""] * capacity
+        self._epoch = uuid.uuid4().hex[:12]
+        self._condition = threading.Condition()
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopWaiters] = {}
+
+    def publish(self, event: str, data: object) -> None:
+        """
+        Appends an event to the buffer and wakes the subscribers.
+
+        Parameters:
+            event (str): The event type, e.g. "created".
+            data (object): The JSON-serializable payload of the event.
+        """
+        with self._condition:
+            self.last_id += 1
+            self._frames[self.last_id % self.capacity] = (
+                b"id: %s-%d\nevent: %s\ndata: %s\n\n"
+                % (
+                    self._epoch.encode(),
+                    self.last_id,
+                    event.encode(),
+                    dumps(data),
+                )
+            )
+            self._condition.notify_all()
+            loops = list(self._loops)
+
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:
+                # The loop was closed while its subscribers were being cancelled
+                pass
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Yields the event stream of a subscriber, blocking the calling thread between events.
+
+        Parameters:
+            last_event_id (Optional[str]): The `Last-Event-ID` header of a reconnecting client.
+                Events following it are sent first. Without it, only new events are sent.
+
+        Returns:
+            An endless iterator of Server-Sent Events chunks.
+        """
+        with self._condition:
+            self.subscribers += 1
+            chunk, cursor = self._start(last_event_id)
+        try:
+            yield chunk
+            while True:
+                with self._condition:
+                    if cursor == self.last_id:
+                        self._condition.wait(self.heartbeat)
+                    chunk, cursor = self._read(cursor)
+                yield chunk or _KEEP_ALIVE
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    async def subscribe_async(
+        self, last_event_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yields the event stream of a subscriber like `subscribe`, waiting on the running event
+        loop between events. All the subscribers of a loop wait on one `asyncio.Event`, set by
+        publications and by a single heartbeat timer, so neither a publication nor the passing
+        of time costs anything per idle subscriber but its wake-up.
+        """
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            self.subscribers += 1
+            waiters = self._loops.get(loop)
+            if waiters is None:
+                waiters = self._loops[loop] = _LoopWaiters()
+                waiters.heartbeat = loop.call_later(self.heartbeat, self._beat, loop)
+            waiters.count += 1
+            chunk, cursor = self._start(last_event_id)
+        try:
+            yield chunk
+            while True:
+                # Taken before reading the last ID, so a publication in between still sets it
+                published = waiters.published
+                if cursor == self.last_id:
+                    await published.wait()
+                with self._condition:
+                    chunk, cursor = self._read(cursor)
+                yield chunk or _KEEP_ALIVE
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+                waiters.count -= 1
+                if waiters.count == 0:
+                    waiters.heartbeat.cancel()
+                    del self._loops[loop]
+
+    def _wake(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Sets the event the subscribers of `loop` wait on, and replaces it for the next
+        publication. Runs on `loop`.
+        """
+        waiters = self._loops.get(loop)
+        if waiters is not None:
+            published, waiters.published = waiters.published, asyncio.Event()
+            published.set()
+
+    def _beat(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Wakes the subscribers of `loop`, which send a comment unless an event arrived, and
+        schedules the next heartbeat. Runs on `loop`.
+        """
+        self._wake(loop)
+        waiters = self._loops.get(loop)
+        if waiters is not None:
+            waiters.heartbeat = loop.call_later(self.heartbeat, self._beat, loop)
+
+    def _start(self, last_event_id: Optional[str]) -> Tuple[bytes, int]:
+        """
+        Returns the first chunk sent to a subscriber and the cursor it continues from. The
+        caller holds the lock.
+        """
+        head = b"retry: %d\n\n" % RETRY_MS
+        if last_event_id is None:
+            return head, self.last_id
+
+        epoch, _, number = last_event_id.strip().rpartition("-")
+        if epoch != self._epoch or not number.isdigit():
+            return head + self._reset_frame(), self.last_id
+        chunk, cursor = self._read(int(number))
+        return head + chunk, cursor
+
+    def _read(self, cursor: int) -> Tuple[bytes, int]:
+        """
+        Returns the frames following event `cursor` and the new cursor, or a `reset` frame if
+        some of them are no longer buffered. The caller holds the lock.
+        """
+        missed = self.last_id - cursor
+        if missed == 0:
+            return b"", cursor
+        if missed < 0 or missed > self.capacity:
+            return self._reset_frame(), self.last_id
+
+        end = min(self.last_id, cursor + MAX_FRAMES_PER_CHUNK)
+        frames = [
+            self._frames[event_id % self.capacity]
+            for event_id in range(cursor + 1, end + 1)
+        ]
+        return b"".join(frames), end
+
+    def _reset_frame(self) -> bytes:
+        return b"id: %s-%d\nevent: reset\ndata: {}\n\n" % (
+            self._epoch.encode(),
+            self.last_id,
+        )
@@ -0,0 +1,465 @@
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from heapq import heapify, heappop
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Tombstones are kept a week by default, so that clients syncing daily never miss a deletion
+DEFAULT_TOMBSTONE_RETENTION = 7 * 24 * 3600.0
+
+# Number of items per chunk of a sorted list, which splits chunks twice that long
+_CHUNK_SIZE = 1000
+
+# The change log is only compacted once it has this many entries, and twice the live ones
+_MIN_LOG_SIZE = 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into case-insensitive word tokens.
+    """
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+class SortedList:
+    """
+    A sorted list of distinct items, such as tokens or task IDs, stored as consecutive sorted
+    chunks.
+
+    Inserting into or removing from a flat sorted list moves every item after the position,
+    which once it holds millions of items costs more than the rest of a write. Here only the
+    items of one chunk of at most `2 * _CHUNK_SIZE` are moved, and the chunk is found by
+    binary search over the last item of each chunk.
+
+    Not thread-safe, the indexes guard it with their lock.
+    """
+
+    def __init__(self):
+        self._chunks: List[List[Any]] = []
+        # The last item of each chunk
+        self._maxes: List[Any] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, item: Any) -> None:
+        """
+        Inserts an item, which must not be in the list already.
+        """
+        self._length += 1
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+            return
+
+        index = min(bisect_left(self._maxes, item), len(self._maxes) - 1)
+        chunk = self._chunks[index]
+        insort(chunk, item)
+        self._maxes[index] = chunk[-1]
+        if len(chunk) > 2 * _CHUNK_SIZE:
+            self._chunks[index : index + 1] = [
+                chunk[:_CHUNK_SIZE],
+                chunk[_CHUNK_SIZE:],
+            ]
+            self._maxes.insert(index, chunk[_CHUNK_SIZE - 1])
+
+    def remove(self, item: Any) -> None:
+        """
+        Removes an item, which must be in the list.
+        """
+        self._length -= 1
+        index = bisect_left(self._maxes, item)
+        chunk = self._chunks[index]
+        del chunk[bisect_left(chunk, item)]
+        if chunk:
+            self._maxes[index] = chunk[-1]
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+
+    def iter_from(self, item: Any) -> Iterator[Any]:
+        """
+        Yields the items greater than or equal to `item`, in ascending order.
+        """
+        index = bisect_left(self._maxes, item)
+        if index == len(self._chunks):
+            return
+        chunk = self._chunks[index]
+        yield from chunk[bisect_left(chunk, item) :]
+        for chunk in self._chunks[index + 1 :]:
+            yield from chunk
+
+    def chunk_after(self, item: Any) -> List[Any]:
+        """
+        Returns the items greater than `item` that share a chunk with the first of them, in
+        ascending order, or an empty list when no item is greater. Unlike `iter_from`, the
+        result is a copy, so the list can be modified while it is used.
+        """
+        index = bisect_right(self._maxes, item)
+        if index == len(self._chunks):
+            return []
+        chunk = self._chunks[index]
+        return chunk[bisect_right(chunk, item) :]
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._maxes.clear()
+        self._length = 0
+
+
+def _iter_ascending(items: List[int]) -> Iterator[int]:
+    """
+    Lazily yields the items in ascending order, only ordering those consumed.
+    """
+    heapify(items)
+    while items:
+        yield heappop(items)
+
+
+class StatusIndex:
+    """
+    A secondary index mapping each task status to the IDs of the tasks having it.
+
+    The IDs of each status are kept both in a set, for membership tests and counts, and in a
+    sorted list, so that a page of IDs following a given one is found by binary search. The
+    structures are updated together under a lock, which readers hold only while copying one
+    chunk of IDs. Writers of the same task must be serialized by the caller, as `Task` does
+    with its lock stripes.
+
+    Attributes:
+        ids (Dict[bool, Set[int]]): The IDs of the tasks, keyed by status.
+        sorted_ids (Dict[bool, SortedList]): The same IDs in ascending order.
+    """
+
+    def __init__(self):
+        self.ids: Dict[bool, Set[int]] = {False: set(), True: set()}
+        self.sorted_ids: Dict[bool, SortedList] = {
+            False: SortedList(),
+            True: SortedList(),
+        }
+        self._lock = threading.Lock()
+
+    def set(self, task_id: int, status: bool) -> None:
+        """
+        Records the status of a created or updated task.
+        """
+        with self._lock:
+            if task_id in self.ids[status]:
+                return
+            self._unlink(task_id, not status)
+            self.ids[status].add(task_id)
+            self.sorted_ids[status].add(task_id)
+
+    def remove(self, task_id: int) -> None:
+        """
+        Forgets a deleted task.
+        """
+        with self._lock:
+            self._unlink(task_id, False)
+            self._unlink(task_id, True)
+
+    def count(self, status: bool) -> int:
+        """
+        Returns the number of tasks with the given status in constant time.
+        """
+        return len(self.ids[status])
+
+    def iter_ids(self, status: bool, after_id: int = 0) -> Iterator[int]:
+        """
+        Lazily yields the IDs of the tasks with the given status that are greater than
+        `after_id`, in ascending order.
+
+        The IDs are copied a chunk at a time, each found by binary search from the last ID
+        yielded, so a page of `limit` IDs costs O(log n + limit) whatever the position of
+        `after_id`. IDs added or removed during the iteration may or may not be yielded.
+        """
+        sorted_ids = self.sorted_ids[status]
+        while True:
+            with self._lock:
+                chunk = sorted_ids.chunk_after(after_id)
+            if not chunk:
+                return
+            yield from chunk
+            after_id = chunk[-1]
+
+    def clear(self) -> None:
+        with self._lock:
+            for status in (False, True):
+                self.ids[status].clear()
+                self.sorted_ids[status].clear()
+
+    def _unlink(self, task_id: int, status: bool) -> None:
+        if task_id in self.ids[status]:
+            self.ids[status].remove(task_id)
+            self.sorted_ids[status].remove(task_id)
+
+
+class NameIndex:
+    """
+    A full-text index over task names, combining an inverted index with a prefix index.
+
+    The inverted index maps each word token to the IDs of the tasks whose name contains it.
+    The prefix index is the sorted list of distinct tokens, so all tokens starting with a
+    prefix are found by binary search. A query matches a task when every query token is a
+    prefix of one of the task's tokens.
+
+    The structures are updated together under a lock, which also guards searches; both hold
+    it only briefly.
+
+    Attributes:
+        postings (Dict[str, Set[int]]): The IDs of the tasks containing each token.
+        sorted_tokens (SortedList): The distinct tokens in ascending order.
+        task_tokens (Dict[int, FrozenSet[str]]): The tokens of each indexed task, used to
+            unindex a task when its name changes or it is deleted.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = {}
+        self.sorted_tokens = SortedList()
+        self.task_tokens: Dict[int, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def matches(name: str, query: str) -> bool:
+        """
+        Tells whether a name matches a query without using the index, e.g. for scans.
+        """
+        return NameIndex.matcher(query)(name)
+
+    @staticmethod
+    def matcher(query: str) -> Callable[[str], bool]:
+        """
+        Returns a function telling whether a name matches a query, which tokenizes the query
+        once for a scan testing many names.
+        """
+        prefixes = tokenize(query)
+
+        def matches(name: str) -> bool:
+            name_tokens = tokenize(name)
+            return all(
+                any(token.startswith(prefix) for token in name_tokens)
+                for prefix in prefixes
+            )
+
+        return matches
+
+    def set(self, task_id: int, name: str) -> None:
+        """
+        Indexes the name of a created or updated task.
+        """
+        tokens = frozenset(tokenize(name))
+        with self._lock:
+            old_tokens = self.task_tokens.get(task_id, frozenset())
+            if tokens == old_tokens:
+                return
+            self._unlink(task_id, old_tokens - tokens)
+            for token in tokens - old_tokens:
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = set()
+                    self.sorted_tokens.add(token)
+                postings.add(task_id)
+            self.task_tokens[task_id] = tokens
+
+    def remove(self, task_id: int) -> None:
+        """
+        Forgets a deleted task.
+        """
+        with self._lock:
+            self._unlink(task_id, self.task_tokens.pop(task_id, frozenset()))
+
+    def search(self, query: str, after_id: int = 0) -> Iterator[int]:
+        """
+        Yields the IDs of the tasks matching `query` that are greater than `after_id`,
+        in ascending order.
+
+        Each query token selects the posting sets of the index tokens it prefixes. Starting
+        from the IDs after `after_id` in the smallest selection, the candidates are narrowed
+        down with set intersections, so the cost is bounded by the most selective query token
+        rather than by the number of tasks. The matches are then heapified and popped as they
+        are consumed, so a page of p IDs is ordered in O(k + p log k) for k matches
+        rather than all of them being sorted.
+        """
+        prefixes = set(tokenize(query))
+        if not prefixes:
+            return iter(())
+
+        with self._lock:
+            selections = sorted(
+                (self._postings_with_prefix(prefix) for prefix in prefixes),
+                key=lambda postings: sum(map(len, postings)),
+            )
+            result = {i for postings in selections[0] for i in postings if i > after_id}
+            for postings in selections[1:]:
+                if not result:
+                    break
+                if len(postings) == 1:
+                    result &= postings[0]
+                elif len(result) * len(postings) < sum(map(len, postings)):
+                    result = {i for i in result if any(i in p for p in postings)}
+                else:
+                    result &= set().union(*postings)
+
+        return _iter_ascending(list(result))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.postings.clear()
+            self.sorted_tokens.clear()
+            self.task_tokens.clear()
+
+    def _postings_with_prefix(self, prefix: str) -> List[Set[int]]:
+        postings = []
+        for token in self.sorted_tokens.iter_from(prefix):
+            if not token.startswith(prefix):
+                break
+            postings.append(self.postings[token])
+
+        return postings
+
+    def _unlink(self, task_id: int, tokens: FrozenSet[str]) -> None:
+        for token in tokens:
+            postings = self.postings[token]
+            postings.discard(task_id)
+            if not postings:
+                del self.postings[token]
+                self.sorted_tokens.remove(token)
+
+
+class ChangeIndex:
+    """
+    A version-ordered index of the tasks, recording the version of the latest mutation of each
+    task and a tombstone for each deleted one, so that the changes since a version are found
+    without scanning every task.
+
+    The change log lists (version, task ID) pairs in ascending version order, one per
+    mutation. An entry is superseded once its task is modified again, and the log is compacted
+    once most of its entries are. Tombstones are dropped once older than the retention; the
+    changes since a version older than a dropped tombstone can then no longer be listed, which
+    `floor` records.
+
+    Versions must be recorded in ascending order, which `Task` ensures by allocating and
+    recording them under one lock. The index has its own lock, held only briefly.
+
+    Attributes:
+        tombstone_retention (Optional[float]): The seconds a tombstone is kept, None to keep
+            tombstones until the index is cleared.
+        latest (Dict[int, Tuple[int, bool]]): The version of the latest mutation of each task,
+            and whether it deleted the task.
+        tombstones (OrderedDict[int, float]): The monotonic time each deleted task was deleted
+            at, oldest first.
+        floor (int): The lowest version the changes since which can be listed.
+        last_version (int): The version of the latest mutation recorded.
+    """
+
+    def __init__(
+        self, tombstone_retention: Optional[float] = DEFAULT_TOMBSTONE_RETENTION
+    ):
+        self.tombstone_retention = tombstone_retention
+        self.latest: Dict[int, Tuple[int, bool]] = {}
+        self.tombstones: "OrderedDict[int, float]" = OrderedDict()
+        self.floor = 0
+        self.last_version = 0
+        self._versions: List[int] = []
+        self._ids: List[int] = []
+        self._lock = threading.Lock()
+
+    def record(self, task_id: int, version: int, deleted: bool) -> None:
+        """
+        Records a mutation of a task, with a version greater than any recorded before.
+        """
+        with self._lock:
+            self.latest[task_id] = (version, deleted)
+            self._versions.append(version)
+            self._ids.append(task_id)
+            self.last_version = version
+            if deleted:
+                self.tombstones[task_id] = time.monotonic()
+            self._expire_tombstones()
+            if len(self._versions) >= max(_MIN_LOG_SIZE, 2 * len(self.latest)):
+                self._compact_log()
+
+    def changes_since(
+        self, version: int, limit: Optional[int] = None
+    ) -> Optional[Tuple[List[Tuple[int, bool]], int, bool]]:
+        """
+        Lists the tasks modified after `version`, in the order of their latest mutation.
+
+        Parameters:
+            version (int): The version the client is in sync with.
+            limit (Optional[int]): The maximum number of tasks to list, or None for all of them.
+
+        Returns:
+            The (task ID, deleted) pairs, the version the client is in sync with once it
+            applied them, and whether further changes remain; or None if the changes since
+            `version` can no longer be listed.
+        """
+        with self._lock:
+            self._expire_tombstones()
+            if version < self.floor:
+                return None
+
+            changes: List[Tuple[int, bool]] = []
+            for i in range(bisect_right(self._versions, version), len(self._versions)):
+                task_id, entry_version = self._ids[i], self._versions[i]
+                entry = self.latest.get(task_id)
+                if entry is None or entry[0] != entry_version:
+                    continue
+                if len(changes) == limit:
+                    return changes, version, True
+                changes.append((task_id, entry[1]))
+                version = entry_version
+
+            return changes, max(version, self.last_version), False
+
+    def compact(self) -> None:
+        """
+        Drops the expired tombstones and the superseded entries of the change log.
+        """
+        with self._lock:
+            self._expire_tombstones()
+            self._compact_log()
+
+    def clear(self, floor: int = 0) -> None:
+        """
+        Forgets every task, e.g. when the storage is replaced.
+
+        Parameters:
+            floor (int): The version of the new state, the lowest the changes since which
+                can be listed from now on.
+        """
+        with self._lock:
+            self.latest.clear()
+            self.tombstones.clear()
+            self._versions.clear()
+            self._ids.clear()
+            self.floor = floor
+            self.last_version = floor
+
+    def _expire_tombstones(self) -> None:
+        if self.tombstone_retention is None:
+            return
+
+        deadline = time.monotonic() - self.tombstone_retention
+        while self.tombstones:
+            task_id, deleted_at = next(iter(self.tombstones.items()))
+            if deleted_at > deadline:
+                break
+            del self.tombstones[task_id]
+            self.floor = max(self.floor, self.latest.pop(task_id)[0])
+
+    def _compact_log(self) -> None:
+        entries = sorted(
+            (version, task_id) for task_id, (version, _) in self.latest.items()
+        )
+        self._versions = [version for version, _ in entries]
+        self._ids = [task_id for _, task_id in entries]
@@ -0,0 +1,86 @@
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from utils.serialization import FAST_ENCODER, dumps, encode_items
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse
+
+
+class TaskJSONCache:
+    """
+    Keeps the encoded JSON of each task, so responses are assembled from bytes instead of
+    encoding every task on every request.
+
+    Each entry remembers the version, name and status it was encoded from and is only used when
+    they still match the task being encoded. A fragment is therefore never stale, even when a
+    reader caches a task that a concurrent writer has just replaced. Writers still discard
+    the entries of the tasks they change, so the cache does not hold on to old names.
+
+    With orjson installed, encoding a whole list in one call is faster than looking up every
+    task, so the cache is bypassed and stays empty. orjson is an optional dependency, listed in
+    requirements-optional.txt; `fast_encoder` tells which path is taken.
+
+    Attributes:
+        max_entries (int): The number of tasks cached at most. Once reached, further tasks are
+            encoded on every request rather than evicting cached ones.
+        fast_encoder (bool): Whether tasks are encoded directly instead of being cached.
+    """
+
+    def __init__(self, max_entries: int = 1_000_000, fast_encoder: bool = FAST_ENCODER):
+        self.max_entries = max_entries
+        self.fast_encoder = fast_encoder
+        self._entries: Dict[int, Tuple[int, str, bool, bytes]] = {}
+
+    def encode(self, task: "TaskInResponse") -> bytes:
+        """
+        Returns the encoded JSON of a task, from the cache when it is current.
+        """
+        if self.fast_encoder:
+            return dumps(task)
+
+        version, name, status = task["version"], task["name"], task["status"]
+        entry = self._entries.get(task["id"])
+        if (
+            entry is not None
+            and entry[0] == version
+            and entry[2] is status
+            and entry[1] == name
+        ):
+            return entry[3]
+
+        fragment = dumps(task)
+        if entry is not None or len(self._entries) < self.max_entries:
+            self._entries[task["id"]] = (version, name, status, fragment)
+
+        return fragment
+
+    def encode_items(self, tasks: List["TaskInResponse"]) -> bytes:
+        """
+        Returns the comma-separated encoded JSON of several tasks. Cache hits are resolved
+        inline, without a function call per task, which dominates the cost of large lists.
+        """
+        if self.fast_encoder:
+            return encode_items(tasks)
+
+        get = self._entries.get
+        return b",".join(
+            [
+                (
+                    entry[3]
+                    if (entry := get(task["id"])) is not None
+                    and entry[0] == task["version"]
+                    and entry[2] is task["status"]
+                    and entry[1] == task["name"]
+                    else self.encode(task)
+                )
+                for task in tasks
+            ]
+        )
+
+    def discard(self, task_id: int) -> None:
+        self._entries.pop(task_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,5 +1,19 @@
-from typing import List, TypedDict, Dict
+import threading
+import uuid
+from typing import List, TypedDict, Dict, Iterator, Optional, Tuple, Union
+from exceptions.ChangesExpiredException import ChangesExpiredException
 from exceptions.TaskNotFoundException import TaskNotFoundException
+from exceptions.VersionConflictException import VersionConflictException
+from models.events import TaskEventLog
+from models.indexes import ChangeIndex, NameIndex, StatusIndex
+from models.json_cache import TaskJSONCache
+from storage.base import Operation, StorageBackend
+from storage.memory import InMemoryBackend
+from storage.wal import OP_CREATE, OP_DELETE, OP_UPDATE, WriteAheadLog
+from utils.concurrency import StripedLock
+
+# The change feed event published for each kind of mutation
+_EVENT_TYPES = {OP_CREATE: "created", OP_UPDATE: "updated", OP_DELETE: "deleted"}
 
 
 class TaskInTaskDict(TypedDict):
@@ -9,10 +23,12 @@ class TaskInTaskDict(TypedDict):
     Attributes:
         name (str): The name of the task.
         status (bool): The current status of the task, where False indicates incomplete.
+        version (int): The number of times the task was written, 1 once created.
     """
 
     name: str
     status: bool
+    version: int
 
 
 class TaskInResponse(TypedDict):
@@ -23,47 +39,316 @@ class TaskInResponse(TypedDict):
         id (int): The unique identifier for the task.
         name (str): The name of the task.
         status (bool): The current status of the task, where False indicates incomplete.
+        version (int): The number of times the task was written, 1 once created.
     """
 
     id: int
     name: str
     status: bool
+    version: int
 
 
 class Task:
     """
     A model representing a task, providing basic CRUD (Create, Read, Update, Delete) operations.
 
+    All operations are safe to call from multiple threads. IDs are allocated under a lock held
+    only for the increment, and mutations of a task are serialized by a lock stripe chosen by
+    its ID, so writes to different tasks do not wait for each other.
+
+    Every task has a version, incremented by each write. Writers that read a task before
+    changing it pass the version they read, and the storage only applies the write if the
+    task still has it, so that a concurrent change is reported rather than overwritten.
+
+    Secondary indexes are maintained by every mutation. They describe the tasks written by this
+    process, so they are not used with backends shared between processes, which fall back to
+    scanning the storage. For the same reason, the store version is only tracked for backends
+    whose mutations all go through this process. Backends that filter and count tasks
+    themselves are not indexed either, such as the compact one, whose point is a low memory use
+    per task, and SQLite, which holds more tasks than memory; the changes since a version are
+    then not tracked.
+
     Attributes:
-        tasks_dict (Dict[int, TaskInTaskDict]): A dictionary acting as the storage for tasks, keyed by task ID.
+        tasks_dict (Dict[int, TaskInTaskDict]): A dictionary acting as the storage for tasks, keyed by task ID,
+            when the default in-memory backend is used.
         last_task_id (int): Tracks the last used task ID to ensure unique identifiers for new tasks.
+        backend (StorageBackend): The storage the tasks are kept in, the in-memory backend by default.
+        wal (Optional[WriteAheadLog]): The write-ahead log mutations are appended to when persistence is enabled.
+        status_index (StatusIndex): The IDs of the tasks, keyed by status.
+        name_index (NameIndex): The IDs of the tasks, keyed by the words and word prefixes of their names.
+        change_index (ChangeIndex): The version of the latest mutation of each task, including deleted ones.
+        version (int): A counter incremented by every mutation, used to tell whether the tasks changed.
+        json_cache (TaskJSONCache): The encoded JSON of the tasks, reused across responses.
+        events (TaskEventLog): The latest mutations, streamed by the change feed.
 
     Methods:
         get_all: Retrieves a list of all tasks in the mock storage.
+        get: Retrieves a single task by its ID.
+        iter_tasks: Lazily yields tasks in ascending ID order, starting after a given ID.
+        get_page: Retrieves a bounded page of tasks following a given ID.
+        count_by_status: Counts the tasks per status.
+        get_version: Returns a token identifying the current state of the tasks.
+        get_epoch: Returns an identifier of the store the task versions are counted in.
+        get_changes: Retrieves the tasks created, updated or deleted after a version.
         create: Inserts a new task into the mock storage with a unique ID.
         update: Updates the details of an existing task identified by its ID.
+        patch: Updates some of the details of an existing task identified by its ID.
         delete: Removes a task from the mock storage by its ID.
+        apply_batch: Applies several creates, updates and deletes under one lock acquisition.
+        reset: Clears the mock storage and restarts the ID sequence.
+        use_backend: Switches the storage the tasks are kept in.
+        enable_persistence: Restores the storage from disk and logs every further mutation.
+        disable_persistence: Flushes and closes the write-ahead log.
     """
 
     # Mock the database
     tasks_dict: Dict[int, TaskInTaskDict] = {}  # store data in hash table
     last_task_id: int = 0  # For auto increment
+    backend: StorageBackend = InMemoryBackend(tasks_dict)
+    # Durable log, only set when persistence is enabled
+    wal: Optional[WriteAheadLog] = None
+    status_index: StatusIndex = StatusIndex()
+    name_index: NameIndex = NameIndex()
+    change_index: ChangeIndex = ChangeIndex()
+    version: int = 0
+    json_cache: TaskJSONCache = TaskJSONCache()
+    events: TaskEventLog = TaskEventLog()
+
+    # Whether other processes write to the storage too, as they do to shared backends
+    _shared: bool = False
+    # Whether the secondary indexes cover every task, False for shared backends and for those
+    # filtering tasks themselves
+    _indexed: bool = True
+    _id_lock = threading.Lock()
+    _version_lock = threading.Lock()
+    # Distinguishes the versions of this process from those of earlier runs and of the stores
+    # it used before being reset or switching backends
+    _epoch: str = uuid.uuid4().hex[:12]
+    _locks = StripedLock()
 
     @classmethod
-    def get_all(cls) -> List[TaskInResponse]:
+    def get_all(
+        cls, status: Optional[bool] = None, query: Optional[str] = None
+    ) -> List[TaskInResponse]:
         """
         Retrieves all tasks from the mock storage.
 
+        Parameters:
+            status (Optional[bool]): When given, only tasks with this status are returned.
+            query (Optional[str]): When given, only tasks whose name matches it are returned.
+
         Returns:
             A list of dictionaries, each representing a task with its ID, name, and status.
         """
-        tasks_list = []
-        for task_id, task in cls.tasks_dict.items():
-            tasks_list.append(
-                {"id": task_id, "name": task["name"], "status": task["status"]}
+        if status is None and query is None:
+            return cls.backend.get_all()
+
+        return list(cls.iter_tasks(status=status, query=query))
+
+    @classmethod
+    def get(cls, task_id: int) -> TaskInResponse:
+        """
+        Retrieves a single task from the mock storage.
+
+        Parameters:
+            task_id (int): The ID of the task to retrieve.
+
+        Returns:
+            A dictionary representing the task, including its ID, name, status and version.
+
+        Raises:
+            TaskNotFoundException: If no task with the specified ID exists in the mock storage.
+        """
+        task = cls.backend.get(task_id)
+        if task is None:
+            raise TaskNotFoundException(f"Task with ID {task_id} does not exist.")
+
+        return {
+            "id": task_id,
+            "name": task["name"],
+            "status": task["status"],
+            "version": task["version"],
+        }
+
+    @classmethod
+    def iter_tasks(
+        cls,
+        after_id: int = 0,
+        status: Optional[bool] = None,
+        query: Optional[str] = None,
+    ) -> Iterator[TaskInResponse]:
+        """
+        Lazily yields tasks with an ID greater than `after_id`, in ascending ID order.
+
+        When filtering, only the tasks listed in the name or status index are visited, so the
+        cost depends on the number of matching tasks rather than on all stored tasks. Backends
+        that filter tasks themselves are asked for the matching tasks instead.
+
+        Parameters:
+            after_id (int): Only tasks with an ID strictly greater than this are yielded.
+            status (Optional[bool]): When given, only tasks with this status are yielded.
+            query (Optional[str]): When given, only tasks whose name contains a word starting
+                with each word of the query are yielded.
+
+        Returns:
+            An iterator of dictionaries, each representing a task with its ID, name, and status.
+        """
+        if status is None and query is None:
+            return cls.backend.iter_tasks(after_id)
+        iter_matching = getattr(cls.backend, "iter_matching", None)
+        if iter_matching is not None:
+            return iter_matching(after_id, status, query)
+        if not cls._indexed:
+            return (
+                task
+                for task in cls.backend.iter_tasks(after_id)
+                if cls._matches(task, status, query)
             )
 
-        return tasks_list
+        if query is not None:
+            task_ids = cls.name_index.search(query, after_id)
+        else:
+            task_ids = cls.status_index.iter_ids(status, after_id)
+        return cls._iter_indexed(task_ids, status, query)
+
+    @classmethod
+    def get_page(
+        cls,
+        limit: int,
+        after_id: int = 0,
+        status: Optional[bool] = None,
+        query: Optional[str] = None,
+    ) -> Tuple[List[TaskInResponse], Optional[int]]:
+        """
+        Retrieves at most `limit` tasks following `after_id`.
+
+        Parameters:
+            limit (int): The maximum number of tasks to return.
+            after_id (int): Only tasks with an ID strictly greater than this are returned.
+            status (Optional[bool]): When given, only tasks with this status are returned.
+            query (Optional[str]): When given, only tasks whose name matches it are returned.
+
+        Returns:
+            A tuple of the tasks in the page and the ID to continue from, which is None
+            when there are no further tasks.
+        """
+        tasks_list = []
+        for task in cls.iter_tasks(after_id, status, query):
+            if len(tasks_list) == limit:
+                return tasks_list, tasks_list[-1]["id"]
+            tasks_list.append(task)
+
+        return tasks_list, None
+
+    @classmethod
+    def count_by_status(cls) -> Dict[bool, int]:
+        """
+        Counts the tasks per status, in constant time when the status index is available or
+        the backend counts them itself.
+
+        Returns:
+            A dictionary mapping each status to the number of tasks having it.
+        """
+        count_by_status = getattr(cls.backend, "count_by_status", None)
+        if count_by_status is not None:
+            return count_by_status()
+        if not cls._indexed:
+            counts = {False: 0, True: 0}
+            for task in cls.backend.iter_tasks():
+                counts[task["status"]] += 1
+            return counts
+
+        return {
+            False: cls.status_index.count(False),
+            True: cls.status_index.count(True),
+        }
+
+    @classmethod
+    def get_version(cls) -> Optional[str]:
+        """
+        Returns a token that changes whenever a task is created, updated or deleted. It is read
+        before the tasks themselves, so a response never carries a token newer than its data.
+
+        Returns:
+            The version prefixed with an identifier of this process, or None when the storage
+            is shared with other processes whose mutations the version does not count.
+        """
+        if cls._shared:
+            return None
+
+        return f"{cls._epoch}-{cls.version}"
+
+    @classmethod
+    def get_epoch(cls) -> str:
+        """
+        Returns an identifier of the store the task versions are counted in. Versions restart
+        from 1 when the tasks are reset, the backend is switched or the process restarts, so a
+        version only identifies a state of a task along with the epoch it was read in.
+
+        Returns:
+            The epoch of this process's store, or the one of a backend shared between
+            processes, which is the same in all of them.
+        """
+        epoch = getattr(cls.backend, "epoch", None)
+        if epoch is not None:
+            return epoch()
+
+        return cls._epoch
+
+    @classmethod
+    def get_changes(
+        cls, since: str, limit: Optional[int] = None
+    ) -> Tuple[List[TaskInResponse], List[int], str, bool]:
+        """
+        Retrieves the tasks created, updated or deleted after a version, from the change index.
+
+        Parameters:
+            since (str): A version returned by `get_version` or by a previous call, or "0" to
+                retrieve every task along with the version to continue from.
+            limit (Optional[int]): The maximum number of changed tasks to return, or None for all
+                of them. It does not apply to "0".
+
+        Returns:
+            A tuple of the created or updated tasks, the IDs of the deleted tasks, the version
+            to pass as `since` next, and whether further changes remain.
+
+        Raises:
+            ChangesExpiredException: If the changes since this version are no longer known,
+                because tombstones were dropped, the version is from before a restart or reset,
+                or changes are not tracked for the storage, which is shared with other
+                processes or not indexed.
+        """
+        if not cls._indexed:
+            raise ChangesExpiredException("Changes are not tracked for this storage.")
+        if since == "0":
+            version = cls.get_version()
+            return cls.backend.get_all(), [], version, False
+
+        epoch, _, number = since.rpartition("-")
+        if epoch != cls._epoch or int(number) > cls.version:
+            raise ChangesExpiredException()
+        changes = cls.change_index.changes_since(int(number), limit)
+        if changes is None:
+            raise ChangesExpiredException()
+
+        entries, version, has_more = changes
+        tasks_list: List[TaskInResponse] = []
+        deleted: List[int] = []
+        for task_id, was_deleted in entries:
+            task = None if was_deleted else cls.backend.get(task_id)
+            if task is None:
+                deleted.append(task_id)
+            else:
+                tasks_list.append(
+                    {
+                        "id": task_id,
+                        "name": task["name"],
+                        "status": task["status"],
+                        "version": task["version"],
+                    }
+                )
+
+        return tasks_list, deleted, f"{cls._epoch}-{version}", has_more
 
     @classmethod
     def create(cls, name: str) -> TaskInResponse:
@@ -74,16 +359,25 @@ class Task:
             name (str): The name of the new task.
 
         Returns:
-            A dictionary representing the newly created task, including its ID, name, and status.
+            A dictionary representing the newly created task, including its ID, name, status
+            and version.
         """
-        cls.last_task_id += 1
-        cls.tasks_dict[cls.last_task_id] = {"name": name, "status": False}
-        new_task = {"id": cls.last_task_id, "name": name, "status": False}
+        (task_id,) = cls._allocate_ids()
+        with cls._locks.for_key(task_id):
+            cls.backend.create(task_id, name, False)
+            lsn = cls._record_mutation(OP_CREATE, task_id, name, False, 1)
+        cls._wait_durable(lsn)
 
-        return new_task
+        return {"id": task_id, "name": name, "status": False, "version": 1}
 
     @classmethod
-    def update(cls, task_id: int, name: str, status: bool) -> TaskInResponse:
+    def update(
+        cls,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> TaskInResponse:
         """
         Updates an existing task's details in the mock storage.
 
@@ -91,19 +385,84 @@ class Task:
             task_id (int): The ID of the task to update.
             name (str): The new name for the task.
             status (bool): The new status for the task.
+            expected_version (Optional[int]): When given, the task is only updated if it still
+                has this version.
 
         Returns:
-            A dictionary representing the updated task, including its ID, name, and status.
+            A dictionary representing the updated task, including its ID, name, status and
+            new version.
 
         Raises:
             TaskNotFoundException: If no task with the specified ID exists in the mock storage.
+            VersionConflictException: If the task does not have the expected version.
         """
-        if task_id not in cls.tasks_dict:
-            raise TaskNotFoundException(f"Task with ID {task_id} does not exist.")
+        with cls._locks.for_key(task_id):
+            version = cls.backend.update(task_id, name, status, expected_version)
+            if version is None:
+                raise cls._write_refused(task_id)
+            lsn = cls._record_mutation(OP_UPDATE, task_id, name, status, version)
+        cls._wait_durable(lsn)
+
+        return {"id": task_id, "name": name, "status": status, "version": version}
 
-        cls.tasks_dict[task_id] = {"name": name, "status": status}
+    @classmethod
+    def patch(
+        cls,
+        task_id: int,
+        name: Optional[str] = None,
+        status: Optional[bool] = None,
+        expected_version: Optional[int] = None,
+    ) -> TaskInResponse:
+        """
+        Updates the given details of an existing task, keeping the others.
 
-        return {"id": task_id, "name": name, "status": status}
+        The task is read, then written only if it still has the version read, so that a change
+        made in between by another process sharing the storage is not overwritten; the patch
+        is then applied again to the new version.
+
+        Parameters:
+            task_id (int): The ID of the task to update.
+            name (Optional[str]): The new name for the task, or None to keep it.
+            status (Optional[bool]): The new status for the task, or None to keep it.
+            expected_version (Optional[int]): When given, the task is only updated if it still
+                has this version.
+
+        Returns:
+            A dictionary representing the updated task, including its ID, name, status and
+            new version.
+
+        Raises:
+            TaskNotFoundException: If no task with the specified ID exists in the mock storage.
+            VersionConflictException: If the task does not have the expected version.
+        """
+        while True:
+            with cls._locks.for_key(task_id):
+                task = cls.backend.get(task_id)
+                if task is None:
+                    raise TaskNotFoundException(
+                        f"Task with ID {task_id} does not exist."
+                    )
+                if expected_version not in (None, task["version"]):
+                    raise cls._write_refused(task_id)
+
+                new_name = task["name"] if name is None else name
+                new_status = task["status"] if status is None else status
+                version = cls.backend.update(
+                    task_id, new_name, new_status, task["version"]
+                )
+                if version is not None:
+                    lsn = cls._record_mutation(
+                        OP_UPDATE, task_id, new_name, new_status, version
+                    )
+                    break
+        cls._wait_durable(lsn)
+
+        return {
+            "id": task_id,
+            "name": new_name,
+            "status": new_status,
+            "version": version,
+        }
 
     @classmethod
     def delete(cls, task_id: int) -> bool:
@@ -119,9 +478,288 @@ class Task:
         Raises:
             TaskNotFoundException: If no task with the specified ID exists in the mock storage.
         """
-        if task_id not in cls.tasks_dict:
-            raise TaskNotFoundException(f"Task with ID {task_id} does not exist.")
-
-        del cls.tasks_dict[task_id]
+        with cls._locks.for_key(task_id):
+            if not cls.backend.delete(task_id):
+                raise TaskNotFoundException(f"Task with ID {task_id} does not exist.")
+            lsn = cls._record_mutation(OP_DELETE, task_id)
+        cls._wait_durable(lsn)
 
         return True
+
+    @classmethod
+    def apply_batch(
+        cls, operations: List[Operation]
+    ) -> List[Union[TaskInResponse, bool, TaskNotFoundException]]:
+        """
+        Applies create, update and delete operations in order while holding the locks of every
+        task involved, and writes them to the storage in a single batch. The storage skips the
+        updates and deletes of tasks that do not exist and returns the versions it wrote.
+
+        Parameters:
+            operations (List[Operation]): (op, task_id, name, status) tuples with op being
+                OP_CREATE, OP_UPDATE or OP_DELETE. The task ID of a create is ignored.
+
+        Returns:
+            One result per operation: the created or updated task, True for a deletion, or a
+            TaskNotFoundException if the task to update or delete does not exist.
+        """
+        new_ids = iter(cls._allocate_ids(sum(op == OP_CREATE for op, *_ in operations)))
+        operations = [
+            (op, next(new_ids) if op == OP_CREATE else task_id, name, status)
+            for op, task_id, name, status in operations
+        ]
+
+        results: List[Union[TaskInResponse, bool, TaskNotFoundException]] = []
+        lsn = None
+        with cls._locks.acquire_keys(task_id for _, task_id, _, _ in operations):
+            # The storage tells which tasks existed, as other processes may share it
+            versions = cls.backend.apply_batch(operations)
+            for (op, task_id, name, status), version in zip(operations, versions):
+                if version is None:
+                    results.append(
+                        TaskNotFoundException(f"Task with ID {task_id} does not exist.")
+                    )
+                    continue
+                if op == OP_DELETE:
+                    results.append(True)
+                else:
+                    results.append(
+                        {
+                            "id": task_id,
+                            "name": name,
+                            "status": status,
+                            "version": version,
+                        }
+                    )
+                lsn = cls._record_mutation(op, task_id, name, status, version)
+        cls._wait_durable(lsn)
+
+        return results
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Removes every task from the mock storage and restarts the ID sequence.
+        """
+        cls.backend.clear()
+        cls.last_task_id = 0
+        cls._rebuild_indexes()
+        cls._new_epoch()
+        cls._bump_version()
+        cls.events.publish("reset", {})
+
+    @classmethod
+    def use_backend(cls, backend: StorageBackend) -> None:
+        """
+        Switches the storage the tasks are kept in and resumes the ID sequence from it.
+
+        Parameters:
+            backend (StorageBackend): The new storage, e.g. an `SQLiteBackend`.
+        """
+        cls.disable_persistence()
+        cls.backend = backend
+        cls.last_task_id = backend.max_id()
+        cls._rebuild_indexes()
+        cls._new_epoch()
+        cls._bump_version()
+        cls.events.publish("reset", {})
+
+    @classmethod
+    def enable_persistence(cls, directory: str, **options) -> None:
+        """
+        Replaces the mock storage with the state recovered from `directory` and appends every
+        further create, update and delete to a write-ahead log there.
+
+        Parameters:
+            directory (str): The directory holding the WAL segments and snapshots.
+            **options: Keyword arguments forwarded to `WriteAheadLog`, such as `sync`
+                or `snapshot_interval`.
+
+        Raises:
+            RuntimeError: If the tasks are not kept in an `InMemoryBackend`.
+        """
+        if not isinstance(cls.backend, InMemoryBackend):
+            raise RuntimeError("Persistence requires the in-memory backend.")
+
+        cls.disable_persistence()
+        wal = WriteAheadLog(directory, snapshot_source=cls._snapshot_state, **options)
+        tasks, last_task_id = wal.open()
+        cls.backend.load(tasks, last_task_id)
+        cls.last_task_id = cls.backend.max_id()
+        cls._rebuild_indexes()
+        cls._new_epoch()
+        cls._bump_version()
+        cls.events.publish("reset", {})
+        cls.wal = wal
+
+    @classmethod
+    def disable_persistence(cls) -> None:
+        """
+        Flushes and closes the write-ahead log, if persistence is enabled.
+        """
+        if cls.wal is not None:
+            wal, cls.wal = cls.wal, None
+            wal.close()
+
+    @classmethod
+    def _allocate_ids(cls, count: int = 1) -> List[int]:
+        """
+        Allocates the next `count` task IDs. Backends shared between processes allocate IDs
+        themselves, since the in-process counter cannot see IDs handed out by other processes.
+        """
+        allocate_id = getattr(cls.backend, "allocate_id", None)
+        with cls._id_lock:
+            if allocate_id is not None:
+                if not count:
+                    return []
+                first_id = allocate_id(count)
+                cls.last_task_id = first_id + count - 1
+                return list(range(first_id, cls.last_task_id + 1))
+
+            first_id = cls.last_task_id + 1
+            cls.last_task_id += count
+            return list(range(first_id, cls.last_task_id + 1))
+
+    @classmethod
+    def _record_mutation(
+        cls,
+        op: int,
+        task_id: int,
+        name: str = "",
+        status: bool = False,
+        version: int = 0,
+    ) -> Optional[int]:
+        """
+        Updates the secondary indexes, the JSON cache and the version after a mutation was
+        written to the storage, publishes it to the change feed and appends it to the
+        write-ahead log, if persistence is enabled. Called while the task's lock stripe is
+        held, so the mutations of one task are recorded in the order applied.
+
+        Returns:
+            The LSN of the WAL record, or None when persistence is disabled.
+        """
+        if cls._indexed:
+            if op == OP_DELETE:
+                cls.status_index.remove(task_id)
+                cls.name_index.remove(task_id)
+            else:
+                cls.status_index.set(task_id, status)
+                cls.name_index.set(task_id, name)
+        if op != OP_CREATE:
+            cls.json_cache.discard(task_id)
+        with cls._version_lock:
+            cls.version += 1
+            # Under the version lock, so that versions are recorded in ascending order
+            if cls._indexed:
+                cls.change_index.record(task_id, cls.version, op == OP_DELETE)
+        if op == OP_DELETE:
+            cls.events.publish(_EVENT_TYPES[op], {"id": task_id})
+        else:
+            cls.events.publish(
+                _EVENT_TYPES[op],
+                {"id": task_id, "name": name, "status": status, "version": version},
+            )
+
+        if cls.wal is None:
+            return None
+        if op == OP_DELETE:
+            return cls.wal.append(op, task_id)
+
+        return cls.wal.append(op, task_id, name, status, version)
+
+    @classmethod
+    def _write_refused(
+        cls, task_id: int
+    ) -> Union[TaskNotFoundException, VersionConflictException]:
+        """
+        Tells why the storage refused to update a task: it does not exist, or it does not have
+        the expected version.
+        """
+        task = cls.backend.get(task_id)
+        if task is None:
+            return TaskNotFoundException(f"Task with ID {task_id} does not exist.")
+
+        return VersionConflictException(
+            f"Task with ID {task_id} was changed since it was read.",
+            current_version=task["version"],
+        )
+
+    @classmethod
+    def _new_epoch(cls) -> None:
+        """
+        Starts a new epoch, e.g. once the tasks were reset, so that the versions and change
+        tokens handed out before are no longer taken for current ones.
+        """
+        cls._epoch = uuid.uuid4().hex[:12]
+
+    @classmethod
+    def _bump_version(cls) -> None:
+        with cls._version_lock:
+            cls.version += 1
+
+    @classmethod
+    def _rebuild_indexes(cls) -> None:
+        """
+        Rebuilds the secondary indexes from the storage and drops the cached JSON, e.g. after
+        switching backends.
+        """
+        cls._shared = hasattr(cls.backend, "allocate_id")
+        cls._indexed = not cls._shared and not hasattr(cls.backend, "iter_matching")
+        cls.json_cache.clear()
+        cls.status_index.clear()
+        cls.name_index.clear()
+        # Changes are listed from the version the callers bump to next
+        cls.change_index.clear(cls.version + 1)
+        if cls._indexed:
+            for task in cls.backend.iter_tasks():
+                cls.status_index.set(task["id"], task["status"])
+                cls.name_index.set(task["id"], task["name"])
+
+    @classmethod
+    def _iter_indexed(
+        cls,
+        task_ids: Iterator[int],
+        status: Optional[bool] = None,
+        query: Optional[str] = None,
+    ) -> Iterator[TaskInResponse]:
+        """
+        Looks up the tasks found in an index, skipping any that no longer match the filters
+        because they changed since the index was read.
+        """
+        for task_id in task_ids:
+            task = cls.backend.get(task_id)
+            if task is not None:
+                task = {
+                    "id": task_id,
+                    "name": task["name"],
+                    "status": task["status"],
+                    "version": task["version"],
+                }
+                if cls._matches(task, status, query):
+                    yield task
+
+    @staticmethod
+    def _matches(
+        task: TaskInResponse, status: Optional[bool], query: Optional[str]
+    ) -> bool:
+        return (status is None or task["status"] == status) and (
+            query is None or NameIndex.matches(task["name"], query)
+        )
+
+    @classmethod
+    def _wait_durable(cls, lsn: Optional[int]) -> None:
+        """
+        Waits for a logged mutation to be fsynced in synchronous mode. Called after the lock
+        stripe is released, so other writers are not held up by the group commit.
+        """
+        wal = cls.wal
+        if lsn is not None and wal is not None and wal.sync:
+            wal.wait_durable(lsn)
+
+    @classmethod
+    def _snapshot_state(cls) -> Tuple[Dict[int, TaskInTaskDict], int]:
+        """
+        Captures the state written to snapshots. Records are replaced rather than mutated in
+        place, so a shallow copy of the storage is consistent.
+        """
+        return cls.backend.tasks_dict.copy(), cls.last_task_id
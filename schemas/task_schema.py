@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic_core import PydanticCustomError
 
 
 class CreateTask(BaseModel):
@@ -9,6 +11,9 @@ class CreateTask(BaseModel):
         name (str): The name of the task.
     """
 
+    # Validators are built on first use, keeping them out of the startup time
+    model_config = ConfigDict(defer_build=True)
+
     name: str = Field(
         ...,
         min_length=1,
@@ -22,6 +27,18 @@ class CreateTask(BaseModel):
     )
 
 
+class ImportTask(CreateTask):
+    """
+    Represents one line of a bulk import, e.g. as written by an export.
+
+    Attributes:
+        name (str): The name of the task.
+        status (bool): The status of the task, False when not given.
+    """
+
+    status: bool = False
+
+
 class UpdateTask(BaseModel):
     """
     Represents the schema for updating an existing task.
@@ -32,6 +49,9 @@ class UpdateTask(BaseModel):
         status (bool): The new status of the task.
     """
 
+    # Validators are built on first use, keeping them out of the startup time
+    model_config = ConfigDict(defer_build=True)
+
     id: int = Field(
         ...,
         gt=0,
@@ -49,3 +69,89 @@ class UpdateTask(BaseModel):
         },
     )
     status: bool
+
+
+class PatchTask(BaseModel):
+    """
+    Represents the schema for partially updating an existing task.
+
+    Attributes:
+        name (Optional[str]): The new name of the task, if it changes.
+        status (Optional[bool]): The new status of the task, if it changes.
+    """
+
+    # Validators are built on first use, keeping them out of the startup time
+    model_config = ConfigDict(defer_build=True)
+
+    name: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=50,
+        json_schema_extra={
+            "error_messages": {
+                "min_length": "Name must not be empty.",
+                "max_length": "Name must not exceed 50 characters.",
+            }
+        },
+    )
+    status: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self) -> "PatchTask":
+        if self.name is None and self.status is None:
+            raise PydanticCustomError(
+                "empty_patch", "At least one of name and status must be given."
+            )
+        return self
+
+
+class CreateTaskOperation(CreateTask):
+    """
+    Represents a create operation within a batch request.
+
+    Attributes:
+        op (str): Always "create".
+        name (str): The name of the task.
+    """
+
+    op: Literal["create"]
+
+
+class UpdateTaskOperation(UpdateTask):
+    """
+    Represents an update operation within a batch request.
+
+    Attributes:
+        op (str): Always "update".
+        id (int): The ID of the task to be updated.
+        name (str): The new name of the task.
+        status (bool): The new status of the task.
+    """
+
+    op: Literal["update"]
+
+
+class DeleteTaskOperation(BaseModel):
+    """
+    Represents a delete operation within a batch request.
+
+    Attributes:
+        op (str): Always "delete".
+        id (int): The ID of the task to be deleted.
+    """
+
+    # Validators are built on first use, keeping them out of the startup time
+    model_config = ConfigDict(defer_build=True)
+
+    op: Literal["delete"]
+    id: int = Field(
+        ...,
+        gt=0,
+        json_schema_extra={"error_messages": {"gt": "ID must be a positive integer."}},
+    )
+
+
+TaskOperation = Annotated[
+    Union[CreateTaskOperation, UpdateTaskOperation, DeleteTaskOperation],
+    Field(discriminator="op"),
+]
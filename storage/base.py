@@ -0,0 +1,75 @@
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse, TaskInTaskDict
+
+# (op, task_id, name, status) with op being one of the storage.wal operation codes
+Operation = Tuple[int, int, str, bool]
+
+
+class StorageBackend(Protocol):
+    """
+    The contract between `models.tasks.Task` and the storage holding the tasks.
+
+    Backends are plain record stores: task IDs are allocated by `Task` and passed in, and
+    validation, indexing and locking stay in the model. Backends shared between processes
+    may additionally provide `allocate_id(count=1) -> int`, allocating `count` consecutive IDs
+    and returning the first, which `Task` then uses instead of its own counter, and
+    `epoch() -> str`, identifying the current contents of the store in
+    every process, which `Task.get_epoch` then returns. Backends may also filter and count
+    tasks themselves by providing `iter_matching(after_id, status, query)`, yielding the tasks
+    `Task.iter_tasks` would, and `count_by_status() -> Dict[bool, int]`; `Task` then keeps no
+    secondary index for them.
+
+    Every record carries a version, 1 when the task is created and incremented by every write
+    to it, including the creates and updates of `apply_batch`. `update` only writes when the
+    record still has the expected version, if one is given, so that concurrent writers can
+    detect conflicts without a lock spanning their read and their write. It returns the new
+    version, or None when the task does not exist or has another version.
+
+    `apply_batch` likewise skips the updates and deletes of tasks that do not exist when the
+    operation is applied, which for a backend shared between processes may differ from what
+    the caller read. It returns one entry per operation: the version written by a create or
+    an update, 0 for a delete, or None for a skipped operation.
+
+    Methods:
+        get: Retrieves a single task by its ID.
+        get_all: Retrieves every task, ordered by ID.
+        iter_tasks: Lazily yields the tasks following a given ID, ordered by ID.
+        create: Inserts a task under the given ID.
+        update: Replaces an existing task, optionally only if it has the expected version.
+        delete: Removes an existing task.
+        apply_batch: Applies several operations as a single transaction.
+        max_id: Returns the highest task ID ever stored.
+        count: Returns the number of stored tasks.
+        clear: Removes every task and forgets the ID high-water mark.
+        close: Releases the resources held by the backend.
+    """
+
+    def get(self, task_id: int) -> Optional["TaskInTaskDict"]: ...
+
+    def get_all(self) -> List["TaskInResponse"]: ...
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator["TaskInResponse"]: ...
+
+    def create(self, task_id: int, name: str, status: bool) -> None: ...
+
+    def update(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]: ...
+
+    def delete(self, task_id: int) -> bool: ...
+
+    def apply_batch(self, operations: Iterable[Operation]) -> List[Optional[int]]: ...
+
+    def max_id(self) -> int: ...
+
+    def count(self) -> int: ...
+
+    def clear(self) -> None: ...
+
+    def close(self) -> None: ...
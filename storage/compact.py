@@ -0,0 +1,327 @@
+import re
+import threading
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+from models.indexes import NameIndex
+from storage.base import Operation
+from storage.wal import OP_CREATE, OP_DELETE
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse, TaskInTaskDict
+
+ITER_CHUNK_SIZE = 1000
+
+# The name buffer is compacted once this many bytes, and half of it, are unused
+_MIN_GARBAGE = 1024 * 1024
+
+_ABSENT = -1
+
+# Finds the next byte of the live bitmap with a task in it, skipping deleted IDs in bulk
+_LIVE_BYTE = re.compile(rb"[^\x00]")
+
+
+class CompactBackend:
+    """
+    Stores tasks in a few flat arrays rather than one dictionary per task, which brings the
+    overhead of a task from hundreds of bytes down to about 20 plus its UTF-8 encoded name.
+
+    Each task occupies a slot. The columns are indexed by slot: the offset and length of the
+    name in a shared name buffer, the version, and one bit of status. An array indexed by task ID holds the
+    slot of each task, task IDs being allocated densely by `Task`. Slots and name space freed by
+    deletions are reused: new tasks take free slots first, names are overwritten in place when
+    the new one fits, and the name buffer is compacted once most of it is unused.
+
+    A bitmap indexed by task ID tells which tasks exist. Scans search it for the bytes that are
+    not zero, skipping runs of deleted IDs in C, so that they take time in proportion to the
+    number of tasks rather than to the highest ID.
+
+    A lock guards every access, as a record is spread over several columns that a writer may
+    change, or a compaction move, in between the reads of another thread.
+
+    Tasks are filtered by status and name while scanning the columns, and counted per status
+    by a counter, so `Task` keeps no index, which would take far more memory per task than the
+    columns do.
+
+    Attributes:
+        high_id (int): The highest task ID ever created, which `max_id` returns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def _slot(self, task_id: int) -> int:
+        """
+        Returns the slot of a task, or `_ABSENT`. The caller holds the lock.
+        """
+        if 0 < task_id < len(self._slot_of):
+            return self._slot_of[task_id]
+        return _ABSENT
+
+    def _read(self, slot: int) -> "TaskInTaskDict":
+        start = self._name_offsets[slot]
+        name = self._names[start : start + self._name_lengths[slot]].decode()
+        return {
+            "name": name,
+            "status": self._status_of(slot),
+            "version": self._versions[slot],
+        }
+
+    def _allocate_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+
+        slot = len(self._name_offsets)
+        self._name_offsets.append(0)
+        self._name_lengths.append(0)
+        self._versions.append(0)
+        if slot >> 3 == len(self._status):
+            self._status.append(0)
+        return slot
+
+    def _status_of(self, slot: int) -> bool:
+        return bool(self._status[slot >> 3] & (1 << (slot & 7)))
+
+    def _write(self, slot: int, name: str, status: bool, was_live: bool) -> None:
+        """
+        Stores the name and status of a slot. The previous name is overwritten in place when
+        the new one fits in its space, otherwise the new one is appended to the buffer.
+        """
+        self._done_count += status - (was_live and self._status_of(slot))
+        encoded = name.encode()
+        length = len(encoded)
+        previous_length = self._name_lengths[slot]
+        if was_live:
+            self._garbage += previous_length
+        if length <= previous_length:
+            start = self._name_offsets[slot]
+            self._names[start : start + length] = encoded
+            self._garbage -= length
+        else:
+            self._name_offsets[slot] = len(self._names)
+            self._names += encoded
+        self._name_lengths[slot] = length
+
+        if status:
+            self._status[slot >> 3] |= 1 << (slot & 7)
+        else:
+            self._status[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+    def _create(self, task_id: int, name: str, status: bool) -> None:
+        if task_id >= len(self._slot_of):
+            # Grow geometrically, as IDs are mostly allocated one after the other
+            size = max(task_id + 1, len(self._slot_of) * 5 // 4)
+            self._slot_of.extend(array("i", [_ABSENT]) * (size - len(self._slot_of)))
+            self._live.extend(bytes(size // 8 + 1 - len(self._live)))
+
+        slot = self._slot_of[task_id]
+        was_live = slot != _ABSENT
+        if not was_live:
+            slot = self._allocate_slot()
+            self._slot_of[task_id] = slot
+            self._live[task_id >> 3] |= 1 << (task_id & 7)
+            self._versions[slot] = 0
+            self._count += 1
+        self._write(slot, name, status, was_live)
+        self._versions[slot] += 1
+        self.high_id = max(self.high_id, task_id)
+
+    def _delete(self, task_id: int) -> bool:
+        slot = self._slot(task_id)
+        if slot == _ABSENT:
+            return False
+
+        self._slot_of[task_id] = _ABSENT
+        self._live[task_id >> 3] &= ~(1 << (task_id & 7)) & 0xFF
+        self._free_slots.append(slot)
+        self._done_count -= self._status_of(slot)
+        self._garbage += self._name_lengths[slot]
+        self._count -= 1
+        return True
+
+    def _compact_names(self) -> None:
+        """
+        Rewrites the name buffer without the unused space, once that is most of it.
+        """
+        if self._garbage < max(_MIN_GARBAGE, len(self._names) // 2):
+            return
+
+        names = bytearray()
+        offsets, lengths = self._name_offsets, self._name_lengths
+        for slot in self._slot_of:
+            if slot != _ABSENT:
+                start = offsets[slot]
+                offsets[slot] = len(names)
+                names += self._names[start : start + lengths[slot]]
+        for slot in self._free_slots:
+            lengths[slot] = 0
+        self._names = names
+        self._garbage = 0
+
+    def get(self, task_id: int) -> Optional["TaskInTaskDict"]:
+        with self._lock:
+            slot = self._slot(task_id)
+            if slot == _ABSENT:
+                return None
+            return self._read(slot)
+
+    def get_all(self) -> List["TaskInResponse"]:
+        return list(self.iter_tasks())
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator["TaskInResponse"]:
+        return self.iter_matching(after_id)
+
+    def iter_matching(
+        self,
+        after_id: int = 0,
+        status: Optional[bool] = None,
+        query: Optional[str] = None,
+    ) -> Iterator["TaskInResponse"]:
+        """
+        Yields the tasks following `after_id` with the given status and whose name matches
+        `query`, if given, by scanning the columns. The status bit is tested before the name
+        is decoded.
+
+        Tasks are read in chunks, each under one acquisition of the lock. The first chunks are
+        small, as a page only needs a few tasks, and grow up to `ITER_CHUNK_SIZE` live tasks.
+        """
+        matches = None if query is None else NameIndex.matcher(query)
+        task_id = max(after_id, 0)
+        chunk_size = 64
+        done = False
+        while not done:
+            chunk = []
+            with self._lock:
+                live, slot_of, names = self._live, self._slot_of, self._names
+                offsets, lengths, statuses, versions = (
+                    self._name_offsets,
+                    self._name_lengths,
+                    self._status,
+                    self._versions,
+                )
+                # The byte of the first ID to visit, without the bits of the IDs before it
+                position, shift = (task_id + 1) >> 3, (task_id + 1) & 7
+                bits = live[position] >> shift << shift if position < len(live) else 0
+                visited = 0
+                while visited < chunk_size:
+                    if not bits:
+                        found = _LIVE_BYTE.search(live, position + 1)
+                        if found is None:
+                            done = True
+                            break
+                        position = found.start()
+                        bits = live[position]
+                    lowest = bits & -bits
+                    bits ^= lowest
+                    task_id = (position << 3) + lowest.bit_length() - 1
+                    visited += 1
+
+                    slot = slot_of[task_id]
+                    task_status = bool(statuses[slot >> 3] & (1 << (slot & 7)))
+                    if status is not None and task_status != status:
+                        continue
+                    start = offsets[slot]
+                    name = names[start : start + lengths[slot]].decode()
+                    if matches is None or matches(name):
+                        chunk.append(
+                            {
+                                "id": task_id,
+                                "name": name,
+                                "status": task_status,
+                                "version": versions[slot],
+                            }
+                        )
+            chunk_size = min(chunk_size * 2, ITER_CHUNK_SIZE)
+            yield from chunk
+
+    def create(self, task_id: int, name: str, status: bool) -> None:
+        with self._lock:
+            self._create(task_id, name, status)
+            self._compact_names()
+
+    def update(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        with self._lock:
+            slot = self._slot(task_id)
+            if slot == _ABSENT or expected_version not in (None, self._versions[slot]):
+                return None
+            self._write(slot, name, status, was_live=True)
+            self._versions[slot] += 1
+            self._compact_names()
+
+            return self._versions[slot]
+
+    def delete(self, task_id: int) -> bool:
+        with self._lock:
+            deleted = self._delete(task_id)
+            self._compact_names()
+
+        return deleted
+
+    def apply_batch(self, operations: Iterable[Operation]) -> List[Optional[int]]:
+        versions: List[Optional[int]] = []
+        with self._lock:
+            for op, task_id, name, status in operations:
+                if op != OP_CREATE and self._slot(task_id) == _ABSENT:
+                    versions.append(None)
+                elif op == OP_DELETE:
+                    self._delete(task_id)
+                    versions.append(0)
+                else:
+                    self._create(task_id, name, status)
+                    versions.append(self._versions[self._slot_of[task_id]])
+            self._compact_names()
+
+        return versions
+
+    def max_id(self) -> int:
+        return self.high_id
+
+    def count(self) -> int:
+        return self._count
+
+    def count_by_status(self) -> Dict[bool, int]:
+        with self._lock:
+            return {False: self._count - self._done_count, True: self._done_count}
+
+    def memory_usage(self) -> int:
+        """
+        Returns the number of bytes allocated by the columns and the name buffer.
+        """
+        with self._lock:
+            return (
+                len(self._slot_of) * self._slot_of.itemsize
+                + len(self._live)
+                + len(self._name_offsets) * self._name_offsets.itemsize
+                + len(self._name_lengths) * self._name_lengths.itemsize
+                + len(self._versions) * self._versions.itemsize
+                + len(self._free_slots) * self._free_slots.itemsize
+                + len(self._status)
+                + len(self._names)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            # Indexed by task ID, ID 0 is never used
+            self._slot_of = array("i", [_ABSENT])
+            # One bit per task ID, set while the task exists
+            self._live = bytearray(1)
+            self._name_offsets = array("Q")
+            self._name_lengths = array("I")
+            self._versions = array("I")
+            self._status = bytearray()
+            self._names = bytearray()
+            self._free_slots = array("i")
+            self._garbage = 0
+            self._count = 0
+            # The number of tasks whose status is True
+            self._done_count = 0
+            self.high_id = 0
+
+    def close(self) -> None:
+        pass
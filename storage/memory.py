@@ -0,0 +1,159 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+from storage.base import Operation
+from storage.wal import OP_CREATE, OP_DELETE
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse, TaskInTaskDict
+
+# Absent IDs probed by a scan before it sorts the IDs instead, when there are fewer tasks
+_MIN_PROBE_MISSES = 1024
+
+
+class InMemoryBackend:
+    """
+    Stores tasks in a plain dictionary keyed by task ID. This is the default backend.
+
+    Records are always replaced rather than mutated in place, so a shallow copy of
+    `tasks_dict` is a consistent view of the storage. Single dictionary operations are
+    atomic, so readers never need a lock; callers serialize writes to the same task.
+
+    Attributes:
+        tasks_dict (Dict[int, TaskInTaskDict]): The storage for tasks, keyed by task ID.
+        high_id (int): The highest task ID ever created, bounding ID-ordered scans.
+    """
+
+    def __init__(self, tasks_dict: Optional[Dict[int, "TaskInTaskDict"]] = None):
+        self.tasks_dict = tasks_dict if tasks_dict is not None else {}
+        self.high_id = max(self.tasks_dict, default=0)
+        self._high_id_lock = threading.Lock()
+
+    def get(self, task_id: int) -> Optional["TaskInTaskDict"]:
+        return self.tasks_dict.get(task_id)
+
+    def get_all(self) -> List["TaskInResponse"]:
+        # Copying is atomic, iterating the live dictionary is not
+        return [
+            {
+                "id": task_id,
+                "name": task["name"],
+                "status": task["status"],
+                "version": task["version"],
+            }
+            for task_id, task in self.tasks_dict.copy().items()
+        ]
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator["TaskInResponse"]:
+        """
+        Probes candidate IDs directly by key instead of copying or sorting the whole storage,
+        so the cost of reaching the first task is independent of the number of stored tasks.
+
+        After mass deletions most probed IDs may be absent. Once the absent IDs probed
+        outnumber the stored tasks, the remaining tasks are copied and sorted by ID instead,
+        so a scan never costs more than about twice a sort of the stored tasks.
+        """
+        task_id = max(after_id, 0)
+        misses = 0
+        while task_id < self.high_id:
+            task_id += 1
+            task = self.tasks_dict.get(task_id)
+            if task is not None:
+                yield {
+                    "id": task_id,
+                    "name": task["name"],
+                    "status": task["status"],
+                    "version": task["version"],
+                }
+                continue
+
+            misses += 1
+            if misses > max(len(self.tasks_dict), _MIN_PROBE_MISSES):
+                break
+        else:
+            return
+
+        # Copying is atomic, iterating the live dictionary is not
+        remaining = sorted(
+            item for item in self.tasks_dict.copy().items() if item[0] > task_id
+        )
+        for task_id, task in remaining:
+            yield {
+                "id": task_id,
+                "name": task["name"],
+                "status": task["status"],
+                "version": task["version"],
+            }
+
+    def create(self, task_id: int, name: str, status: bool) -> None:
+        self.tasks_dict[task_id] = {"name": name, "status": status, "version": 1}
+        self._raise_high_id(task_id)
+
+    def _raise_high_id(self, task_id: int) -> None:
+        if task_id > self.high_id:
+            with self._high_id_lock:
+                if task_id > self.high_id:
+                    self.high_id = task_id
+
+    def update(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        task = self.tasks_dict.get(task_id)
+        if task is None or expected_version not in (None, task["version"]):
+            return None
+
+        version = task["version"] + 1
+        self.tasks_dict[task_id] = {"name": name, "status": status, "version": version}
+        return version
+
+    def delete(self, task_id: int) -> bool:
+        if task_id not in self.tasks_dict:
+            return False
+
+        del self.tasks_dict[task_id]
+        return True
+
+    def apply_batch(self, operations: Iterable[Operation]) -> List[Optional[int]]:
+        versions: List[Optional[int]] = []
+        for op, task_id, name, status in operations:
+            task = self.tasks_dict.get(task_id)
+            if task is None and op != OP_CREATE:
+                versions.append(None)
+            elif op == OP_DELETE:
+                del self.tasks_dict[task_id]
+                versions.append(0)
+            else:
+                version = 1 if task is None else task["version"] + 1
+                self.tasks_dict[task_id] = {
+                    "name": name,
+                    "status": status,
+                    "version": version,
+                }
+                self._raise_high_id(task_id)
+                versions.append(version)
+
+        return versions
+
+    def load(self, tasks: Dict[int, "TaskInTaskDict"], high_id: int) -> None:
+        """
+        Replaces the stored tasks, e.g. with the state recovered from a write-ahead log.
+        """
+        self.tasks_dict.clear()
+        self.tasks_dict.update(tasks)
+        self.high_id = max(high_id, max(self.tasks_dict, default=0))
+
+    def max_id(self) -> int:
+        return self.high_id
+
+    def count(self) -> int:
+        return len(self.tasks_dict)
+
+    def clear(self) -> None:
+        self.tasks_dict.clear()
+        self.high_id = 0
+
+    def close(self) -> None:
+        pass
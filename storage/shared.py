@@ -0,0 +1,449 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+from exceptions.StorageFullException import StorageFullException
+from storage.base import Operation
+from storage.wal import OP_CREATE, OP_DELETE
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse, TaskInTaskDict
+
+# magic, version, capacity, heap size, heap used, highest task ID, number of tasks
+_HEADER = struct.Struct("<4sIQQQQQ")
+_HEADER_SIZE = 256
+_MAGIC = b"TSHM"
+_VERSION = 2
+_HEAP_USED_OFFSET = 24
+_HIGH_ID_OFFSET = 32
+_COUNT_OFFSET = 40
+# A random identifier of the current contents, replaced when the store is cleared. Stores
+# created before it was kept have 0 there.
+_EPOCH_OFFSET = 48
+# Names are stored in heap blocks of 16 << k bytes, k below _BLOCK_CLASSES. Freed blocks are
+# chained through their first 8 bytes into one free list per size, whose heads follow the
+# header fields, and reused before the heap grows.
+_FREE_LISTS_OFFSET = 64
+_BLOCK_CLASSES = 12
+_MIN_BLOCK_SIZE = 16
+_MAX_NAME_SIZE = _MIN_BLOCK_SIZE << (_BLOCK_CLASSES - 1)
+
+# sequence, live flag, status, name length, name capacity, padding, name offset in the heap
+_RECORD = struct.Struct("<IBBHHxxI")
+_SEQUENCE = struct.Struct("<I")
+_COUNTER = struct.Struct("<Q")
+
+# Unlocked read attempts of a record before its stripe lock is taken, which waits for a slow
+# writer and is released by the kernel when the writer died
+_MAX_READ_RETRIES = 1000
+
+# Byte-range lock 0 guards the header and the heap, the others guard record stripes
+_META_LOCK = 0
+
+
+def _new_epoch() -> int:
+    return int.from_bytes(os.urandom(8), "little")
+
+
+def _block_class(length: int) -> int:
+    """
+    Returns the size class of the smallest heap block holding `length` bytes.
+    """
+    return (max(length, _MIN_BLOCK_SIZE) - 1).bit_length() - 4
+
+
+class SharedMemoryBackend:
+    """
+    Stores tasks in a memory-mapped file, so that several worker processes share one dataset.
+
+    The file holds a header, a fixed-layout record area addressed directly by task ID and a
+    name heap. Each record carries a sequence number used as a seqlock: writers make it odd
+    while they change the record and even again afterwards, and readers retry when it changed
+    underneath them. Reads therefore never lock and scale with the number of processes. As
+    every write advances the sequence by two, half of it is the version of the record.
+
+    Writers are serialized across processes with `fcntl` byte-range locks, one for the header
+    and heap and one per record stripe, each paired with a thread lock because `fcntl` locks
+    do not exclude threads of the same process. IDs are allocated from the shared header.
+
+    Names are overwritten in place when they fit their heap block. Otherwise, or when the task
+    is deleted, the block is put on a free list of blocks of its size, from which later names
+    are allocated, so renames and deletions do not use up the heap. Blocks are sized in powers
+    of two from 16 bytes, which bounds the space wasted per name to half of it.
+
+    Attributes:
+        path (str): The path of the memory-mapped file.
+        capacity (int): The maximum number of task IDs the file can hold.
+        heap_size (int): The number of bytes available for UTF-8 encoded names.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 1_000_000,
+        heap_size: int = 64 * 1024 * 1024,
+        stripes: int = 64,
+    ):
+        self.path = path
+        self._stripes = stripes
+        self._thread_locks = [threading.Lock() for _ in range(stripes + 1)]
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        with self._locked(_META_LOCK):
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(
+                    self._fd, _HEADER_SIZE + capacity * _RECORD.size + heap_size
+                )
+                header = _HEADER.pack(_MAGIC, _VERSION, capacity, heap_size, 0, 0, 0)
+                os.pwrite(self._fd, header + _COUNTER.pack(_new_epoch()), 0)
+            self._mm = mmap.mmap(self._fd, 0)
+
+        magic, version, self.capacity, self.heap_size, _, _, _ = _HEADER.unpack_from(
+            self._mm
+        )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a shared task store.")
+        self._heap_base = _HEADER_SIZE + self.capacity * _RECORD.size
+
+    @contextmanager
+    def _locked(self, stripe: int) -> Iterator[None]:
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+
+    def _stripe(self, task_id: int) -> int:
+        return task_id % self._stripes + 1
+
+    def _record_offset(self, task_id: int) -> int:
+        if not 1 <= task_id <= self.capacity:
+            raise StorageFullException(
+                f"Task ID {task_id} exceeds the shared store capacity of {self.capacity}."
+            )
+        return _HEADER_SIZE + (task_id - 1) * _RECORD.size
+
+    def _read_counter(self, offset: int) -> int:
+        return _COUNTER.unpack_from(self._mm, offset)[0]
+
+    def _add_counter(self, offset: int, delta: int) -> None:
+        _COUNTER.pack_into(self._mm, offset, self._read_counter(offset) + delta)
+
+    def _read(
+        self, task_id: int, locked: bool = False
+    ) -> Optional[Tuple[str, bool, int]]:
+        """
+        Reads a record without locking, retrying while a writer is changing it.
+
+        After `_MAX_READ_RETRIES` attempts, the record is read under its stripe lock instead,
+        so that readers do not spin forever on a record left mid-write by a crashed writer.
+
+        Parameters:
+            task_id (int): The ID of the task to read.
+            locked (bool): Whether the caller holds the record's stripe lock already.
+        """
+        if not 1 <= task_id <= self.capacity:
+            return None
+        mm = self._mm
+        offset = _HEADER_SIZE + (task_id - 1) * _RECORD.size
+        if locked:
+            return self._read_locked(offset)
+
+        for _ in range(_MAX_READ_RETRIES):
+            sequence, live, status, length, _, name_offset = _RECORD.unpack_from(
+                mm, offset
+            )
+            if not sequence & 1:
+                result = None
+                if live:
+                    start = self._heap_base + name_offset
+                    try:
+                        result = (
+                            mm[start : start + length].decode(),
+                            status == 1,
+                            sequence >> 1,
+                        )
+                    except UnicodeDecodeError:
+                        continue
+                if _SEQUENCE.unpack_from(mm, offset)[0] == sequence:
+                    return result
+            os.sched_yield()
+
+        with self._locked(self._stripe(task_id)):
+            return self._read_locked(offset)
+
+    def _read_locked(self, offset: int) -> Optional[Tuple[str, bool, int]]:
+        """
+        Reads a record while holding its stripe lock, repairing it if a writer died mid-write.
+        """
+        mm = self._mm
+        sequence, live, status, length, _, name_offset = _RECORD.unpack_from(mm, offset)
+        if sequence & 1:
+            # No writer can be active, so the one that made the sequence odd died. Its write
+            # is completed as is, and a name it left half written is decoded leniently until
+            # the task is written again.
+            sequence += 1
+            _SEQUENCE.pack_into(mm, offset, sequence)
+        if not live:
+            return None
+
+        start = self._heap_base + name_offset
+        return (
+            mm[start : start + length].decode(errors="replace"),
+            status == 1,
+            sequence >> 1,
+        )
+
+    def _write(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        live: bool = True,
+        block: Optional[Tuple[int, int]] = None,
+    ) -> int:
+        """
+        Writes a record under the seqlock. The caller holds the record's stripe lock.
+        Names are overwritten in place when they fit, otherwise moved to a new heap block,
+        and the blocks left behind are freed once the record no longer points to them.
+        `block` is a heap block reserved for the name by the caller, used when it does not
+        fit in place and freed otherwise. Returns the version written.
+        """
+        offset = self._record_offset(task_id)
+        sequence, was_live, _, _, capacity, name_offset = _RECORD.unpack_from(
+            self._mm, offset
+        )
+        # An odd sequence under the lock was left by a writer that died, the record is
+        # rewritten entirely
+        sequence += sequence & 1
+        encoded = name.encode()
+        freed = []
+        if not live or len(encoded) > capacity:
+            if capacity:
+                freed.append((name_offset, capacity))
+            if not live:
+                name_offset, capacity = 0, 0
+            elif block is not None:
+                (name_offset, capacity), block = block, None
+            else:
+                name_offset, capacity = self._allocate_name(len(encoded))
+        if block is not None:
+            freed.append(block)
+
+        _SEQUENCE.pack_into(self._mm, offset, sequence + 1)
+        if live:
+            start = self._heap_base + name_offset
+            self._mm[start : start + len(encoded)] = encoded
+        _RECORD.pack_into(
+            self._mm,
+            offset,
+            sequence + 1,
+            live,
+            status,
+            len(encoded),
+            capacity,
+            name_offset,
+        )
+        _SEQUENCE.pack_into(self._mm, offset, sequence + 2)
+
+        if live != bool(was_live) or freed:
+            with self._locked(_META_LOCK):
+                if live != bool(was_live):
+                    self._add_counter(_COUNT_OFFSET, 1 if live else -1)
+                for freed_block in freed:
+                    self._release_block(*freed_block)
+
+        return (sequence + 2) >> 1
+
+    def _allocate_name(self, length: int) -> Tuple[int, int]:
+        with self._locked(_META_LOCK):
+            return self._take_block(length)
+
+    def _take_block(self, length: int) -> Tuple[int, int]:
+        """
+        Takes a heap block of at least `length` bytes, from its free list when it has one.
+        The caller holds the meta lock.
+
+        Returns:
+            The offset of the block in the heap and its size.
+
+        Raises:
+            StorageFullException: If the name is too long or the heap is full.
+        """
+        if length > _MAX_NAME_SIZE:
+            raise StorageFullException(
+                f"Names stored in the shared store are limited to {_MAX_NAME_SIZE} bytes."
+            )
+        size_class = _block_class(length)
+        size = _MIN_BLOCK_SIZE << size_class
+        head_offset = _FREE_LISTS_OFFSET + size_class * _COUNTER.size
+        # Free list links are offsets plus one, so that 0 ends a list
+        head = self._read_counter(head_offset)
+        if head:
+            next_head = self._read_counter(self._heap_base + head - 1)
+            _COUNTER.pack_into(self._mm, head_offset, next_head)
+            return head - 1, size
+
+        used = self._read_counter(_HEAP_USED_OFFSET)
+        if used + size > self.heap_size:
+            raise StorageFullException("The shared store name heap is full.")
+        _COUNTER.pack_into(self._mm, _HEAP_USED_OFFSET, used + size)
+        return used, size
+
+    def _release_block(self, name_offset: int, size: int) -> None:
+        """
+        Puts a heap block on its free list. The caller holds the meta lock.
+        """
+        head_offset = _FREE_LISTS_OFFSET + _block_class(size) * _COUNTER.size
+        _COUNTER.pack_into(
+            self._mm, self._heap_base + name_offset, self._read_counter(head_offset)
+        )
+        _COUNTER.pack_into(self._mm, head_offset, name_offset + 1)
+
+    def allocate_id(self, count: int = 1) -> int:
+        """
+        Allocates the next `count` task IDs from the shared header, so IDs are unique across
+        processes, and returns the first of them.
+        """
+        with self._locked(_META_LOCK):
+            first_id = self._read_counter(_HIGH_ID_OFFSET) + 1
+            last_id = first_id + count - 1
+            self._record_offset(last_id)
+            _COUNTER.pack_into(self._mm, _HIGH_ID_OFFSET, last_id)
+
+        return first_id
+
+    def get(self, task_id: int) -> Optional["TaskInTaskDict"]:
+        record = self._read(task_id)
+        if record is None:
+            return None
+
+        return {"name": record[0], "status": record[1], "version": record[2]}
+
+    def get_all(self) -> List["TaskInResponse"]:
+        return list(self.iter_tasks())
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator["TaskInResponse"]:
+        task_id = max(after_id, 0)
+        while task_id < self.max_id():
+            task_id += 1
+            record = self._read(task_id)
+            if record is not None:
+                yield {
+                    "id": task_id,
+                    "name": record[0],
+                    "status": record[1],
+                    "version": record[2],
+                }
+
+    def create(self, task_id: int, name: str, status: bool) -> None:
+        with self._locked(self._stripe(task_id)):
+            self._write(task_id, name, status)
+        with self._locked(_META_LOCK):
+            if task_id > self._read_counter(_HIGH_ID_OFFSET):
+                _COUNTER.pack_into(self._mm, _HIGH_ID_OFFSET, task_id)
+
+    def update(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        with self._locked(self._stripe(task_id)):
+            record = self._read(task_id, locked=True)
+            if record is None or expected_version not in (None, record[2]):
+                return None
+            return self._write(task_id, name, status)
+
+    def delete(self, task_id: int) -> bool:
+        with self._locked(self._stripe(task_id)):
+            if self._read(task_id, locked=True) is None:
+                return False
+            self._write(task_id, "", False, live=False)
+
+        return True
+
+    def apply_batch(self, operations: Iterable[Operation]) -> List[Optional[int]]:
+        """
+        Applies the operations in order. Every task ID is checked and a heap block reserved
+        for every name first, so that a batch the store has no room for raises
+        StorageFullException before any of it is applied. Whether the task to update or
+        delete still exists is checked under its stripe lock, as another process may have
+        deleted it since the caller read it; the blocks of skipped updates are freed.
+        """
+        operations = list(operations)
+        for _, task_id, _, _ in operations:
+            self._record_offset(task_id)
+        blocks = []
+        with self._locked(_META_LOCK):
+            try:
+                for op, _, name, _ in operations:
+                    if op != OP_DELETE:
+                        blocks.append(self._take_block(len(name.encode())))
+            except StorageFullException:
+                for block in blocks:
+                    self._release_block(*block)
+                raise
+
+        blocks = iter(blocks)
+        unused_blocks = []
+        versions: List[Optional[int]] = []
+        for op, task_id, name, status in operations:
+            block = None if op == OP_DELETE else next(blocks)
+            with self._locked(self._stripe(task_id)):
+                if op != OP_CREATE and self._read(task_id, locked=True) is None:
+                    versions.append(None)
+                    if block is not None:
+                        unused_blocks.append(block)
+                elif op == OP_DELETE:
+                    self._write(task_id, "", False, live=False)
+                    versions.append(0)
+                else:
+                    versions.append(self._write(task_id, name, status, block=block))
+        high_id = max(
+            (task_id for op, task_id, _, _ in operations if op == OP_CREATE), default=0
+        )
+        with self._locked(_META_LOCK):
+            if high_id > self._read_counter(_HIGH_ID_OFFSET):
+                _COUNTER.pack_into(self._mm, _HIGH_ID_OFFSET, high_id)
+            for block in unused_blocks:
+                self._release_block(*block)
+
+        return versions
+
+    def max_id(self) -> int:
+        return self._read_counter(_HIGH_ID_OFFSET)
+
+    def count(self) -> int:
+        return self._read_counter(_COUNT_OFFSET)
+
+    def clear(self) -> None:
+        with self._locked(_META_LOCK):
+            self._mm[_HEADER_SIZE : self._heap_base] = bytes(
+                self._heap_base - _HEADER_SIZE
+            )
+            for offset in (_HEAP_USED_OFFSET, _HIGH_ID_OFFSET, _COUNT_OFFSET):
+                _COUNTER.pack_into(self._mm, offset, 0)
+            self._mm[
+                _FREE_LISTS_OFFSET : _FREE_LISTS_OFFSET + _BLOCK_CLASSES * _COUNTER.size
+            ] = bytes(_BLOCK_CLASSES * _COUNTER.size)
+            _COUNTER.pack_into(self._mm, _EPOCH_OFFSET, _new_epoch())
+
+    def epoch(self) -> str:
+        """
+        Identifies the current contents of the store, the same in every process, so that task
+        versions from before the store was cleared are not mistaken for current ones.
+        """
+        return f"{self._read_counter(_EPOCH_OFFSET):016x}"
+
+    def close(self) -> None:
+        if self._fd < 0:
+            return
+        self._mm.close()
+        os.close(self._fd)
+        self._fd = -1
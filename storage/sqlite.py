@@ -0,0 +1,382 @@
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+from models.indexes import NameIndex
+from storage.base import Operation
+from storage.wal import OP_CREATE, OP_DELETE
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse, TaskInTaskDict
+
+# Rows fetched per query when iterating, bounding memory use and connection hold time
+ITER_CHUNK_SIZE = 500
+
+# Statements are kept as constants so that sqlite3's per-connection statement cache
+# reuses the prepared statements instead of compiling them on every call.
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS tasks ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, status INTEGER NOT NULL, "
+    "version INTEGER NOT NULL DEFAULT 1)"
+)
+# Values shared by every process using the database, such as the epoch
+_META_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+)
+_SELECT_EPOCH = "SELECT value FROM meta WHERE key = 'epoch'"
+_INIT_EPOCH = "INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)"
+_SET_EPOCH = "UPDATE meta SET value = ? WHERE key = 'epoch'"
+# Serves the status filter and the counts per status, the ID being part of every index entry
+_STATUS_INDEX = "CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status)"
+# Databases created before tasks were versioned lack the column
+_COLUMNS = "PRAGMA table_info(tasks)"
+_ADD_VERSION = "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+_SELECT_ONE = "SELECT name, status, version FROM tasks WHERE id = ?"
+_SELECT_ALL = "SELECT id, name, status, version FROM tasks ORDER BY id"
+_SELECT_AFTER = (
+    "SELECT id, name, status, version FROM tasks WHERE id > ? ORDER BY id LIMIT ?"
+)
+_SELECT_AFTER_WITH_STATUS = (
+    "SELECT id, name, status, version FROM tasks WHERE status = ? AND id > ? "
+    "ORDER BY id LIMIT ?"
+)
+# name_matches is the Python function registered on every connection
+_SELECT_AFTER_MATCHING = (
+    "SELECT id, name, status, version FROM tasks WHERE id > ? AND name_matches(name, ?) "
+    "ORDER BY id LIMIT ?"
+)
+_SELECT_AFTER_WITH_STATUS_MATCHING = (
+    "SELECT id, name, status, version FROM tasks "
+    "WHERE status = ? AND id > ? AND name_matches(name, ?) ORDER BY id LIMIT ?"
+)
+_UPSERT = (
+    "INSERT INTO tasks (id, name, status) VALUES (?, ?, ?) ON CONFLICT (id) DO UPDATE "
+    "SET name = excluded.name, status = excluded.status, version = version + 1"
+)
+_SELECT_VERSIONS = "SELECT id, version FROM tasks WHERE id BETWEEN ? AND ?"
+# Writes a task as it is, keeping the version given rather than incrementing it
+_STORE = (
+    "INSERT INTO tasks (id, name, status, version) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE "
+    "SET name = excluded.name, status = excluded.status, version = excluded.version"
+)
+_INSERT = "INSERT INTO tasks (id, name, status) VALUES (?, ?, ?)"
+_UPDATE = (
+    "UPDATE tasks SET name = ?, status = ?, version = version + 1 WHERE id = ? "
+    "RETURNING version"
+)
+_UPDATE_IF_VERSION = (
+    "UPDATE tasks SET name = ?, status = ?, version = version + 1 "
+    "WHERE id = ? AND version = ? RETURNING version"
+)
+_DELETE = "DELETE FROM tasks WHERE id = ?"
+_MAX_ID = "SELECT seq FROM sqlite_sequence WHERE name = 'tasks'"
+# Keyed by whether tasks are filtered by status and by name
+_SELECT_FILTERED = {
+    (False, False): _SELECT_AFTER,
+    (True, False): _SELECT_AFTER_WITH_STATUS,
+    (False, True): _SELECT_AFTER_MATCHING,
+    (True, True): _SELECT_AFTER_WITH_STATUS_MATCHING,
+}
+_COUNT = "SELECT COUNT(*) FROM tasks"
+_COUNT_BY_STATUS = "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+# Raise the ID high-water mark, whose row only exists once a task was inserted
+_RAISE_MAX_ID = "UPDATE sqlite_sequence SET seq = ? WHERE name = 'tasks' AND seq < ?"
+_INIT_MAX_ID = (
+    "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', ? "
+    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks')"
+)
+
+
+class SQLiteBackend:
+    """
+    Stores tasks in an SQLite database, allowing datasets larger than memory.
+
+    Tasks are filtered by status and name and counted per status by queries, so `Task` keeps no
+    index of them in memory. The status filter uses an index of the table, whereas name
+    searches scan it, testing each name with the same matching as `NameIndex`.
+
+    Several processes may use the same database: task IDs are allocated from its ID high-water
+    mark by `allocate_id` and versions are kept in its rows, and the epoch identifying its
+    contents is stored in it too, so none of them is held in one process only.
+
+    Connections are kept in a pool and checked out by one thread at a time for the duration
+    of a single operation, so threaded servers that start a thread per request still reuse
+    connections. The database runs in WAL journal mode, letting readers proceed while a
+    write transaction is open, and `apply_batch` commits many operations in one transaction.
+
+    Attributes:
+        path (str): The path of the database file.
+        pool_size (int): The maximum number of idle connections kept open.
+    """
+
+    def __init__(self, path: str, pool_size: int = 8, synchronous: str = "NORMAL"):
+        self.path = path
+        self.pool_size = pool_size
+        self._synchronous = synchronous
+        self._idle: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+
+        with self._connection() as connection:
+            connection.execute(_SCHEMA)
+            columns = [row[1] for row in connection.execute(_COLUMNS)]
+            if "version" not in columns:
+                connection.execute(_ADD_VERSION)
+            connection.execute(_STATUS_INDEX)
+            connection.execute(_META_SCHEMA)
+            connection.execute(_INIT_EPOCH, (uuid.uuid4().hex[:12],))
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self._synchronous}")
+        connection.create_function(
+            "name_matches", 2, NameIndex.matches, deterministic=True
+        )
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        with self._pool_lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._connect()
+        try:
+            yield connection
+        finally:
+            with self._pool_lock:
+                if len(self._idle) < self.pool_size:
+                    self._idle.append(connection)
+                    connection = None
+            if connection is not None:
+                connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def allocate_id(self, count: int = 1) -> int:
+        """
+        Allocates the next `count` task IDs by raising the ID high-water mark of the database
+        in a write transaction, so IDs are unique across the processes using it, and returns
+        the first of them.
+        """
+        with self._transaction() as connection:
+            row = connection.execute(_MAX_ID).fetchone()
+            first_id = (row[0] if row else 0) + 1
+            last_id = first_id + count - 1
+            connection.execute(_RAISE_MAX_ID, (last_id, last_id))
+            connection.execute(_INIT_MAX_ID, (last_id,))
+
+        return first_id
+
+    def epoch(self) -> str:
+        """
+        Identifies the current contents of the database, the same in every process and across
+        restarts, so that task versions from before it was cleared are not mistaken for
+        current ones.
+        """
+        with self._connection() as connection:
+            return connection.execute(_SELECT_EPOCH).fetchone()[0]
+
+    def get(self, task_id: int) -> Optional["TaskInTaskDict"]:
+        with self._connection() as connection:
+            row = connection.execute(_SELECT_ONE, (task_id,)).fetchone()
+        if row is None:
+            return None
+
+        return {"name": row[0], "status": bool(row[1]), "version": row[2]}
+
+    def get_all(self) -> List["TaskInResponse"]:
+        with self._connection() as connection:
+            rows = connection.execute(_SELECT_ALL).fetchall()
+
+        return [
+            {"id": task_id, "name": name, "status": bool(status), "version": version}
+            for task_id, name, status, version in rows
+        ]
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator["TaskInResponse"]:
+        return self.iter_matching(after_id)
+
+    def iter_matching(
+        self,
+        after_id: int = 0,
+        status: Optional[bool] = None,
+        query: Optional[str] = None,
+    ) -> Iterator["TaskInResponse"]:
+        """
+        Walks the primary key, or the status index when filtering by status, in chunks (keyset
+        pagination), checking a connection out of the pool only while a chunk is being fetched.
+        """
+        statement = _SELECT_FILTERED[status is not None, query is not None]
+        before = () if status is None else (status,)
+        after = () if query is None else (query,)
+        while True:
+            parameters = (*before, after_id, *after, ITER_CHUNK_SIZE)
+            with self._connection() as connection:
+                rows = connection.execute(statement, parameters).fetchall()
+            for task_id, name, status, version in rows:
+                yield {
+                    "id": task_id,
+                    "name": name,
+                    "status": bool(status),
+                    "version": version,
+                }
+            if len(rows) < ITER_CHUNK_SIZE:
+                return
+            after_id = rows[-1][0]
+
+    def create(self, task_id: int, name: str, status: bool) -> None:
+        with self._connection() as connection:
+            connection.execute(_INSERT, (task_id, name, status))
+
+    def update(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        Compares the version and writes in a single statement, so the check holds even against
+        writers in other processes.
+        """
+        with self._connection() as connection:
+            if expected_version is None:
+                cursor = connection.execute(_UPDATE, (name, status, task_id))
+            else:
+                cursor = connection.execute(
+                    _UPDATE_IF_VERSION, (name, status, task_id, expected_version)
+                )
+            # Fetching every row completes the statement, which commits it
+            rows = cursor.fetchall()
+
+        return rows[0][0] if rows else None
+
+    def delete(self, task_id: int) -> bool:
+        with self._connection() as connection:
+            cursor = connection.execute(_DELETE, (task_id,))
+
+        return cursor.rowcount == 1
+
+    def apply_batch(self, operations: Iterable[Operation]) -> List[Optional[int]]:
+        """
+        Applies the operations in order within a single transaction. Updates and deletes
+        return whether they found the task, which may have been deleted by another process
+        since the caller read it, in which case they are skipped. Consecutive creates are
+        grouped into one `executemany` call, their versions being derived from those of the
+        rows in their ID range, read first.
+        """
+        versions: List[Optional[int]] = []
+        creates: List[Tuple[int, str, bool]] = []
+        with self._transaction() as connection:
+            for op, task_id, name, status in operations:
+                if op == OP_CREATE:
+                    creates.append((task_id, name, status))
+                    continue
+                if creates:
+                    versions += self._create_many(connection, creates)
+                    creates = []
+                if op == OP_DELETE:
+                    cursor = connection.execute(_DELETE, (task_id,))
+                    versions.append(0 if cursor.rowcount == 1 else None)
+                else:
+                    rows = connection.execute(
+                        _UPDATE, (name, status, task_id)
+                    ).fetchall()
+                    versions.append(rows[0][0] if rows else None)
+            if creates:
+                versions += self._create_many(connection, creates)
+
+        return versions
+
+    @staticmethod
+    def _create_many(
+        connection: sqlite3.Connection, creates: List[Tuple[int, str, bool]]
+    ) -> List[int]:
+        task_ids = [task_id for task_id, _, _ in creates]
+        # Creates get new IDs, so the range is usually empty
+        current = dict(
+            connection.execute(_SELECT_VERSIONS, (min(task_ids), max(task_ids)))
+        )
+        connection.executemany(_UPSERT, creates)
+        versions = []
+        for task_id in task_ids:
+            current[task_id] = current.get(task_id, 0) + 1
+            versions.append(current[task_id])
+
+        return versions
+
+    def store_batch(
+        self,
+        records: Iterable[Tuple[int, Optional["TaskInTaskDict"]]],
+        max_id: int = 0,
+    ) -> None:
+        """
+        Writes the given state of each task within a single transaction, e.g. that of a cache
+        in front of the database. Unlike `apply_batch`, versions are stored as given.
+
+        Parameters:
+            records (Iterable[Tuple[int, Optional[TaskInTaskDict]]]): (task ID, task) pairs,
+                the task being None when it is deleted.
+            max_id (int): The highest task ID ever created, which `max_id` returns from then
+                on if higher, even when that task was deleted before it could be stored.
+        """
+        stored, deleted = [], []
+        for task_id, task in records:
+            if task is None:
+                deleted.append((task_id,))
+            else:
+                stored.append((task_id, task["name"], task["status"], task["version"]))
+        with self._transaction() as connection:
+            if stored:
+                connection.executemany(_STORE, stored)
+            if deleted:
+                connection.executemany(_DELETE, deleted)
+            if max_id:
+                connection.execute(_RAISE_MAX_ID, (max_id, max_id))
+                connection.execute(_INIT_MAX_ID, (max_id,))
+
+    def max_id(self) -> int:
+        with self._connection() as connection:
+            row = connection.execute(_MAX_ID).fetchone()
+
+        return row[0] if row else 0
+
+    def count(self) -> int:
+        with self._connection() as connection:
+            return connection.execute(_COUNT).fetchone()[0]
+
+    def count_by_status(self) -> Dict[bool, int]:
+        counts = {False: 0, True: 0}
+        with self._connection() as connection:
+            for status, count in connection.execute(_COUNT_BY_STATUS):
+                counts[bool(status)] = count
+
+        return counts
+
+    def clear(self) -> None:
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM tasks")
+            connection.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+            connection.execute(_SET_EPOCH, (uuid.uuid4().hex[:12],))
+
+    def close(self) -> None:
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
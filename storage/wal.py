@@ -0,0 +1,493 @@
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Operation codes stored in each WAL record
+OP_CREATE = 1
+OP_UPDATE = 2
+OP_DELETE = 3
+
+# crc32, op, task_id, status, name length; followed by the UTF-8 encoded name
+_RECORD_HEADER = struct.Struct("<IBQBH")
+# Set in the op of records followed by the version of the task, after the name. Records
+# written before tasks were versioned lack it.
+_VERSIONED = 0x80
+_RECORD_VERSION = struct.Struct("<I")
+# magic, first LSN not covered by the snapshot, last_task_id, number of tasks
+_SNAPSHOT_HEADER = struct.Struct("<4sQQQ")
+# Version 2 adds a column of task versions, version 1 snapshots are still read
+_SNAPSHOT_MAGIC = b"TSN2"
+_SNAPSHOT_MAGIC_V1 = b"TSN1"
+_CRC = struct.Struct("<I")
+_BLOB_LENGTH = struct.Struct("<Q")
+
+_SEGMENT_PATTERN = re.compile(r"^wal-(\d{20})\.log$")
+_SNAPSHOT_PATTERN = re.compile(r"^snapshot-(\d{20})\.bin$")
+
+TaskRecords = Dict[int, Dict]
+SnapshotSource = Callable[[], Tuple[TaskRecords, int]]
+
+
+def _segment_name(start_lsn: int) -> str:
+    return f"wal-{start_lsn:020d}.log"
+
+
+def _snapshot_name(lsn: int) -> str:
+    return f"snapshot-{lsn:020d}.bin"
+
+
+def _fsync_directory(directory: str) -> None:
+    """
+    Flushes directory metadata so that created and renamed files survive a crash.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def encode_record(
+    op: int,
+    task_id: int,
+    name: str = "",
+    status: bool = False,
+    version: Optional[int] = None,
+) -> bytes:
+    """
+    Encodes one WAL record.
+
+    Parameters:
+        - op (int): One of OP_CREATE, OP_UPDATE or OP_DELETE.
+        - task_id (int): The ID of the affected task.
+        - name (str): The name of the task after the operation.
+        - status (bool): The status of the task after the operation.
+        - version (Optional[int]): The version of the task after the operation. Replaying a
+            record sets the version rather than incrementing it, so records also reflected in
+            the snapshot they follow are not counted twice.
+
+    Returns:
+        - The binary record, prefixed with a CRC32 of its content.
+    """
+    encoded_name = name.encode()
+    if version is not None:
+        op |= _VERSIONED
+    body = _RECORD_HEADER.pack(0, op, task_id, status, len(encoded_name))[4:]
+    body += encoded_name
+    if version is not None:
+        body += _RECORD_VERSION.pack(version)
+    return _CRC.pack(zlib.crc32(body)) + body
+
+
+def iter_records(
+    data: bytes,
+) -> Iterator[Tuple[int, int, int, bool, str, Optional[int]]]:
+    """
+    Decodes WAL records from a segment, stopping at the first torn or corrupt record.
+
+    Parameters:
+        - data (bytes): The content of a WAL segment.
+
+    Returns:
+        - An iterator of (end offset, op, task_id, status, name, version) tuples, the version
+            being None for records written without one.
+    """
+    view = memoryview(data)
+    offset = 0
+    header_size = _RECORD_HEADER.size
+    total = len(data)
+    while offset + header_size <= total:
+        crc, op, task_id, status, name_length = _RECORD_HEADER.unpack_from(data, offset)
+        name_end = end = offset + header_size + name_length
+        if op & _VERSIONED:
+            end += _RECORD_VERSION.size
+        if end > total or zlib.crc32(view[offset + 4 : end]) != crc:
+            return
+        name = bytes(view[offset + header_size : name_end]).decode()
+        version = None
+        if op & _VERSIONED:
+            (version,) = _RECORD_VERSION.unpack_from(data, name_end)
+        yield end, op & ~_VERSIONED, task_id, bool(status), name, version
+        offset = end
+
+
+def write_snapshot(path: str, lsn: int, tasks: TaskRecords, last_task_id: int) -> None:
+    """
+    Writes a columnar snapshot of the tasks atomically (temporary file, fsync, rename).
+
+    Parameters:
+        - path (str): The final path of the snapshot file.
+        - lsn (int): The first WAL LSN whose effect is not guaranteed to be in `tasks`.
+        - tasks (TaskRecords): The tasks keyed by ID.
+        - last_task_id (int): The last allocated task ID.
+    """
+    ids = array("q", tasks.keys())
+    statuses = bytearray(len(ids))
+    lengths = array("I")
+    versions = array("I")
+    names = []
+    for index, task in enumerate(tasks.values()):
+        statuses[index] = task["status"]
+        lengths.append(len(task["name"]))
+        versions.append(task["version"])
+        names.append(task["name"])
+    blob = "".join(names).encode()
+    if sys.byteorder == "big":
+        ids.byteswap()
+        lengths.byteswap()
+        versions.byteswap()
+
+    parts = [
+        _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, lsn, last_task_id, len(ids)),
+        ids.tobytes(),
+        bytes(statuses),
+        lengths.tobytes(),
+        versions.tobytes(),
+        _BLOB_LENGTH.pack(len(blob)),
+        blob,
+    ]
+    crc = 0
+    for part in parts:
+        crc = zlib.crc32(part, crc)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        for part in parts:
+            file.write(part)
+        file.write(_CRC.pack(crc))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    _fsync_directory(os.path.dirname(path) or ".")
+
+
+def read_snapshot(path: str) -> Optional[Tuple[int, TaskRecords, int]]:
+    """
+    Reads a snapshot written by `write_snapshot`.
+
+    Parameters:
+        - path (str): The path of the snapshot file.
+
+    Returns:
+        - A tuple of (lsn, tasks, last_task_id), or None if the file is corrupt.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < _SNAPSHOT_HEADER.size + _CRC.size:
+        return None
+    (expected_crc,) = _CRC.unpack_from(data, len(data) - _CRC.size)
+    if zlib.crc32(memoryview(data)[: -_CRC.size]) != expected_crc:
+        return None
+
+    magic, lsn, last_task_id, count = _SNAPSHOT_HEADER.unpack_from(data)
+    if magic not in (_SNAPSHOT_MAGIC, _SNAPSHOT_MAGIC_V1):
+        return None
+    offset = _SNAPSHOT_HEADER.size
+    ids = array("q")
+    ids.frombytes(data[offset : offset + count * ids.itemsize])
+    offset += count * ids.itemsize
+    statuses = data[offset : offset + count]
+    offset += count
+    lengths = array("I")
+    lengths.frombytes(data[offset : offset + count * lengths.itemsize])
+    offset += count * lengths.itemsize
+    versions = array("I")
+    if magic == _SNAPSHOT_MAGIC:
+        versions.frombytes(data[offset : offset + count * versions.itemsize])
+        offset += count * versions.itemsize
+    (blob_length,) = _BLOB_LENGTH.unpack_from(data, offset)
+    offset += _BLOB_LENGTH.size
+    text = data[offset : offset + blob_length].decode()
+    if sys.byteorder == "big":
+        ids.byteswap()
+        lengths.byteswap()
+        versions.byteswap()
+    if magic == _SNAPSHOT_MAGIC_V1:
+        versions = array("I", [1]) * count
+
+    tasks = {}
+    position = 0
+    for task_id, status, length, version in zip(ids, statuses, lengths, versions):
+        end = position + length
+        tasks[task_id] = {
+            "name": text[position:end],
+            "status": status == 1,
+            "version": version,
+        }
+        position = end
+
+    return lsn, tasks, last_task_id
+
+
+class WriteAheadLog:
+    """
+    A durable, append-only binary log of task mutations with periodic snapshots.
+
+    Every create, update and delete is appended as a record holding the task state after the
+    operation, so replaying any suffix of the log in order reproduces the latest state.
+    Appends only copy bytes into a buffer; a background flusher writes and fsyncs everything
+    buffered so far in one go (group commit), so concurrent writers share the cost of an fsync.
+
+    After `snapshot_interval` records, the log is rotated to a new segment and a snapshot of
+    the state is written in the background. Recovery loads the newest valid snapshot and
+    replays only the segments written after it.
+
+    Callers must apply a mutation to their state before appending its record, so that every
+    record older than a snapshot's LSN is guaranteed to be reflected in the snapshot.
+
+    Attributes:
+        - directory (str): The directory holding the WAL segments and snapshots.
+        - sync (bool): Whether `commit` waits until the record has been fsynced.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot_source: Optional[SnapshotSource] = None,
+        sync: bool = True,
+        fsync: bool = True,
+        snapshot_interval: int = 1_000_000,
+        snapshot_on_close: bool = True,
+    ):
+        self.directory = directory
+        self.sync = sync
+        self._snapshot_source = snapshot_source
+        self._fsync = fsync
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_on_close = snapshot_on_close
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._has_data = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._snapshot_requested = threading.Event()
+
+        self._buffer = bytearray()
+        self._next_lsn = 0
+        self._durable_lsn = 0
+        self._since_snapshot = 0
+        self._file = None
+        self._closing = False
+        self._threads: List[threading.Thread] = []
+
+    def open(self) -> Tuple[TaskRecords, int]:
+        """
+        Recovers the state from the latest snapshot and WAL tail, then starts accepting appends.
+
+        Returns:
+            - A tuple of the recovered tasks keyed by ID and the last allocated task ID.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tasks, last_task_id, snapshot_lsn = {}, 0, 0
+        for lsn in sorted(self._list(_SNAPSHOT_PATTERN), reverse=True):
+            snapshot = read_snapshot(os.path.join(self.directory, _snapshot_name(lsn)))
+            if snapshot is not None:
+                snapshot_lsn, tasks, last_task_id = snapshot
+                break
+
+        next_lsn = snapshot_lsn
+        for start_lsn in sorted(self._list(_SEGMENT_PATTERN)):
+            if start_lsn < snapshot_lsn:
+                continue
+            path = os.path.join(self.directory, _segment_name(start_lsn))
+            with open(path, "rb") as file:
+                data = file.read()
+            valid_length = 0
+            next_lsn = start_lsn
+            for valid_length, op, task_id, status, name, version in iter_records(data):
+                if op == OP_DELETE:
+                    tasks.pop(task_id, None)
+                else:
+                    if version is None:
+                        previous = tasks.get(task_id)
+                        version = 1 if previous is None else previous["version"] + 1
+                    tasks[task_id] = {
+                        "name": name,
+                        "status": status,
+                        "version": version,
+                    }
+                if task_id > last_task_id:
+                    last_task_id = task_id
+                next_lsn += 1
+            if valid_length < len(data):
+                # Drop a torn record left behind by a crash during a write
+                with open(path, "r+b") as file:
+                    file.truncate(valid_length)
+
+        self._next_lsn = self._durable_lsn = next_lsn
+        self._since_snapshot = next_lsn - snapshot_lsn
+        self._file = self._open_segment(next_lsn)
+        self._start_thread(self._flush_loop, "wal-flusher")
+        if self._snapshot_source is not None:
+            self._start_thread(self._snapshot_loop, "wal-snapshotter")
+
+        return tasks, last_task_id
+
+    def append(
+        self,
+        op: int,
+        task_id: int,
+        name: str = "",
+        status: bool = False,
+        version: Optional[int] = None,
+    ) -> int:
+        """
+        Buffers a record for the next group commit.
+
+        Returns:
+            - The LSN of the record.
+        """
+        record = encode_record(op, task_id, name, status, version)
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Write-ahead log is not open.")
+            lsn = self._next_lsn
+            self._next_lsn += 1
+            self._buffer += record
+            self._since_snapshot += 1
+            if self._since_snapshot == self._snapshot_interval:
+                self._snapshot_requested.set()
+            self._has_data.notify()
+
+        return lsn
+
+    def wait_durable(self, lsn: int) -> None:
+        """
+        Blocks until the record with the given LSN has been written and fsynced.
+        """
+        with self._lock:
+            while self._durable_lsn <= lsn:
+                self._durable.wait()
+
+    def commit(
+        self,
+        op: int,
+        task_id: int,
+        name: str = "",
+        status: bool = False,
+        version: Optional[int] = None,
+    ) -> None:
+        """
+        Appends a record and, in synchronous mode, waits for it to become durable.
+        """
+        lsn = self.append(op, task_id, name, status, version)
+        if self.sync:
+            self.wait_durable(lsn)
+
+    def snapshot(self) -> None:
+        """
+        Rotates the log, writes a snapshot of the current state and drops obsolete files.
+        """
+        if self._snapshot_source is None:
+            raise RuntimeError("No snapshot source configured.")
+
+        with self._snapshot_lock:
+            with self._io_lock:
+                with self._lock:
+                    buffer, upto = self._take_buffer()
+                    self._since_snapshot = 0
+                self._write(buffer)
+                self._file.close()
+                self._file = self._open_segment(upto)
+                self._mark_durable(upto)
+
+            tasks, last_task_id = self._snapshot_source()
+            path = os.path.join(self.directory, _snapshot_name(upto))
+            write_snapshot(path, upto, tasks, last_task_id)
+
+            for lsn in self._list(_SNAPSHOT_PATTERN):
+                if lsn < upto:
+                    os.remove(os.path.join(self.directory, _snapshot_name(lsn)))
+            for start_lsn in self._list(_SEGMENT_PATTERN):
+                if start_lsn < upto:
+                    os.remove(os.path.join(self.directory, _segment_name(start_lsn)))
+
+    def close(self) -> None:
+        """
+        Flushes buffered records, optionally writes a final snapshot and stops the background threads.
+        """
+        if self._file is None:
+            return
+        with self._lock:
+            self._closing = True
+            self._has_data.notify_all()
+        self._snapshot_requested.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        if self._snapshot_on_close and self._snapshot_source is not None:
+            self.snapshot()
+        with self._io_lock:
+            with self._lock:
+                buffer, upto = self._take_buffer()
+            self._write(buffer)
+            self._file.close()
+            self._file = None
+        self._mark_durable(upto)
+
+    def _list(self, pattern: "re.Pattern") -> List[int]:
+        names = os.listdir(self.directory)
+        return [int(match.group(1)) for match in map(pattern.match, names) if match]
+
+    def _open_segment(self, start_lsn: int):
+        path = os.path.join(self.directory, _segment_name(start_lsn))
+        file = open(path, "ab")
+        _fsync_directory(self.directory)
+        return file
+
+    def _start_thread(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _take_buffer(self) -> Tuple[bytearray, int]:
+        buffer = self._buffer
+        self._buffer = bytearray()
+        return buffer, self._next_lsn
+
+    def _write(self, buffer: bytearray) -> None:
+        if buffer:
+            self._file.write(buffer)
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+
+    def _mark_durable(self, upto: int) -> None:
+        with self._lock:
+            if upto > self._durable_lsn:
+                self._durable_lsn = upto
+                self._durable.notify_all()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closing:
+                    self._has_data.wait()
+                if not self._buffer and self._closing:
+                    return
+            # Everything buffered while the previous fsync was running goes out in one write
+            with self._io_lock:
+                with self._lock:
+                    buffer, upto = self._take_buffer()
+                self._write(buffer)
+            self._mark_durable(upto)
+
+    def _snapshot_loop(self) -> None:
+        while True:
+            self._snapshot_requested.wait()
+            self._snapshot_requested.clear()
+            if self._closing:
+                return
+            self.snapshot()
@@ -0,0 +1,277 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set
+from storage.base import Operation
+from storage.memory import InMemoryBackend
+from storage.sqlite import SQLiteBackend
+
+if TYPE_CHECKING:
+    from models.tasks import TaskInResponse, TaskInTaskDict
+
+# Dirty tasks written per transaction, bounding the time the database is locked for
+FLUSH_BATCH_SIZE = 10_000
+
+
+class WriteBehindBackend:
+    """
+    Keeps the tasks in memory and writes them to an SQLite database in the background.
+
+    The in-memory copy is authoritative: reads are answered from it, and writes return once
+    applied to it, without waiting for a commit. Each write marks its task dirty. A background
+    flusher waits up to `flush_interval` seconds after the first dirty task for more writes,
+    then writes the current state of every dirty task in transactions of `FLUSH_BATCH_SIZE`.
+    Several writes to a task between two flushes thus become a single row write, and a task
+    created then deleted in between is never written.
+
+    Once `max_dirty` tasks wait to be written, writes to other tasks wait for the flusher,
+    which bounds the memory held by the dirty set and the writes lost if the process dies. A
+    failed flush leaves its tasks dirty and is retried after `retry_interval` seconds. `close`
+    writes the remaining dirty tasks.
+
+    The database must not be written by anyone else while the backend is open.
+
+    Attributes:
+        target (SQLiteBackend): The database the tasks are written to, and loaded from on start.
+        tasks_dict (Dict[int, TaskInTaskDict]): The authoritative copy of the tasks, keyed by ID.
+        max_dirty (int): The number of tasks waiting to be written beyond which writes wait.
+        flush_interval (float): The seconds changes are left to coalesce before a flush.
+        retry_interval (float): The seconds waited before retrying a failed flush.
+        flushed_count (int): The number of task writes flushed so far.
+        flush_errors (int): The number of flushes that failed.
+        backpressure_waits (int): The number of writes that waited for the flusher.
+        last_flush_duration (float): The seconds the latest successful flush took.
+    """
+
+    def __init__(
+        self,
+        target: SQLiteBackend,
+        max_dirty: int = 100_000,
+        flush_interval: float = 0.05,
+        retry_interval: float = 1.0,
+    ):
+        self.target = target
+        self.max_dirty = max_dirty
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.flushed_count = 0
+        self.flush_errors = 0
+        self.backpressure_waits = 0
+        self.last_flush_duration = 0.0
+
+        self._cache = InMemoryBackend(
+            {
+                task["id"]: {
+                    "name": task["name"],
+                    "status": task["status"],
+                    "version": task["version"],
+                }
+                for task in target.iter_tasks()
+            }
+        )
+        self._cache.high_id = max(self._cache.high_id, target.max_id())
+        self.tasks_dict = self._cache.tasks_dict
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._has_dirty = threading.Condition(self._lock)
+        self._has_room = threading.Condition(self._lock)
+        self._dirty: Set[int] = set()
+        # The number of tasks taken by the flush in progress and not written yet
+        self._flushing_count = 0
+        # When the oldest change of the dirty set, and of the flush in progress, was made
+        self._dirty_since: Optional[float] = None
+        self._flushing_since: Optional[float] = None
+        self._closing = False
+        self._thread = threading.Thread(
+            target=self._flush_loop, name="write-behind-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def get(self, task_id: int) -> Optional["TaskInTaskDict"]:
+        return self._cache.get(task_id)
+
+    def get_all(self) -> List["TaskInResponse"]:
+        return self._cache.get_all()
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator["TaskInResponse"]:
+        return self._cache.iter_tasks(after_id)
+
+    def create(self, task_id: int, name: str, status: bool) -> None:
+        self._cache.create(task_id, name, status)
+        self._mark_dirty((task_id,))
+
+    def update(
+        self,
+        task_id: int,
+        name: str,
+        status: bool,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        version = self._cache.update(task_id, name, status, expected_version)
+        if version is not None:
+            self._mark_dirty((task_id,))
+
+        return version
+
+    def delete(self, task_id: int) -> bool:
+        if not self._cache.delete(task_id):
+            return False
+
+        self._mark_dirty((task_id,))
+        return True
+
+    def apply_batch(self, operations: Iterable[Operation]) -> List[Optional[int]]:
+        operations = list(operations)
+        versions = self._cache.apply_batch(operations)
+        self._mark_dirty(
+            task_id
+            for (_, task_id, _, _), version in zip(operations, versions)
+            if version is not None
+        )
+
+        return versions
+
+    def max_id(self) -> int:
+        return self._cache.max_id()
+
+    def count(self) -> int:
+        return self._cache.count()
+
+    def clear(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                self._dirty.clear()
+                self._dirty_since = None
+                self._has_room.notify_all()
+            self._cache.clear()
+            self.target.clear()
+
+    def close(self) -> None:
+        """
+        Stops the flusher, writes the remaining dirty tasks and closes the database.
+        """
+        with self._lock:
+            self._closing = True
+            self._has_dirty.notify_all()
+            self._has_room.notify_all()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            self.target.close()
+
+    def flush(self) -> None:
+        """
+        Writes every dirty task to the database, without waiting for `flush_interval`.
+
+        Raises:
+            sqlite3.Error: If the database could not be written. The tasks not written yet
+                stay dirty.
+        """
+        with self._io_lock:
+            with self._lock:
+                task_ids = sorted(self._dirty)
+                self._dirty = set()
+                self._flushing_count = len(task_ids)
+                self._flushing_since, self._dirty_since = self._dirty_since, None
+                max_id = self._cache.high_id
+            if not task_ids:
+                return
+
+            start = time.perf_counter()
+            written = 0
+            try:
+                while written < len(task_ids):
+                    batch = task_ids[written : written + FLUSH_BATCH_SIZE]
+                    self.target.store_batch(
+                        [(task_id, self.tasks_dict.get(task_id)) for task_id in batch],
+                        max_id,
+                    )
+                    written += len(batch)
+                    with self._lock:
+                        self._flushing_count -= len(batch)
+                        self.flushed_count += len(batch)
+                        self._has_room.notify_all()
+            except Exception:
+                with self._lock:
+                    self._dirty.update(task_ids[written:])
+                    if (
+                        self._dirty_since is None
+                        or self._flushing_since < self._dirty_since
+                    ):
+                        self._dirty_since = self._flushing_since
+                    self.flush_errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self._flushing_count = 0
+                    self._flushing_since = None
+
+            self.last_flush_duration = time.perf_counter() - start
+
+    def dirty_count(self) -> int:
+        """
+        Returns the number of tasks changed since they were last written to the database.
+        """
+        with self._lock:
+            return len(self._dirty) + self._flushing_count
+
+    def flush_lag(self) -> float:
+        """
+        Returns the seconds since the oldest change not yet written to the database was made,
+        0 when every change is written.
+        """
+        with self._lock:
+            since = [
+                moment
+                for moment in (self._flushing_since, self._dirty_since)
+                if moment is not None
+            ]
+
+        return time.monotonic() - min(since) if since else 0.0
+
+    def _mark_dirty(self, task_ids: Iterable[int]) -> None:
+        """
+        Marks written tasks dirty, first waiting for the flusher while `max_dirty` tasks
+        already wait to be written, unless these are among them.
+        """
+        task_ids = set(task_ids)
+        if not task_ids:
+            return
+        with self._lock:
+            if (
+                len(self._dirty) + self._flushing_count >= self.max_dirty
+                and not task_ids <= self._dirty
+            ):
+                self.backpressure_waits += 1
+                self._has_dirty.notify()
+                while (
+                    len(self._dirty) + self._flushing_count >= self.max_dirty
+                    and not self._closing
+                ):
+                    self._has_room.wait()
+            if not self._dirty:
+                self._dirty_since = time.monotonic()
+                self._has_dirty.notify()
+            self._dirty |= task_ids
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._dirty and not self._closing:
+                    self._has_dirty.wait()
+                if self._closing:
+                    return
+                # Leave time for further writes to coalesce, unless writers wait for room
+                deadline = self._dirty_since + self.flush_interval
+                while len(self._dirty) < self.max_dirty and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._has_dirty.wait(remaining)
+            try:
+                self.flush()
+            except Exception:
+                with self._lock:
+                    if not self._closing:
+                        self._has_dirty.wait(self.retry_interval)
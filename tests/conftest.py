@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Keep the request logs of test runs out of the repository's logs directory. Set before the
+# test modules import the app, which opens the log file.
+os.environ["LOG_PATH"] = os.path.join(
+    tempfile.mkdtemp(prefix="task-api-test-logs-"), "app.log"
+)
@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+import pytest
+from app import app
+from asgi import application
+from blueprints.metrics import metrics
+from models.tasks import Task
+from utils import admission as admission_module
+from utils.admission import (
+    READ,
+    WRITE,
+    AdmissionController,
+    ConcurrencyLimiter,
+    TokenBucketLimiter,
+)
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    default_admission = app.extensions["admission"]
+    with app.test_client() as client:
+        yield client
+    app.extensions["admission"] = default_admission
+    Task.reset()
+
+
+def use_admission(**settings):
+    admission = AdmissionController(**settings)
+    app.extensions["admission"] = admission
+    return admission
+
+
+def decisions(priority, decision):
+    return metrics.counter_value(
+        "admission_decisions_total", (("priority", priority), ("decision", decision))
+    )
+
+
+def test_token_bucket_allows_bursts_then_refills(monkeypatch):
+    """Test that a client may send `burst` requests at once, then `rate` per second"""
+    now = [1000.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: now[0])
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+
+    assert [limiter.take("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.take("a") == pytest.approx(0.5)
+    assert limiter.take("b") == 0
+
+    now[0] += 0.5
+    assert limiter.take("a") == 0
+    assert limiter.take("a") > 0
+
+
+def test_token_bucket_keeps_recent_clients_only():
+    """Test that the buckets of the least recent clients are evicted"""
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.take(client)
+    assert list(limiter._buckets) == ["b", "c"]
+
+
+def test_reads_leave_reserved_slots_to_writes():
+    """Test that reads cannot take the slots reserved for writes"""
+    limiter = ConcurrencyLimiter(max_in_flight=3, write_reserve=1)
+    assert limiter.try_acquire(READ)
+    assert limiter.try_acquire(READ)
+    assert not limiter.try_acquire(READ)
+    assert limiter.try_acquire(WRITE)
+    assert not limiter.try_acquire(WRITE)
+
+    limiter.release()
+    assert limiter.in_flight == 2
+    assert not limiter.try_acquire(READ)
+    assert limiter.try_acquire(WRITE)
+
+
+def test_waiting_request_gets_released_slot():
+    """Test that a request waiting within its target takes a slot released meanwhile"""
+    limiter = ConcurrencyLimiter(max_in_flight=1)
+    assert limiter.acquire(READ, 0)
+    assert not limiter.acquire(READ, 0.01)
+
+    releaser = threading.Timer(0.05, limiter.release)
+    releaser.start()
+    start = time.perf_counter()
+    assert limiter.acquire(READ, 5)
+    assert time.perf_counter() - start < 1
+    releaser.join()
+
+
+def test_waiting_coroutine_gets_released_slot():
+    """Test that a coroutine waiting for a slot is woken by a release from another thread"""
+    limiter = ConcurrencyLimiter(max_in_flight=1)
+    assert limiter.try_acquire(WRITE)
+
+    async def main():
+        assert not await limiter.acquire_async(WRITE, 0.01)
+        releaser = threading.Timer(0.05, limiter.release)
+        releaser.start()
+        acquired = await limiter.acquire_async(WRITE, 5)
+        releaser.join()
+        return acquired
+
+    assert asyncio.run(main())
+    assert limiter.in_flight == 1
+    assert limiter._async_waiters == []
+
+
+def test_rate_limited_client_gets_429(client):
+    """Test that a client over its rate is refused with 429 and told when to retry"""
+    use_admission(rate=1, burst=2)
+    before = decisions(READ, "rate_limited")
+
+    statuses = [client.get(f"/api/{API_VERSION}/tasks").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+    response = client.post(f"/api/{API_VERSION}/task", json={"name": "Task 1"})
+    assert response.status_code == 429
+    assert response.get_json() == {"errors": "Too many requests."}
+    assert int(response.headers["Retry-After"]) >= 1
+    assert decisions(READ, "rate_limited") == before + 1
+    assert Task.get_all() == []
+
+
+def test_overloaded_server_sheds_reads_first(client):
+    """Test that once the slots are taken, reads are shed with 503 while writes may proceed"""
+    admission = use_admission(max_in_flight=2, write_reserve=1, read_target=0.01)
+    before = decisions(READ, "overloaded")
+    assert admission.concurrency.try_acquire(READ)
+
+    response = client.get(f"/api/{API_VERSION}/tasks")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert decisions(READ, "overloaded") == before + 1
+
+    response = client.post(f"/api/{API_VERSION}/task", json={"name": "Task 1"})
+    assert response.status_code == 201
+    assert admission.concurrency.in_flight == 1
+
+
+def test_slots_are_released(client):
+    """Test that every admitted request returns its slot, and streams do not take one"""
+    admission = use_admission(max_in_flight=1, read_target=0.01)
+    for _ in range(3):
+        assert client.get(f"/api/{API_VERSION}/tasks").status_code == 200
+        assert client.get(f"/api/{API_VERSION}/task/9").status_code == 400
+
+    response = client.get(f"/api/{API_VERSION}/tasks/events", buffered=False)
+    assert response.status_code == 200
+    assert admission.concurrency.in_flight == 0
+    assert client.get(f"/api/{API_VERSION}/tasks").status_code == 200
+    response.close()
+
+
+def test_asgi_applies_admission_control(client):
+    """Test that the ASGI application refuses and releases like the Flask app"""
+    admission = use_admission(rate=1, burst=2, max_in_flight=1)
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/api/{API_VERSION}/tasks",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+
+    async def call():
+        sent = []
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await application(scope, receive, send)
+        return sent
+
+    responses = [asyncio.run(call()) for _ in range(3)]
+    assert [sent[0]["status"] for sent in responses] == [200, 200, 429]
+    assert (b"retry-after", b"1") in responses[2][0]["headers"]
+    assert admission.concurrency.in_flight == 0
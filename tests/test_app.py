@@ -1,5 +1,7 @@
 import pytest
-from app import app
+from werkzeug.test import Client
+from app import DOCS_PATHS, app, create_docs_app
+from utils.lazy_mount import LazyMount
 
 
 @pytest.fixture
@@ -18,3 +20,25 @@ def test_global_exception_handler(client):
     """Test global exception handler"""
     response = client.get("/test/error")
     assert response.status_code == 500
+
+
+def test_lazy_docs_are_built_on_first_docs_request(client):
+    """Test that lazily mounted docs are built once, by the first request for them"""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return create_docs_app()
+
+    lazy_app = LazyMount(app.wsgi_app, DOCS_PATHS, factory)
+    lazy_client = Client(lazy_app)
+
+    assert lazy_client.get("/api/v1/tasks").status_code == 200
+    assert lazy_client.get("/apidocsx").status_code == 404
+    assert not lazy_app.is_loaded
+
+    assert lazy_client.get("/apidocs/").status_code == 200
+    spec = lazy_client.get("/apispec_1.json")
+    assert spec.get_data() == client.get("/apispec_1.json").get_data()
+    assert lazy_app.is_loaded
+    assert len(calls) == 1
@@ -0,0 +1,191 @@
+import asyncio
+import gzip
+import json
+import threading
+import pytest
+from app import app
+from asgi import application
+from models.async_tasks import AsyncTask
+from models.tasks import Task
+from storage.sqlite import SQLiteBackend
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        yield client
+        Task.reset()
+
+
+def call(method, url, body=None, headers=None):
+    """Send one request to the ASGI application and collect the messages it sends back"""
+    path, _, query = url.partition("?")
+    raw_headers = [
+        (name.lower().encode(), value.encode())
+        for name, value in (headers or {}).items()
+    ]
+    payload = b""
+    if body is not None:
+        payload = json.dumps(body).encode()
+        raw_headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Like a server, only report a disconnection once the response is complete
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def status_and_json(sent):
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return sent[0]["status"], json.loads(body) if body else None
+
+
+REQUESTS = [
+    ("POST", f"/api/{API_VERSION}/task", {"name": "Task 1"}),
+    ("POST", f"/api/{API_VERSION}/task", {"name": "Task 2"}),
+    ("POST", f"/api/{API_VERSION}/task", {"name": ""}),
+    ("POST", f"/api/{API_VERSION}/task", ["not", "an", "object"]),
+    ("GET", f"/api/{API_VERSION}/tasks", None),
+    ("GET", f"/api/{API_VERSION}/tasks?limit=1", None),
+    ("GET", f"/api/{API_VERSION}/tasks?stream=true&status=false", None),
+    ("GET", f"/api/{API_VERSION}/tasks?limit=0", None),
+    ("GET", f"/api/{API_VERSION}/tasks?q=%20", None),
+    ("GET", f"/api/{API_VERSION}/tasks?since=yesterday", None),
+    ("GET", f"/api/{API_VERSION}/tasks?since=abc-1", None),
+    ("GET", f"/api/{API_VERSION}/tasks/stats", None),
+    ("GET", f"/api/{API_VERSION}/task/1", None),
+    ("GET", f"/api/{API_VERSION}/task/9", None),
+    ("PUT", f"/api/{API_VERSION}/task/1", {"id": 1, "name": "Done", "status": True}),
+    ("PUT", f"/api/{API_VERSION}/task/1", {"id": 2, "name": "Done", "status": True}),
+    ("PUT", f"/api/{API_VERSION}/task/9", {"id": 9, "name": "Done", "status": True}),
+    ("PATCH", f"/api/{API_VERSION}/task/1", {"name": "Done"}),
+    (
+        "POST",
+        f"/api/{API_VERSION}/tasks:batch",
+        [{"op": "create", "name": "Task 3"}, {"op": "delete", "id": 9}],
+    ),
+    ("DELETE", f"/api/{API_VERSION}/task/2", None),
+    ("DELETE", f"/api/{API_VERSION}/task/2", None),
+    ("GET", f"/api/{API_VERSION}/tasks", None),
+    ("GET", "/api/v2/tasks", None),
+]
+
+
+def test_asgi_responses_match_flask(client):
+    """Test that the ASGI application answers every request like the Flask app"""
+    expected = []
+    for method, url, body in REQUESTS:
+        response = client.open(url, method=method, json=body)
+        expected.append((response.status_code, response.get_json(silent=True)))
+
+    Task.reset()
+    actual = [
+        status_and_json(call(method, url, body)) for method, url, body in REQUESTS
+    ]
+
+    assert actual == expected
+
+
+def test_asgi_missing_json_content_type(client):
+    """Test that a body sent without the JSON content type is rejected"""
+    sent = call(
+        "POST", f"/api/{API_VERSION}/task", headers={"Content-Type": "text/plain"}
+    )
+    assert status_and_json(sent) == (400, {"errors": "Invalid or missing JSON"})
+
+
+def test_asgi_conditional_get(client):
+    """Test that the ASGI application tags responses and answers matching tags with 304"""
+    Task.create(name="Task 1")
+    url = f"/api/{API_VERSION}/tasks"
+    headers = dict(call("GET", url)[0]["headers"])
+    etag = headers[b"etag"].decode()
+    assert etag == client.get(url).headers["ETag"]
+
+    sent = call("GET", url, headers={"If-None-Match": etag})
+    assert sent[0]["status"] == 304
+    assert sent[1]["body"] == b""
+
+
+def test_asgi_streams_in_chunks(client):
+    """Test that a streamed list is sent as several body messages"""
+    for i in range(600):
+        Task.create(name=f"Task {i}")
+
+    sent = call("GET", f"/api/{API_VERSION}/tasks?stream=true")
+    bodies = [message for message in sent if message["type"] == "http.response.body"]
+
+    assert len(bodies) > 2
+    assert all(message["more_body"] for message in bodies[:-1])
+    assert not bodies[-1].get("more_body", False)
+    assert len(status_and_json(sent)[1]["result"]) == 600
+
+
+@pytest.mark.parametrize("stream", ["false", "true"])
+def test_asgi_compresses_lists(client, stream):
+    """Test that the ASGI application compresses lists like the Flask app"""
+    for i in range(100):
+        Task.create(name=f"Task {i}")
+    url = f"/api/{API_VERSION}/tasks?stream={stream}"
+    expected = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    sent = call("GET", url, headers={"Accept-Encoding": "gzip"})
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert headers[b"etag"].decode() == expected.headers["ETag"]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    assert json.loads(gzip.decompress(body)) == json.loads(
+        gzip.decompress(expected.data)
+    )
+
+
+def test_async_task_runs_blocking_backends_in_executor(tmp_path):
+    """Test that operations run on the loop with the in-memory backend and in a thread otherwise"""
+
+    async def create_from():
+        threads = []
+        await AsyncTask.run(lambda: threads.append(threading.get_ident()))
+        task = await AsyncTask.create("Task 1")
+        return threads[0], task
+
+    Task.reset()
+    thread, task = asyncio.run(create_from())
+    assert thread == threading.get_ident()
+    assert task == {"id": 1, "name": "Task 1", "status": False, "version": 1}
+
+    default_backend = Task.backend
+    Task.use_backend(SQLiteBackend(str(tmp_path / "tasks.db")))
+    try:
+        thread, task = asyncio.run(create_from())
+        assert thread != threading.get_ident()
+        assert task == {"id": 1, "name": "Task 1", "status": False, "version": 1}
+    finally:
+        Task.backend.close()
+        Task.use_backend(default_backend)
+        Task.reset()
@@ -0,0 +1,135 @@
+from unittest.mock import patch
+import pytest
+from app import app
+from models.tasks import Task
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        yield client
+        Task.reset()
+
+
+def test_batch_mixed_operations(client):
+    """Test applying creates, updates and deletes in one request"""
+    Task.create(name="Existing Task")
+    response = client.post(
+        f"/api/{API_VERSION}/tasks:batch",
+        json=[
+            {"op": "create", "name": "First Task"},
+            {"op": "update", "id": 1, "name": "Existing Task Updated", "status": True},
+            {"op": "create", "name": "Second Task"},
+            {"op": "delete", "id": 2},
+        ],
+    )
+    assert response.status_code == 200
+    assert response.get_json()["result"] == [
+        {
+            "status": 201,
+            "result": {"id": 2, "name": "First Task", "status": False, "version": 1},
+        },
+        {
+            "status": 200,
+            "result": {
+                "id": 1,
+                "name": "Existing Task Updated",
+                "status": True,
+                "version": 2,
+            },
+        },
+        {
+            "status": 201,
+            "result": {"id": 3, "name": "Second Task", "status": False, "version": 1},
+        },
+        {"status": 200, "message": "Task #2 has been deleted"},
+    ]
+    assert Task.get_all() == [
+        {"id": 1, "name": "Existing Task Updated", "status": True, "version": 2},
+        {"id": 3, "name": "Second Task", "status": False, "version": 1},
+    ]
+
+
+def test_batch_reports_errors_per_item(client):
+    """Test that invalid or failing operations do not prevent the others"""
+    response = client.post(
+        f"/api/{API_VERSION}/tasks:batch",
+        json=[
+            {"op": "create", "name": ""},
+            {"op": "create", "name": "Valid Task"},
+            {"op": "update", "id": 99, "name": "Missing Task", "status": True},
+            {"op": "delete", "id": 1},
+            {"op": "delete", "id": 1},
+            {"op": "archive", "id": 1},
+        ],
+    )
+    assert response.status_code == 200
+    results = response.get_json()["result"]
+    assert [result["status"] for result in results] == [400, 201, 400, 200, 400, 400]
+    assert results[2]["errors"] == "Task with ID 99 does not exist."
+    assert results[4]["errors"] == "Task with ID 1 does not exist."
+    assert Task.get_all() == []
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ({"op": "create", "name": "Not an array"}),  # test body is not an array
+        ([{"op": "create", "name": "Task"}] * 1001),  # test batch exceeds upper limit
+    ],
+)
+def test_batch_invalid_body(client, payload):
+    """Test that a body which is not a bounded JSON array is rejected"""
+    response = client.post(f"/api/{API_VERSION}/tasks:batch", json=payload)
+    assert response.status_code == 400
+    assert "errors" in response.get_json()
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ('{"op": "create"', "Request body must be a JSON array."),
+        ("null", "Request body must be a JSON array."),
+        (
+            "[" + ",".join(['{"op": "delete", "id": 1}'] * 1001) + "]",
+            "A batch must not exceed 1000 items.",
+        ),
+        (
+            "[" + ",".join(["5"] * 1001) + "]",
+            "A batch must not exceed 1000 items.",
+        ),
+    ],
+)
+def test_batch_invalid_body_message(client, data, message):
+    """Test the error reported for raw bodies that are not a bounded JSON array"""
+    response = client.post(
+        f"/api/{API_VERSION}/tasks:batch", data=data, content_type="application/json"
+    )
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == message
+
+
+def test_batch_with_non_json_content_type(client):
+    """Test batching with non-JSON content type results in a 400 error"""
+    response = client.post(
+        f"/api/{API_VERSION}/tasks:batch",
+        data="This is not a JSON string",
+        content_type="text/plain",
+    )
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == "Invalid or missing JSON"
+
+
+def test_batch_unexpected_error(client):
+    """Test batching encountering unexpected error"""
+    with patch("models.tasks.Task.apply_batch") as mock_apply_batch:
+        mock_apply_batch.side_effect = Exception("Unexpected error")
+        response = client.post(
+            f"/api/{API_VERSION}/tasks:batch", json=[{"op": "create", "name": "Task"}]
+        )
+        assert response.status_code == 500
+        assert "errors" in response.get_json()
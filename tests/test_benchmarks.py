@@ -0,0 +1,73 @@
+import json
+import threading
+import pytest
+from werkzeug.serving import make_server
+from app import app
+from benchmarks.bench_load import percentile, run_load, summarize
+from benchmarks.results import compare, metric, save_results
+from models.tasks import Task
+
+
+def test_percentile_nearest_rank():
+    """Test that percentiles pick the nearest-ranked value"""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7.0], 0.95) == 7
+    assert percentile([], 0.5) == 0
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    """Test that regressions respect each metric's direction and the threshold"""
+    baseline = {
+        "latency_ms": metric(10, "ms"),
+        "rps": metric(1000, "req/s", higher_is_better=True),
+        "errors": metric(0, "requests"),
+        "removed_ms": metric(1, "ms"),
+    }
+    current = {
+        "latency_ms": metric(11.5, "ms"),
+        "rps": metric(700, "req/s", higher_is_better=True),
+        "errors": metric(2, "requests"),
+        "added_ms": metric(1, "ms"),
+    }
+
+    regressions = {name for name, *_ in compare(current, baseline, threshold=0.2)}
+    assert regressions == {"rps", "errors"}
+
+
+def test_save_results(tmp_path):
+    """Test that results are saved as JSON along with the suite name"""
+    path = tmp_path / "results.json"
+    save_results(str(path), "micro", {"create_us": metric(1.5, "us")})
+
+    results = json.loads(path.read_text())
+    assert results["suite"] == "micro"
+    assert results["metrics"]["create_us"]["value"] == 1.5
+
+
+@pytest.fixture
+def server():
+    Task.reset()
+    Task.create(name="Task 1")
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    Task.reset()
+
+
+def test_load_generator_reports_latency_and_throughput(server):
+    """Test a short end-to-end load run against the in-process server"""
+    latencies, failures, elapsed = run_load(
+        "127.0.0.1", server.server_port, clients=2, duration=0.3, max_id=1
+    )
+    metrics = summarize(latencies, failures, elapsed)
+
+    assert failures == 0
+    assert metrics["load.all.rps"]["value"] > 0
+    assert (
+        metrics["load.all.p50_ms"]["value"]
+        <= metrics["load.all.p95_ms"]["value"]
+        <= metrics["load.all.p99_ms"]["value"]
+    )
@@ -0,0 +1,126 @@
+import gzip
+import json
+import zlib
+import pytest
+from app import app
+from models.tasks import Task
+from utils.compression import (
+    DEFAULT_LEVEL,
+    DEFAULT_MIN_SIZE,
+    compress_chunks,
+    negotiate_encoding,
+)
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        for i in range(100):
+            Task.create(name=f"Task {i}")
+        yield client
+        Task.reset()
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("gzip", "gzip"),
+        ("deflate", "deflate"),
+        ("gzip, deflate", "gzip"),
+        ("gzip;q=0.5, deflate", "deflate"),
+        ("br", None),
+        ("*", "gzip"),
+        ("gzip;q=0, deflate;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    """Test that the coding preferred by the client is picked among those supported"""
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize(
+    "encoding, decompress",
+    [("gzip", gzip.decompress), ("deflate", zlib.decompress)],
+)
+@pytest.mark.parametrize(
+    "url",
+    [
+        f"/api/{API_VERSION}/tasks",
+        f"/api/{API_VERSION}/tasks?limit=50",
+        f"/api/{API_VERSION}/tasks?stream=true",
+    ],
+)
+def test_list_is_compressed(client, url, encoding, decompress):
+    """Test that a large list, complete or streamed, is compressed with the accepted coding"""
+    expected = client.get(url).get_json()
+
+    response = client.get(url, headers={"Accept-Encoding": encoding})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(decompress(response.data)) == expected
+
+
+def test_small_list_is_not_compressed(client):
+    """Test that a list below the minimum size is sent as it is"""
+    response = client.get(
+        f"/api/{API_VERSION}/tasks?limit=1", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.get_json()["result"] == [
+        {"id": 1, "name": "Task 0", "status": False, "version": 1}
+    ]
+
+
+def test_compression_settings(client):
+    """Test that the minimum size and the level are read from the app config"""
+    url = f"/api/{API_VERSION}/tasks"
+    size = len(client.get(url).data)
+    default_size = len(client.get(url, headers={"Accept-Encoding": "gzip"}).data)
+
+    app.config["COMPRESSION_MIN_SIZE"] = size + 1
+    try:
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+    finally:
+        app.config["COMPRESSION_MIN_SIZE"] = DEFAULT_MIN_SIZE
+
+    app.config["COMPRESSION_LEVEL"] = 0
+    try:
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert len(response.data) > default_size
+    finally:
+        app.config["COMPRESSION_LEVEL"] = DEFAULT_LEVEL
+
+
+def test_etag_depends_on_encoding(client):
+    """Test that compressed and uncompressed lists are tagged and revalidated separately"""
+    url = f"/api/{API_VERSION}/tasks"
+    plain_etag = client.get(url).headers["ETag"]
+    gzip_etag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    assert plain_etag != gzip_etag
+
+    response = client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = client.get(url, headers={"If-None-Match": gzip_etag})
+    assert response.status_code == 200
+
+
+def test_compress_chunks_is_incremental():
+    """Test that compressing chunks one at a time gives one valid stream"""
+    chunks = [json.dumps({"id": i, "name": f"Task {i}"}).encode() for i in range(1000)]
+    compressed = b"".join(compress_chunks(iter(chunks), "gzip"))
+    assert gzip.decompress(compressed) == b"".join(chunks)
@@ -0,0 +1,100 @@
+import threading
+import pytest
+from benchmarks.bench_concurrency import run_mixed_workload
+from models.tasks import Task
+
+THREADS = 16
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    Task.reset()
+    yield
+    Task.reset()
+
+
+def _run_in_threads(target, threads=THREADS):
+    """Starts `threads` threads together and re-raises the first error any of them hit"""
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            target(index)
+        except BaseException as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_concurrent_creates_allocate_unique_ids():
+    """Test that tasks created from many threads never share an ID"""
+    created = [[] for _ in range(THREADS)]
+
+    def create(index):
+        for _ in range(500):
+            created[index].append(Task.create(name=f"Task from {index}")["id"])
+
+    _run_in_threads(create)
+
+    ids = [task_id for ids in created for task_id in ids]
+    assert len(set(ids)) == len(ids) == THREADS * 500
+    assert Task.last_task_id == THREADS * 500
+    assert len(Task.get_all()) == THREADS * 500
+
+
+def test_reads_during_concurrent_writes():
+    """Test that listing tasks while other threads mutate the store does not fail"""
+    for i in range(1000):
+        Task.create(name=f"Task {i}")
+    done = threading.Event()
+
+    def mutate_or_read(index):
+        if index == 0:
+            while not done.is_set():
+                Task.get_all()
+                list(Task.iter_tasks())
+            return
+        try:
+            for _ in range(300):
+                task_id = Task.create(name="Temporary Task")["id"]
+                Task.update(task_id, "Updated Task", True)
+                Task.delete(task_id)
+        finally:
+            if index == 1:
+                done.set()
+
+    _run_in_threads(mutate_or_read)
+    assert len(Task.get_all()) == 1000
+
+
+def test_concurrent_update_and_delete_of_same_task():
+    """Test that an update racing a delete never resurrects the deleted task"""
+    for _ in range(200):
+        task_id = Task.create(name="Contended Task")["id"]
+
+        def race(index):
+            try:
+                if index % 2:
+                    Task.delete(task_id)
+                else:
+                    Task.update(task_id, "Updated Task", True)
+            except Exception:
+                pass
+
+        _run_in_threads(race, threads=4)
+        assert Task.backend.get(task_id) is None
+
+
+def test_throughput_as_threads_are_added():
+    """Test that adding threads does not make throughput collapse under lock contention"""
+    single = run_mixed_workload(1, 6000)
+    many = run_mixed_workload(THREADS, 6000)
+    assert many > single * 0.3, f"{THREADS} threads: {many:.0f} ops/s vs {single:.0f}"
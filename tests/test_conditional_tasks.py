@@ -0,0 +1,107 @@
+from unittest.mock import patch
+import pytest
+from app import app
+from models.tasks import Task
+from storage.shared import SharedMemoryBackend
+from storage.wal import OP_CREATE
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        Task.create(name="Task 1")
+        Task.create(name="Task 2")
+        yield client
+        Task.reset()
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        f"/api/{API_VERSION}/tasks",
+        f"/api/{API_VERSION}/tasks?limit=1",
+        f"/api/{API_VERSION}/tasks?stream=true",
+    ],
+)
+def test_unchanged_response_is_not_modified(client, url):
+    """Test that repeating a GET with the returned ETag results in an empty 304"""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    with patch("models.tasks.Task.backend") as mock_backend:
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert mock_backend.mock_calls == []
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda: Task.create(name="Task 3"),
+        lambda: Task.update(2, "Task 2", True),
+        lambda: Task.delete(1),
+        lambda: Task.apply_batch([(OP_CREATE, 0, "Task 3", False)]),
+    ],
+)
+def test_mutation_changes_etag(client, mutate):
+    """Test that every kind of mutation invalidates the previous ETag"""
+    etag = client.get(f"/api/{API_VERSION}/tasks").headers["ETag"]
+    mutate()
+
+    response = client.get(f"/api/{API_VERSION}/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_get_task(client):
+    """Test fetching a single task by its ID"""
+    response = client.get(f"/api/{API_VERSION}/task/2")
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "result": {"id": 2, "name": "Task 2", "status": False, "version": 1}
+    }
+    assert response.headers["ETag"] == f'"{Task.get_epoch()}-1"'
+
+
+def test_task_etag_follows_its_version(client):
+    """Test that a task's ETag only changes when that task does"""
+    etag = client.get(f"/api/{API_VERSION}/task/1").headers["ETag"]
+    Task.update(2, "Task 2", True)
+
+    response = client.get(f"/api/{API_VERSION}/task/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    Task.update(1, "Task 1", True)
+    response = client.get(f"/api/{API_VERSION}/task/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{Task.get_epoch()}-2"'
+
+
+def test_get_task_not_found(client):
+    """Test fetching a task that does not exist"""
+    response = client.get(f"/api/{API_VERSION}/task/999")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+    assert "errors" in response.get_json()
+
+
+def test_shared_backend_is_not_tagged(client, tmp_path):
+    """Test that no ETag is sent when other processes may change the tasks unseen"""
+    default_backend = Task.backend
+    Task.use_backend(SharedMemoryBackend(str(tmp_path / "tasks.shm"), capacity=100))
+    try:
+        response = client.get(f"/api/{API_VERSION}/tasks")
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+    finally:
+        Task.backend.close()
+        Task.use_backend(default_backend)
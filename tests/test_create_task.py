@@ -101,3 +101,22 @@ def test_create_task_with_non_json_content_type(client):
     assert (
         json_data["errors"] == "Invalid or missing JSON"
     ), "Expected specific error message for non-JSON content"
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ('{"name": ', "Invalid JSON"),  # test truncated JSON
+        ('["Task"]', "Input should be an object"),  # test body is not an object
+        ("null", "Input should be an object"),  # test body is null
+    ],
+)
+def test_create_task_with_malformed_body(client, data, message):
+    """Test creating a task with a body that is not a JSON object results in a 400 error"""
+    response = client.post(
+        f"/api/{API_VERSION}/task", data=data, content_type="application/json"
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"].startswith(message)
+    assert Task.tasks_dict == {}
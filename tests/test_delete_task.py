@@ -15,7 +15,7 @@ def client():
 
 def test_delete_task_success(client):
     """Test successfully deleting a task"""
-    Task.tasks_dict[1] = {"name": "Task to be deleted", "status": True}
+    Task.tasks_dict[1] = {"name": "Task to be deleted", "status": True, "version": 1}
     response = client.delete(f"/api/{API_VERSION}/task/1")
     assert response.status_code == 200
     assert "Task #1 has been deleted" in response.get_json()["message"]
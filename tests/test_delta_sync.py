@@ -0,0 +1,165 @@
+from unittest.mock import patch
+import pytest
+from app import app
+from models.indexes import ChangeIndex
+from models.tasks import Task
+from storage.shared import SharedMemoryBackend
+from storage.wal import OP_CREATE, OP_DELETE
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        Task.create(name="Task 1")
+        Task.create(name="Task 2")
+        yield client
+        Task.reset()
+
+
+def sync(client, since, **args):
+    query = "&".join(f"{name}={value}" for name, value in args.items())
+    return client.get(f"/api/{API_VERSION}/tasks?since={since}&{query}")
+
+
+def test_since_zero_returns_every_task(client):
+    """Test that since=0 returns every task along with the version to sync from"""
+    response = sync(client, "0")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["result"] == [
+        {"id": 1, "name": "Task 1", "status": False, "version": 1},
+        {"id": 2, "name": "Task 2", "status": False, "version": 1},
+    ]
+    assert data["deleted"] == []
+    assert data["has_more"] is False
+    assert data["version"] == Task.get_version()
+
+
+def test_since_returns_only_changes(client):
+    """Test that only the tasks changed or deleted after the version are returned"""
+    version = sync(client, "0").get_json()["version"]
+    Task.update(2, "Task 2", True)
+    Task.create(name="Task 3")
+    Task.delete(1)
+    Task.apply_batch([(OP_CREATE, 0, "Task 4", False), (OP_DELETE, 4, "", False)])
+
+    data = sync(client, version).get_json()
+    assert data["result"] == [
+        {"id": 2, "name": "Task 2", "status": True, "version": 2},
+        {"id": 3, "name": "Task 3", "status": False, "version": 1},
+    ]
+    assert sorted(data["deleted"]) == [1, 4]
+    assert data["has_more"] is False
+
+    data = sync(client, data["version"]).get_json()
+    assert data == {
+        "result": [],
+        "deleted": [],
+        "version": data["version"],
+        "has_more": False,
+    }
+
+
+def test_since_is_paged_by_limit(client):
+    """Test that `limit` bounds the changes returned and `version` continues after them"""
+    version = sync(client, "0").get_json()["version"]
+    for i in range(5):
+        Task.update(1 + i % 2, f"Task {i}", True)
+        Task.create(name=f"New task {i}")
+
+    seen = []
+    has_more = True
+    while has_more:
+        data = sync(client, version, limit=2).get_json()
+        assert len(data["result"]) <= 2
+        seen += [task["id"] for task in data["result"]]
+        version, has_more = data["version"], data["has_more"]
+
+    assert sorted(seen) == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_changes_are_found_without_a_scan(client):
+    """Test that the changes are read from the change index rather than the storage"""
+    version = sync(client, "0").get_json()["version"]
+    Task.delete(2)
+    with patch.object(Task.backend, "iter_tasks") as iter_tasks, patch.object(
+        Task.backend, "get_all"
+    ) as get_all:
+        data = sync(client, version).get_json()
+    assert iter_tasks.mock_calls == get_all.mock_calls == []
+    assert data["deleted"] == [2]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {"since": "yesterday"},
+        {"since": "0", "status": "true"},
+        {"since": "0", "q": "task"},
+        {"since": "0", "cursor": "dGFzazox"},
+    ],
+)
+def test_invalid_since(client, args):
+    """Test that malformed versions and unsupported combinations are rejected"""
+    query = "&".join(f"{name}={value}" for name, value in args.items())
+    response = client.get(f"/api/{API_VERSION}/tasks?{query}")
+    assert response.status_code == 400
+
+
+def test_unknown_version_is_gone(client):
+    """Test that versions of another process, of the future or from before a reset are refused"""
+    version = sync(client, "0").get_json()["version"]
+    epoch, _, number = version.rpartition("-")
+    assert sync(client, f"abc123-{number}").status_code == 410
+    assert sync(client, f"{epoch}-{int(number) + 10}").status_code == 410
+
+    Task.reset()
+    response = sync(client, version)
+    assert response.status_code == 410
+    assert "errors" in response.get_json()
+
+
+def test_expired_tombstones_are_compacted():
+    """Test that dropping a tombstone makes the versions before its deletion unavailable"""
+    changes = ChangeIndex(tombstone_retention=0)
+    changes.record(1, 1, False)
+    changes.record(2, 2, False)
+    changes.record(1, 3, True)
+    assert changes.tombstones == {}
+    assert changes.latest == {2: (2, False)}
+    assert changes.floor == 3
+    assert changes.changes_since(2) is None
+    assert changes.changes_since(3) == ([], 3, False)
+
+    changes.record(2, 4, False)
+    changes.compact()
+    assert changes._versions == [4]
+    assert changes.changes_since(3) == ([(2, False)], 4, False)
+
+
+def test_change_log_stays_bounded():
+    """Test that superseded entries are dropped once they make up most of the log"""
+    changes = ChangeIndex()
+    for version in range(1, 10_001):
+        changes.record(version % 10, version, False)
+    assert len(changes._versions) < 1100
+    assert changes.changes_since(9_995) == (
+        [(6, False), (7, False), (8, False), (9, False), (0, False)],
+        10_000,
+        False,
+    )
+
+
+def test_shared_backend_does_not_track_changes(client, tmp_path):
+    """Test that delta sync is refused when other processes may change the tasks"""
+    default_backend = Task.backend
+    Task.use_backend(SharedMemoryBackend(str(tmp_path / "tasks.shm")))
+    try:
+        assert sync(client, "0").status_code == 410
+    finally:
+        Task.backend.close()
+        Task.use_backend(default_backend)
@@ -0,0 +1,111 @@
+from unittest.mock import patch
+import pytest
+from app import app
+from models.indexes import StatusIndex
+from models.tasks import Task
+from storage.wal import OP_CREATE, OP_DELETE, OP_UPDATE
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        for i in range(6):
+            Task.create(name=f"Task {i + 1}")
+        for task_id in (2, 4, 6):
+            Task.update(task_id, f"Task {task_id}", True)
+        yield client
+        Task.reset()
+
+
+@pytest.mark.parametrize(
+    "status, expected_ids", [("true", [2, 4, 6]), ("false", [1, 3, 5])]
+)
+def test_filter_tasks_by_status(client, status, expected_ids):
+    """Test listing only the tasks with the requested status"""
+    response = client.get(f"/api/{API_VERSION}/tasks?status={status}")
+    assert response.status_code == 200
+    assert [task["id"] for task in response.get_json()["result"]] == expected_ids
+
+
+def test_filter_tasks_with_pagination(client):
+    """Test paging through the tasks with a given status"""
+    response = client.get(f"/api/{API_VERSION}/tasks?status=true&limit=2")
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [2, 4]
+
+    response = client.get(
+        f"/api/{API_VERSION}/tasks?status=true&limit=2&cursor={json_data['next_cursor']}"
+    )
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [6]
+    assert json_data["next_cursor"] is None
+
+
+def test_filter_tasks_streamed(client):
+    """Test streaming only the tasks with the requested status"""
+    response = client.get(f"/api/{API_VERSION}/tasks?status=false&stream=true")
+    assert [task["id"] for task in response.get_json()["result"]] == [1, 3, 5]
+
+
+def test_filter_tasks_invalid_status(client):
+    """Test that a status other than true or false results in a 400 error"""
+    response = client.get(f"/api/{API_VERSION}/tasks?status=done")
+    assert response.status_code == 400
+    assert "errors" in response.get_json()
+
+
+def test_status_index_pages_in_order():
+    """Test that the status index yields the IDs after a given one, across chunks"""
+    index = StatusIndex()
+    for i in range(1, 10001):
+        index.set(i * 7919 % 10000 + 1, i % 2 == 0)
+    ids = list(index.iter_ids(True))
+    assert ids == sorted(index.ids[True])
+    assert len(index.sorted_ids[True]._chunks) > 1
+    assert list(index.iter_ids(True, ids[2000]))[:3] == ids[2001:2004]
+    assert list(index.iter_ids(True, 10000)) == []
+
+    index.set(ids[0], False)
+    index.remove(ids[1])
+    assert list(index.iter_ids(True))[:2] == ids[2:4]
+    assert ids[0] in index.ids[False] and index.count(True) == len(ids) - 2
+    assert list(index.sorted_ids[False]) == sorted(index.ids[False])
+
+
+def test_task_stats(client):
+    """Test that the counts per status follow creates, updates, deletes and batches"""
+    response = client.get(f"/api/{API_VERSION}/tasks/stats")
+    assert response.status_code == 200
+    assert response.get_json()["result"] == {
+        "total": 6,
+        "status": {"false": 3, "true": 3},
+    }
+
+    Task.delete(1)
+    Task.update(3, "Task 3", True)
+    Task.apply_batch(
+        [
+            (OP_CREATE, 0, "Task 7", False),
+            (OP_UPDATE, 2, "Task 2", False),
+            (OP_DELETE, 4, "", False),
+        ]
+    )
+    response = client.get(f"/api/{API_VERSION}/tasks/stats")
+    assert response.get_json()["result"] == {
+        "total": 5,
+        "status": {"false": 3, "true": 2},
+    }
+    assert [task["id"] for task in Task.get_all(status=False)] == [2, 5, 7]
+
+
+def test_task_stats_unexpected_error(client):
+    """Test fetching task stats encountering unexpected error"""
+    with patch("models.tasks.Task.count_by_status") as mock_count_by_status:
+        mock_count_by_status.side_effect = Exception("Unexpected error")
+        response = client.get(f"/api/{API_VERSION}/tasks/stats")
+        assert response.status_code == 500
+        assert "errors" in response.get_json()
@@ -15,7 +15,7 @@ def client():
 
 def test_get_tasks(client):
     """Test successfully getting the task list"""
-    Task.tasks_dict[1] = {"name": "Test Task", "status": False}
+    Task.tasks_dict[1] = {"name": "Test Task", "status": False, "version": 1}
 
     response = client.get(f"/api/{API_VERSION}/tasks")
 
@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+import pytest
+from app import app
+from exceptions.IdempotencyKeyException import IdempotencyKeyException
+from asgi import application
+from models.tasks import Task
+from utils import idempotency as idempotency_module
+from utils.idempotency import IdempotencyCache
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    app.extensions["idempotency"].clear()
+    with app.test_client() as client:
+        yield client
+    app.extensions["idempotency"].clear()
+    Task.reset()
+
+
+def create(client, name, key=None):
+    headers = {} if key is None else {"Idempotency-Key": key}
+    return client.post(f"/api/{API_VERSION}/task", json={"name": name}, headers=headers)
+
+
+def test_retry_is_answered_with_the_first_response(client):
+    """Test that a retry with the same key creates nothing and gets the first response"""
+    first = create(client, "Task 1", key="key-1")
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    with patch.object(Task, "create") as task_create:
+        retry = create(client, "Task 1", key="key-1")
+    assert task_create.mock_calls == []
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert (
+        retry.get_json()
+        == first.get_json()
+        == {"result": {"id": 1, "name": "Task 1", "status": False, "version": 1}}
+    )
+    assert len(Task.get_all()) == 1
+
+
+def test_retry_after_reset_creates_the_task_again(client):
+    """Test that a response stored before the tasks were reset is not replayed"""
+    assert create(client, "Task 1", key="key-1").status_code == 201
+    create(client, "Task 2")
+    Task.reset()
+
+    retry = create(client, "Task 1", key="key-1")
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+    assert Task.get_all() == [
+        {"id": 1, "name": "Task 1", "status": False, "version": 1}
+    ]
+    assert (
+        create(client, "Task 1", key="key-1").headers["Idempotent-Replayed"] == "true"
+    )
+
+
+def test_requests_without_a_key_are_not_deduplicated(client):
+    """Test that requests without a key, or with different keys, each create a task"""
+    create(client, "Task 1")
+    create(client, "Task 1")
+    create(client, "Task 1", key="key-1")
+    create(client, "Task 1", key="key-2")
+    assert len(Task.get_all()) == 4
+
+
+def test_key_reused_for_another_request(client):
+    """Test that a key sent with a different body is refused with 422"""
+    create(client, "Task 1", key="key-1")
+    response = create(client, "Task 2", key="key-1")
+    assert response.status_code == 422
+    assert "errors" in response.get_json()
+    assert len(Task.get_all()) == 1
+
+
+@pytest.mark.parametrize("key", ["", "   ", "k" * 256])
+def test_invalid_key(client, key):
+    """Test that empty and overlong keys are rejected"""
+    response = create(client, "Task 1", key=key)
+    assert response.status_code == 400
+    assert Task.get_all() == []
+
+
+def test_failed_creation_is_not_stored(client):
+    """Test that a retry after a failed creation creates the task"""
+    with patch.object(Task, "create", side_effect=RuntimeError("disk on fire")):
+        assert create(client, "Task 1", key="key-1").status_code == 500
+
+    response = create(client, "Task 1", key="key-1")
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    assert len(Task.get_all()) == 1
+
+
+def test_concurrent_requests_are_coalesced(client):
+    """Test that requests sent while the first with their key is handled wait for its response"""
+    task_create = Task.create
+
+    def slow_create(*args, **kwargs):
+        time.sleep(0.1)
+        return task_create(*args, **kwargs)
+
+    responses = []
+
+    def send():
+        with app.test_client() as thread_client:
+            responses.append(create(thread_client, "Task 1", key="key-1"))
+
+    with patch.object(Task, "create", side_effect=slow_create) as mock_create:
+        threads = [threading.Thread(target=send) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(mock_create.mock_calls) == 1
+    assert [response.status_code for response in responses] == [201] * 8
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 7
+    assert len({response.data for response in responses}) == 1
+
+
+def test_waiting_for_a_stuck_request_times_out():
+    """Test that a request gives up with 409 when the first with its key does not finish"""
+    cache = IdempotencyCache(wait_timeout=0.01)
+    assert cache.lookup("key-1", "a") is None
+    with pytest.raises(IdempotencyKeyException) as error:
+        cache.execute("key-1", "a", lambda: (201, b"{}"))
+    assert error.value.error_code == 409
+
+
+def test_least_recently_used_responses_are_evicted():
+    """Test that only `capacity` responses are kept, evicting the least recently used"""
+    cache = IdempotencyCache(capacity=2)
+    for key in ("a", "b"):
+        cache.execute(key, key, lambda: (201, b"{}"))
+    assert cache.execute("a", "a", lambda: (201, b"new"))[1] is True
+    cache.execute("c", "c", lambda: (201, b"{}"))
+
+    assert list(cache._responses) == ["a", "c"]
+    assert cache.execute("b", "b", lambda: (201, b"new"))[0].body == b"new"
+
+
+def test_expired_responses_are_not_replayed(monkeypatch):
+    """Test that a response is forgotten `ttl` seconds after it was stored"""
+    now = [1000.0]
+    monkeypatch.setattr(idempotency_module.time, "monotonic", lambda: now[0])
+    cache = IdempotencyCache(ttl=60)
+    cache.execute("a", "a", lambda: (201, b"first"))
+
+    now[0] += 59
+    assert cache.execute("a", "a", lambda: (201, b"second"))[0].body == b"first"
+    now[0] += 1
+    assert cache.execute("a", "a", lambda: (201, b"second"))[0].body == b"second"
+    assert len(cache) == 1
+
+
+def test_coroutines_are_coalesced():
+    """Test that coroutines with the same key wait on the loop for the first one's response"""
+    cache = IdempotencyCache()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 201, b"created"
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.execute_async("key-1", "a", handler) for _ in range(5))
+        )
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert [stored.body for stored, _ in results] == [b"created"] * 5
+    assert [replayed for _, replayed in results].count(False) == 1
+
+
+def test_asgi_replays_responses(client):
+    """Test that the ASGI application honours the key like the Flask app"""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": f"/api/{API_VERSION}/task",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"idempotency-key", b"key-1"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+
+    async def call():
+        sent = []
+        messages = [
+            {"type": "http.request", "body": b'{"name": "Task 1"}', "more_body": False}
+        ]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await application(scope, receive, send)
+        return sent
+
+    first, retry = asyncio.run(call()), asyncio.run(call())
+    assert first[0]["status"] == retry[0]["status"] == 201
+    assert (b"idempotent-replayed", b"true") not in first[0]["headers"]
+    assert (b"idempotent-replayed", b"true") in retry[0]["headers"]
+    assert first[1]["body"] == retry[1]["body"]
+    assert len(Task.get_all()) == 1
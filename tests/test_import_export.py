@@ -0,0 +1,260 @@
+import asyncio
+import gzip
+import io
+import json
+import pytest
+from app import app
+from asgi import application
+from models.indexes import NameIndex, SortedList
+from models.tasks import Task
+from schemas.task_schema import ImportTask
+from utils.ndjson import NDJSONReader
+from utils.streaming import stream_ndjson
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        yield client
+    Task.reset()
+
+
+def import_body(client, body, content_type="application/x-ndjson"):
+    return client.post(
+        f"/api/{API_VERSION}/tasks/import",
+        input_stream=io.BytesIO(body),
+        content_length=len(body),
+        content_type=content_type,
+    )
+
+
+def export_lines(response):
+    return [json.loads(line) for line in response.data.splitlines()]
+
+
+def body_messages(chunks):
+    return [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def asgi_call(method, path, messages, headers=()):
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": list(headers),
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def test_import_creates_tasks(client):
+    """Test that each line of the body creates a task, in order"""
+    response = import_body(
+        client, b'{"name": "Task 1"}\n{"name": "Task 2", "status": true}\n'
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {"result": {"imported": 2, "failed": 0, "errors": []}}
+    assert [(task["id"], task["name"], task["status"]) for task in Task.get_all()] == [
+        (1, "Task 1", False),
+        (2, "Task 2", True),
+    ]
+
+
+def test_import_reports_invalid_lines(client):
+    """Test that invalid lines are reported with their number while valid ones are imported"""
+    body = b"\n".join(
+        [
+            b'{"name": "Task 1"}',
+            b"",
+            b'{"name": ""}',
+            b"not json",
+            b'{"name": "' + b"x" * 5000 + b'"}',
+            b'{"name": "Task 2"}',
+        ]
+    )
+    response = import_body(client, body)
+    assert response.status_code == 200
+    result = response.get_json()["result"]
+    assert result["imported"] == 2
+    assert result["failed"] == 3
+    assert [error["line"] for error in result["errors"]] == [3, 4, 5]
+    assert [task["name"] for task in Task.get_all()] == ["Task 1", "Task 2"]
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "text/plain"])
+def test_import_requires_ndjson(client, content_type):
+    """Test that a body not declared as NDJSON is rejected with 400"""
+    response = import_body(client, b'{"name": "Task 1"}\n', content_type=content_type)
+    assert response.status_code == 400
+    assert "errors" in response.get_json()
+    assert Task.get_all() == []
+
+
+def test_export_streams_tasks(client):
+    """Test that the export lists every task as one JSON object per line"""
+    for i in range(1, 4):
+        Task.create(name=f"Task {i}")
+    Task.update(2, "Task 2", True)
+
+    response = client.get(f"/api/{API_VERSION}/tasks/export")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.data.endswith(b"\n")
+    assert export_lines(response) == Task.get_all()
+
+
+def test_export_filters_and_compression(client):
+    """Test that the export honours the task filters and Accept-Encoding"""
+    for name in ("Buy milk", "Write report", "Buy bread"):
+        Task.create(name=name)
+
+    response = client.get(
+        f"/api/{API_VERSION}/tasks/export?q=buy",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    lines = gzip.decompress(response.data).splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Buy milk", "Buy bread"]
+
+    response = client.get(f"/api/{API_VERSION}/tasks/export?status=maybe")
+    assert response.status_code == 400
+
+
+def test_export_then_import_round_trip(client):
+    """Test that an export imported into an empty store recreates the same tasks"""
+    for i in range(1, 2501):
+        Task.create(name=f"Task {i}")
+        if i % 3 == 0:
+            Task.update(i, f"Task {i}", True)
+    exported = client.get(f"/api/{API_VERSION}/tasks/export").data
+
+    Task.reset()
+    response = import_body(client, exported)
+    assert response.get_json()["result"]["imported"] == 2500
+    assert [(task["id"], task["name"], task["status"]) for task in Task.get_all()] == [
+        (task["id"], task["name"], task["status"])
+        for task in map(json.loads, exported.splitlines())
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 7, 64 * 1024])
+def test_reader_is_independent_of_chunk_boundaries(size):
+    """Test that the reader yields the same batches however the body is split"""
+    body = (
+        b"".join(b'{"name": "Task %d"}\n' % i for i in range(25)) + b'{"name": "Last"}'
+    )
+    reader = NDJSONReader(ImportTask, batch_size=10)
+    batches = []
+    for start in range(0, len(body), size):
+        batches.extend(reader.feed(body[start : start + size]))
+    batches.append(reader.close())
+
+    assert [len(batch) for batch in batches] == [10, 10, 6]
+    assert batches[-1][-1].name == "Last"
+    assert reader.report() == {"imported": 26, "failed": 0, "errors": []}
+
+
+def test_stream_ndjson_chunks():
+    """Test that items are encoded one per line, `chunk_size` per chunk"""
+    chunks = list(stream_ndjson(({"id": i} for i in range(5)), chunk_size=2))
+    assert chunks == [b'{"id":0}\n{"id":1}\n', b'{"id":2}\n{"id":3}\n', b'{"id":4}\n']
+    assert list(stream_ndjson([])) == []
+
+
+def test_sorted_tokens_split_and_remove():
+    """Test that the chunked token list stays sorted while chunks are split and emptied"""
+    tokens = SortedList()
+    words = [f"{i * 7919 % 5000:04d}" for i in range(5000)]
+    for word in words:
+        tokens.add(word)
+    assert len(tokens._chunks) > 1
+    assert list(tokens) == sorted(words)
+    assert list(tokens.iter_from("4998")) == ["4998", "4999"]
+    assert list(tokens.iter_from("5")) == []
+
+    for word in words[::2]:
+        tokens.remove(word)
+    assert list(tokens) == sorted(words[1::2])
+    for word in words[1::2]:
+        tokens.remove(word)
+    assert len(tokens) == 0 and tokens._chunks == []
+
+
+def test_name_index_prefix_search_across_chunks():
+    """Test that a prefix search finds tokens spread over several chunks"""
+    index = NameIndex()
+    for i in range(1, 5001):
+        index.set(i, f"item{i:04d} common")
+    assert list(index.search("item49")) == list(range(4900, 5000))
+    assert len(list(index.search("common item"))) == 5000
+
+    index.remove(4950)
+    index.set(4951, "renamed")
+    assert 4950 not in set(index.search("item49"))
+    assert 4951 not in set(index.search("item49"))
+
+
+def test_asgi_import_reads_body_in_chunks(client):
+    """Test that the ASGI application imports a body received in several messages"""
+    sent = asgi_call(
+        "POST",
+        f"/api/{API_VERSION}/tasks/import",
+        body_messages(
+            [b'{"name": "Ta', b'sk 1"}\n{"name": "Task 2", "sta', b'tus": true}']
+        ),
+        headers=[(b"content-type", b"application/x-ndjson")],
+    )
+    assert sent[0]["status"] == 200
+    assert json.loads(sent[1]["body"])["result"]["imported"] == 2
+    assert [task["name"] for task in Task.get_all()] == ["Task 1", "Task 2"]
+
+
+def test_asgi_import_stops_on_disconnect(client):
+    """Test that nothing is sent when the client disconnects before the end of the body"""
+    sent = asgi_call(
+        "POST",
+        f"/api/{API_VERSION}/tasks/import",
+        [
+            {
+                "type": "http.request",
+                "body": b'{"name": "Task 1"}\n',
+                "more_body": True,
+            },
+            {"type": "http.disconnect"},
+        ],
+        headers=[(b"content-type", b"application/x-ndjson")],
+    )
+    assert sent == []
+
+
+def test_asgi_export(client):
+    """Test that the ASGI application streams the export like the Flask app"""
+    Task.create(name="Task 1")
+    Task.create(name="Task 2")
+    sent = asgi_call("GET", f"/api/{API_VERSION}/tasks/export", body_messages([b""]))
+    assert sent[0]["status"] == 200
+    assert (b"content-type", b"application/x-ndjson") in sent[0]["headers"]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    assert body == client.get(f"/api/{API_VERSION}/tasks/export").data
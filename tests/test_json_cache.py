@@ -0,0 +1,91 @@
+import json
+from unittest.mock import patch
+import pytest
+from app import app
+from models.json_cache import TaskJSONCache
+from models.tasks import Task
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with patch.object(Task, "json_cache", TaskJSONCache(fast_encoder=False)):
+        with app.test_client() as client:
+            yield client
+    Task.reset()
+
+
+def test_list_is_assembled_from_cached_fragments(client):
+    """Test that list responses reuse the JSON encoded for each task"""
+    Task.create(name="Task 1")
+    Task.create(name="買早餐")
+
+    response = client.get(f"/api/{API_VERSION}/tasks")
+    assert response.get_json()["result"] == [
+        {"id": 1, "name": "Task 1", "status": False, "version": 1},
+        {"id": 2, "name": "買早餐", "status": False, "version": 1},
+    ]
+    assert len(Task.json_cache) == 2
+
+    with patch("models.json_cache.dumps") as mock_dumps:
+        response = client.get(f"/api/{API_VERSION}/tasks?limit=1")
+        mock_dumps.assert_not_called()
+    assert response.get_json()["result"] == [
+        {"id": 1, "name": "Task 1", "status": False, "version": 1}
+    ]
+
+
+def test_update_and_delete_invalidate_fragments(client):
+    """Test that changed and deleted tasks are not served from the cache"""
+    Task.create(name="Task 1")
+    Task.create(name="Task 2")
+    client.get(f"/api/{API_VERSION}/tasks")
+
+    client.put(
+        f"/api/{API_VERSION}/task/1", json={"id": 1, "name": "Renamed", "status": True}
+    )
+    client.delete(f"/api/{API_VERSION}/task/2")
+
+    response = client.get(f"/api/{API_VERSION}/tasks?stream=true")
+    assert response.get_json()["result"] == [
+        {"id": 1, "name": "Renamed", "status": True, "version": 2}
+    ]
+
+
+def test_stale_fragment_is_not_used():
+    """Test that a fragment is re-encoded when the task no longer matches it"""
+    cache = TaskJSONCache(fast_encoder=False)
+    cache.encode({"id": 1, "name": "Before", "status": False, "version": 1})
+
+    task = {"id": 1, "name": "After", "status": True, "version": 2}
+    assert json.loads(cache.encode(task)) == task
+
+
+def test_cache_size_is_bounded():
+    """Test that tasks beyond the cache capacity are encoded without being cached"""
+    cache = TaskJSONCache(max_entries=2, fast_encoder=False)
+    tasks = [
+        {"id": i, "name": f"Task {i}", "status": False, "version": 1}
+        for i in range(1, 5)
+    ]
+
+    assert json.loads(b"[" + cache.encode_items(tasks) + b"]") == tasks
+    assert len(cache) == 2
+
+
+@pytest.mark.parametrize("fast_encoder", [False, True])
+def test_encoders_produce_the_same_json(fast_encoder):
+    """Test that the cached and the single-call encodings agree"""
+    cache = TaskJSONCache(fast_encoder=fast_encoder)
+    tasks = [
+        {"id": 1, "name": 'Quote " and \\ backslash', "status": True, "version": 3},
+        {"id": 2, "name": "買早餐", "status": False, "version": 1},
+    ]
+    if fast_encoder:
+        pytest.importorskip("orjson")
+
+    assert json.loads(b"[" + cache.encode_items(tasks) + b"]") == tasks
+    assert json.loads(b"[" + cache.encode_items([]) + b"]") == []
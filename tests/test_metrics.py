@@ -0,0 +1,89 @@
+import threading
+import pytest
+from app import app
+from blueprints.metrics import metrics
+from models.tasks import Task
+from utils.metrics import MetricsRegistry
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    metrics.reset()
+    with app.test_client() as client:
+        yield client
+        Task.reset()
+
+
+def _samples(body: str) -> dict:
+    samples = {}
+    for line in body.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_requests_per_route_and_status(client):
+    """Test that requests are counted and timed per route template, method and status"""
+    client.post(f"/api/{API_VERSION}/task", json={"name": "Task 1"})
+    client.get(f"/api/{API_VERSION}/task/1")
+    client.get(f"/api/{API_VERSION}/task/2")
+    client.get("/test/error")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    samples = _samples(response.get_data(as_text=True))
+
+    route = 'route="/api/v1/task/<int:id>",method="GET"'
+    assert samples[f'http_requests_total{{{route},status="200"}}'] == 1
+    assert samples[f'http_requests_total{{{route},status="400"}}'] == 1
+    assert samples[f"http_request_duration_seconds_count{{{route}}}"] == 2
+    assert samples[f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] == 2
+    assert samples[f"http_request_duration_seconds_sum{{{route}}}"] > 0
+    assert samples['http_request_errors_total{route="/test/error",method="GET"}'] == 1
+    assert samples["tasks_stored"] == 1
+    assert samples["http_requests_in_flight"] == 1  # the /metrics request itself
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test that observations land in the first bucket whose bound they do not exceed"""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        registry.observe("latency_seconds", (("route", "/"),), value)
+
+    samples = _samples(registry.render())
+    assert samples['latency_seconds_bucket{route="/",le="0.1"}'] == 2
+    assert samples['latency_seconds_bucket{route="/",le="1"}'] == 3
+    assert samples['latency_seconds_bucket{route="/",le="+Inf"}'] == 4
+    assert samples['latency_seconds_count{route="/"}'] == 4
+
+
+def test_label_values_are_escaped():
+    """Test that quotes, backslashes and newlines in label values are escaped"""
+    registry = MetricsRegistry()
+    registry.increment("requests_total", (("route", 'a"b\\c\nd'),))
+
+    assert 'requests_total{route="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_concurrent_updates_are_not_lost():
+    """Test that unlocked per-thread updates add up, including those of finished threads"""
+    registry = MetricsRegistry()
+    threads = [
+        threading.Thread(
+            target=lambda: [registry.increment("ops_total") for _ in range(10_000)]
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.counter_value("ops_total") == 80_000
+    assert registry._shards == []
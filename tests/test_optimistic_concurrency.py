@@ -0,0 +1,278 @@
+import asyncio
+import os
+import struct
+import zlib
+from array import array
+from unittest.mock import patch
+import pytest
+from app import app
+from asgi import application
+from exceptions.VersionConflictException import VersionConflictException
+from models.tasks import Task
+from storage.wal import OP_CREATE, OP_UPDATE, encode_record
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        Task.create(name="Task 1")
+        yield client
+    Task.reset()
+
+
+def tag(version):
+    return f'"{Task.get_epoch()}-{version}"'
+
+
+def put(client, name, status, if_match=None):
+    headers = {} if if_match is None else {"If-Match": if_match}
+    return client.put(
+        f"/api/{API_VERSION}/task/1",
+        json={"id": 1, "name": name, "status": status},
+        headers=headers,
+    )
+
+
+def test_update_with_current_version(client):
+    """Test that a PUT with the ETag of the task as read updates it and returns its new version"""
+    etag = client.get(f"/api/{API_VERSION}/task/1").headers["ETag"]
+    assert etag == tag(1)
+
+    response = put(client, "Renamed", True, if_match=etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == tag(2)
+    assert response.get_json() == {
+        "result": {"id": 1, "name": "Renamed", "status": True, "version": 2}
+    }
+
+
+def test_update_with_stale_version_is_refused(client):
+    """Test that a PUT conditioned on an outdated version fails with 412 and changes nothing"""
+    put(client, "Changed elsewhere", True)
+
+    response = put(client, "Lost update", False, if_match=tag(1))
+    assert response.status_code == 412
+    assert response.headers["ETag"] == tag(2)
+    assert "errors" in response.get_json()
+    assert Task.get(1) == {
+        "id": 1,
+        "name": "Changed elsewhere",
+        "status": True,
+        "version": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "if_match, status_code",
+    [
+        ("*", 200),
+        ('"{epoch}-1"', 200),
+        ('W/"{epoch}-1"', 412),
+        ('"{epoch}-1", "{epoch}-2"', 412),
+        (tag(1), 412),
+        ('"0123456789ab-1"', 412),
+        ('"{epoch}-v1"', 412),
+        (f'"{{epoch}}-{"9" * 30}"', 412),
+    ],
+)
+def test_if_match_forms(client, if_match, status_code):
+    """Test that only `*` or the single strong ETag of the current version let a write through"""
+    if_match = if_match.format(epoch=Task.get_epoch())
+    assert put(client, "Task", True, if_match=if_match).status_code == status_code
+
+
+def test_reset_invalidates_task_etags(client):
+    """Test that the tag of a task from before a reset does not match the new task 1"""
+    etag = client.get(f"/api/{API_VERSION}/task/1").headers["ETag"]
+    Task.reset()
+    Task.create(name="Another task")
+
+    response = client.get(f"/api/{API_VERSION}/task/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == tag(1) != etag
+    assert put(client, "Task", True, if_match=etag).status_code == 412
+    assert Task.get(1)["name"] == "Another task"
+
+
+def test_if_match_on_missing_task(client):
+    """Test that a conditional write to a task that does not exist is still a 400"""
+    response = client.put(
+        f"/api/{API_VERSION}/task/9",
+        json={"id": 9, "name": "Task", "status": True},
+        headers={"If-Match": tag(1)},
+    )
+    assert response.status_code == 400
+
+
+def test_patch_keeps_fields_not_given(client):
+    """Test that a PATCH only changes the fields in its body"""
+    response = client.patch(f"/api/{API_VERSION}/task/1", json={"status": True})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == tag(2)
+    assert response.get_json()["result"] == {
+        "id": 1,
+        "name": "Task 1",
+        "status": True,
+        "version": 2,
+    }
+
+    response = client.patch(
+        f"/api/{API_VERSION}/task/1",
+        json={"name": "Renamed"},
+        headers={"If-Match": tag(2)},
+    )
+    assert response.get_json()["result"] == {
+        "id": 1,
+        "name": "Renamed",
+        "status": True,
+        "version": 3,
+    }
+
+
+@pytest.mark.parametrize("body", [{}, {"name": None}, {"name": ""}, {"status": "x"}])
+def test_patch_validation(client, body):
+    """Test that a PATCH without a valid name or status is rejected"""
+    response = client.patch(f"/api/{API_VERSION}/task/1", json=body)
+    assert response.status_code == 400
+    assert "errors" in response.get_json()
+    assert Task.get(1)["version"] == 1
+
+
+def test_patch_with_stale_version_is_refused(client):
+    """Test that a conditional PATCH fails with 412 once the task changed"""
+    client.patch(f"/api/{API_VERSION}/task/1", json={"status": True})
+
+    response = client.patch(
+        f"/api/{API_VERSION}/task/1",
+        json={"name": "Late"},
+        headers={"If-Match": tag(1)},
+    )
+    assert response.status_code == 412
+    assert response.headers["ETag"] == tag(2)
+    assert Task.get(1)["name"] == "Task 1"
+
+
+def test_patch_applies_on_top_of_concurrent_write(client):
+    """Test that a patch racing a write made outside this process is applied to its result"""
+    backend_get = Task.backend.get
+    raced = []
+
+    def get_then_race(task_id):
+        task = backend_get(task_id)
+        if not raced:
+            raced.append(True)
+            # Another process renames the task between the read and the write
+            Task.backend.update(task_id, "Renamed elsewhere", task["status"])
+        return task
+
+    with patch.object(Task.backend, "get", side_effect=get_then_race):
+        task = Task.patch(1, status=True)
+
+    assert task == {"id": 1, "name": "Renamed elsewhere", "status": True, "version": 3}
+    assert Task.get(1) == task
+
+
+def test_conflict_reports_current_version(client):
+    """Test that the model tells the version the task has when refusing a write"""
+    Task.update(1, "Task 1", True)
+    with pytest.raises(VersionConflictException) as error:
+        Task.update(1, "Task 1", False, expected_version=1)
+    assert error.value.current_version == 2
+    assert error.value.error_code == 412
+
+
+def test_versions_survive_recovery(tmp_path):
+    """Test that versions are restored from the snapshot and the log after a restart"""
+    data_dir = str(tmp_path)
+    Task.reset()
+    try:
+        Task.enable_persistence(data_dir, snapshot_on_close=False)
+        Task.create(name="Task 1")
+        Task.update(1, "Task 1", True)
+        Task.wal.snapshot()
+        Task.patch(1, name="Renamed")
+        Task.disable_persistence()
+        Task.reset()
+
+        Task.enable_persistence(data_dir)
+        assert Task.get(1)["version"] == 3
+        assert Task.update(1, "Renamed", False, expected_version=3)["version"] == 4
+    finally:
+        Task.disable_persistence()
+        Task.reset()
+
+
+def test_unversioned_records_are_replayed(tmp_path):
+    """Test that logs and snapshots written before tasks were versioned are still recovered"""
+    data_dir = str(tmp_path)
+    ids, lengths, name = array("q", [1, 2]), array("I", [6, 6]), b"Task 1Task 2"
+    snapshot = b"".join(
+        [
+            struct.pack("<4sQQQ", b"TSN1", 2, 2, 2),
+            ids.tobytes(),
+            bytes([0, 1]),
+            lengths.tobytes(),
+            struct.pack("<Q", len(name)),
+            name,
+        ]
+    )
+    with open(
+        os.path.join(data_dir, "snapshot-00000000000000000002.bin"), "wb"
+    ) as file:
+        file.write(snapshot + struct.pack("<I", zlib.crc32(snapshot)))
+    with open(os.path.join(data_dir, "wal-00000000000000000002.log"), "wb") as file:
+        file.write(encode_record(OP_UPDATE, 2, "Task 2", False))
+        file.write(encode_record(OP_CREATE, 3, "Task 3", False))
+
+    Task.reset()
+    try:
+        Task.enable_persistence(data_dir, snapshot_on_close=False)
+        assert [task["version"] for task in Task.get_all()] == [1, 2, 1]
+    finally:
+        Task.disable_persistence()
+        Task.reset()
+
+
+def test_asgi_honours_if_match(client):
+    """Test that the ASGI application checks If-Match and patches like the Flask app"""
+
+    def call(method, body, if_match):
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": f"/api/{API_VERSION}/task/1",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"if-match", if_match),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+        sent = []
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return sent
+
+    sent = call("PATCH", b'{"status": true}', tag(1).encode())
+    assert sent[0]["status"] == 200
+    assert (b"etag", tag(2).encode()) in sent[0]["headers"]
+
+    sent = call("PUT", b'{"id": 1, "name": "Late", "status": false}', tag(1).encode())
+    assert sent[0]["status"] == 412
+    assert (b"etag", tag(2).encode()) in sent[0]["headers"]
+    assert Task.get(1)["status"] is True
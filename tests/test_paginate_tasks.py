@@ -0,0 +1,95 @@
+import pytest
+from app import app
+from models.tasks import Task
+from utils.pagination import encode_cursor
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        yield client
+        Task.reset()
+
+
+def test_paginate_tasks(client):
+    """Test walking through the task list page by page with the returned cursor"""
+    for i in range(5):
+        Task.create(name=f"Task {i}")
+    Task.delete(3)
+
+    response = client.get(f"/api/{API_VERSION}/tasks?limit=2")
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [1, 2]
+    assert json_data["next_cursor"]
+
+    response = client.get(
+        f"/api/{API_VERSION}/tasks?limit=2&cursor={json_data['next_cursor']}"
+    )
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [4, 5]
+    assert json_data["next_cursor"] is None
+
+
+def test_cursor_without_limit_uses_default_page_size(client):
+    """Test that a cursor alone returns the tasks after it"""
+    for i in range(3):
+        Task.create(name=f"Task {i}")
+
+    response = client.get(f"/api/{API_VERSION}/tasks?cursor={encode_cursor(1)}")
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [2, 3]
+    assert json_data["next_cursor"] is None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "limit=0",  # test limit below lower bound
+        "limit=1001",  # test limit above upper bound
+        "limit=abc",  # test limit is not an integer
+        "cursor=not-a-cursor",  # test malformed cursor
+    ],
+)
+def test_paginate_tasks_invalid_parameters(client, query):
+    """Test invalid pagination parameters result in a 400 error"""
+    response = client.get(f"/api/{API_VERSION}/tasks?{query}")
+    assert response.status_code == 400
+    assert "errors" in response.get_json()
+
+
+def test_stream_tasks(client):
+    """Test streamed list responses decode to the same payload as buffered ones"""
+    for i in range(600):
+        Task.create(name=f"Task {i}")
+
+    buffered = client.get(f"/api/{API_VERSION}/tasks").get_json()
+    response = client.get(f"/api/{API_VERSION}/tasks?stream=true")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.get_json() == buffered
+
+
+def test_stream_tasks_with_limit(client):
+    """Test streamed pages carry the next cursor after the list"""
+    for i in range(3):
+        Task.create(name=f"Task {i}")
+
+    response = client.get(f"/api/{API_VERSION}/tasks?stream=true&limit=2")
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [1, 2]
+    assert json_data["next_cursor"] == encode_cursor(2)
+
+    response = client.get(f"/api/{API_VERSION}/tasks?stream=true&limit=5")
+    assert response.get_json()["next_cursor"] is None
+
+
+def test_stream_empty_task_list(client):
+    """Test streaming an empty task list"""
+    response = client.get(f"/api/{API_VERSION}/tasks?stream=true")
+    assert response.get_json() == {"result": []}
@@ -0,0 +1,92 @@
+import os
+import time
+import pytest
+from models.tasks import Task
+from storage.wal import OP_CREATE, WriteAheadLog, encode_record
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    Task.reset()
+    yield str(tmp_path)
+    Task.disable_persistence()
+    Task.reset()
+
+
+def test_recover_from_wal(data_dir):
+    """Test that every mutation is replayed after a restart"""
+    Task.enable_persistence(data_dir, snapshot_on_close=False)
+    Task.create(name="First Task")
+    Task.create(name="Second Task")
+    Task.create(name="Third Task")
+    Task.update(2, "Second Task Updated", True)
+    Task.delete(1)
+    Task.disable_persistence()
+    Task.reset()
+
+    Task.enable_persistence(data_dir)
+    assert Task.tasks_dict == {
+        2: {"name": "Second Task Updated", "status": True, "version": 2},
+        3: {"name": "Third Task", "status": False, "version": 1},
+    }
+    assert Task.last_task_id == 3
+    assert Task.create(name="Fourth Task")["id"] == 4
+
+
+def test_recover_from_snapshot_and_wal_tail(data_dir):
+    """Test that recovery loads the latest snapshot and replays only the records after it"""
+    Task.enable_persistence(data_dir, snapshot_on_close=False)
+    for i in range(10):
+        Task.create(name=f"Task {i}")
+    Task.wal.snapshot()
+    Task.update(1, "Updated after snapshot", True)
+    Task.delete(10)
+    Task.disable_persistence()
+    Task.reset()
+
+    files = sorted(os.listdir(data_dir))
+    assert files == [
+        "snapshot-00000000000000000010.bin",
+        "wal-00000000000000000010.log",
+    ]
+
+    Task.enable_persistence(data_dir)
+    assert len(Task.tasks_dict) == 9
+    assert Task.tasks_dict[1] == {
+        "name": "Updated after snapshot",
+        "status": True,
+        "version": 2,
+    }
+    assert Task.last_task_id == 10
+
+
+def test_automatic_snapshot(data_dir):
+    """Test that a snapshot is written in the background after the configured interval"""
+    Task.enable_persistence(data_dir, snapshot_interval=5, snapshot_on_close=False)
+    for i in range(5):
+        Task.create(name=f"Task {i}")
+    for _ in range(100):
+        if any(name.startswith("snapshot-") for name in os.listdir(data_dir)):
+            break
+        time.sleep(0.01)
+    Task.disable_persistence()
+
+    assert "snapshot-00000000000000000005.bin" in os.listdir(data_dir)
+
+
+def test_torn_record_is_discarded(data_dir):
+    """Test that a partially written record at the end of the log is ignored"""
+    wal = WriteAheadLog(data_dir, snapshot_on_close=False)
+    wal.open()
+    wal.commit(OP_CREATE, 1, "Complete Task")
+    wal.close()
+
+    segment = os.path.join(data_dir, "wal-00000000000000000000.log")
+    with open(segment, "ab") as file:
+        file.write(encode_record(OP_CREATE, 2, "Torn Task")[:-3])
+
+    Task.enable_persistence(data_dir)
+    assert Task.tasks_dict == {
+        1: {"name": "Complete Task", "status": False, "version": 1}
+    }
+    assert os.path.getsize(segment) == len(encode_record(OP_CREATE, 1, "Complete Task"))
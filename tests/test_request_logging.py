@@ -0,0 +1,118 @@
+import json
+import logging
+import queue
+from unittest.mock import patch
+import pytest
+from app import app
+from utils.request_logging import (
+    REDACTED,
+    BatchingFileHandler,
+    BatchingLogListener,
+    DroppingQueueHandler,
+    JSONLinesFormatter,
+    redact_headers,
+)
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return tmp_path / "app.log"
+
+
+def _make_logger(log_queue: queue.Queue) -> logging.Logger:
+    logger = logging.getLogger(f"test_request_logging.{id(log_queue)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    return logger
+
+
+def test_records_are_written_as_json_lines(log_path):
+    """Test that queued records are written by the listener as one JSON object per line"""
+    handler = BatchingFileHandler(str(log_path), maxBytes=0)
+    handler.setFormatter(JSONLinesFormatter())
+    log_queue = queue.Queue()
+    listener = BatchingLogListener(log_queue, handler)
+    logger = _make_logger(log_queue)
+
+    for i in range(100):
+        logger.info("request %d", i, extra={"fields": {"status": 200, "i": i}})
+    with patch.object(handler, "emit_batch", wraps=handler.emit_batch) as emit_batch:
+        listener.start()
+        listener.stop()
+        assert emit_batch.call_count == 1
+
+    lines = log_path.read_text().splitlines()
+    assert len(lines) == 100
+    entry = json.loads(lines[42])
+    assert isinstance(entry.pop("time"), float)
+    assert entry == {
+        "level": "INFO",
+        "message": "request 42",
+        "status": 200,
+        "i": 42,
+    }
+
+
+def test_full_queue_drops_records():
+    """Test that logging never blocks when the writer falls behind"""
+    log_queue = queue.Queue(maxsize=2)
+    logger = _make_logger(log_queue)
+
+    for i in range(5):
+        logger.info("request %d", i)
+
+    assert log_queue.qsize() == 2
+    assert logger.handlers[0].dropped == 3
+
+
+def test_rollover_once_per_batch(log_path):
+    """Test that the log rotates when a batch would exceed the maximum size"""
+    handler = BatchingFileHandler(str(log_path), maxBytes=1000, backupCount=2)
+    handler.setFormatter(JSONLinesFormatter())
+    record = logging.makeLogRecord({"msg": "x" * 100})
+
+    for _ in range(12):
+        handler.emit_batch([record])
+    handler.close()
+
+    assert log_path.with_name("app.log.1").exists()
+    assert log_path.stat().st_size <= 1000
+
+
+def test_redact_headers():
+    """Test that credentials are hidden and long values trimmed"""
+    headers = redact_headers(
+        [
+            ("Authorization", "Bearer secret"),
+            ("Cookie", "session=secret"),
+            ("User-Agent", "a" * 300),
+            ("Host", "localhost"),
+        ],
+        max_length=10,
+    )
+
+    assert headers == {
+        "Authorization": REDACTED,
+        "Cookie": REDACTED,
+        "User-Agent": "aaaaaaaaaa...",
+        "Host": "localhost",
+    }
+
+
+def test_sampling_keeps_error_responses(client, caplog):
+    """Test that sampled-out successful requests are not logged, unlike errors"""
+    with patch("app.log_sample_rate", 0.0), caplog.at_level(logging.INFO, "app"):
+        client.get("/api/v1/tasks")
+        client.get("/api/nonexistent", headers={"Authorization": "Bearer secret"})
+
+    records = [record for record in caplog.records if hasattr(record, "fields")]
+    assert [record.fields["status"] for record in records] == [404]
+    assert records[0].fields["headers"]["Authorization"] == REDACTED
@@ -0,0 +1,106 @@
+import pytest
+from app import app
+from models.indexes import NameIndex
+from models.tasks import Task
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        for name in [
+            "Buy groceries",
+            "Buy birthday present",
+            "Write report",
+            "Review groceries budget",
+            "買晚餐",
+        ]:
+            Task.create(name=name)
+        yield client
+        Task.reset()
+
+
+def _search(client, query):
+    response = client.get(f"/api/{API_VERSION}/tasks", query_string={"q": query})
+    assert response.status_code == 200
+    return [task["id"] for task in response.get_json()["result"]]
+
+
+@pytest.mark.parametrize(
+    "query, expected_ids",
+    [
+        ("buy", [1, 2]),  # test token match, case-insensitive
+        ("gro", [1, 4]),  # test prefix match
+        ("buy gro", [1]),  # test every query word must match
+        ("groceries buy", [1]),  # test word order does not matter
+        ("買", [5]),  # test non-ASCII names
+        ("missing", []),  # test no match
+    ],
+)
+def test_search_tasks(client, query, expected_ids):
+    """Test searching tasks by words and word prefixes of their names"""
+    assert _search(client, query) == expected_ids
+
+
+def test_search_follows_updates_and_deletes(client):
+    """Test that the name index is maintained incrementally"""
+    Task.update(1, "Sell groceries", False)
+    Task.delete(4)
+    assert _search(client, "gro") == [1]
+    assert _search(client, "buy") == [2]
+    assert _search(client, "sell") == [1]
+    assert "buy" in Task.name_index.postings
+    assert "review" not in Task.name_index.postings
+
+
+def test_search_with_status_and_pagination(client):
+    """Test combining the search with the status filter and pagination"""
+    Task.update(2, "Buy birthday present", True)
+    response = client.get(f"/api/{API_VERSION}/tasks?q=buy&status=false")
+    assert [task["id"] for task in response.get_json()["result"]] == [1]
+
+    response = client.get(f"/api/{API_VERSION}/tasks?q=buy&limit=1")
+    json_data = response.get_json()
+    assert [task["id"] for task in json_data["result"]] == [1]
+    response = client.get(
+        f"/api/{API_VERSION}/tasks?q=buy&limit=1&cursor={json_data['next_cursor']}"
+    )
+    assert [task["id"] for task in response.get_json()["result"]] == [2]
+
+
+def test_search_without_words(client):
+    """Test that a query without any word results in a 400 error"""
+    response = client.get(f"/api/{API_VERSION}/tasks", query_string={"q": " !? "})
+    assert response.status_code == 400
+    assert "errors" in response.get_json()
+
+
+def test_index_matches_linear_scan():
+    """Test that the index returns the same tasks as matching every name"""
+    names = [f"task {i} {'alpha' if i % 3 else 'beta'} item{i % 7}" for i in range(500)]
+    index = NameIndex()
+    for task_id, name in enumerate(names, start=1):
+        index.set(task_id, name)
+
+    for query in ["alpha", "bet", "item3", "task 1", "item", "gamma"]:
+        expected = [
+            task_id
+            for task_id, name in enumerate(names, start=1)
+            if NameIndex.matches(name, query)
+        ]
+        assert list(index.search(query)) == expected
+
+
+def test_index_search_after_id():
+    """Test that a search resumed after an ID yields the following matches in order"""
+    index = NameIndex()
+    for task_id in range(1000, 0, -1):
+        index.set(task_id, f"task {'even' if task_id % 2 == 0 else 'odd'}")
+
+    results = index.search("task even", after_id=500)
+    assert [next(results) for _ in range(3)] == [502, 504, 506]
+    assert list(index.search("even", after_id=996)) == [998, 1000]
+    assert list(index.search("odd", after_id=1000)) == []
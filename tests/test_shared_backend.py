@@ -0,0 +1,237 @@
+import multiprocessing
+import os
+import pytest
+from app import app
+from exceptions.StorageFullException import StorageFullException
+from exceptions.TaskNotFoundException import TaskNotFoundException
+from models.tasks import Task
+from storage.shared import _HEADER_SIZE, _RECORD, _SEQUENCE, SharedMemoryBackend
+from storage.wal import OP_CREATE, OP_DELETE, OP_UPDATE
+
+API_VERSION = "v1"
+PROCESSES = 4
+TASKS_PER_PROCESS = 200
+
+# fork shares the test module with the workers without re-importing it
+context = multiprocessing.get_context("fork")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tasks.shm")
+
+
+@pytest.fixture
+def shared_task(path):
+    default_backend = Task.backend
+    Task.use_backend(SharedMemoryBackend(path, capacity=10_000, heap_size=1 << 20))
+    yield Task
+    Task.backend.close()
+    Task.use_backend(default_backend)
+    Task.reset()
+
+
+def _create_tasks(path, index, queue):
+    Task.use_backend(SharedMemoryBackend(path))
+    queue.put(
+        [Task.create(name=f"Worker {index}")["id"] for _ in range(TASKS_PER_PROCESS)]
+    )
+
+
+def test_processes_share_one_dataset(shared_task, path):
+    """Test that tasks created by several processes get unique IDs and are visible to all"""
+    queue = context.Queue()
+    workers = [
+        context.Process(target=_create_tasks, args=(path, index, queue))
+        for index in range(PROCESSES)
+    ]
+    for worker in workers:
+        worker.start()
+    ids = [task_id for _ in workers for task_id in queue.get(timeout=30)]
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    assert sorted(ids) == list(range(1, PROCESSES * TASKS_PER_PROCESS + 1))
+    assert Task.backend.count() == PROCESSES * TASKS_PER_PROCESS
+    assert len(Task.get_all()) == PROCESSES * TASKS_PER_PROCESS
+    assert Task.create(name="Parent Task")["id"] == PROCESSES * TASKS_PER_PROCESS + 1
+
+
+def test_writes_are_visible_to_other_mappings(shared_task, path):
+    """Test that a second mapping of the file sees creates, updates and deletes"""
+    other = SharedMemoryBackend(path)
+    Task.create(name="Short")
+    Task.create(name="Second Task")
+    Task.update(1, "A much longer name than before", True)
+    Task.delete(2)
+
+    assert other.get(1) == {
+        "name": "A much longer name than before",
+        "status": True,
+        "version": 2,
+    }
+    assert other.get(2) is None
+    assert other.count() == 1
+    other.close()
+
+
+def test_shared_store_capacity(path):
+    """Test that exceeding the record area or the name heap raises StorageFullException"""
+    backend = SharedMemoryBackend(path, capacity=2, heap_size=16)
+    backend.create(backend.allocate_id(), "Task", False)
+    with pytest.raises(StorageFullException):
+        backend.create(backend.allocate_id(), "Too long", False)
+    with pytest.raises(StorageFullException):
+        backend.allocate_id()
+    backend.close()
+
+
+def test_full_store_answers_507(path):
+    """Test that requests the shared store has no room for get a 507 status code"""
+    app.config["TESTING"] = True
+    default_backend = Task.backend
+    Task.use_backend(SharedMemoryBackend(path, capacity=2, heap_size=32))
+    try:
+        with app.test_client() as client:
+            response = client.post(f"/api/{API_VERSION}/task", json={"name": "Task"})
+            assert response.status_code == 201
+            response = client.put(
+                f"/api/{API_VERSION}/task/1",
+                json={"id": 1, "name": "x" * 40, "status": True},
+            )
+            assert response.status_code == 507
+            response = client.post(
+                f"/api/{API_VERSION}/tasks:batch",
+                json=[{"op": "create", "name": "A"}, {"op": "create", "name": "B"}],
+            )
+            assert response.status_code == 507
+            assert "capacity" in response.get_json()["errors"]
+
+            response = client.delete(f"/api/{API_VERSION}/task/1")
+            assert response.status_code == 200
+            response = client.post(f"/api/{API_VERSION}/task", json={"name": "Task"})
+            assert response.status_code == 201
+            # Deleting a task does not free its ID
+            response = client.post(f"/api/{API_VERSION}/task", json={"name": "Task"})
+            assert response.status_code == 507
+    finally:
+        Task.backend.close()
+        Task.use_backend(default_backend)
+        Task.reset()
+
+
+def test_batch_without_room_is_not_applied(path):
+    """Test that a batch the store has no room for fails before any operation is applied"""
+    backend = SharedMemoryBackend(path, capacity=10, heap_size=64)
+    backend.create(1, "Kept", False)
+    batch = [
+        (OP_DELETE, 1, "", False),
+        (OP_CREATE, 2, "Task 2", False),
+        (OP_CREATE, 3, "x" * 40, False),
+    ]
+    with pytest.raises(StorageFullException):
+        backend.apply_batch(batch)
+    with pytest.raises(StorageFullException):
+        backend.apply_batch(
+            [(OP_CREATE, 2, "Task 2", False), (OP_CREATE, 11, "", False)]
+        )
+    assert backend.get_all() == [
+        {"id": 1, "name": "Kept", "status": False, "version": 1}
+    ]
+
+    backend.apply_batch(batch[:2] + [(OP_CREATE, 3, "x" * 20, False)])
+    assert [task["id"] for task in backend.get_all()] == [2, 3]
+    assert backend.count() == 2
+    backend.close()
+
+
+def test_batch_skips_tasks_deleted_by_another_process(shared_task, path):
+    """Test that a batch does not bring back a task another process deleted"""
+    Task.create(name="Task 1")
+    Task.create(name="Task 2")
+    other = SharedMemoryBackend(path)
+    assert other.delete(1)
+
+    results = Task.apply_batch(
+        [(OP_UPDATE, 1, "Updated", True), (OP_UPDATE, 2, "Updated", True)]
+    )
+    assert isinstance(results[0], TaskNotFoundException)
+    assert results[1] == {"id": 2, "name": "Updated", "status": True, "version": 2}
+    assert other.get(1) is None
+    assert other.count() == 1
+    other.close()
+
+
+def test_name_heap_space_is_reused(path):
+    """Test that renames and deletions free heap space for later names"""
+    backend = SharedMemoryBackend(path, capacity=1000, heap_size=256)
+    backend.create(backend.allocate_id(), "Short", False)
+    for i in range(100):
+        backend.update(
+            1, "Short" if i % 2 else "A name that needs a larger block", False
+        )
+    for _ in range(500):
+        task_id = backend.allocate_id()
+        backend.create(task_id, f"Task {task_id}", False)
+        assert backend.delete(task_id)
+
+    backend.create(backend.allocate_id(), "x" * 100, True)
+    assert backend.get(1) == {"name": "Short", "status": False, "version": 101}
+    assert backend.count() == 2
+    backend.close()
+
+
+def _die_mid_write(path, task_id):
+    backend = SharedMemoryBackend(path)
+    with backend._locked(backend._stripe(task_id)):
+        offset = _HEADER_SIZE + (task_id - 1) * _RECORD.size
+        sequence = _SEQUENCE.unpack_from(backend._mm, offset)[0]
+        _SEQUENCE.pack_into(backend._mm, offset, sequence + 1)
+        os._exit(1)
+
+
+def test_record_left_mid_write_is_repaired(path):
+    """Test that a record left mid-write by a crashed writer is repaired by the next reader"""
+    backend = SharedMemoryBackend(path, capacity=100, heap_size=4096)
+    backend.create(backend.allocate_id(), "Task", False)
+    backend.create(backend.allocate_id(), "Other", False)
+    writer = context.Process(target=_die_mid_write, args=(path, 1))
+    writer.start()
+    writer.join()
+    assert writer.exitcode == 1
+
+    assert backend.get(1) == {"name": "Task", "status": False, "version": 2}
+    assert backend.update(1, "Task", True, expected_version=2) == 3
+    writer = context.Process(target=_die_mid_write, args=(path, 2))
+    writer.start()
+    writer.join()
+    assert backend.delete(2)
+    assert backend.get(2) is None
+    backend.close()
+
+
+def test_status_queries_see_other_processes(shared_task, path):
+    """Test that status filters and counts include tasks written through another mapping"""
+    other = SharedMemoryBackend(path)
+    other.create(other.allocate_id(), "Written elsewhere", True)
+    Task.create(name="Written here")
+
+    assert Task.get_all(status=True) == [
+        {"id": 1, "name": "Written elsewhere", "status": True, "version": 1}
+    ]
+    assert Task.count_by_status() == {False: 1, True: 1}
+    other.close()
+
+
+def test_epoch_is_shared_and_changes_on_clear(path):
+    """Test that every mapping of a store reports the same epoch, renewed when it is cleared"""
+    first = SharedMemoryBackend(path, capacity=100, heap_size=4096)
+    second = SharedMemoryBackend(path)
+    epoch = first.epoch()
+    assert second.epoch() == epoch
+
+    second.clear()
+    assert first.epoch() == second.epoch() != epoch
+    first.close()
+    second.close()
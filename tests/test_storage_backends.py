@@ -0,0 +1,357 @@
+import sqlite3
+import pytest
+from app import app
+from models.tasks import Task
+from storage import compact, memory
+from storage.compact import CompactBackend
+from storage.memory import InMemoryBackend
+from storage.shared import SharedMemoryBackend
+from storage.sqlite import ITER_CHUNK_SIZE, SQLiteBackend
+from storage.wal import OP_CREATE, OP_DELETE, OP_UPDATE
+
+API_VERSION = "v1"
+
+
+@pytest.fixture(params=["memory", "sqlite", "shared", "compact"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = InMemoryBackend()
+    elif request.param == "compact":
+        backend = CompactBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "tasks.db"))
+    else:
+        backend = SharedMemoryBackend(
+            str(tmp_path / "tasks.shm"), capacity=2000, heap_size=65536
+        )
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def sqlite_client(tmp_path):
+    app.config["TESTING"] = True
+    default_backend = Task.backend
+    Task.use_backend(SQLiteBackend(str(tmp_path / "tasks.db")))
+    with app.test_client() as client:
+        yield client
+    Task.backend.close()
+    Task.use_backend(default_backend)
+    Task.reset()
+
+
+def test_backend_crud(backend):
+    """Test the create, read, update and delete contract shared by all backends"""
+    backend.create(1, "First Task", False)
+    backend.create(2, "Second Task", False)
+    assert backend.get(1) == {"name": "First Task", "status": False, "version": 1}
+    assert backend.get(3) is None
+
+    assert backend.update(2, "Second Task Updated", True) == 2
+    assert backend.update(3, "Missing Task", True) is None
+    assert backend.delete(1)
+    assert not backend.delete(1)
+
+    assert backend.get_all() == [
+        {"id": 2, "name": "Second Task Updated", "status": True, "version": 2}
+    ]
+    assert backend.count() == 1
+    assert backend.max_id() == 2
+
+
+def test_backend_compare_and_swap(backend):
+    """Test that an update with an expected version only applies to that version"""
+    backend.create(1, "Task", False)
+    assert backend.update(1, "Stale", True, expected_version=2) is None
+    assert backend.update(1, "Current", True, expected_version=1) == 2
+    assert backend.update(1, "Stale", False, expected_version=1) is None
+    assert backend.get(1) == {"name": "Current", "status": True, "version": 2}
+
+    backend.apply_batch([(OP_UPDATE, 1, "Batched", False)])
+    assert backend.get(1)["version"] == 3
+
+
+def test_backend_iter_tasks(backend):
+    """Test iterating in ID order across several chunks, starting after a given ID"""
+    total = ITER_CHUNK_SIZE * 2 + 10
+    backend.apply_batch((OP_CREATE, i, f"Task {i}", False) for i in range(1, total + 1))
+
+    ids = [task["id"] for task in backend.iter_tasks()]
+    assert ids == list(range(1, total + 1))
+    ids = [task["id"] for task in backend.iter_tasks(after_id=total - 3)]
+    assert ids == [total - 2, total - 1, total]
+
+
+def test_backend_apply_batch(backend):
+    """Test that a batch applies mixed operations in order and returns their versions"""
+    versions = backend.apply_batch(
+        [
+            (OP_CREATE, 1, "First Task", False),
+            (OP_CREATE, 2, "Second Task", False),
+            (OP_UPDATE, 1, "First Task Updated", True),
+            (OP_DELETE, 2, "", False),
+            (OP_UPDATE, 2, "Deleted Task", True),
+            (OP_DELETE, 4, "", False),
+            (OP_CREATE, 3, "Third Task", False),
+        ]
+    )
+    assert versions == [1, 1, 2, 0, None, None, 1]
+    assert backend.get_all() == [
+        {"id": 1, "name": "First Task Updated", "status": True, "version": 2},
+        {"id": 3, "name": "Third Task", "status": False, "version": 1},
+    ]
+
+
+def test_backend_clear(backend):
+    """Test that clearing removes every task and the ID high-water mark"""
+    backend.create(5, "Task", False)
+    backend.clear()
+    assert backend.count() == 0
+    assert backend.max_id() == 0
+
+
+class ProbeCountingDict(dict):
+    probes = 0
+
+    def get(self, key, default=None):
+        self.probes += 1
+        return super().get(key, default)
+
+
+def test_memory_scan_after_mass_deletions(monkeypatch):
+    """Test that a scan over a sparse ID range falls back to sorting the stored IDs"""
+    monkeypatch.setattr(memory, "_MIN_PROBE_MISSES", 0)
+    backend = InMemoryBackend(ProbeCountingDict())
+    backend.apply_batch((OP_CREATE, i, f"Task {i}", False) for i in range(1, 10001))
+    backend.apply_batch((OP_DELETE, i, "", False) for i in range(2, 10000))
+    backend.create(20000, "Last", True)
+
+    probes = backend.tasks_dict.probes
+    assert [task["id"] for task in backend.iter_tasks()] == [1, 10000, 20000]
+    assert [task["id"] for task in backend.iter_tasks(10000)] == [20000]
+    assert backend.tasks_dict.probes - probes < 20
+
+
+def test_compact_reuses_slots_and_name_space():
+    """Test that the compact backend reuses freed slots and overwrites names in place"""
+    backend = CompactBackend()
+    backend.create(1, "First Task", False)
+    backend.create(2, "Second Task", True)
+    backend.delete(1)
+    backend.create(3, "Third", False)
+
+    slots = backend._slot_of
+    assert slots[3] == 0 and slots[1] == -1
+    names_size = len(backend._names)
+
+    backend.update(2, "Second", False)
+    backend.update(3, "3rd", True)
+    assert len(backend._names) == names_size
+    assert backend.get_all() == [
+        {"id": 2, "name": "Second", "status": False, "version": 2},
+        {"id": 3, "name": "3rd", "status": True, "version": 2},
+    ]
+
+
+def test_compact_compacts_name_buffer(monkeypatch):
+    """Test that the name buffer shrinks once most of it is unused"""
+    monkeypatch.setattr(compact, "_MIN_GARBAGE", 0)
+    backend = CompactBackend()
+    backend.apply_batch(
+        (OP_CREATE, i, f"Task number {i}", i % 2 == 0) for i in range(1, 101)
+    )
+    for i in range(1, 91):
+        backend.delete(i)
+
+    live = sum(len(f"Task number {i}") for i in range(91, 101))
+    assert len(backend._names) < 2 * live
+    assert backend.count() == 10
+    assert backend.get_all() == [
+        {"id": i, "name": f"Task number {i}", "status": i % 2 == 0, "version": 1}
+        for i in range(91, 101)
+    ]
+
+    backend.create(101, "Reused slot", True)
+    assert backend.get(101) == {"name": "Reused slot", "status": True, "version": 1}
+
+
+def test_compact_skips_deleted_ids():
+    """Test that scans of the compact backend resume after any ID between sparse tasks"""
+    backend = CompactBackend()
+    backend.apply_batch(
+        (OP_CREATE, i, f"Task number {i}", i % 2 == 0) for i in range(1, 5001)
+    )
+    kept = [1, 7, 8, 9, 16, 17, 2500, 4999, 5000]
+    for i in range(1, 5001):
+        if i not in kept:
+            backend.delete(i)
+
+    for after_id in range(0, 5001):
+        assert [task["id"] for task in backend.iter_tasks(after_id)] == [
+            i for i in kept if i > after_id
+        ]
+    assert [task["id"] for task in backend.iter_matching(8, status=True)] == [
+        16,
+        2500,
+        5000,
+    ]
+
+    backend.create(5001, "After the bitmap grew", False)
+    assert [task["id"] for task in backend.iter_tasks(5000)] == [5001]
+
+
+def test_sqlite_keeps_ids_after_restart(tmp_path):
+    """Test that deleted IDs are not reused after reopening the database"""
+    path = str(tmp_path / "tasks.db")
+    backend = SQLiteBackend(path)
+    backend.create(1, "First Task", False)
+    backend.create(2, "Second Task", False)
+    backend.delete(2)
+    backend.close()
+
+    reopened = SQLiteBackend(path)
+    assert reopened.max_id() == 2
+    assert reopened.get_all() == [
+        {"id": 1, "name": "First Task", "status": False, "version": 1}
+    ]
+    reopened.close()
+
+
+def test_sqlite_adds_versions_to_existing_database(tmp_path):
+    """Test that a database created before tasks were versioned is upgraded on open"""
+    path = str(tmp_path / "tasks.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE tasks ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, status INTEGER NOT NULL)"
+    )
+    connection.execute("INSERT INTO tasks (name, status) VALUES ('Old Task', 0)")
+    connection.commit()
+    connection.close()
+
+    backend = SQLiteBackend(path)
+    assert backend.get(1) == {"name": "Old Task", "status": False, "version": 1}
+    assert backend.update(1, "Old Task", True, expected_version=1) == 2
+    backend.close()
+
+
+def test_task_api_with_sqlite_backend(sqlite_client):
+    """Test the task endpoints against the SQLite backend"""
+    response = sqlite_client.post(f"/api/{API_VERSION}/task", json={"name": "Task"})
+    assert response.status_code == 201
+    assert response.get_json()["result"]["id"] == 1
+
+    response = sqlite_client.put(
+        f"/api/{API_VERSION}/task/1",
+        json={"id": 1, "name": "Updated Task", "status": True},
+    )
+    assert response.status_code == 200
+
+    response = sqlite_client.get(f"/api/{API_VERSION}/tasks?limit=10")
+    assert response.get_json()["result"] == [
+        {"id": 1, "name": "Updated Task", "status": True, "version": 2}
+    ]
+
+    response = sqlite_client.delete(f"/api/{API_VERSION}/task/1")
+    assert response.status_code == 200
+    response = sqlite_client.delete(f"/api/{API_VERSION}/task/1")
+    assert response.status_code == 400
+
+
+def test_task_api_with_compact_backend():
+    """Test the task endpoints against the compact backend"""
+    app.config["TESTING"] = True
+    default_backend = Task.backend
+    Task.use_backend(CompactBackend())
+    try:
+        with app.test_client() as client:
+            for name in ("First Task", "Second Task"):
+                response = client.post(f"/api/{API_VERSION}/task", json={"name": name})
+                assert response.status_code == 201
+            response = client.delete(f"/api/{API_VERSION}/task/1")
+            assert response.status_code == 200
+            response = client.put(
+                f"/api/{API_VERSION}/task/2",
+                json={"id": 2, "name": "Done", "status": True},
+            )
+            assert response.status_code == 200
+
+            response = client.get(f"/api/{API_VERSION}/tasks?status=true")
+            assert response.get_json()["result"] == [
+                {"id": 2, "name": "Done", "status": True, "version": 2}
+            ]
+    finally:
+        Task.use_backend(default_backend)
+        Task.reset()
+
+
+@pytest.mark.parametrize("backend_name", ["compact", "sqlite"])
+def test_backend_filters_without_indexes(backend_name, tmp_path):
+    """Test that the compact and SQLite backends filter and count tasks without indexes"""
+    app.config["TESTING"] = True
+    default_backend = Task.backend
+    if backend_name == "compact":
+        Task.use_backend(CompactBackend())
+    else:
+        Task.use_backend(SQLiteBackend(str(tmp_path / "tasks.db")))
+    try:
+        Task.apply_batch(
+            [(OP_CREATE, 0, f"Task number {i}", i % 3 == 0) for i in range(1, 301)]
+        )
+        Task.apply_batch([(OP_UPDATE, 3, "Renamed", False), (OP_DELETE, 6, "", False)])
+        assert len(Task.status_index.ids[True]) == 0
+        assert len(Task.name_index.task_tokens) == 0
+        assert Task.count_by_status() == {False: 201, True: 98}
+
+        tasks = list(Task.iter_tasks(status=True, after_id=200))
+        assert [task["id"] for task in tasks] == list(range(201, 301, 3))
+        tasks = list(Task.iter_tasks(query="numb 29", status=False))
+        assert [task["id"] for task in tasks] == [29, 290, 292, 293, 295, 296, 298, 299]
+
+        with app.test_client() as client:
+            response = client.get(f"/api/{API_VERSION}/tasks?q=renamed")
+            assert response.get_json()["result"] == [
+                {"id": 3, "name": "Renamed", "status": False, "version": 2}
+            ]
+            response = client.get(f"/api/{API_VERSION}/tasks?since=0")
+            assert response.status_code == 410
+    finally:
+        Task.backend.close()
+        Task.use_backend(default_backend)
+        Task.reset()
+
+
+def test_sqlite_allocates_ids_for_every_process(tmp_path):
+    """Test that backends opened on the same database share its IDs and epoch"""
+    path = str(tmp_path / "tasks.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    assert first.allocate_id() == 1
+    assert second.allocate_id(3) == 2
+    assert first.allocate_id() == 5
+    assert first.epoch() == second.epoch()
+
+    epoch = first.epoch()
+    second.clear()
+    assert first.epoch() != epoch
+    assert first.allocate_id() == 1
+    first.close()
+    second.close()
+
+
+def test_task_ids_are_unique_across_sqlite_processes(tmp_path):
+    """Test that Task does not reuse the IDs another process allocated in the database"""
+    path = str(tmp_path / "tasks.db")
+    default_backend = Task.backend
+    Task.use_backend(SQLiteBackend(path))
+    other = SQLiteBackend(path)
+    try:
+        assert Task.create("Mine")["id"] == 1
+        other.create(other.allocate_id(), "Other process", False)
+        assert Task.create("Mine again")["id"] == 3
+        assert Task.get_epoch() == other.epoch()
+        assert Task.get_version() is None
+    finally:
+        other.close()
+        Task.backend.close()
+        Task.use_backend(default_backend)
+        Task.reset()
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import threading
+import pytest
+from app import app
+from asgi import application
+from models.events import TaskEventLog
+from models.tasks import Task
+from storage.wal import OP_CREATE, OP_DELETE
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    Task.reset()
+    with app.test_client() as client:
+        yield client
+        Task.reset()
+
+
+def parse_events(chunk):
+    """Parse Server-Sent Events frames into (id, event, data) tuples, skipping comments"""
+    events = []
+    for frame in chunk.decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1)
+            for line in frame.splitlines()
+            if line and not line.startswith(":")
+        )
+        if "event" in fields:
+            events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def subscribe(client, last_event_id=None):
+    headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+    response = client.get(
+        f"/api/{API_VERSION}/tasks/events", headers=headers, buffered=False
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    return response, iter(response.response)
+
+
+def test_mutations_are_streamed(client):
+    """Test that creates, updates and deletes are pushed in the order they happened"""
+    response, chunks = subscribe(client)
+    assert next(chunks).startswith(b"retry: ")
+
+    Task.create(name="Task 1")
+    Task.update(1, "Task 1", True)
+    Task.apply_batch([(OP_CREATE, 0, "Task 2", False), (OP_DELETE, 1, "", False)])
+    events = parse_events(next(chunks))
+    response.close()
+
+    assert [(event, data) for _, event, data in events] == [
+        ("created", {"id": 1, "name": "Task 1", "status": False, "version": 1}),
+        ("updated", {"id": 1, "name": "Task 1", "status": True, "version": 2}),
+        ("created", {"id": 2, "name": "Task 2", "status": False, "version": 1}),
+        ("deleted", {"id": 1}),
+    ]
+    assert len({event_id for event_id, _, _ in events}) == 4
+    assert Task.events.subscribers == 0
+
+
+def test_resume_from_last_event_id(client):
+    """Test that a reconnecting client receives the events it missed"""
+    response, chunks = subscribe(client)
+    next(chunks)
+    Task.create(name="Task 1")
+    last_event_id = parse_events(next(chunks))[-1][0]
+    response.close()
+
+    Task.create(name="Task 2")
+    Task.delete(1)
+    response, chunks = subscribe(client, last_event_id)
+    events = parse_events(next(chunks))
+    response.close()
+
+    assert [(event, data["id"]) for _, event, data in events] == [
+        ("created", 2),
+        ("deleted", 1),
+    ]
+
+
+@pytest.mark.parametrize("last_event_id", ["unknown-5", "garbage"])
+def test_unknown_last_event_id_resets(client, last_event_id):
+    """Test that an ID from another process or an unreadable one results in a reset"""
+    response, chunks = subscribe(client, last_event_id)
+    events = parse_events(next(chunks))
+    response.close()
+
+    assert [event for _, event, _ in events] == ["reset"]
+
+
+def test_lagging_subscriber_is_reset():
+    """Test that a subscriber behind by more than the buffer is reset instead of replayed"""
+    events = TaskEventLog(capacity=4)
+    subscriber = events.subscribe()
+    next(subscriber)
+    for i in range(5):
+        events.publish("created", {"id": i})
+    parsed = parse_events(next(subscriber))
+    assert [event for _, event, _ in parsed] == ["reset"]
+
+    events.publish("deleted", {"id": 0})
+    parsed = parse_events(next(subscriber))
+    assert [(event, data) for _, event, data in parsed] == [("deleted", {"id": 0})]
+    subscriber.close()
+
+
+def test_idle_subscriber_gets_heartbeats():
+    """Test that a comment is sent when nothing happened for the heartbeat interval"""
+    events = TaskEventLog(heartbeat=0.01)
+    subscriber = events.subscribe()
+    next(subscriber)
+    assert next(subscriber) == b": keep-alive\n\n"
+    subscriber.close()
+    assert events.subscribers == 0
+
+
+def test_idle_async_subscribers_get_heartbeats():
+    """Test that subscribers waiting on a loop are sent a comment by the shared heartbeat"""
+    events = TaskEventLog(heartbeat=0.01)
+
+    async def main():
+        subscribers = [events.subscribe_async() for _ in range(3)]
+        for subscriber in subscribers:
+            await subscriber.__anext__()
+        chunks = [await subscriber.__anext__() for subscriber in subscribers]
+        for subscriber in subscribers:
+            await subscriber.aclose()
+        return chunks
+
+    assert asyncio.run(main()) == [b": keep-alive\n\n"] * 3
+    assert events._loops == {}
+
+
+def test_async_subscribers_are_woken_from_other_threads():
+    """Test that a publication from a thread reaches every subscriber waiting on a loop"""
+    events = TaskEventLog()
+
+    async def receive_one(ready):
+        subscriber = events.subscribe_async()
+        await subscriber.__anext__()
+        ready.release()
+        chunk = await subscriber.__anext__()
+        await subscriber.aclose()
+        return parse_events(chunk)
+
+    async def main():
+        ready = asyncio.Semaphore(0)
+        tasks = [asyncio.ensure_future(receive_one(ready)) for _ in range(100)]
+        for _ in tasks:
+            await ready.acquire()
+        assert len(events._loops) == 1
+        publisher = threading.Thread(target=events.publish, args=("created", {"id": 1}))
+        publisher.start()
+        results = await asyncio.gather(*tasks)
+        publisher.join()
+        return results
+
+    results = asyncio.run(main())
+    assert all([event for _, event, _ in result] == ["created"] for result in results)
+    assert events.subscribers == 0
+    assert events._loops == {}
+
+
+def test_asgi_streams_events_until_disconnect(client):
+    """Test that the ASGI application streams events and stops once the client leaves"""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/api/{API_VERSION}/tasks/events",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    sent = []
+
+    async def main():
+        disconnected = asyncio.Event()
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 3:
+                disconnected.set()
+
+        serving = asyncio.ensure_future(application(scope, receive, send))
+        while len(sent) < 2:
+            await asyncio.sleep(0)
+        Task.create(name="Task 1")
+        await asyncio.wait_for(serving, 5)
+
+    asyncio.run(main())
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-type"] == b"text/event-stream"
+    assert headers[b"cache-control"] == b"no-cache"
+    assert [event for _, event, _ in parse_events(sent[2]["body"])] == ["created"]
+    assert Task.events.subscribers == 0
@@ -15,7 +15,7 @@ def client():
 
 def test_update_task_success(client):
     """Test successfully updating a task"""
-    Task.tasks_dict[1] = {"name": "Original Task", "status": True}
+    Task.tasks_dict[1] = {"name": "Original Task", "status": True, "version": 1}
     response = client.put(
         f"/api/{API_VERSION}/task/1",
         json={"id": 1, "name": "Updated Task", "status": False},
@@ -26,7 +26,7 @@ def test_update_task_success(client):
 
 def test_update_task_id_mismatch(client):
     """Test when id in query string is different from id in request body"""
-    Task.tasks_dict[1] = {"name": "Original Task", "status": True}
+    Task.tasks_dict[1] = {"name": "Original Task", "status": True, "version": 1}
     response = client.put(
         f"/api/{API_VERSION}/task/2",
         json={"id": 1, "name": "Updated Task", "status": False},
@@ -74,7 +74,7 @@ def test_update_task_validation_errors(client, data, expected_status):
     """Test boundary conditions for all fields"""
     if data["id"] > 0:
         Task.tasks_dict.clear()
-        Task.tasks_dict[1] = {"name": "Original Task", "status": True}
+        Task.tasks_dict[1] = {"name": "Original Task", "status": True, "version": 1}
 
     response = client.put(f"/api/{API_VERSION}/task/{data['id']}", json=data)
     assert (
@@ -84,7 +84,7 @@ def test_update_task_validation_errors(client, data, expected_status):
 
 def test_update_task_unexpected_error(client):
     """Test updating a task encountering unexpected error"""
-    Task.tasks_dict[1] = {"name": "Original Task", "status": True}
+    Task.tasks_dict[1] = {"name": "Original Task", "status": True, "version": 1}
 
     with patch("models.tasks.Task.update") as mock_update:
         mock_update.side_effect = Exception("Unexpected error")
@@ -103,7 +103,7 @@ def test_update_task_unexpected_error(client):
 
 def test_update_task_with_non_json_content_type(client):
     """Test updating a task with a non-JSON content type results in an appropriate response"""
-    Task.tasks_dict[1] = {"name": "Task Before Update", "status": True}
+    Task.tasks_dict[1] = {"name": "Task Before Update", "status": True, "version": 1}
 
     response = client.put(
         f"/api/{API_VERSION}/task/1",
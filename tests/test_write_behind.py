@@ -0,0 +1,198 @@
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+import pytest
+from app import app
+from models.tasks import Task
+from storage.sqlite import SQLiteBackend
+from storage.wal import OP_CREATE, OP_UPDATE
+from storage.write_behind import WriteBehindBackend
+
+API_VERSION = "v1"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tasks.db")
+
+
+@pytest.fixture
+def backend(path):
+    # Flushes only happen when the tests ask for them
+    backend = WriteBehindBackend(SQLiteBackend(path), flush_interval=3600)
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def client(path):
+    app.config["TESTING"] = True
+    default_backend = Task.backend
+    Task.use_backend(WriteBehindBackend(SQLiteBackend(path), flush_interval=0.01))
+    with app.test_client() as client:
+        yield client
+    Task.backend.close()
+    Task.use_backend(default_backend)
+    Task.reset()
+
+
+def test_writes_are_coalesced(backend):
+    """Test that several writes to a task before a flush become one row write"""
+    backend.create(1, "Task", False)
+    for i in range(3):
+        backend.update(1, f"Task {i}", True)
+    backend.create(2, "Other", False)
+    assert backend.target.get_all() == []
+    assert backend.dirty_count() == 2
+
+    backend.flush()
+    assert backend.flushed_count == 2
+    assert backend.dirty_count() == 0
+    assert backend.target.get_all() == [
+        {"id": 1, "name": "Task 2", "status": True, "version": 4},
+        {"id": 2, "name": "Other", "status": False, "version": 1},
+    ]
+
+
+def test_reads_are_served_from_memory(backend):
+    """Test that reads do not touch the database"""
+    backend.apply_batch([(OP_CREATE, 1, "Task", False), (OP_UPDATE, 1, "Done", True)])
+    with patch.object(backend.target, "get", side_effect=AssertionError), patch.object(
+        backend.target, "iter_tasks", side_effect=AssertionError
+    ):
+        assert backend.get(1) == {"name": "Done", "status": True, "version": 2}
+        assert [task["id"] for task in backend.iter_tasks()] == [1]
+        assert backend.count() == 1
+
+
+def test_short_lived_tasks_keep_their_id(path):
+    """Test that a task deleted before it was written still counts toward the highest ID"""
+    backend = WriteBehindBackend(SQLiteBackend(path), flush_interval=3600)
+    backend.create(1, "Kept", False)
+    backend.create(2, "Short-lived", False)
+    assert backend.delete(2)
+    assert not backend.delete(2)
+    backend.close()
+
+    reopened = WriteBehindBackend(SQLiteBackend(path))
+    assert reopened.max_id() == 2
+    assert reopened.get_all() == [
+        {"id": 1, "name": "Kept", "status": False, "version": 1}
+    ]
+    reopened.close()
+
+
+def test_close_flushes_dirty_tasks(path):
+    """Test that closing writes every change, which the next start loads"""
+    backend = WriteBehindBackend(SQLiteBackend(path), flush_interval=3600)
+    backend.apply_batch((OP_CREATE, i, f"Task {i}", False) for i in range(1, 101))
+    backend.update(7, "Task 7", True)
+    backend.close()
+
+    reopened = WriteBehindBackend(SQLiteBackend(path))
+    assert reopened.count() == 100
+    assert reopened.get(7) == {"name": "Task 7", "status": True, "version": 2}
+    assert reopened.update(7, "Task 7", False, expected_version=2) == 3
+    reopened.close()
+
+
+def test_failed_flush_keeps_tasks_dirty(backend):
+    """Test that tasks whose write failed are written by the next flush"""
+    backend.create(1, "Task", False)
+    with patch.object(
+        backend.target,
+        "store_batch",
+        side_effect=sqlite3.OperationalError("database is locked"),
+    ):
+        with pytest.raises(sqlite3.OperationalError):
+            backend.flush()
+    assert backend.flush_errors == 1
+    assert backend.dirty_count() == 1
+    assert backend.flush_lag() > 0
+
+    backend.flush()
+    assert backend.target.get(1) == {"name": "Task", "status": False, "version": 1}
+    assert backend.flush_lag() == 0
+
+
+def test_flush_lag_measures_oldest_change(backend):
+    """Test that the lag is the age of the oldest change not written yet"""
+    assert backend.flush_lag() == 0
+    backend.create(1, "Task", False)
+    time.sleep(0.05)
+    backend.update(1, "Task", True)
+    assert backend.flush_lag() >= 0.05
+
+    backend.flush()
+    assert backend.flush_lag() == 0
+
+
+def test_background_flush(path):
+    """Test that the flusher writes changes shortly after they are made"""
+    backend = WriteBehindBackend(SQLiteBackend(path), flush_interval=0.01)
+    try:
+        backend.create(1, "Task", False)
+        deadline = time.monotonic() + 5
+        while backend.target.get(1) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert backend.target.get(1) == {"name": "Task", "status": False, "version": 1}
+    finally:
+        backend.close()
+
+
+def test_writes_wait_while_too_many_tasks_are_dirty(path):
+    """Test that writes to further tasks wait for the flusher once `max_dirty` are dirty"""
+    backend = WriteBehindBackend(SQLiteBackend(path), max_dirty=2, flush_interval=3600)
+    store_batch = backend.target.store_batch
+    release = threading.Event()
+
+    def slow_store_batch(*args):
+        release.wait()
+        store_batch(*args)
+
+    with patch.object(backend.target, "store_batch", side_effect=slow_store_batch):
+        backend.create(1, "First", False)
+        # Rewriting a dirty task takes no room
+        backend.update(1, "First", True)
+        backend.create(2, "Second", False)
+
+        writer = threading.Thread(target=backend.create, args=(3, "Third", False))
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert backend.backpressure_waits == 1
+
+        release.set()
+        writer.join(5)
+        assert not writer.is_alive()
+        backend.close()
+
+    reopened = SQLiteBackend(path)
+    assert [task["id"] for task in reopened.get_all()] == [1, 2, 3]
+    reopened.close()
+
+
+def test_task_api_with_write_behind(client):
+    """Test the task endpoints and metrics against the write-behind backend"""
+    response = client.post(f"/api/{API_VERSION}/task", json={"name": "Task"})
+    assert response.status_code == 201
+    response = client.put(
+        f"/api/{API_VERSION}/task/1",
+        json={"id": 1, "name": "Updated Task", "status": True},
+        headers={"If-Match": f'"{Task.get_epoch()}-1"'},
+    )
+    assert response.status_code == 200
+    assert client.get(f"/api/{API_VERSION}/task/1").get_json()["result"] == {
+        "id": 1,
+        "name": "Updated Task",
+        "status": True,
+        "version": 2,
+    }
+
+    Task.backend.flush()
+    assert Task.backend.target.get(1)["version"] == 2
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "write_behind_dirty_tasks 0" in text
+    assert "write_behind_flush_lag_seconds 0" in text
+    assert "# TYPE write_behind_flushed_tasks_total counter" in text
@@ -0,0 +1,272 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+READ = "read"
+WRITE = "write"
+
+# Methods that never change the tasks, admitted with the read priority
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class Rejection(NamedTuple):
+    """
+    Why a request was refused, and how it should be answered.
+    """
+
+    status: int
+    reason: str
+    message: str
+    retry_after: int
+
+
+class TokenBucketLimiter:
+    """
+    Rate limits clients with one token bucket each. A bucket holds up to `burst` tokens and is
+    refilled at `rate` tokens per second; every request takes a token, and is refused when its
+    client's bucket is empty.
+
+    Buckets are refilled lazily, from the time elapsed since they were last used, so idle
+    clients cost nothing. Only the buckets of the `max_clients` most recent clients are kept; a
+    client seen again after its bucket was evicted starts with a full one.
+
+    Attributes:
+        rate (float): The tokens added to a bucket per second.
+        burst (float): The capacity of a bucket, i.e. the requests a client may send at once.
+        max_clients (int): The number of buckets kept at most.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """
+        Takes a token from the bucket of a client.
+
+        Returns:
+            0 if the request is admitted, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of requests handled at once. Reads may only take `max_in_flight` minus
+    `write_reserve` slots, so some are always left for writes when reads flood the API.
+
+    A request waits for a slot for at most the queueing delay allowed to its priority. Waiting
+    threads block on a condition, and waiting coroutines on a future resolved when a slot is
+    released, so neither polls.
+
+    Attributes:
+        max_in_flight (int): The number of requests handled at once at most.
+        write_reserve (int): The slots only writes may take.
+        in_flight (int): The number of requests currently holding a slot.
+    """
+
+    def __init__(self, max_in_flight: int, write_reserve: int = 0):
+        self.max_in_flight = max_in_flight
+        self.write_reserve = write_reserve
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _limit(self, priority: str) -> int:
+        if priority == WRITE:
+            return self.max_in_flight
+        return self.max_in_flight - self.write_reserve
+
+    def try_acquire(self, priority: str) -> bool:
+        with self._condition:
+            if self.in_flight < self._limit(priority):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, priority: str, timeout: float) -> bool:
+        """
+        Takes a slot, waiting up to `timeout` seconds for one to be released.
+
+        Returns:
+            True if a slot was taken, which must then be released.
+        """
+        limit = self._limit(priority)
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < limit, timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    async def acquire_async(self, priority: str, timeout: float) -> bool:
+        """
+        Takes a slot like `acquire`, waiting on the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self.try_acquire(priority):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            waiter = (loop, loop.create_future())
+            with self._condition:
+                self._async_waiters.append(waiter)
+            # A slot released before the waiter was added would not resolve it
+            if self.try_acquire(priority):
+                self._discard(waiter)
+                return True
+            try:
+                await asyncio.wait_for(waiter[1], remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._discard(waiter)
+
+        return True
+
+    def release(self) -> None:
+        """
+        Returns a slot and wakes the requests waiting for one.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The loop was closed while the request was waiting
+                pass
+
+    def _discard(
+        self, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future]
+    ) -> None:
+        with self._condition:
+            if waiter in self._async_waiters:
+                self._async_waiters.remove(waiter)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """
+    Decides whether a request is handled or refused early, before it adds to the load.
+
+    A request is first charged to the rate limit of its client, and refused with 429 if its
+    client sent too many. It then waits for a concurrency slot, and is refused with 503 if none
+    is released within the queueing delay targeted for its priority: rather than queueing
+    without bound while latency grows for everyone, the excess is shed right away. Writes are
+    given a longer target than reads, and slots that only they may take.
+
+    Attributes:
+        rate_limiter (Optional[TokenBucketLimiter]): The per-client rate limits, if any.
+        concurrency (Optional[ConcurrencyLimiter]): The cap on requests in flight, if any.
+        queue_targets (Dict[str, float]): The seconds a request of each priority may wait for
+            a slot.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0,
+        burst: float = 0,
+        max_in_flight: int = 0,
+        write_reserve: int = 0,
+        read_target: float = 0.05,
+        write_target: float = 0.2,
+    ):
+        self.rate_limiter = (
+            TokenBucketLimiter(rate, max(burst, 1)) if rate > 0 else None
+        )
+        self.concurrency = (
+            ConcurrencyLimiter(max_in_flight, write_reserve)
+            if max_in_flight > 0
+            else None
+        )
+        self.queue_targets = {READ: read_target, WRITE: write_target}
+
+    def check_rate(self, client: Optional[str]) -> Optional[Rejection]:
+        """
+        Charges a request to the rate limit of its client.
+
+        Returns:
+            A 429 rejection if the client exceeded its rate, otherwise None.
+        """
+        if self.rate_limiter is None:
+            return None
+
+        wait = self.rate_limiter.take(client or "")
+        if wait == 0:
+            return None
+        return Rejection(
+            429, "rate_limited", "Too many requests.", max(1, math.ceil(wait))
+        )
+
+    def admit(
+        self, client: Optional[str], priority: str, hold_slot: bool = True
+    ) -> Optional[Rejection]:
+        """
+        Applies the rate limit and, when `hold_slot` is set, takes a concurrency slot, which
+        the caller releases with `release` once the request is handled.
+
+        Parameters:
+            client (Optional[str]): The address of the client.
+            priority (str): READ or WRITE.
+            hold_slot (bool): False for requests exempt from the concurrency cap, such as
+                long-lived streams.
+
+        Returns:
+            The rejection to answer with, or None if the request is admitted.
+        """
+        rejection = self.check_rate(client)
+        if rejection is not None or not hold_slot or self.concurrency is None:
+            return rejection
+        if self.concurrency.acquire(priority, self.queue_targets[priority]):
+            return None
+        return self._overloaded()
+
+    async def admit_async(
+        self, client: Optional[str], priority: str, hold_slot: bool = True
+    ) -> Optional[Rejection]:
+        """
+        Decides like `admit`, waiting for a slot on the running event loop.
+        """
+        rejection = self.check_rate(client)
+        if rejection is not None or not hold_slot or self.concurrency is None:
+            return rejection
+        if await self.concurrency.acquire_async(priority, self.queue_targets[priority]):
+            return None
+        return self._overloaded()
+
+    def release(self) -> None:
+        if self.concurrency is not None:
+            self.concurrency.release()
+
+    def _overloaded(self) -> Rejection:
+        return Rejection(
+            503, "overloaded", "The server is overloaded, try again later.", 1
+        )
@@ -0,0 +1,89 @@
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple, Union
+from werkzeug.http import parse_accept_header
+
+# Content codings offered, in order of preference when the client accepts several equally
+ENCODINGS = ("gzip", "deflate")
+
+# Level 1 saves nearly as many bytes as the default level 6 on task lists, in half the time
+DEFAULT_LEVEL = 1
+
+# Bodies smaller than this are sent as they are: their compressed form would hardly be
+# smaller, and compressing them costs more than sending them
+DEFAULT_MIN_SIZE = 1024
+
+# zlib window bits producing a gzip stream, or the zlib stream HTTP calls deflate
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the content coding of a response from the `Accept-Encoding` header of the request.
+
+    Parameters:
+        - accept_encoding (Optional[str]): The header value, e.g. "gzip, deflate;q=0.5".
+
+    Returns:
+        - "gzip" or "deflate", whichever the client prefers, or None to send the body as it is.
+    """
+    if not accept_encoding:
+        return None
+
+    return parse_accept_header(accept_encoding).best_match(ENCODINGS)
+
+
+def compress_chunks(
+    chunks: Iterable[bytes], encoding: str, level: int = DEFAULT_LEVEL
+) -> Iterator[bytes]:
+    """
+    Compresses a body incrementally, as its chunks are produced.
+
+    A single compressor is fed every chunk, so the body is compressed as well as if it were
+    complete, while only the compressor's window is held in memory. Compressed data is yielded
+    whenever the compressor outputs some, not necessarily once per chunk.
+
+    Parameters:
+        - chunks (Iterable[bytes]): The body, consumed lazily.
+        - encoding (str): "gzip" or "deflate".
+        - level (int): The zlib compression level, from 1 (fastest) to 9 (smallest).
+
+    Returns:
+        - An iterator of compressed fragments, which concatenated form the encoded body.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_body(
+    body: Union[bytes, Iterable[bytes]],
+    encoding: Optional[str],
+    level: int = DEFAULT_LEVEL,
+    min_size: int = DEFAULT_MIN_SIZE,
+) -> Tuple[Union[bytes, Iterator[bytes]], Optional[str]]:
+    """
+    Compresses a response body with the negotiated coding, when it is worth it.
+
+    A complete body is only compressed from `min_size` bytes. A streamed body is always
+    compressed, as its size is unknown when the headers are sent.
+
+    Parameters:
+        - body (Union[bytes, Iterable[bytes]]): The encoded body, complete or streamed.
+        - encoding (Optional[str]): The value of `negotiate_encoding()`.
+        - level (int): The zlib compression level.
+        - min_size (int): The size from which a complete body is compressed.
+
+    Returns:
+        - The body to send, and its `Content-Encoding`, or None if it is sent as it is.
+    """
+    if encoding is None:
+        return body, None
+    if isinstance(body, bytes):
+        if len(body) < min_size:
+            return body, None
+        return b"".join(compress_chunks((body,), encoding, level)), encoding
+
+    return compress_chunks(body, encoding, level), encoding
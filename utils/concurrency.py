@@ -0,0 +1,43 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterable, Iterator, List
+
+
+class StripedLock:
+    """
+    A fixed set of locks, each guarding the keys that hash to it.
+
+    Operations on keys mapped to different stripes proceed in parallel, while operations
+    on the same key are serialized. This keeps per-key check-then-act sequences atomic
+    without funnelling every writer through one global lock.
+
+    Attributes:
+        - stripes (int): The number of locks keys are spread over.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self.stripes = stripes
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        """
+        Returns the lock guarding `key`.
+        """
+        return self._locks[hash(key) % self.stripes]
+
+    @contextmanager
+    def acquire_keys(self, keys: Iterable[Hashable]) -> Iterator[None]:
+        """
+        Holds the locks of all `keys` at once. Each stripe is taken once, in index order,
+        so concurrent multi-key acquisitions cannot deadlock.
+        """
+        indices = sorted({hash(key) % self.stripes for key in keys})
+        acquired = []
+        try:
+            for index in indices:
+                self._locks[index].acquire()
+                acquired.append(self._locks[index])
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
@@ -0,0 +1,125 @@
+from typing import Optional
+from flask import Response, request
+from werkzeug.http import parse_etags
+
+# Longer tags cannot be a version, which must fit in a SQLite integer
+MAX_VERSION_DIGITS = 18
+
+
+def make_etag(version: Optional[str], encoding: Optional[str] = None) -> Optional[str]:
+    """
+    Builds the entity tag of a response from the version of the tasks it was built from.
+
+    Parameters:
+        - version (Optional[str]): The value of `Task.get_version()`.
+        - encoding (Optional[str]): The content coding negotiated for the response, if any. The
+            compressed and uncompressed bodies differ, so they are given different strong tags.
+
+    Returns:
+        - The opaque tag, or None when the version is not tracked and no tag can be given.
+    """
+    if version is None:
+        return None
+    if encoding is not None:
+        return f"v{version}-{encoding}"
+
+    return f"v{version}"
+
+
+def make_task_etag(epoch: str, version: int) -> str:
+    """
+    Builds the entity tag of a single task from its version, which is also the tag `If-Match`
+    is expected to carry when the task is written.
+
+    Parameters:
+        - epoch (str): The value of `Task.get_epoch()`. Versions restart from 1 in a new epoch,
+            e.g. once the tasks are reset, so the tag carries it to tell them apart.
+        - version (int): The version of the task.
+
+    Returns:
+        - The tag, the epoch and the version separated by a dash.
+    """
+    return f"{epoch}-{version}"
+
+
+def parse_if_match(header: Optional[str], epoch: str) -> Optional[int]:
+    """
+    Reads the version a write is conditioned on from an `If-Match` header.
+
+    If-Match uses the strong comparison, so only a single strong tag built by `make_task_etag`
+    in the current epoch can match; a weak tag, a list of tags, a tag from another epoch or
+    any other tag is turned into version 0, which no task ever has, so that the write is
+    refused with 412.
+
+    Parameters:
+        - header (Optional[str]): The `If-Match` header of the request.
+        - epoch (str): The value of `Task.get_epoch()`.
+
+    Returns:
+        - The expected version, or None when the write is unconditional: the header is absent
+            or `*`.
+    """
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if etags.star_tag:
+        return None
+    tags = etags.as_set()
+    if len(tags) != 1:
+        return 0
+    tag_epoch, _, version = next(iter(tags)).rpartition("-")
+    if (
+        tag_epoch != epoch
+        or not (version.isascii() and version.isdigit())
+        or len(version) > MAX_VERSION_DIGITS
+    ):
+        return 0
+
+    return int(version)
+
+
+def is_not_modified(etag: Optional[str]) -> bool:
+    """
+    Tells whether the `If-None-Match` header of the current request matches `etag`, in which
+    case the client's copy is current and the response body can be skipped.
+
+    Parameters:
+        - etag (Optional[str]): The tag the response would carry.
+
+    Returns:
+        - True if a 304 response should be sent.
+    """
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+
+def not_modified_response(etag: str) -> Response:
+    """
+    Builds an empty 304 response carrying `etag`.
+
+    Parameters:
+        - etag (str): The tag matched by the request.
+
+    Returns:
+        - The 304 Not Modified response.
+    """
+    response = Response(status=304)
+    response.set_etag(etag)
+
+    return response
+
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    """
+    Sets the strong `ETag` header of a response, if a tag is available.
+
+    Parameters:
+        - response (Response): The response to tag.
+        - etag (Optional[str]): The tag, or None to leave the response untagged.
+
+    Returns:
+        - The same response.
+    """
+    if etag is not None:
+        response.set_etag(etag)
+
+    return response
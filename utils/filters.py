@@ -0,0 +1,57 @@
+import re
+from typing import Mapping, Optional, Tuple
+from exceptions.InvalidFilterException import InvalidFilterException
+from models.indexes import tokenize
+
+_VERSION_PATTERN = re.compile(r"0|[0-9a-f]+-[0-9]+")
+
+
+def parse_filter_args(args: Mapping[str, str]) -> Tuple[Optional[bool], Optional[str]]:
+    """
+    Reads the `status` and `q` query parameters.
+
+    Parameters:
+        - args (Mapping[str, str]): The request query parameters.
+
+    Returns:
+        - A tuple of the status to filter on and the search query, each None when not given.
+
+    Raises:
+        - InvalidFilterException: If `status` is neither "true" nor "false", or if `q` contains no word.
+    """
+    status_arg = args.get("status")
+    if status_arg not in (None, "true", "false"):
+        raise InvalidFilterException("Status must be either true or false.")
+    status = None if status_arg is None else status_arg == "true"
+
+    query = args.get("q")
+    if query is not None and not tokenize(query):
+        raise InvalidFilterException("Search query must contain at least one word.")
+
+    return status, query
+
+
+def parse_since_arg(args: Mapping[str, str]) -> Optional[str]:
+    """
+    Reads the `since` query parameter, which asks for the changes after a version.
+
+    Parameters:
+        - args (Mapping[str, str]): The request query parameters.
+
+    Returns:
+        - The version, or None when not given.
+
+    Raises:
+        - InvalidFilterException: If `since` is not a version, or if it is combined with `status`, `q` or `cursor`.
+    """
+    since = args.get("since")
+    if since is None:
+        return None
+    if not _VERSION_PATTERN.fullmatch(since):
+        raise InvalidFilterException("Since must be a version returned by the API.")
+    if any(name in args for name in ("status", "q", "cursor")):
+        raise InvalidFilterException(
+            "Since cannot be combined with status, q or cursor."
+        )
+
+    return since
@@ -0,0 +1,291 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+from exceptions.IdempotencyKeyException import IdempotencyKeyException
+
+# Longest `Idempotency-Key` header accepted
+MAX_KEY_LENGTH = 255
+
+# Seconds a request waits for another one with the same key before giving up with 409
+DEFAULT_WAIT_TIMEOUT = 30.0
+
+
+class StoredResponse(NamedTuple):
+    """
+    The response a request with an idempotency key was answered with.
+    """
+
+    status: int
+    body: bytes
+    fingerprint: str
+    expires: float
+
+
+class _Pending:
+    """
+    A request with an idempotency key being handled, which requests with the same key wait for.
+    """
+
+    __slots__ = ("fingerprint", "done", "response", "async_waiters")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.response: Optional[StoredResponse] = None
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+class IdempotencyCache:
+    """
+    Remembers the responses to requests sent with an `Idempotency-Key` header, so that a
+    client retrying such a request is answered with the original response instead of having it
+    handled again.
+
+    Responses are kept in a least recently used order: once `capacity` are stored, the least
+    recently used is evicted, and a response older than `ttl` seconds is never replayed. Only
+    successful responses are stored, so a request that failed can be retried with the same key.
+
+    Requests with a key already being handled are coalesced: they wait for the first one to
+    finish and are answered with its response. A key sent again with a different request, as
+    told by its fingerprint, is refused with 422.
+
+    Keys can be scoped, e.g. by the epoch of the task store, so that the responses stored
+    before the tasks were reset are not replayed: a retry then creates the task again.
+
+    Attributes:
+        capacity (int): The number of responses stored at most.
+        ttl (float): The seconds a response is replayed for.
+        wait_timeout (float): The seconds a request waits for another with the same key.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10_000,
+        ttl: float = 86_400.0,
+        wait_timeout: float = DEFAULT_WAIT_TIMEOUT,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._responses: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._responses.clear()
+
+    def lookup(
+        self, key: str, fingerprint: str
+    ) -> Union[StoredResponse, _Pending, None]:
+        """
+        Finds what answers a request with an idempotency key.
+
+        Parameters:
+            - key (str): The idempotency key of the request.
+            - fingerprint (str): Identifies the content of the request.
+
+        Returns:
+            - The stored response, if the key was used before.
+            - The pending request to wait for, if a request with the key is being handled.
+            - None if the caller should handle the request, then call `complete` or `abandon`.
+
+        Raises:
+            - IdempotencyKeyException: If the key was used for a different request.
+        """
+        with self._lock:
+            stored = self._responses.get(key)
+            if stored is not None and stored.expires <= time.monotonic():
+                del self._responses[key]
+                stored = None
+            found = stored or self._pending.get(key)
+            if found is None:
+                self._pending[key] = _Pending(fingerprint)
+                return None
+            if found.fingerprint != fingerprint:
+                raise IdempotencyKeyException(
+                    "Idempotency-Key was already used for a different request."
+                )
+            if stored is not None:
+                self._responses.move_to_end(key)
+            return found
+
+    def complete(self, key: str, status: int, body: bytes) -> None:
+        """
+        Stores the response to a request handled after `lookup` returned None, and answers the
+        requests waiting for it.
+        """
+        with self._lock:
+            pending = self._pending.pop(key)
+            pending.response = StoredResponse(
+                status, body, pending.fingerprint, time.monotonic() + self.ttl
+            )
+            self._responses[key] = pending.response
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.capacity:
+                self._responses.popitem(last=False)
+        self._wake(pending)
+
+    def abandon(self, key: str) -> None:
+        """
+        Forgets a request that failed, so that the requests waiting for it, or a retry, handle
+        it again.
+        """
+        with self._lock:
+            pending = self._pending.pop(key)
+        self._wake(pending)
+
+    def _wake(self, pending: _Pending) -> None:
+        with self._lock:
+            pending.done.set()
+            waiters, pending.async_waiters = pending.async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The loop was closed while the request was waiting
+                pass
+
+    def execute(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Tuple[int, bytes]],
+        scope: str = "",
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        Answers a request with an idempotency key, calling `handler` only if no response is
+        stored or pending for the key.
+
+        Parameters:
+            - key (str): The idempotency key of the request.
+            - fingerprint (str): Identifies the content of the request.
+            - handler (Callable[[], Tuple[int, bytes]]): Handles the request, returning the
+                status code and the body of the response.
+            - scope (str): The scope of the key; the same key in another scope is another key.
+
+        Returns:
+            - The response, and whether it is replayed rather than returned by `handler`.
+
+        Raises:
+            - IdempotencyKeyException: If the key was used for a different request, or a
+                request with the key is still being handled after `wait_timeout` seconds.
+        """
+        key = _scoped(key, scope)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            found = self.lookup(key, fingerprint)
+            if isinstance(found, StoredResponse):
+                return found, True
+            if found is None:
+                try:
+                    result = handler()
+                except BaseException:
+                    self.abandon(key)
+                    raise
+                return self._store(key, fingerprint, result), False
+            if not found.done.wait(max(0.0, deadline - time.monotonic())):
+                raise _still_pending()
+            if found.response is not None:
+                return found.response, True
+
+    async def execute_async(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Tuple[int, bytes]]],
+        scope: str = "",
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        Answers a request like `execute`, waiting for the pending one on the running event
+        loop.
+        """
+        key = _scoped(key, scope)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        while True:
+            found = self.lookup(key, fingerprint)
+            if isinstance(found, StoredResponse):
+                return found, True
+            if found is None:
+                try:
+                    result = await handler()
+                except BaseException:
+                    self.abandon(key)
+                    raise
+                return self._store(key, fingerprint, result), False
+
+            future = loop.create_future()
+            with self._lock:
+                if not found.done.is_set():
+                    found.async_waiters.append((loop, future))
+                    waiting = True
+                else:
+                    waiting = False
+            if waiting:
+                try:
+                    await asyncio.wait_for(future, deadline - loop.time())
+                except asyncio.TimeoutError:
+                    raise _still_pending()
+            if found.response is not None:
+                return found.response, True
+
+    def _store(
+        self, key: str, fingerprint: str, result: Tuple[int, bytes]
+    ) -> StoredResponse:
+        status, body = result
+        if 200 <= status < 300:
+            self.complete(key, status, body)
+        else:
+            self.abandon(key)
+        return StoredResponse(status, body, fingerprint, 0.0)
+
+
+def _scoped(key: str, scope: str) -> str:
+    # Keys are header values, which cannot contain a NUL character
+    return f"{scope}\0{key}" if scope else key
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _still_pending() -> IdempotencyKeyException:
+    return IdempotencyKeyException(
+        "A request with this Idempotency-Key is still being processed.", 409
+    )
+
+
+def parse_idempotency_key(header: Optional[str]) -> Optional[str]:
+    """
+    Validates the `Idempotency-Key` header of a request.
+
+    Returns:
+        - The key, or None if the request has none.
+
+    Raises:
+        - IdempotencyKeyException: If the key is empty or longer than `MAX_KEY_LENGTH`.
+    """
+    if header is None:
+        return None
+    key = header.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyKeyException(
+            f"Idempotency-Key must be between 1 and {MAX_KEY_LENGTH} characters.", 400
+        )
+    return key
@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+WSGIApp = Callable[[Dict[str, Any], Callable], Iterable[bytes]]
+
+
+class LazyMount:
+    """
+    WSGI middleware sending the requests under some paths to an application that is only
+    built when the first of them arrives, and every other request to the wrapped application.
+
+    It is meant for parts of the service that are expensive to import or set up but rarely used,
+    such as the API docs: they no longer delay the startup, at the cost of a slower first hit.
+    The mounted application must be separate, as Flask forbids registering routes once the
+    wrapped one has served a request.
+
+    Attributes:
+        app (WSGIApp): The application serving every other request.
+        paths (Tuple[str, ...]): The paths served by the mounted application, along with every
+            path below them.
+        factory (Callable[[], WSGIApp]): Builds the mounted application.
+    """
+
+    def __init__(
+        self, app: WSGIApp, paths: Tuple[str, ...], factory: Callable[[], WSGIApp]
+    ):
+        self.app = app
+        self.paths = paths
+        self.factory = factory
+        self._mounted: Optional[WSGIApp] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._mounted is not None
+
+    def _get_mounted(self) -> WSGIApp:
+        if self._mounted is None:
+            with self._lock:
+                if self._mounted is None:
+                    self._mounted = self.factory()
+        return self._mounted
+
+    def __call__(
+        self, environ: Dict[str, Any], start_response: Callable
+    ) -> Iterable[bytes]:
+        path = environ.get("PATH_INFO", "")
+        for mount_path in self.paths:
+            if path == mount_path or path.startswith(mount_path + "/"):
+                return self._get_mounted()(environ, start_response)
+
+        return self.app(environ, start_response)
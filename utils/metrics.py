@@ -0,0 +1,194 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+Labels = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, Labels]
+
+
+class _Shard:
+    """
+    The metrics recorded by one thread. Only its owner writes to it, so updates need no lock.
+    """
+
+    def __init__(self, owner: Optional[threading.Thread], buckets: int):
+        self.owner = owner
+        self.buckets = buckets
+        self.counters: Dict[MetricKey, float] = {}
+        # One count per bucket, the last one being +Inf, followed by the sum of the values
+        self.histograms: Dict[MetricKey, List[float]] = {}
+
+    def merge(self, other: "_Shard") -> None:
+        for key, value in other.counters.copy().items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.copy().items():
+            totals = self.histograms.setdefault(key, [0] * (self.buckets + 2))
+            for i, value in enumerate(list(values)):
+                totals[i] += value
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms recorded without locking and exposed in the Prometheus text format.
+
+    Every thread records into its own shard, so concurrent requests never contend for a lock
+    or a shared value. Shards are summed when the metrics are collected, which is rare in
+    comparison. The shards of finished threads are folded into a single one, so servers that
+    start a thread per request do not accumulate them.
+
+    Attributes:
+        buckets (Tuple[float, ...]): The upper bounds of the histogram buckets.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(None, len(self.buckets))
+        self._registry_lock = threading.Lock()
+        self._fold_threshold = 64
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """
+        Declares the type ("counter", "gauge" or "histogram") and help text of a metric.
+        """
+        self._descriptions[name] = (metric_type, help_text)
+
+    def increment(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        shard = self._shard()
+        key = (name, labels)
+        values = shard.histograms.get(key)
+        if values is None:
+            values = shard.histograms[key] = [0] * (len(self.buckets) + 2)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def collect(self) -> _Shard:
+        """
+        Sums the metrics recorded by every thread.
+        """
+        with self._registry_lock:
+            self._fold_finished()
+            shards = [self._retired, *self._shards]
+
+        total = _Shard(None, len(self.buckets))
+        for shard in shards:
+            total.merge(shard)
+
+        return total
+
+    def counter_value(self, name: str, labels: Labels = ()) -> float:
+        return self.collect().counters.get((name, labels), 0)
+
+    def render(
+        self,
+        gauges: Optional[Dict[str, float]] = None,
+        total: Optional[_Shard] = None,
+    ) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Parameters:
+            gauges (Optional[Dict[str, float]]): Values sampled at collection time, such as
+                the number of stored tasks, keyed by metric name.
+            total (Optional[_Shard]): The result of `collect()`, when the caller already has it.
+
+        Returns:
+            The exposition text.
+        """
+        if total is None:
+            total = self.collect()
+        families: Dict[str, List[str]] = {}
+
+        for (name, labels), value in sorted(total.counters.items()):
+            families.setdefault(name, []).append(
+                f"{name}{_format_labels(labels)} {_format_value(value)}"
+            )
+        for name, value in (gauges or {}).items():
+            families.setdefault(name, []).append(f"{name} {_format_value(value)}")
+        for (name, labels), values in sorted(total.histograms.items()):
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), values):
+                cumulative += count
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                lines.append(
+                    f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            lines.append(
+                f"{name}_sum{_format_labels(labels)} {_format_value(values[-1])}"
+            )
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        output = []
+        for name, lines in families.items():
+            if name in self._descriptions:
+                metric_type, help_text = self._descriptions[name]
+                output.append(f"# HELP {name} {help_text}")
+                output.append(f"# TYPE {name} {metric_type}")
+            output.extend(lines)
+
+        return "\n".join(output) + "\n"
+
+    def reset(self) -> None:
+        with self._registry_lock:
+            self._shards.clear()
+            self._retired = _Shard(None, len(self.buckets))
+            self._local = threading.local()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(
+                threading.current_thread(), len(self.buckets)
+            )
+            with self._registry_lock:
+                self._shards.append(shard)
+                if len(self._shards) > self._fold_threshold:
+                    self._fold_finished()
+                    self._fold_threshold = max(64, 2 * len(self._shards))
+
+        return shard
+
+    def _fold_finished(self) -> None:
+        """
+        Merges the shards of finished threads, which are no longer written to, into one.
+        Called with the registry lock held.
+        """
+        alive = []
+        for shard in self._shards:
+            if shard.owner is not None and shard.owner.is_alive():
+                alive.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
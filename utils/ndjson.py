@@ -0,0 +1,155 @@
+from typing import Any, Dict, List, Optional
+from pydantic import ValidationError
+from exceptions.InvalidInputException import InvalidInputException
+from utils.validation import get_validator
+
+# Media type of newline-delimited JSON responses
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Media types accepted for newline-delimited JSON request bodies
+NDJSON_MEDIA_TYPES = frozenset(
+    (NDJSON_MEDIA_TYPE, "application/ndjson", "application/jsonl")
+)
+
+# Number of bytes read from a request body at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+# Number of valid items handed over at a time, e.g. written in one storage batch
+IMPORT_BATCH_SIZE = 1000
+
+# Longest line accepted. Longer lines are rejected without being buffered.
+MAX_LINE_LENGTH = 4096
+
+# Number of invalid lines reported at most, the others are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def check_ndjson_media_type(mimetype: Optional[str]) -> None:
+    """
+    Checks that a request body is declared as newline-delimited JSON.
+
+    Parameters:
+        - mimetype (Optional[str]): The media type of the request, without its parameters.
+
+    Raises:
+        - InvalidInputException: If it is not one of `NDJSON_MEDIA_TYPES`.
+    """
+    if mimetype not in NDJSON_MEDIA_TYPES:
+        raise InvalidInputException("Invalid or missing NDJSON")
+
+
+class NDJSONReader:
+    """
+    Validates a newline-delimited JSON body while it is received, one item per line, and
+    groups the valid items into batches.
+
+    The body is fed in chunks of any size; only the line being received and the batch being
+    filled are held in memory, so the memory used does not depend on the size of the body.
+    Blank lines are skipped. Invalid lines are counted, and the first `MAX_REPORTED_ERRORS`
+    are reported with their line number, counted from 1, without stopping the others.
+
+    Attributes:
+        batch_size (int): The number of valid items per batch.
+        max_line_length (int): The length in bytes of the longest line accepted.
+        line_count (int): The number of lines read so far.
+        item_count (int): The number of valid items read so far.
+        error_count (int): The number of invalid lines read so far.
+        errors (List[Dict[str, Any]]): The line number and error message of the first invalid
+            lines.
+    """
+
+    def __init__(
+        self,
+        schema: Any,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        max_line_length: int = MAX_LINE_LENGTH,
+    ):
+        self.batch_size = batch_size
+        self.max_line_length = max_line_length
+        self.line_count = 0
+        self.item_count = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._validator = get_validator(schema)
+        self._batch: List[Any] = []
+        self._partial = b""
+        # Whether the line being received is already too long and is skipped
+        self._overlong = False
+
+    def feed(self, chunk: bytes) -> List[List[Any]]:
+        """
+        Reads the next chunk of the body.
+
+        Parameters:
+            chunk (bytes): The bytes following the previous chunk.
+
+        Returns:
+            The batches filled by the lines the chunk completes.
+        """
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = self._partial + lines[0]
+            self._partial = b""
+
+        batches = []
+        for line in lines:
+            self._read_line(line)
+            if len(self._batch) == self.batch_size:
+                batches.append(self._batch)
+                self._batch = []
+
+        if not self._overlong:
+            self._partial += rest
+            if len(self._partial) > self.max_line_length:
+                self._overlong = True
+                self._partial = b""
+
+        return batches
+
+    def close(self) -> List[Any]:
+        """
+        Reads the last line of the body, if it does not end with a newline.
+
+        Returns:
+            The last batch, which may hold fewer than `batch_size` items or none.
+        """
+        if self._partial or self._overlong:
+            self._read_line(self._partial)
+            self._partial = b""
+        batch, self._batch = self._batch, []
+
+        return batch
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarizes the body read.
+
+        Returns:
+            The number of valid items in `imported`, the number of invalid lines in `failed`
+            and the first of them in `errors`.
+        """
+        return {
+            "imported": self.item_count,
+            "failed": self.error_count,
+            "errors": self.errors,
+        }
+
+    def _read_line(self, line: bytes) -> None:
+        self.line_count += 1
+        if self._overlong or len(line) > self.max_line_length:
+            self._overlong = False
+            self._fail(f"A line must not exceed {self.max_line_length} bytes.")
+            return
+        if not line.strip():
+            return
+
+        try:
+            self._batch.append(self._validator.validate_json(line))
+            self.item_count += 1
+        except ValidationError as e:
+            self._fail(e.errors()[0]["msg"])
+
+    def _fail(self, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": self.line_count, "errors": message})
@@ -0,0 +1,84 @@
+import base64
+import binascii
+from typing import Mapping, Optional, Tuple
+from exceptions.InvalidPaginationException import InvalidPaginationException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+_CURSOR_PREFIX = "task:"
+
+
+def encode_cursor(task_id: int) -> str:
+    """
+    Encodes the ID of the last task in a page into an opaque cursor string.
+
+    Parameters:
+        - task_id (int): The ID of the last task returned to the client.
+
+    Returns:
+        - A URL-safe cursor string to be passed back as the `cursor` query parameter.
+    """
+    raw = f"{_CURSOR_PREFIX}{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodes a cursor produced by `encode_cursor` back into a task ID.
+
+    Parameters:
+        - cursor (str): The cursor string received from the client.
+
+    Returns:
+        - The ID of the last task of the previous page.
+
+    Raises:
+        - InvalidPaginationException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        if raw.startswith(_CURSOR_PREFIX):
+            task_id = int(raw[len(_CURSOR_PREFIX) :])
+            if task_id >= 0:
+                return task_id
+    except (binascii.Error, UnicodeError, ValueError):
+        pass
+
+    raise InvalidPaginationException("Invalid cursor.")
+
+
+def parse_pagination_args(args: Mapping[str, str]) -> Tuple[Optional[int], int]:
+    """
+    Reads the `limit` and `cursor` query parameters.
+
+    Parameters:
+        - args (Mapping[str, str]): The request query parameters.
+
+    Returns:
+        - A tuple of the page size (None when neither `limit` nor `cursor` is given)
+            and the ID after which the page starts.
+
+    Raises:
+        - InvalidPaginationException: If `limit` is not an integer between 1 and `MAX_PAGE_SIZE`,
+            or if `cursor` is malformed.
+    """
+    limit_arg = args.get("limit")
+    cursor_arg = args.get("cursor")
+
+    after_id = decode_cursor(cursor_arg) if cursor_arg else 0
+
+    if limit_arg is None:
+        return (DEFAULT_PAGE_SIZE if cursor_arg else None), after_id
+
+    try:
+        limit = int(limit_arg)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise InvalidPaginationException(
+            f"Limit must be an integer between 1 and {MAX_PAGE_SIZE}."
+        )
+
+    return limit, after_id
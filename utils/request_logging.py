@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.serialization import dumps
+
+REDACTED = "[REDACTED]"
+
+# Headers whose values are credentials and are never written to the log
+SENSITIVE_HEADERS = frozenset(
+    {"authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key"}
+)
+
+
+def redact_headers(
+    headers: Iterable[Tuple[str, str]], max_length: int = 256
+) -> Dict[str, str]:
+    """
+    Prepares request headers for logging, hiding credentials and trimming long values.
+
+    Parameters:
+        - headers (Iterable[Tuple[str, str]]): The header names and values.
+        - max_length (int): The number of characters kept of each value.
+
+    Returns:
+        - A dictionary of the headers, with sensitive values replaced by `REDACTED`.
+    """
+    redacted = {}
+    for name, value in headers:
+        if name.lower() in SENSITIVE_HEADERS:
+            value = REDACTED
+        elif len(value) > max_length:
+            value = value[:max_length] + "..."
+        redacted[name] = value
+
+    return redacted
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """
+    Formats a record as a single JSON object. The structured fields passed through
+    `extra={"fields": {...}}` are merged into it.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+
+        return dumps(entry).decode()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without blocking. When the writer falls behind and the
+    queue is full, records are dropped and counted instead of slowing requests down.
+    Formatting is left to the writer thread.
+
+    Attributes:
+        dropped (int): The number of records dropped, approximate under concurrent drops.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Queues the record itself. The records stay in this process, so unlike the base class
+        there is no need to copy them and format their message on the request thread.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingFileHandler(RotatingFileHandler):
+    """
+    A rotating file handler that writes a batch of records with a single write and flush,
+    checking for rollover once per batch instead of once per record.
+    """
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+
+        data = "\n".join(lines) + "\n"
+        with self.lock:
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.maxBytes > 0 and self.stream.tell() + len(data) > self.maxBytes:
+                    self.doRollover()
+                self.stream.write(data)
+                self.stream.flush()
+            except Exception:
+                self.handleError(records[-1])
+
+
+class BatchingLogListener:
+    """
+    Writes queued records from a background thread, so file I/O and rotation stay off the
+    request path. Every record already queued when the thread wakes up is written as one
+    batch, so batches grow with the load and the number of writes does not.
+
+    Attributes:
+        queue (queue.Queue): The queue filled by a `DroppingQueueHandler`.
+        handler (BatchingFileHandler): The handler the batches are written to.
+        batch_size (int): The number of records written at most per batch.
+    """
+
+    _sentinel = None
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        handler: BatchingFileHandler,
+        batch_size: int = 1000,
+    ):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Writes the records still queued, then stops the thread and closes the handler.
+        """
+        if self._thread is None:
+            return
+
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        self.handler.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not self._sentinel:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = batch[-1] is self._sentinel
+            if stopping:
+                batch.pop()
+            if batch:
+                self.handler.emit_batch(batch)
+            if stopping:
+                return
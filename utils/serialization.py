@@ -0,0 +1,92 @@
+import json
+from typing import Any, Dict, List, Optional
+from flask import Response
+
+# orjson is an optional dependency, listed in requirements-optional.txt
+try:
+    import orjson
+except ImportError:  # the standard library encoder is the fallback
+    orjson = None
+
+# Whether dumps uses orjson, which encodes a whole list faster than cached items can be joined
+FAST_ENCODER = orjson is not None
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encodes a value into compact UTF-8 JSON, using orjson when it is installed.
+
+    Parameters:
+        - value (Any): The JSON-serializable value.
+
+    Returns:
+        - The encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+
+    return _encoder.encode(value).encode()
+
+
+def encode_items(items: List[Any]) -> bytes:
+    """
+    Encodes list items in a single call, separated by commas but without the brackets.
+
+    Parameters:
+        - items (List[Any]): The JSON-serializable items.
+
+    Returns:
+        - The encoded items, ready to be placed inside a JSON array.
+    """
+    return dumps(items)[1:-1]
+
+
+def encode_list(
+    key: str, items: bytes, trailer: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Assembles `{key: [items], **trailer}` from already encoded list items.
+
+    Parameters:
+        - key (str): The name of the list field in the JSON object.
+        - items (bytes): The comma-separated encoded items of the list.
+        - trailer (Optional[Dict[str, Any]]): Extra fields appended after the list.
+
+    Returns:
+        - The encoded JSON object.
+    """
+    parts = [b"{", dumps(key), b":[", items, b"]"]
+    for field, value in (trailer or {}).items():
+        parts += [b",", dumps(field), b":", dumps(value)]
+    parts.append(b"}")
+
+    return b"".join(parts)
+
+
+def encode_field(key: str, fragment: bytes) -> bytes:
+    """
+    Wraps an already encoded value into `{key: value}`.
+
+    Parameters:
+        - key (str): The name of the field.
+        - fragment (bytes): The encoded value.
+
+    Returns:
+        - The encoded JSON object.
+    """
+    return b"{" + dumps(key) + b":" + fragment + b"}"
+
+
+def json_response(body: Any) -> Response:
+    """
+    Builds a JSON response from an encoded body, without encoding it again.
+
+    Parameters:
+        - body (Any): The encoded body, either bytes or an iterator of bytes to be streamed.
+
+    Returns:
+        - The response, whose status code is set by the caller.
+    """
+    return Response(body, mimetype="application/json")
@@ -0,0 +1,79 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from utils.serialization import dumps, encode_items
+
+# Number of encoded items joined into a single chunk written to the client
+STREAM_CHUNK_SIZE = 256
+
+
+def stream_json_list(
+    key: str,
+    items: Iterable[Any],
+    trailer: Optional[Dict[str, Any]] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    encode: Callable[[List[Any]], bytes] = encode_items,
+) -> Iterator[bytes]:
+    """
+    Encodes `{key: [items...], **trailer}` incrementally from an iterable.
+
+    Only `chunk_size` encoded items are held in memory at a time, so the memory used per
+    response is bounded regardless of the number of items.
+
+    Parameters:
+        - key (str): The name of the list field in the JSON object.
+        - items (Iterable[Any]): The JSON-serializable items of the list, consumed lazily.
+        - trailer (Optional[Dict[str, Any]]): Extra fields appended after the list. It is read
+            only after `items` is exhausted, so it may be filled in while the list is streamed.
+        - chunk_size (int): The number of items encoded per yielded chunk.
+        - encode (Callable[[List[Any]], bytes]): Encodes a chunk of items into comma-separated
+            JSON, e.g. from a cache of encoded tasks.
+
+    Returns:
+        - An iterator of UTF-8 encoded JSON fragments.
+    """
+    head = b"{" + dumps(key) + b":["
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield head + (b"" if first else b",") + encode(chunk)
+            head = b""
+            first = False
+            chunk = []
+
+    body = head + (b"" if first or not chunk else b",") + encode(chunk) + b"]"
+    for field, value in (trailer or {}).items():
+        body += b"," + dumps(field) + b":" + dumps(value)
+    yield body + b"}"
+
+
+def stream_ndjson(
+    items: Iterable[Any],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    encode: Callable[[Any], bytes] = dumps,
+) -> Iterator[bytes]:
+    """
+    Encodes items as newline-delimited JSON, one item per line, incrementally from an iterable.
+
+    Like `stream_json_list`, only `chunk_size` encoded items are held in memory at a time.
+
+    Parameters:
+        - items (Iterable[Any]): The JSON-serializable items, consumed lazily.
+        - chunk_size (int): The number of items encoded per yielded chunk.
+        - encode (Callable[[Any], bytes]): Encodes a single item, e.g. from a cache of encoded
+            tasks.
+
+    Returns:
+        - An iterator of UTF-8 encoded lines, each chunk ending with a newline.
+    """
+    lines = []
+    for item in items:
+        lines.append(encode(item))
+        if len(lines) == chunk_size:
+            lines.append(b"")
+            yield b"\n".join(lines)
+            lines = []
+
+    if lines:
+        lines.append(b"")
+        yield b"\n".join(lines)
@@ -1,23 +1,158 @@
-from functools import wraps
+from functools import lru_cache, wraps
+from typing import Annotated, Any, List, Optional, Union
 from flask import request, jsonify
-from pydantic import ValidationError
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from pydantic_core import SchemaValidator, from_json
+from exceptions.InvalidInputException import InvalidInputException
+
+MAX_BATCH_ITEMS = 1000
+
+# Errors of the batch as a whole, rather than of one of its items
+_BATCH_ERRORS = {"json_invalid", "json_type", "list_type", "too_long"}
+
+
+@lru_cache(maxsize=None)
+def get_validator(schema: Any, max_items: Optional[int] = None) -> SchemaValidator:
+    """
+    Returns the compiled validator of a pydantic model or type, built once per schema.
+
+    Parameters:
+        - schema (Any): A pydantic model or any type a `TypeAdapter` accepts.
+        - max_items (Optional[int]): When given, the validator accepts an array of at most this
+            many `schema` items instead.
+
+    Returns:
+        - The validator, whose `validate_json` reads raw JSON without building Python objects first.
+    """
+    if max_items is not None:
+        return TypeAdapter(
+            Annotated[List[schema], Field(max_length=max_items)]
+        ).validator
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        # Builds the validator if the model deferred it
+        schema.model_rebuild()
+        return schema.__pydantic_validator__
+
+    return TypeAdapter(schema).validator
+
+
+def validate_body(schema: Any, content_type: Optional[str], body: bytes) -> Any:
+    """
+    Parses and validates a JSON request body in a single pass.
+
+    Parameters:
+        - schema (Any): The pydantic model or type the body must match.
+        - content_type (Optional[str]): The Content-Type header of the request.
+        - body (bytes): The raw request body.
+
+    Returns:
+        - The validated body.
+
+    Raises:
+        - InvalidInputException: If the body is not JSON or does not match the schema.
+    """
+    if content_type != "application/json":
+        raise InvalidInputException("Invalid or missing JSON")
+    try:
+        return get_validator(schema).validate_json(body)
+    except ValidationError as e:
+        raise InvalidInputException(e.errors()[0]["msg"])
+
+
+def validate_batch_body(
+    item_schema: Any,
+    content_type: Optional[str],
+    body: bytes,
+    max_items: int = MAX_BATCH_ITEMS,
+) -> List[Union[BaseModel, str]]:
+    """
+    Parses and validates a JSON array of items in a single pass.
+
+    Only when that fails because of some items is the body parsed into Python objects and each
+    item validated on its own, so that the errors can be reported per item.
+
+    Parameters:
+        - item_schema (Any): The pydantic model or type every item must match.
+        - content_type (Optional[str]): The Content-Type header of the request.
+        - body (bytes): The raw request body.
+        - max_items (int): The largest number of items accepted.
+
+    Returns:
+        - The validated items, with invalid ones replaced by their error message.
+
+    Raises:
+        - InvalidInputException: If the body is not a JSON array or holds more than `max_items` items.
+    """
+    if content_type != "application/json":
+        raise InvalidInputException("Invalid or missing JSON")
+    try:
+        return get_validator(item_schema, max_items).validate_json(body)
+    except ValidationError as e:
+        error = e.errors(include_url=False, include_context=False)[0]
+        if error["type"] in _BATCH_ERRORS and error["loc"] == ():
+            if error["type"] == "too_long":
+                raise InvalidInputException(
+                    f"A batch must not exceed {max_items} items."
+                )
+            raise InvalidInputException("Request body must be a JSON array.")
+
+    items = from_json(body)
+    if len(items) > max_items:
+        raise InvalidInputException(f"A batch must not exceed {max_items} items.")
+    item_validator = get_validator(item_schema)
+    validated_data = []
+    for item in items:
+        try:
+            validated_data.append(item_validator.validate_python(item))
+        except ValidationError as e:
+            validated_data.append(e.errors()[0]["msg"])
+
+    return validated_data
 
 
 def validate_input(validation_model):
     """
     Decorator function for validating input data using a Pydantic model.
+
+    The raw body is validated by the compiled validator of the model, without being decoded
+    into Python objects first.
     """
 
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if request.content_type != "application/json":
-                return jsonify({"errors": "Invalid or missing JSON"}), 400
             try:
-                validated_data = validation_model(**request.json)
-                return func(*args, **kwargs, validated_data=validated_data)
-            except ValidationError as e:
-                return jsonify({"errors": e.errors()[0]["msg"]}), 400
+                validated_data = validate_body(
+                    validation_model, request.content_type, request.get_data()
+                )
+            except InvalidInputException as e:
+                return jsonify({"errors": e.message}), e.error_code
+
+            return func(*args, **kwargs, validated_data=validated_data)
+
+        return wrapper
+
+    return decorator
+
+
+def validate_batch_input(item_schema, max_items=MAX_BATCH_ITEMS):
+    """
+    Decorator function for validating a JSON array of items in one pass.
+
+    Invalid items are replaced by their error message in the injected `validated_data`.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                validated_data = validate_batch_body(
+                    item_schema, request.content_type, request.get_data(), max_items
+                )
+            except InvalidInputException as e:
+                return jsonify({"errors": e.message}), e.error_code
+
+            return func(*args, **kwargs, validated_data=validated_data)
 
         return wrapper
 
@@ -0,0 +1,87 @@
+import io
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+# (status code, headers, body) of a response
+WSGIResult = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+def build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """
+    Translates an ASGI HTTP scope and its already received body into a WSGI environ.
+
+    Parameters:
+        - scope (Dict[str, Any]): The ASGI connection scope.
+        - body (bytes): The complete request body.
+
+    Returns:
+        - The WSGI environ describing the same request.
+    """
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path) :]
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode().decode("latin-1"),
+        "PATH_INFO": path.encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    # The body is already complete, so its length is known even when it was sent chunked
+    environ["CONTENT_LENGTH"] = str(len(body))
+
+    return environ
+
+
+def call_wsgi(application: Callable, environ: Dict[str, Any]) -> WSGIResult:
+    """
+    Calls a WSGI application and buffers its whole response. It blocks, so it is meant to run
+    in an executor.
+
+    Parameters:
+        - application (Callable): The WSGI application.
+        - environ (Dict[str, Any]): The environ of the request.
+
+    Returns:
+        - The status code, the headers encoded for ASGI and the body of the response.
+    """
+    started: Dict[str, Any] = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ]
+
+    result = application(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+    return started["status"], started["headers"], body